@@ -27,9 +27,14 @@ Paper: Oguz, E.A., Depina, I. & Thakur, V. Effects of soil heterogeneity on susc
 # Libraries
 import numpy as np
 import os
+import time
+import hashlib
+import zlib
 import scipy.linalg as sl
 from scipy.optimize import root
 from scipy import special
+from scipy.stats import qmc
+from raster_io import read_ascii_grid
 # import multiprocessing as mp     # mp used for sake of ease of coding
 from multiprocessing import Process, Queue, Array, Manager  ## For processes
 from queue import Queue as Queue_Threads  ## For threads
@@ -63,31 +68,20 @@ def ReadData(FileNameList, nNumber=6):
 
     Returns
     -------
-    The data in the file in  ASCII grid format.
+    List of the data (numpy arrays, nrows x ncols) in the files in  ASCII grid format.
     """
 
     ## Allocate
     ReturnData = []
 
     for FileName in FileNameList:
-        ## Allocate
-        data = []
-        data2 = []
-
-        ## Read the file and store the data
-        with open(FileName) as f:
-            for line in f:
-                data.append(line.split())
-        f.close()
-
-        ## Read the numbers below explanations
-        for i in range(nNumber, len(data) + (-1 if data[len(data) - 1] == [] else 0)):
-            data2.append([float(n) for n in data[i]])
-        NumberData = np.matrix(data2)  ## Convert to matrix
+        ## Read the header once and bulk-load the numbers below explanations (see raster_io.py)
+        NumberData, _ = read_ascii_grid(FileName, header_lines=nNumber)
+        ## The grids are returned as arrays (nrows, ncols)
         ReturnData.append(NumberData)
         ## Max and Min of the numbers
-        # MaxData=np.matrix.max(NumberData)
-        # MinData=np.matrix.min(NumberData)
+        # MaxData=np.max(NumberData)
+        # MinData=np.min(NumberData)
 
     return ReturnData
 
@@ -228,9 +222,62 @@ def InZone_Rec_to_List(InZone):
 
 
 # ---------------------------------------------------------------------------------
-def RFR(nrows, ncols, cellsize, Maxrix_Directory, CorrLengthX, CorrLengthY, ParMean, ParCoV, DistType="N", SaveMat="NO"):
+## Number of random field realizations generated per factorization in one batched product.
+## The realizations are buffered in the process and consumed one by one by Par_Fields.
+RanField_BatchSize = 8
+
+## In-process caches of the correlation matrix factors and the buffered standard normal fields.
+CorrFactor_Cache = {}
+RanField_Buffer = {}
+
+
+def Set_RanField_BatchSize(BatchSize):
     """
-    ## Random fields are created.
+    This function sets the number of random field realizations generated per factorization.
+
+    Parameters
+    ----------
+    BatchSize : int
+        Number of realizations generated in one batched product (at least 1).
+
+    Returns
+    -------
+    None.
+    """
+    global RanField_BatchSize
+    RanField_BatchSize = max(int(BatchSize), 1)
+    ## Drop the buffered fields so that the new batch size is used from now on.
+    RanField_Buffer.clear()
+
+
+# ---------------------------------------------------------------------------------
+def CorrMatrix_1D(Coord, CorrLength):
+    """
+    This function calculates the (markovian) correlation matrix of the given coordinates in one direction.
+
+    Parameters
+    ----------
+    Coord : Array
+        Coordinates of the cells in one direction.
+    CorrLength : int/float
+        Correlation length in the direction.
+
+    Returns
+    -------
+    CorrMat : Array
+        Correlation matrix.
+    """
+    CorrMat = np.abs(np.subtract.outer(Coord, Coord))
+    CorrMat *= -2.0 / CorrLength
+    np.exp(CorrMat, out=CorrMat)
+    return CorrMat
+
+
+# ---------------------------------------------------------------------------------
+def CorrMatrix_2D(nrows, ncols, cellsize, CorrLengthX, CorrLengthY):
+    """
+    This function calculates the (markovian) correlation matrix of all cells of the grid.
+    The distances are calculated with array operations instead of looping over all cell pairs.
 
     Parameters
     ----------
@@ -240,86 +287,522 @@ def RFR(nrows, ncols, cellsize, Maxrix_Directory, CorrLengthX, CorrLengthY, ParM
         Number of columns.
     cellsize : int
         Cell size.
-    Code_Directory: str
-        The folder including the code to save the Matrix.
     CorrLengthX : int/float
         Correlation length range in X direction.
     CorrLengthY : int/float
         Correlation length range in Y direction.
-    ParMean : int/float
-        Mean of the parameter.
-    ParCoV : float
-        Coefficient of variation of the parameter.
-    DistType : str
-        Distribution type, 'N' or 'LN' . The default is 'N'.
-    SaveMat: str
-        Whether the mayrix is saved or not. The default is 'NO'.
 
     Returns
     -------
-    ParInp: 2D Array
-        Random field data of the parameter.
+    CorrMat : Array
+        Correlation matrix (nrows*ncols, nrows*ncols).
     """
-
     nel = nrows * ncols
     ## Discretize the domain
     x = np.linspace(cellsize / 2, (ncols - 1) * cellsize + cellsize / 2, num=ncols)
     y = np.linspace(cellsize / 2, (nrows - 1) * cellsize + cellsize / 2, num=nrows)
     ## Create a coordinate mesh
     xm, ym = np.meshgrid(x, y)
-    ## Reshape the coordinate meshes
-    xm, ym = np.reshape(xm, (nel, 1)), np.reshape(ym, (nel, 1))
+    xm, ym = np.reshape(xm, nel), np.reshape(ym, nel)
+
+    ## Scaled squared distances (in place to limit the temporary arrays)
+    CorrMat = np.subtract.outer(xm, xm)
+    CorrMat *= CorrMat
+    CorrMat /= CorrLengthX**2
+    DistY = np.subtract.outer(ym, ym)
+    DistY *= DistY
+    DistY /= CorrLengthY**2
+    CorrMat += DistY
+    del DistY
+    np.sqrt(CorrMat, out=CorrMat)
+    CorrMat *= -2.0
+    np.exp(CorrMat, out=CorrMat)
+    return CorrMat
 
-    ## Allocate correlation matrix.
-    if CorrLengthX == 0 or CorrLengthY == 0:
-        ## If the correlation length in either X or Y is zero, then random field with zero correlation length in both direction is created.
-        ## It check the Matrix folder for the corr. matrix. If there is no, it creates.
-        Name = "Cell_%d_%d_Size_%d" % (nrows, ncols, cellsize) + "_Theta_%d_%d.npy" % (
-            CorrLengthX,
-            CorrLengthY,
-        )
-        os.chdir(Maxrix_Directory)
-        if os.path.isfile(Name):
-            CorrMat = np.load(Name)
-        else:
-            CorrMat = np.identity(nel)
 
+# ---------------------------------------------------------------------------------
+def Factorize_CorrMatrix(CorrMat):
+    """
+    This function factorizes a correlation matrix as CorrMat = A A^T.
+    Cholesky decomposition is used. If the matrix is numerically not positive definite
+    (e.g. large correlation lengths), the eigen decomposition is used instead.
+
+    Parameters
+    ----------
+    CorrMat : Array
+        Correlation matrix.
+
+    Returns
+    -------
+    A : Array
+        Factor of the correlation matrix.
+    """
+    try:
+        A = sl.cholesky(CorrMat, lower=True, check_finite=False)
+    except (np.linalg.LinAlgError, sl.LinAlgError):
+        EigVal, EigVec = np.linalg.eigh(CorrMat)
+        A = EigVec * np.sqrt(np.clip(EigVal, 0, None))
+    return A
+
+
+# ---------------------------------------------------------------------------------
+def Load_CorrFactor(Name, Maxrix_Directory, CorrMatName, CorrMatFunc, SaveMat="NO"):
+    """
+    This function returns the factor of a correlation matrix.
+    The factor is taken from the in-process cache, or memory-mapped from the matrix folder,
+    or calculated (from the saved correlation matrix if available) and saved to the matrix folder.
+
+    Parameters
+    ----------
+    Name : str
+        File name of the factor.
+    Maxrix_Directory : str
+        The folder for the matrix.
+    CorrMatName : str
+        File name of the correlation matrix (kept for the previously saved matrices).
+    CorrMatFunc : function
+        Function without argument returning the correlation matrix.
+    SaveMat : str
+        Whether the correlation matrix is saved or not. The default is 'NO'.
+
+    Returns
+    -------
+    A : Array
+        Factor of the correlation matrix.
+    """
+    if Name in CorrFactor_Cache:
+        return CorrFactor_Cache[Name]
+
+    FactorPath = os.path.join(Maxrix_Directory, Name)
+    CorrMatPath = os.path.join(Maxrix_Directory, CorrMatName)
+    if os.path.isfile(FactorPath):
+        ## Memory-map the factor instead of reading it into every process.
+        A = np.load(FactorPath, mmap_mode="r")
     else:
-        ## It check the Matrix folder for the corr. matrix. If there is no, it creates.
-        Name = "Cell_%d_%d_Size_%d" % (nrows, ncols, cellsize) + "_Theta_%d_%d.npy" % (
-            CorrLengthX,
-            CorrLengthY,
-        )
-        os.chdir(Maxrix_Directory)
-        if os.path.isfile(Name):
-            CorrMat = np.load(Name)
+        if os.path.isfile(CorrMatPath):
+            CorrMat = np.load(CorrMatPath)
         else:
-            CorrMat = np.zeros((nrows * ncols, nrows * ncols))
-            for i in range(nel):
-                for j in range(i, nel):
-                    CorrMat[i, j] = np.exp(-2.0 * np.sqrt((xm[i, 0] - xm[j, 0]) ** 2 / CorrLengthX**2 + (ym[i, 0] - ym[j, 0]) ** 2 / CorrLengthY**2))
-                    CorrMat[j, i] = CorrMat[i, j]
-
-    ## Save the matrix for further use.
-    if SaveMat == "YES":
-        if os.path.isfile(Name) == False:
-            np.save(Name, CorrMat)
-            print("Correlation matrix is generated for %d_%d " % (CorrLengthX, CorrLengthY))
-
-    ## Cholesky decomposition
-    # A1 = sl.cholesky(CorrMat,lower=True)
-    A1 = np.linalg.cholesky(CorrMat)
-    ## Random number
-    U = np.random.normal(0, 1, nel)
+            CorrMat = CorrMatFunc()
+            ## Save the matrix for further use.
+            if SaveMat == "YES":
+                np.save(CorrMatPath, CorrMat)
+        A = Factorize_CorrMatrix(CorrMat)
+        del CorrMat
+        ## Save the factor (write and rename so that parallel processes never read a partial file).
+        TempPath = FactorPath[:-4] + "_%d.tmp.npy" % os.getpid()
+        try:
+            np.save(TempPath, A)
+            os.replace(TempPath, FactorPath)
+            A = np.load(FactorPath, mmap_mode="r")
+        except OSError:
+            if os.path.isfile(TempPath):
+                os.remove(TempPath)
+
+    CorrFactor_Cache[Name] = A
+    return A
+
+
+# ---------------------------------------------------------------------------------
+def CorrFactor(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, Maxrix_Directory, RanFieldMethod="CMD", SaveMat="NO"):
+    """
+    This function returns the factors of the correlation matrix for the given grid, correlation lengths and method.
+    The factors are cached by grid shape, cell size, correlation lengths and method.
+
+    Parameters
+    ----------
+    nrows : int
+        Number of rows.
+    ncols : int
+        Number of columns.
+    cellsize : int
+        Cell size.
+    CorrLengthX : int/float
+        Correlation length range in X direction.
+    CorrLengthY : int/float
+        Correlation length range in Y direction.
+    Maxrix_Directory = str
+        The folder for the matrix
+    RanFieldMethod : str
+        The method for the random field generation, 'CMD' - 'SCMD'. The default is 'CMD'.
+    SaveMat: str
+        Whether the correlation matrix is saved or not. The default is 'NO'.
+
+    Returns
+    -------
+    Factors : tuple
+        (A,) for 'CMD' and (Ax, Ay) for 'SCMD'. None stands for the identity (zero correlation length).
+    """
+    ## Zero correlation length in either direction gives uncorrelated fields.
+    if CorrLengthX == 0 or CorrLengthY == 0:
+        return (None,) if RanFieldMethod == "CMD" else (None, None)
+
+    Base = "Cell_%d_%d_Size_%d" % (nrows, ncols, cellsize) + "_Theta_%d_%d" % (CorrLengthX, CorrLengthY)
+    if RanFieldMethod == "CMD":
+        A = Load_CorrFactor(
+            Base + "_CMD_Factor.npy",
+            Maxrix_Directory,
+            Base + ".npy",
+            lambda: CorrMatrix_2D(nrows, ncols, cellsize, CorrLengthX, CorrLengthY),
+            SaveMat,
+        )
+        return (A,)
+
+    ## Separable correlation function
+    x = np.linspace(cellsize / 2, (ncols - 1) * cellsize + cellsize / 2, num=ncols)
+    y = np.linspace(cellsize / 2, (nrows - 1) * cellsize + cellsize / 2, num=nrows)
+    Ax = Load_CorrFactor(Base + "_X_Dir_Factor.npy", Maxrix_Directory, Base + "_X_Dir.npy", lambda: CorrMatrix_1D(x, CorrLengthX), SaveMat)
+    Ay = Load_CorrFactor(Base + "_Y_Dir_Factor.npy", Maxrix_Directory, Base + "_Y_Dir.npy", lambda: CorrMatrix_1D(y, CorrLengthY), SaveMat)
+    return (Ax, Ay)
+
+
+# ---------------------------------------------------------------------------------
+def Standard_Fields(Factors, nrows, ncols, nReal=1, U=None):
+    """
+    This function generates correlated standard normal fields with one batched product per factorization.
+
+    Parameters
+    ----------
+    Factors : tuple
+        Factors from CorrFactor function.
+    nrows : int
+        Number of rows.
+    ncols : int
+        Number of columns.
+    nReal : int
+        Number of realizations. The default is 1.
+    U : Array, optional
+        Uncorrelated standard normal inputs (nReal, nrows, ncols). The default is None (drawn from the global random state).
+
+    Returns
+    -------
+    Fields : Array
+        Standard normal fields (nReal, nrows, ncols).
+    """
+    if len(Factors) == 1:
+        ## Correlation matrix decomposition: Z = A U
+        U = np.random.normal(0, 1, (nReal, nrows * ncols)) if U is None else np.reshape(U, (nReal, nrows * ncols))
+        if Factors[0] is None:
+            return np.reshape(U, (nReal, nrows, ncols))
+        return np.reshape(np.matmul(U, np.transpose(Factors[0])), (nReal, nrows, ncols))
+
+    ## Stepwise decomposition: Z = Ay U Ax^T
+    Ax, Ay = Factors
+    U = np.random.normal(0, 1, (nReal, nrows, ncols)) if U is None else np.reshape(U, (nReal, nrows, ncols))
+    if Ay is not None:
+        U = np.matmul(Ay, U)
+    if Ax is not None:
+        U = np.matmul(U, np.transpose(Ax))
+    return U
+
+
+# ---------------------------------------------------------------------------------
+def Transform_Field(Field, ParMean, ParCoV, DistType="N"):
+    """
+    This function transforms a standard normal field to a field of the parameter.
+
+    Parameters
+    ----------
+    Field : Array
+        Standard normal field.
+    ParMean : int/float
+        Mean of the parameter.
+    ParCoV : float
+        Coefficient of variation of the parameter.
+    DistType : str
+        Distribution type, 'N' or 'LN' . The default is 'N'.
 
+    Returns
+    -------
+    ParInp: Array
+        Random field data of the parameter.
+    """
     if DistType == "N":  ## For normal distribution
-        ParInp = ParMean + (ParCoV * ParMean) * np.reshape(np.dot(A1, U), (nrows, ncols))
+        ParInp = ParMean + (ParCoV * ParMean) * Field
 
     elif DistType == "LN":  ## For lognormal distribution
         ## Parameters of the underlying normal distribution
         SigLnPar = np.sqrt(np.log(1 + ParCoV**2))
         MuLnPar = np.log(ParMean) - 0.5 * SigLnPar**2
-        ParInp = np.exp(MuLnPar + SigLnPar * np.reshape(np.dot(A1, U), (nrows, ncols)))
+        ParInp = np.exp(MuLnPar + SigLnPar * Field)
+
+    return ParInp
+
+
+# ---------------------------------------------------------------------------------
+def Next_Standard_Field(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, Maxrix_Directory, RanFieldMethod="SCMD", SaveMat="NO"):
+    """
+    This function returns the next correlated standard normal field from the in-process buffer.
+    When the buffer is empty, RanField_BatchSize realizations are generated with one factorization and one batched product.
+
+    Parameters
+    ----------
+    See CorrFactor function.
+
+    Returns
+    -------
+    Field : Array
+        Standard normal field (nrows, ncols).
+    """
+    Key = (RanFieldMethod, nrows, ncols, cellsize, CorrLengthX, CorrLengthY)
+    Buffer = RanField_Buffer.get(Key)
+    if Buffer is None or Buffer[1] >= np.shape(Buffer[0])[0]:
+        Factors = CorrFactor(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, Maxrix_Directory, RanFieldMethod, SaveMat)
+        Buffer = [Standard_Fields(Factors, nrows, ncols, RanField_BatchSize), 0]
+        RanField_Buffer[Key] = Buffer
+    Field = Buffer[0][Buffer[1]]
+    Buffer[1] += 1
+    return Field
+
+
+# ---------------------------------------------------------------------------------
+## Sampling of the standard normal inputs of the Monte Carlo simulations (see Set_MC_Sampling).
+## None: plain Monte Carlo with the global random state and the batched fields of Next_Standard_Field.
+MC_Sampling = None
+
+
+def Set_MC_Sampling(Method="MC", Seed=None, MCnumber=1, Results_Directory=None, Worker=False):
+    """
+    This function sets the sampling of the standard normal inputs of the parameter fields.
+
+    Each realization draws its inputs from its own stream derived from the seed, the parameter, the zone and
+    the realization number (the sample index), so that the results are reproducible and do not depend on the process running it.
+    The sampling is recorded in MC_Sampling.npz; in resume mode, the recorded seed is used if no seed is given.
+    The seed is resolved once by the main process; the spawned processes (Worker=True) read the recorded seed
+    and neither draw a seed nor write MC_Sampling.npz.
+
+    Parameters
+    ----------
+    Method : str
+        'MC' (plain Monte Carlo), 'LHS' (Latin hypercube over the realizations) or 'Sobol' (scrambled Sobol sequence).
+    Seed : int or None
+        Seed of the sampling. None with 'MC' keeps the global random state; otherwise, a seed is drawn and printed.
+    MCnumber : int
+        Number of realizations (number of strata of 'LHS').
+    Results_Directory : str, optional
+        The folder to store data. The default is None (the sampling is not recorded).
+    Worker : bool, optional
+        Whether the function is called by a spawned process of the main process. The default is False.
+
+    Returns
+    -------
+    None.
+    """
+    global MC_Sampling
+    if Method not in ("MC", "LHS", "Sobol"):
+        raise ValueError("Sampling method should be 'MC', 'LHS' or 'Sobol', not %s" % (Method))
+    if Method == "MC" and Seed is None:
+        MC_Sampling = None
+        return
+
+    NameSampling = None if Results_Directory is None else os.path.join(Results_Directory, "MC_Sampling.npz")
+    if Worker:
+        ## Sampling recorded by the main process (the same seed in all processes)
+        if Seed is None:
+            if NameSampling is None or not os.path.exists(NameSampling):
+                raise RuntimeError("The sampling seed is not recorded by the main process (MC_Sampling.npz)")
+            with np.load(NameSampling) as Sampling:
+                Seed = int(Sampling["Seed"])
+        MC_Sampling = {"Method": Method, "Seed": int(Seed), "MCnumber": max(int(MCnumber), 1)}
+        return
+
+    if Seed is None and MC_Resume and NameSampling is not None and os.path.exists(NameSampling):
+        with np.load(NameSampling) as Sampling:
+            if str(Sampling["Method"]) == Method and int(Sampling["MCnumber"]) == MCnumber:
+                Seed = int(Sampling["Seed"])
+    if Seed is None:
+        Seed = int(np.random.SeedSequence().entropy % 2**63)
+    if Method == "Sobol" and MCnumber & (MCnumber - 1) != 0:
+        print("Sobol sampling is balanced when the Monte Carlo number is a power of 2 (%d)" % (MCnumber))
+    print("Sampling: %s, seed: %d" % (Method, Seed))
+    MC_Sampling = {"Method": Method, "Seed": int(Seed), "MCnumber": max(int(MCnumber), 1)}
+    if NameSampling is not None:
+        np.savez(NameSampling, **MC_Sampling)
+
+
+def Standard_Normal_Sample(Shape, FieldName, MC_current):
+    """
+    This function returns the standard normal inputs of a realization with the sampling of Set_MC_Sampling.
+
+    'LHS' assigns each cell a random linear permutation (a*MC_current + b) mod MCnumber of the strata, so that the
+    inputs of a realization are generated without the other realizations. 'Sobol' is used up to 21201 inputs
+    (the dimension limit of the sequence); larger fields use 'LHS'.
+
+    Parameters
+    ----------
+    Shape : tuple
+        Shape of the inputs.
+    FieldName : str
+        Name of the field (e.g. parameter and zone); fields with different names use different streams.
+    MC_current : int
+        Number of the realization (sample index).
+
+    Returns
+    -------
+    U : Array
+        Standard normal inputs (from the global random state if the sampling is not set).
+    """
+    if MC_Sampling is None:
+        return np.random.normal(0, 1, Shape)
+
+    Method, Seed, MCnumber = MC_Sampling["Method"], MC_Sampling["Seed"], MC_Sampling["MCnumber"]
+    FieldKey = zlib.crc32(FieldName.encode())
+    nel = int(np.prod(Shape))
+
+    if Method == "MC":
+        return np.random.default_rng([Seed, FieldKey, MC_current]).standard_normal(Shape)
+
+    if Method == "Sobol" and nel <= 21201:
+        Sequence = qmc.Sobol(nel, scramble=True, seed=np.random.default_rng([Seed, FieldKey]))
+        if MC_current > 0:
+            Sequence.fast_forward(MC_current)
+        Probability = Sequence.random(1)[0]
+    else:
+        ## Random linear permutation of the strata for each cell (a coprime to MCnumber)
+        Design = np.random.default_rng([Seed, FieldKey])
+        a = Design.integers(1, max(MCnumber, 2), nel)
+        b = Design.integers(0, MCnumber, nel)
+        Coprime = np.gcd(a, MCnumber) == 1
+        while not np.all(Coprime):
+            a[~Coprime] = Design.integers(1, MCnumber, np.count_nonzero(~Coprime))
+            Coprime = np.gcd(a, MCnumber) == 1
+        Stratum = (a * MC_current + b) % MCnumber
+        Probability = (Stratum + np.random.default_rng([Seed, FieldKey, MC_current]).random(nel)) / MCnumber
+
+    Probability = np.clip(Probability, np.finfo(float).eps, 1 - np.finfo(float).eps)
+    return np.reshape(special.ndtri(Probability), Shape)
+
+
+# ---------------------------------------------------------------------------------
+## Importance sampling of the standard normal inputs of the parameters (see Set_MC_ImportanceSampling).
+## None: the inputs are sampled from their distribution (all realizations have a weight of 1).
+MC_ImportanceShift = None
+MC_ImportanceDirectory = None
+UnitShift_Cache = {}
+
+
+def Set_MC_ImportanceSampling(Shift=None, Results_Directory=None):
+    """
+    This function sets the importance sampling of the parameters for small probabilities of failure.
+
+    The inputs of each parameter are sampled around a shifted mean, so that the standard normal field of the parameter
+    has the mean Shift[i] (e.g. negative values for c and phi, towards the design point). The log of the likelihood ratio
+    of the inputs of each realization is saved as MC_XXXX_LogWeight.npy and used as the weight of the realization
+    in the probability of failure (see MC_Failure_Probability). The weights vary more for short correlation lengths
+    (many independent values over the study area), so smaller shifts are used for them.
+
+    Parameters
+    ----------
+    Shift : list or None
+        Shift of the standard normal field of each parameter, in the order of Parameter_Means. None or zeros: no importance sampling.
+    Results_Directory : str
+        The folder to store data. Without importance sampling, the MC_XXXX_LogWeight.npy files of an earlier run are removed (not in resume mode).
+
+    Returns
+    -------
+    None.
+    """
+    global MC_ImportanceShift, MC_ImportanceDirectory
+    if Shift is None or not np.any(np.asarray(Shift, dtype=float) != 0):
+        MC_ImportanceShift = None
+        ## Remove the weights of an earlier run with importance sampling (not in resume mode, see Set_MC_Resume)
+        if not MC_Resume and Results_Directory is not None and os.path.isdir(Results_Directory):
+            for NameWeight in os.listdir(Results_Directory):
+                if NameWeight.startswith("MC_") and NameWeight.endswith("_LogWeight.npy"):
+                    os.remove(os.path.join(Results_Directory, NameWeight))
+        return
+
+    MC_ImportanceShift = np.asarray(Shift, dtype=float).ravel()
+    MC_ImportanceDirectory = Results_Directory
+    print("Importance sampling, shift of the standard normal parameters: %s" % (MC_ImportanceShift))
+    if MC_Convergence:
+        print("Convergence-driven stopping is not available with importance sampling, all realizations are calculated")
+
+
+def Unit_Shift_Inputs(Factors, nrows, ncols, Key):
+    """
+    This function returns the standard normal inputs U for which Standard_Fields gives a field of ones.
+    The inputs are the shift of a unit mean of the field; the minimum-norm solution is used for a singular factor.
+
+    Parameters
+    ----------
+    Factors : tuple
+        Factors from CorrFactor function.
+    nrows : int
+        Number of rows.
+    ncols : int
+        Number of columns.
+    Key : tuple
+        Key of the factors in the in-process cache.
+
+    Returns
+    -------
+    UShift : Array
+        Inputs (1, nrows, ncols).
+    """
+    if Key in UnitShift_Cache:
+        return UnitShift_Cache[Key]
+
+    def Solve(A, n):
+        One = np.ones(n)
+        if A is None:
+            return One
+        ## Lower triangular factor (Cholesky), otherwise the factor of the eigen decomposition
+        Solution = sl.solve_triangular(A, One, lower=True, check_finite=False)
+        if np.all(np.isfinite(Solution)) and np.allclose(np.matmul(A, Solution), One, atol=1e-6):
+            return Solution
+        return np.linalg.lstsq(A, One, rcond=None)[0]
+
+    if len(Factors) == 1:
+        ## A U = 1
+        UShift = np.reshape(Solve(Factors[0], nrows * ncols), (1, nrows, ncols))
+    else:
+        ## Ay U Ax^T = 1 1^T
+        Ax, Ay = Factors
+        UShift = np.reshape(np.outer(Solve(Ay, nrows), Solve(Ax, ncols)), (1, nrows, ncols))
+    UnitShift_Cache[Key] = UShift
+    return UShift
+
+
+# ---------------------------------------------------------------------------------
+def RFR(nrows, ncols, cellsize, Maxrix_Directory, CorrLengthX, CorrLengthY, ParMean, ParCoV, DistType="N", SaveMat="NO"):
+    """
+    ## Random fields are created.
+
+    Parameters
+    ----------
+    nrows : int
+        Number of rows.
+    ncols : int
+        Number of columns.
+    cellsize : int
+        Cell size.
+    Code_Directory: str
+        The folder including the code to save the Matrix.
+    CorrLengthX : int/float
+        Correlation length range in X direction.
+    CorrLengthY : int/float
+        Correlation length range in Y direction.
+    ParMean : int/float
+        Mean of the parameter.
+    ParCoV : float
+        Coefficient of variation of the parameter.
+    DistType : str
+        Distribution type, 'N' or 'LN' . The default is 'N'.
+    SaveMat: str
+        Whether the mayrix is saved or not. The default is 'NO'.
+
+    Returns
+    -------
+    ParInp: 2D Array
+        Random field data of the parameter.
+    """
+
+    ## Factor of the correlation matrix (cached by grid, correlation lengths and method).
+    ## The correlation matrix is built with array operations and only factorized once.
+    Factors = CorrFactor(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, Maxrix_Directory, "CMD", SaveMat)
+
+    ## Random field
+    ParInp = Transform_Field(Standard_Fields(Factors, nrows, ncols)[0], ParMean, ParCoV, DistType)
 
     ## Plotting the fields.
     # plt.figure(figsize = (3,3))
@@ -483,94 +966,12 @@ def StepwiseRFRv2(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, ParMean, Par
         Random field data of the parameter.
     """
 
-    nel = nrows * ncols
-    ## Discretize the domain
-    x = np.linspace(cellsize / 2, (ncols - 1) * cellsize + cellsize / 2, num=ncols)
-    y = np.linspace(cellsize / 2, (nrows - 1) * cellsize + cellsize / 2, num=nrows)
-    ## Create a coordinate mesh
-    xm, ym = np.meshgrid(x, y)
-    ## Reshape the coordinate meshes
-    xm, ym = np.reshape(xm, (nel, 1)), np.reshape(ym, (nel, 1))
+    ## Factors of the correlation matrices for X and Y (cached by grid, correlation lengths and method).
+    # np.random.seed(args[0][0]) ### For testing (Shared array change)
+    Factors = CorrFactor(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, Maxrix_Directory, "SCMD", SaveMat)
 
-    ## Allocate
-    CorrMatX = np.zeros((ncols, ncols))
-    CorrMatY = np.zeros((nrows, nrows))
-
-    NameX = "Cell_%d_%d_Size_%d" % (
-        nrows,
-        ncols,
-        cellsize,
-    ) + "_Theta_%d_%d_X_Dir.npy" % (CorrLengthX, CorrLengthY)
-    NameY = "Cell_%d_%d_Size_%d" % (
-        nrows,
-        ncols,
-        cellsize,
-    ) + "_Theta_%d_%d_Y_Dir.npy" % (CorrLengthX, CorrLengthY)
-
-    # t1 = time.time() ## Time (if needed)
-
-    if CorrLengthX == 0 or CorrLengthY == 0:
-        os.chdir(Maxrix_Directory)
-        if os.path.isfile(NameX) and os.path.isfile(NameY):
-            CorrMatX = np.load(NameX)
-            CorrMatY = np.load(NameY)
-        else:
-            CorrMatX = np.identity(ncols)
-            CorrMatY = np.identity(nrows)
-
-    else:
-        ## Correlation matrix for X and Y
-        os.chdir(Maxrix_Directory)
-        if os.path.isfile(NameX) and os.path.isfile(NameY):
-            CorrMatX = np.load(NameX)
-            CorrMatY = np.load(NameY)
-        else:
-            for i in range(ncols):
-                for j in range(i, ncols):
-                    CorrMatX[i, j] = np.exp(-2.0 * np.sqrt((x[i] - x[j]) ** 2 / CorrLengthX**2))
-                    CorrMatX[j, i] = CorrMatX[i, j]
-            for i in range(nrows):
-                for j in range(i, nrows):
-                    CorrMatY[i, j] = np.exp(-2.0 * np.sqrt((y[i] - y[j]) ** 2 / CorrLengthY**2))
-                    CorrMatY[j, i] = CorrMatY[i, j]
-
-    ## Save the matrix for further use.
-    if SaveMat == "YES":
-        os.chdir(Maxrix_Directory)
-        if os.path.isfile(NameX) == False and os.path.isfile(NameY) == False:
-            np.save(NameX, CorrMatX)
-            np.save(NameY, CorrMatY)
-            # print("Correlation matrix is generated for %d_%d for both X and Y directions" %(CorrLengthX, CorrLengthY))
-
-    # t2 = time.time()
-
-    ## Cholesky decomposition and generation of random field
-    # U       = np.random.normal(0,1,(ncols,nrows))
-    # np.random.seed(args[0][0]) ### For testing (Shared array change)
-    U = np.random.normal(0, 1, (nrows, ncols)).T  ## This is correct
-    Ax = sl.cholesky(CorrMatX, lower=True)
-    Ay = sl.cholesky(CorrMatY, lower=True)
-
-    ## U vector can be defined in two ways: (ncols, nrows) or (nrows, ncols)
-    # cInp =(MuC + (COVC*MuC)*np.matmul(np.matmul(Ay,U.T),np.transpose(Ax)))
-    # cInp =(MuC + (COVC*MuC)*np.matmul(np.matmul(Ax,U),np.transpose(Ay))).T
-
-    # t3 = time.time()
-
-    # print('Correlation matrix: %f'%(t2-t1))
-    # print('Decomposition: %f'%(t3-t2))
-
-    if DistType == "N":
-
-        ParInp = (ParMean + (ParCoV * ParMean) * np.matmul(np.matmul(Ax, U), np.transpose(Ay))).T  # For normal distribution
-
-    elif DistType == "LN":
-
-        # Parameters of the underlying normal distribution
-        SigLnPar = np.sqrt(np.log(1 + ParCoV**2))
-        MuLnPar = np.log(ParMean) - 0.5 * SigLnPar**2
-
-        ParInp = (np.exp(MuLnPar + SigLnPar * np.matmul(np.matmul(Ax, U), np.transpose(Ay)))).T  # For lognormal distribution
+    ## Random field: (Ax U Ay^T)^T with U (ncols, nrows), i.e. Ay U^T Ax^T
+    ParInp = Transform_Field(Standard_Fields(Factors, nrows, ncols)[0], ParMean, ParCoV, DistType)
 
     # t2 = time.time() ## Time (if needed)
     # print('Stepwise method time: %f ' %(t2-t1)) ## Time required to create random field
@@ -602,7 +1003,50 @@ def StepwiseRFRv2(nrows, ncols, cellsize, CorrLengthX, CorrLengthY, ParMean, Par
 
 
 # ---------------------------------------------------------------------------------
-def CellsInsideEllV2(nrows, ncols, cellsize, DEMInput, EllCenterX, EllCenterY, EllDEMCenter, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz):
+def Ellipsoid_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz):
+    """
+    This function returns the window of rows and columns covering the horizontal projection of the ellipsoid.
+    In the e' coordinate system (rotated by EllAlpha), the projection of the ellipsoid is inside
+    |x' - Ellz*sin(EllBeta)| <= sqrt(a^2 cos^2(EllBeta) + c^2 sin^2(EllBeta)) and |y'| <= b.
+
+    Parameters
+    ----------
+    nrows : int
+        Number of rows.
+    ncols : int
+        Number of columns.
+    cellsize : int
+        Cell size.
+    EllCenterX, EllCenterY : float
+        X and Y coordinates of the ellipsoid center according to the global.
+    EllAlpha, EllBeta : float
+        The aspect of the direction of motion and the slope of the ellipsoid in the direction of motion.
+    Ella, Ellb, Ellc : float
+        The dimensions of the ellipsoid.
+    Ellz : float
+        Offset of the ellipsoid.
+
+    Returns
+    -------
+    RowStart, RowEnd, ColStart, ColEnd : int
+        The window (inclusive, one cell of margin, limited to the grid). RowStart > RowEnd if the window is outside the grid.
+    """
+    ExtentX = np.sqrt((Ella * np.cos(np.radians(EllBeta))) ** 2 + (Ellc * np.sin(np.radians(EllBeta))) ** 2)
+    RectX = Ellz * np.sin(np.radians(EllBeta)) + np.array((-ExtentX, ExtentX, ExtentX, -ExtentX))
+    RectY = np.array((-Ellb, -Ellb, Ellb, Ellb))
+    ## Corners of the rectangle according to the global coordinate system (inverse rotation)
+    RectGX = EllCenterX + RectX * np.cos(np.radians(EllAlpha)) + RectY * np.sin(np.radians(EllAlpha))
+    RectGY = EllCenterY - RectX * np.sin(np.radians(EllAlpha)) + RectY * np.cos(np.radians(EllAlpha))
+    ## Window of rows and columns (one cell of margin)
+    ColStart = max(int(np.floor((np.min(RectGX) - cellsize / 2) / cellsize)) - 1, 0)
+    ColEnd = min(int(np.ceil((np.max(RectGX) - cellsize / 2) / cellsize)) + 1, ncols - 1)
+    RowStart = max(int(np.floor(((nrows - 1) * cellsize + cellsize / 2 - np.max(RectGY)) / cellsize)) - 1, 0)
+    RowEnd = min(int(np.ceil(((nrows - 1) * cellsize + cellsize / 2 - np.min(RectGY)) / cellsize)) + 1, nrows - 1)
+    return (RowStart, RowEnd, ColStart, ColEnd)
+
+
+# ---------------------------------------------------------------------------------
+def CellsInsideEllV2(nrows, ncols, cellsize, DEMInput, EllCenterX, EllCenterY, EllDEMCenter, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, RowOffset=0, ColOffset=0):
     """
     ## This function returns the cells inside the ellipsoid.
     ## This is 3D version of the previous function, CellsInsideEll
@@ -636,6 +1080,10 @@ def CellsInsideEllV2(nrows, ncols, cellsize, DEMInput, EllCenterX, EllCenterY, E
         The dimension of the ellipdoid perpendicular to the other two directions.
     Ellz : float
         Offset of the ellipsoid.
+    RowOffset : int, optional
+        Row of the grid corresponding to the first row of DEMInput (DEMInput is a window of the grid). The default is 0.
+    ColOffset : int, optional
+        Column of the grid corresponding to the first column of DEMInput. The default is 0.
 
     Returns
     -------
@@ -646,59 +1094,44 @@ def CellsInsideEllV2(nrows, ncols, cellsize, DEMInput, EllCenterX, EllCenterY, E
 
     """
 
-    ## Cell center coordinate according to the left bottom option-1
-    CoorG2 = []
-    for i in range(nrows):
-        for j in range(ncols):
-            CoorG2.append(
-                [
-                    i,
-                    j,
-                    cellsize / 2 + j * cellsize,
-                    (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                    DEMInput[i, j],
-                ]
-            )
-    CoorG2 = np.asarray(CoorG2)  ## (row #, column #, x coordinate, y coordinate)
+    ## Only the cells in the bounding window of the projected ellipsoid are checked.
+    RowStart, RowEnd, ColStart, ColEnd = Ellipsoid_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz)
+    ## The window is limited to the part of the grid given by DEMInput.
+    RowStart, ColStart = max(RowStart, RowOffset), max(ColStart, ColOffset)
+    RowEnd = min(RowEnd, RowOffset + np.shape(DEMInput)[0] - 1)
+    ColEnd = min(ColEnd, ColOffset + np.shape(DEMInput)[1] - 1)
+    if ColStart > ColEnd or RowStart > RowEnd:
+        return (np.asarray([]), np.asarray([]))
+
+    ## Cell center coordinate according to the left bottom option-1 (only for the window)
+    Rows, Cols = np.meshgrid(np.arange(RowStart, RowEnd + 1), np.arange(ColStart, ColEnd + 1), indexing="ij")
+    Rows, Cols = Rows.ravel(), Cols.ravel()
     ## Coordinates according to the center of allipsoid, e
-    CoorEll = CoorG2[:] - np.array((0, 0, EllCenterX, EllCenterY, EllDEMCenter))
+    CoorEllX = (cellsize / 2 + Cols * cellsize) - EllCenterX
+    CoorEllY = ((nrows - 1) * cellsize + cellsize / 2 - Rows * cellsize) - EllCenterY
+    CoorEllZ = np.asarray(DEMInput)[Rows - RowOffset, Cols - ColOffset] - EllDEMCenter
 
     ## Coordinates according to the center of allipsoid with a rotation alpha, el
-    x1 = CoorEll[:, 2] * np.cos(np.radians(EllAlpha)) - CoorEll[:, 3] * np.sin(np.radians(EllAlpha))
-    y1 = CoorEll[:, 3] * np.cos(np.radians(EllAlpha)) + CoorEll[:, 2] * np.sin(np.radians(EllAlpha))
-    z1 = CoorEll[:, 4]
+    x1 = CoorEllX * np.cos(np.radians(EllAlpha)) - CoorEllY * np.sin(np.radians(EllAlpha))
+    y1 = CoorEllY * np.cos(np.radians(EllAlpha)) + CoorEllX * np.sin(np.radians(EllAlpha))
+    z1 = CoorEllZ
 
     ## Coordinates according to the center of allipsoid with a rotation alpha, elll
     x111 = x1 - np.array((Ellz * np.sin(np.radians(EllBeta))))
     y111 = y1
     z111 = z1 - np.array((Ellz * np.cos(np.radians(EllBeta))))
 
-    ## Coordinates according to the center of allipsoid with a rotation beta, ell
+    ## Coordinates according to the center of allipsoid with a rotation beta, ell (e'')
     x11 = x111 * np.cos(np.radians(EllBeta)) - z111 * np.sin(np.radians(EllBeta))
     y11 = y111
     z11 = z111 * np.cos(np.radians(EllBeta)) + x111 * np.sin(np.radians(EllBeta))
 
-    ## Coordinates (e'')
-    CoorEll11 = np.concatenate(
-        (
-            CoorEll[:, [0, 1]],
-            np.reshape(x11, (np.shape(CoorG2)[0], 1)),
-            np.reshape(y11, (np.shape(CoorG2)[0], 1)),
-            np.reshape(z11, (np.shape(CoorG2)[0], 1)),
-        ),
-        axis=1,
-    )
-
-    ## Find the cells inside the ellipsoidal sliding surface
-    CellsInside = []
-    indexes = []
-    for i in range(np.shape(CoorEll11)[0]):
-        cond = (CoorEll11[i][2] ** 2 / Ella**2 + CoorEll11[i][3] ** 2 / Ellb**2 + CoorEll11[i][4] ** 2 / Ellc**2) <= 1
-        if cond:
-            CellsInside.append([CoorEll[i, 0], CoorEll[i, 1], x1[i], y1[i], z1[i]])
-            indexes.append((i))
-    CellsInside = np.asarray(CellsInside)
-    indexes = np.asarray(indexes)
+    ## Find the cells inside the ellipsoidal sliding surface (row-major order as the whole grid)
+    Inside = (x11**2 / Ella**2 + y11**2 / Ellb**2 + z11**2 / Ellc**2) <= 1
+    if not np.any(Inside):
+        return (np.asarray([]), np.asarray([]))
+    CellsInside = np.column_stack((Rows[Inside], Cols[Inside], x1[Inside], y1[Inside], z1[Inside])).astype(float)
+    indexes = Rows[Inside] * ncols + Cols[Inside]
 
     # See = np.zeros((nrows,ncols))
     # for i in range(np.shape(CellsInside)[0]):
@@ -712,6 +1145,151 @@ def CellsInsideEllV2(nrows, ncols, cellsize, DEMInput, EllCenterX, EllCenterY, E
     return (indexes, CellsInside)  ## Returns the indexes and infromation of the Cells
 
 
+# ---------------------------------------------------------------------------------
+def SubDis_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, ProblemName=""):
+    """
+    This function returns the window (original cell size) in which an ellipsoid is sub-discretized.
+    Only the data inside the window are refined instead of the whole grid.
+
+    Parameters
+    ----------
+    See Ellipsoid_Window function.
+    ProblemName : str
+         Name of the problem to reproduce results. The default is ''.
+
+    Returns
+    -------
+    Window : tuple
+        (RowStart, RowEnd, ColStart, ColEnd) according to the original cell size.
+    """
+    ## For the simplified case, the DEM is calculated again for the whole grid.
+    if ProblemName == "SimpCase":
+        return (0, nrows - 1, 0, ncols - 1)
+    return Ellipsoid_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz)
+
+
+# ---------------------------------------------------------------------------------
+## Refined patches of the data not changing with the realizations (DEM, slope, ground water, infiltration).
+## They are produced once and reused for the other time instances and realizations in the process.
+SubDis_Patch_Cache = {}
+SubDis_Patch_CacheSize = 20000
+
+
+def SubDis_Patch(Array, Window, CountSubDis, Reuse=False):
+    """
+    This function returns the data inside the window with the cell size halved CountSubDis times (numpy.kron).
+
+    Parameters
+    ----------
+    Array : Array
+        Data with the original cell size.
+    Window : tuple
+        (RowStart, RowEnd, ColStart, ColEnd) according to the original cell size.
+    CountSubDis : int
+        Number of sub-discretizations.
+    Reuse : bool, optional
+        Whether the patch is kept for the next calls with the same array. Only for the data not changing with the realizations. The default is False.
+
+    Returns
+    -------
+    Patch : Array
+        Refined data inside the window.
+    """
+    if Reuse:
+        Key = (id(Array), Window, CountSubDis)
+        Cached = SubDis_Patch_Cache.get(Key)
+        ## The array is kept in the cache; therefore, its id cannot be given to another array.
+        if Cached is not None and Cached[0] is Array:
+            return Cached[1]
+
+    Factor = 2**CountSubDis
+    Patch = np.kron(Array[Window[0] : Window[1] + 1, Window[2] : Window[3] + 1], np.ones((Factor, Factor)))
+
+    if Reuse:
+        if len(SubDis_Patch_Cache) >= SubDis_Patch_CacheSize:
+            SubDis_Patch_Cache.clear()
+        SubDis_Patch_Cache[Key] = (Array, Patch)
+    return Patch
+
+
+# ---------------------------------------------------------------------------------
+def SubDis_DEMPatch(DEMInput, SlopeInput, Window, CountSubDis, nrows_org, cellsize, ProblemName=""):
+    """
+    This function returns the DEM inside the window with the cell size halved CountSubDis times.
+    The patch is reused for the other time instances and realizations.
+
+    Parameters
+    ----------
+    DEMInput : Array
+        Digital elevation map data (original cell size).
+    SlopeInput : Array
+        Slope angle (original cell size).
+    Window : tuple
+        (RowStart, RowEnd, ColStart, ColEnd) according to the original cell size.
+    CountSubDis : int
+        Number of sub-discretizations.
+    nrows_org : int
+        Original number of rows.
+    cellsize : float
+        Current (halved) cell size.
+    ProblemName : str
+         Name of the problem to reproduce results. The default is ''.
+
+    Returns
+    -------
+    DEMPatch : Array
+        Refined DEM inside the window.
+    """
+    ### !!!
+    ##This part is for simplified case
+    if ProblemName == "SimpCase":
+        ## np.kron does not work for the simplified case.
+        ## For simplified case, DEM should be calculated again.
+        Key = ("SimpCase", id(SlopeInput), Window, CountSubDis)
+        Cached = SubDis_Patch_Cache.get(Key)
+        if Cached is not None and Cached[0] is SlopeInput:
+            return Cached[1]
+        SlopePatch = SubDis_Patch(SlopeInput, Window, CountSubDis, Reuse=True)
+        DEMPatch = Calculate_DEM_SimpCase(DEMInput, SlopePatch, nrows_org, np.shape(SlopePatch)[0], np.shape(SlopePatch)[1], cellsize)
+        SubDis_Patch_Cache[Key] = (SlopeInput, DEMPatch)
+        return DEMPatch
+    ### !!!
+    return SubDis_Patch(DEMInput, Window, CountSubDis, Reuse=True)
+
+
+# ---------------------------------------------------------------------------------
+def SubDis_Local(CellsInside, Window, CountSubDis):
+    """
+    This function converts the cells inside (rows and columns of the refined grid) to the rows and columns of the refined window.
+
+    Parameters
+    ----------
+    CellsInside : Array
+        CellsInside variable --> [ row(from top), column(from left), xe', ye' ] for the refined grid.
+    Window : tuple
+        (RowStart, RowEnd, ColStart, ColEnd) according to the original cell size.
+    CountSubDis : int
+        Number of sub-discretizations.
+
+    Returns
+    -------
+    CellsLocal : Array
+        CellsInside variable for the refined window.
+    indexesLocal : Array
+        Indexes of the cells according to the refined window.
+    nrowsLocal, ncolsLocal : int
+        Number of rows and columns of the refined window.
+    """
+    Factor = 2**CountSubDis
+    nrowsLocal = (Window[1] - Window[0] + 1) * Factor
+    ncolsLocal = (Window[3] - Window[2] + 1) * Factor
+    CellsLocal = np.array(CellsInside, dtype=float)
+    CellsLocal[:, 0] -= Window[0] * Factor
+    CellsLocal[:, 1] -= Window[2] * Factor
+    indexesLocal = CellsLocal[:, 0].astype(int) * ncolsLocal + CellsLocal[:, 1].astype(int)
+    return (CellsLocal, indexesLocal, nrowsLocal, ncolsLocal)
+
+
 # ---------------------------------------------------------------------------------
 def EllDepth(x, y, EllCenterX, EllCenterY, Ella, Ellb, Ellc, Ellz, EllAlpha, EllBeta):
     """
@@ -801,6 +1379,28 @@ def calz(x, y, Ella, Ellb, Ellc):
     return Ellc * np.sqrt(1 - (x**2) / (Ella**2) - (y**2) / (Ellb**2))  ## directly calculated
 
 
+# ---------------------------------------------------------------------------------
+def Angle_To_Unit_Vector(n, uvx11):
+    """
+    ## Calculate the angles between the normal vectors and a unit vector (by dot product) for all cells at once.
+
+    Parameters
+    ----------
+    n : array of floats
+        Normal vectors of the cells, one row for each cell.
+    uvx11 : array of floats
+        The unit vector.
+
+    Returns
+    -------
+    array of floats
+        Angles between the normal vectors and the unit vector in degrees.
+    """
+
+    un = n / np.linalg.norm(n, axis=1)[:, np.newaxis]
+    return np.degrees(np.arccos(np.sum(un * uvx11, axis=1)))
+
+
 # ---------------------------------------------------------------------------------
 def HydrologyModel_v1_0(TimeToAnalyse, CellsInside, A, HwInput, rizeroInput, riInp, Ksat, Diff0, Thickness, SlopeInput):
     """
@@ -910,40 +1510,40 @@ def HydrologyModel_v1_0(TimeToAnalyse, CellsInside, A, HwInput, rizeroInput, riI
     ## New version for multiple time instances
     """
 
-    PoreWaterForce = []
+    ## Currently the formulation is for time lower or equal the time of the rainfall.
+    ## It can be simply modified to analyse times after rainfall.
     for TimeCurrent in TimeToAnalyse:
-        # print(TimeCurrent)
-        ## Currently the formulation is for time lower or equal the time of the rainfall.
-        ## It can be simply modified to analyse times after rainfall.
         if TimeCurrent > riInp[1][0] or TimeCurrent < 0:
             print("Check time to analse! If you want to assign time greater than the storm, modify the equations!")
             print("Now, the time is assigned as zero")
             # TimeToAnalyse = 0
 
-        if TimeCurrent == 0:
-            SteadyP = np.multiply((Thickness - HwValuesInside), BetaIverson)  ## unit is m
-            TransientP = np.zeros((np.shape(CellsInside)[0], 1))  ## unit is m
+    ## The steady part, the diffusivity term and the limit do not depend on time. They are calculated once.
+    ## The transient part is calculated for all time instances at once (one column for each time instance).
+    Times = np.reshape(np.asarray(TimeToAnalyse, dtype=float), (1, np.size(TimeToAnalyse)))
+    SteadyP = np.multiply((Thickness - HwValuesInside), BetaIverson)  ## unit is m
+    DiffIverson = np.multiply((4 * Diff0inside), np.square(np.cos(np.radians(SlopeInside[:]))))
+    t_star = np.multiply(Times, DiffIverson) / np.square(Thickness)
+    ## t_star = 0 at time zero gives exp(-inf) and erfc(inf) (both zero); the columns are set to zero below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Response = np.multiply(np.sqrt(t_star / np.pi), np.exp(-1 / t_star)) - special.erfc(1 / np.sqrt(t_star))
+    TransientP = np.multiply((np.multiply((riInside / KsatInside), Thickness)), Response)  ## unit is m
+    TransientP[:, Times[0] == 0] = 0  ## No transient pressure head at time zero
 
-        else:
-            SteadyP = np.multiply((Thickness - HwValuesInside), BetaIverson)  ## unit is m
-            DiffIverson = np.multiply((4 * Diff0inside), np.square(np.cos(np.radians(SlopeInside[:]))))
-            t_star = (TimeCurrent * DiffIverson) / np.square(Thickness)
-            Response = np.multiply(np.sqrt(t_star / np.pi), np.exp(-1 / t_star)) - special.erfc(1 / np.sqrt(t_star))
-            TransientP = np.multiply((np.multiply((riInside / KsatInside), Thickness)), Response)  ## unit is m
-
-        ## Pore water pressure is the sum of steady and transient pressure heads
-        PoreWaterPressure = (SteadyP + TransientP) * 10  ## 10 is the unit weight of water
-
-        ## The values are limited by values assuming saturated soil with slope parallel flow.
-        MaxWaterPressure = np.multiply(Thickness, BetaIverson) * 10  ## 10 is the unit weight of water
-        ## Limit the pore pressures values by Z*BetaIverson
-        # for i in range(np.shape(CellsInside)[0]):
-        #     if (PoreWaterPressure[i] > MaxWaterPressure[i]):
-        #          PoreWaterPressure[i] = MaxWaterPressure[i]
-        PoreWaterPressure = np.where(PoreWaterPressure > MaxWaterPressure, MaxWaterPressure, PoreWaterPressure)
+    ## Pore water pressure is the sum of steady and transient pressure heads
+    PoreWaterPressure = (SteadyP + TransientP) * 10  ## 10 is the unit weight of water
+
+    ## The values are limited by values assuming saturated soil with slope parallel flow.
+    MaxWaterPressure = np.multiply(Thickness, BetaIverson) * 10  ## 10 is the unit weight of water
+    ## Limit the pore pressures values by Z*BetaIverson
+    # for i in range(np.shape(CellsInside)[0]):
+    #     if (PoreWaterPressure[i] > MaxWaterPressure[i]):
+    #          PoreWaterPressure[i] = MaxWaterPressure[i]
+    PoreWaterPressure = np.where(PoreWaterPressure > MaxWaterPressure, MaxWaterPressure, PoreWaterPressure)
 
-        ## Calculate pore water pressure
-        PoreWaterForce.append(np.multiply(PoreWaterPressure, A))
+    ## Calculate pore water pressure for each time instance
+    PoreWaterForce = np.multiply(PoreWaterPressure, A)
+    PoreWaterForce = [PoreWaterForce[:, [TimeInd]] for TimeInd in range(np.shape(Times)[1])]
 
     return PoreWaterForce
 
@@ -1288,6 +1888,144 @@ def FSJanbu3D(x, *DataFunction):
     return Difference
 
 
+# ---------------------------------------------------------------------------------
+## Maximum number of (padded) cell entries solved together by FS3D_Surfaces.
+## Larger batches need fewer Python-level iterations but more memory.
+FS3D_BatchCells = 2**20
+
+
+def FS3D_Batch(FSCalType, c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1, CellMask, FSInitial=1.5, xtol=1.49012e-08, maxiter=50):
+    """
+    ## This function solves the Bishop 3D or Janbu 3D factor of safety equation for a batch of items at once.
+    ## An item is an (ellipsoid, time instance) pair. The cells of the items are padded to the same length.
+
+    Parameters
+    ----------
+    FSCalType : str
+        Method for FS calculation: 'Bishop3D' - 'Janbu3D'.
+    c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1 : arrays of floats
+        Values of the cells for each item, shape (number of items, number of cells). See FSBishop3D and FSJanbu3D.
+    CellMask : array of bool
+        True for the cells of the items, False for the padded cells.
+    FSInitial : float
+        Initial guess. The default is 1.5.
+    xtol : float
+        Relative difference of two consecutive FS values for convergence (same as scipy.optimize.root). The default is 1.49012e-08.
+    maxiter : int
+        Maximum number of secant iterations. The items not converged are solved with scipy.optimize.root. The default is 50.
+
+    Returns
+    -------
+    FS3D : array of floats
+        3D factor of safety of each item.
+
+    """
+
+    ## Terms of the cells which do not depend on the FS. The padded cells do not contribute to the sums.
+    TanPhi = np.tan(np.radians(phi))
+    SinThetaAvr = np.sin(np.radians(ThetaAvr))
+    CosTheta = np.where(CellMask, np.cos(np.radians(Theta)), 1.0)
+    m = np.where(CellMask, TanPhi * SinThetaAvr, 0.0)
+    if FSCalType == "Bishop3D":
+        ## FSCalc = sum(Num / (CosTheta + m / FS)) / sum(Dri)
+        Num = np.where(CellMask, (Weight - PoreWaterForce * CosTheta) * TanPhi + c * A * CosTheta, 0.0)
+        Dri = np.sum(np.where(CellMask, np.sign(AngleTangentXZE1) * Weight * SinThetaAvr, 0.0), axis=1)
+        Terms = (Num,)
+    elif FSCalType == "Janbu3D":
+        ## N = (Weight * FS + K) / (CosTheta * FS + m) and FSCalc = sum(ResConst + N * ResN) / sum(N * DriN)
+        CosThetaAvr = np.cos(np.radians(ThetaAvr))
+        W = np.where(CellMask, Weight, 0.0)
+        K = np.where(CellMask, (PoreWaterForce * TanPhi - c * A) * SinThetaAvr, 0.0)
+        ResConst = np.sum(np.where(CellMask, (c * A - PoreWaterForce * TanPhi) * CosThetaAvr, 0.0), axis=1)
+        ResN = np.where(CellMask, TanPhi * CosThetaAvr, 0.0)
+        DriN = np.where(CellMask, np.sign(AngleTangentXZE1) * CosTheta * np.tan(np.radians(ThetaAvr)), 0.0)
+        Terms = (W, K, ResN, DriN)
+
+    def Difference(FSGuess, Items):
+        ## FSCalc - FSGuess for the given items
+        FSGuess = np.expand_dims(FSGuess, axis=1)
+        if FSCalType == "Bishop3D":
+            (Num,) = (Term[Items] for Term in Terms)
+            FSCalc = np.sum(Num / (CosTheta[Items] + m[Items] / FSGuess), axis=1) / Dri[Items]
+        else:
+            W, K, ResN, DriN = (Term[Items] for Term in Terms)
+            N = (W * FSGuess + K) / (CosTheta[Items] * FSGuess + m[Items])
+            FSCalc = (ResConst[Items] + np.sum(N * ResN, axis=1)) / np.sum(N * DriN, axis=1)
+        return FSCalc - FSGuess[:, 0]
+
+    ## Secant iterations starting from the initial guess and one fixed-point step; only the unconverged items are updated.
+    nItems = np.shape(CellMask)[0]
+    FS3D = np.full(nItems, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        Items = np.arange(nItems)
+        x0 = np.full(nItems, float(FSInitial))
+        g0 = Difference(x0, Items)
+        x1 = x0 + g0
+        for _ in range(maxiter):
+            g1 = Difference(x1, Items)
+            SecantSlope = (g1 - g0) / (x1 - x0)
+            x2 = np.where(g1 == 0, x1, x1 - g1 / SecantSlope)
+            Converged = np.isfinite(x2) & (np.abs(x2 - x1) <= xtol * np.abs(x2))
+            FS3D[Items[Converged]] = x2[Converged]
+            Active = np.isfinite(x2) & ~Converged
+            Items, x0, g0, x1 = Items[Active], x1[Active], g1[Active], x2[Active]
+            if np.size(Items) == 0:
+                break
+
+    ## Items not converged by the secant iterations are solved one by one as before
+    for Item in np.flatnonzero(np.isnan(FS3D)):
+        FS3D[Item] = root(lambda x: Difference(np.asarray(x, dtype=float), np.array([Item])), FSInitial).x[0]
+
+    return FS3D
+
+
+# ---------------------------------------------------------------------------------
+def FS3D_Surfaces(FSCalType, Surfaces, FSInitial=1.5):
+    """
+    ## This function calculates the Bishop 3D or Janbu 3D factor of safety of sliding surfaces for all time instances.
+    ## The cells of the surfaces are padded and the (surface, time instance) pairs are solved together by FS3D_Batch.
+
+    Parameters
+    ----------
+    FSCalType : str
+        Method for FS calculation: 'Bishop3D' - 'Janbu3D'.
+    Surfaces : list of tuples
+        (c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1) for each sliding surface.
+        PoreWaterForce is the list of pore water forces for each time instance (HydrologyModel_v1_0).
+    FSInitial : float
+        Initial guess. The default is 1.5.
+
+    Returns
+    -------
+    FS3D_All : list of arrays
+        3D factor of safety of each sliding surface for each time instance.
+
+    """
+
+    ## Number of cells and time instances
+    nCells = [np.size(Surface[2]) for Surface in Surfaces]
+    nTimes = [np.shape(Surface[3])[0] for Surface in Surfaces]
+    nCellsMax = max(nCells)
+    nItems = sum(nTimes)
+
+    ## Padded arrays; the per-cell values of a surface are repeated for each time instance
+    Padded = [np.zeros((nItems, nCellsMax)) for _ in range(8)]
+    CellMask = np.zeros((nItems, nCellsMax), dtype=bool)
+    Row = 0
+    for Surface, n, nT in zip(Surfaces, nCells, nTimes):
+        for k, Values in enumerate(Surface):
+            if k == 3:
+                Padded[k][Row : Row + nT, :n] = np.reshape(np.asarray(Values, dtype=float), (nT, n))
+            else:
+                Padded[k][Row : Row + nT, :n] = np.reshape(np.asarray(Values, dtype=float), (1, n))
+        CellMask[Row : Row + nT, :n] = True
+        Row += nT
+
+    FS3D = FS3D_Batch(FSCalType, *Padded, CellMask, FSInitial=FSInitial)
+
+    return np.split(FS3D, np.cumsum(nTimes)[:-1])
+
+
 # ---------------------------------------------------------------------------------
 def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLenX, Parameter_CorrLenY, nrows, ncols, cellsize, RanFieldMethod, ZoneInput, Maxrix_Directory, NoData=-9999, SaveMat="NO", *args):
     """
@@ -1322,7 +2060,7 @@ def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLe
     SaveMat : str, optional
         Whether the mayrix is saved or not. The default is 'NO'.
     *args : list of number (not needed)
-        Used to generate same random fields by aranging seed number.
+        args[0] is the number of the realization, used as the sample index with the sampling of Set_MC_Sampling.
 
     Returns
     -------
@@ -1345,6 +2083,11 @@ def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLe
     ## Allocate
     Parameter_Fields = np.ones((np.shape(Parameter_CoVs)[0], nrows, ncols)) * NoData
 
+    ## Number of the realization for the sampling of the standard normal inputs (see Set_MC_Sampling and Set_MC_ImportanceSampling)
+    MC_current = args[0] if ((MC_Sampling is not None or MC_ImportanceShift is not None) and len(args) > 0) else None
+    ## Log of the likelihood ratio of the inputs with importance sampling
+    LogWeight = 0.0
+
     ## Generate ranfom field for each parameter individually
     ## {c, phi, uws, ksat, diffus} for drained analysis
     ## {Su, uws} for drained analysis
@@ -1362,6 +2105,9 @@ def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLe
         if np.shape(ZoneInd_NotVariable)[0] + np.shape(ZoneInd_HomVariable)[0] + np.shape(ZoneInd_SpaVariable)[0] != np.shape(ZoneNumber)[0]:
             print("Problem in Par_Fields function!")
 
+        ## Shift of the standard normal field of the parameter (importance sampling)
+        Shift = MC_ImportanceShift[i] if (MC_ImportanceShift is not None and i < np.size(MC_ImportanceShift)) else 0.0
+
         ## Assign parmeter values for "NotVariable" zones
         for CurrentZoneIndex in ZoneInd_NotVariable:
             # print(CurrentZoneIndex)
@@ -1374,7 +2120,18 @@ def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLe
             # print(CurrentZoneIndex)
             CurrentZoneNumber = ZoneNumber[CurrentZoneIndex]
 
-            if Parameter_Dist[i, 0, CurrentZoneIndex] == "N":
+            if MC_current is not None:
+                ## Standard normal input of the realization (shifted with importance sampling), transformed to the distribution of the parameter
+                U = Standard_Normal_Sample((1,), "Par_%d_Zone_%s" % (i, CurrentZoneNumber), MC_current)[0] + Shift
+                LogWeight += -Shift * U + 0.5 * Shift**2
+                RandomValue = Transform_Field(
+                    U,
+                    Parameter_Means[i, 0, CurrentZoneIndex],
+                    Parameter_CoVs[i, 0, CurrentZoneIndex],
+                    Parameter_Dist[i, 0, CurrentZoneIndex],
+                )
+
+            elif Parameter_Dist[i, 0, CurrentZoneIndex] == "N":
                 ## Draw samples from a normal distribution.
                 # np.random.seed(2021+args[0]) ### For testing (Shared array change)
                 RandomValue = np.random.normal(
@@ -1408,33 +2165,36 @@ def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLe
             # print(CurrentZoneIndex)
             CurrentZoneNumber = ZoneNumber[CurrentZoneIndex]
 
-            if RanFieldMethod == "SCMD":
-                FieldData = StepwiseRFRv2(
+            ## Correlated standard normal field from the batch generated with the cached factor,
+            ## transformed to the distribution of the parameter ('CMD' or 'SCMD').
+            ## With the sampling of Set_MC_Sampling, the field is generated from the inputs of the realization.
+            ## With importance sampling, the inputs are shifted so that the mean of the standard normal field is Shift.
+            if MC_current is not None:
+                Key = (RanFieldMethod, nrows, ncols, cellsize, int(Parameter_CorrLenX[i, 0, CurrentZoneIndex]), int(Parameter_CorrLenY[i, 0, CurrentZoneIndex]))
+                Factors = CorrFactor(nrows, ncols, cellsize, Key[4], Key[5], Maxrix_Directory, RanFieldMethod, SaveMat)
+                U = Standard_Normal_Sample((1, nrows, ncols), "Par_%d_Zone_%s" % (i, CurrentZoneNumber), MC_current)
+                if Shift != 0:
+                    UShift = Shift * Unit_Shift_Inputs(Factors, nrows, ncols, Key)
+                    U = U + UShift
+                    LogWeight += -np.sum(UShift * U) + 0.5 * np.sum(UShift**2)
+                StandardField = Standard_Fields(Factors, nrows, ncols, 1, U)[0]
+            else:
+                StandardField = Next_Standard_Field(
                     nrows,
                     ncols,
                     cellsize,
                     int(Parameter_CorrLenX[i, 0, CurrentZoneIndex]),
                     int(Parameter_CorrLenY[i, 0, CurrentZoneIndex]),
-                    Parameter_Means[i, 0, CurrentZoneIndex],
-                    Parameter_CoVs[i, 0, CurrentZoneIndex],
-                    Maxrix_Directory,
-                    Parameter_Dist[i, 0, CurrentZoneIndex],
-                    SaveMat,
-                    args,
-                )
-            elif RanFieldMethod == "CMD":
-                FieldData = RFR(
-                    nrows,
-                    ncols,
-                    cellsize,
                     Maxrix_Directory,
-                    int(Parameter_CorrLenX[i, 0, CurrentZoneIndex]),
-                    int(Parameter_CorrLenY[i, 0, CurrentZoneIndex]),
-                    Parameter_Means[i, 0, CurrentZoneIndex],
-                    Parameter_CoVs[i, 0, CurrentZoneIndex],
-                    Parameter_Dist[i, 0, CurrentZoneIndex],
+                    RanFieldMethod,
                     SaveMat,
                 )
+            FieldData = Transform_Field(
+                StandardField,
+                Parameter_Means[i, 0, CurrentZoneIndex],
+                Parameter_CoVs[i, 0, CurrentZoneIndex],
+                Parameter_Dist[i, 0, CurrentZoneIndex],
+            )
 
             ## Assign spatially variable parameter values to the corresponding cells
             Parameter_Fields[i][ZoneInput == CurrentZoneNumber] = FieldData[ZoneInput == CurrentZoneNumber]
@@ -1453,11 +2213,17 @@ def Par_Fields(Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLe
         # # plt.savefig(".png", dpi=500)
         # plt.show()
 
+    ## Save the weight of the realization (write and rename, see MC_Result_Save)
+    if MC_ImportanceShift is not None and MC_current is not None and MC_ImportanceDirectory is not None:
+        NameWeight = os.path.join(MC_ImportanceDirectory, "MC_%.4d_LogWeight" % (MC_current))
+        np.save(NameWeight + "_Partial", LogWeight)
+        os.replace(NameWeight + "_Partial.npy", NameWeight + ".npy")
+
     return Parameter_Fields
 
 
 # ---------------------------------------------------------------------------------
-def Zmax_Variable(SlopeInput, CoV_Zmax, MinZmax, nrows, ncols, cellsize, NoData):
+def Zmax_Variable(SlopeInput, CoV_Zmax, MinZmax, nrows, ncols, cellsize, NoData, MC_current=None):
     """
     This function is used to generate a new max depth map of the study area.
     The mean is calculated by using an empirical funciton and the an assigned CoV is employed for the variability.
@@ -1484,6 +2250,8 @@ def Zmax_Variable(SlopeInput, CoV_Zmax, MinZmax, nrows, ncols, cellsize, NoData)
         Cell size.
     NoData : int
         The value of No Data.
+    MC_current : int, optional
+        Number of the realization, used as the sample index with the sampling of Set_MC_Sampling. The default is None.
 
     Returns
     -------
@@ -1501,7 +2269,10 @@ def Zmax_Variable(SlopeInput, CoV_Zmax, MinZmax, nrows, ncols, cellsize, NoData)
     # ZmaxInput_mean   = 5.0 * np.exp(-0.04*SlopeInput)
     # ZmaxInput_StdDev = CoV_Zmax * ZmaxInput_mean
 
-    ZmaxInput = ZmaxInput_mean + ZmaxInput_StdDev * np.random.normal(0, 1)
+    if MC_Sampling is not None and MC_current is not None:
+        ZmaxInput = ZmaxInput_mean + ZmaxInput_StdDev * Standard_Normal_Sample((1,), "Zmax", MC_current)[0]
+    else:
+        ZmaxInput = ZmaxInput_mean + ZmaxInput_StdDev * np.random.normal(0, 1)
     ZmaxInput[ZmaxInput < MinZmax] = MinZmax
     ZmaxInput[SlopeInput == NoData] = NoData
 
@@ -1509,35 +2280,382 @@ def Zmax_Variable(SlopeInput, CoV_Zmax, MinZmax, nrows, ncols, cellsize, NoData)
 
 
 # ---------------------------------------------------------------------------------
-def FSCalcEllipsoid_v1_0_SingleRrocess(AnalysisType, FSCalType, RanFieldMethod, InZone, SubDisNum, Results_Directory, Code_Directory, Maxrix_Directory, nrows, ncols, nel, cellsize, EllParam, MCnumber, Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLenX, Parameter_CorrLenY, SaveMat, ZoneInput, SlopeInput, ZmaxArg, ZmaxInput, DEMInput, HwInput, rizeroInput, riInp, AspectInput, TimeToAnalyse, NoData, ProblemName=""):
+## Resume options of the Monte Carlo simulations (see Set_MC_Resume).
+## If MC_Resume is True, completed realizations are skipped and partial realizations continue from their checkpoints.
+## A checkpoint of the partial min-FS map is written every MC_CheckpointInterval ellipsoids (0: no checkpoints).
+MC_Resume = False
+MC_CheckpointInterval = 0
+
+
+def Set_MC_Resume(Resume, CheckpointInterval=0):
     """
-    ## This is the main function in which the calculations are done with single processor.
-    ## Many other functions are called and used inside this function.
+    This function sets the resume options of the Monte Carlo simulations.
+
+    Parameters
+    ----------
+    Resume : bool
+        Whether completed realizations are skipped and partial realizations are continued.
+    CheckpointInterval : int
+        Number of ellipsoids between two checkpoints of a realization (0: no checkpoints).
+
+    Returns
+    -------
+    None.
+    """
+    global MC_Resume, MC_CheckpointInterval
+    MC_Resume = bool(Resume)
+    MC_CheckpointInterval = max(int(CheckpointInterval), 0)
+
+
+def MC_Result_Exists(Results_Directory, MC_current):
+    """
+    This function checks whether a realization is completed and can be skipped (only in resume mode).
 
     Parameters
     ----------
-    AnalysisType : str
-        It might be either 'Drained' or 'Undrained'.
-    FSCalType : str
-        It shows which method will be used for FS calculation: 'Normal3D' - 'Bishop3D' - 'Janbu3D'.
-    RanFieldMethod : str
-        It shows which method will be used for random field generation: 'CMD' - 'SCMD' .
-    InZone: array of int
-        The interested zone for the analysis.
-    SubDisNum : int
-         Minimum number of cells desired inside the ellipsoidal sliding surface.
     Results_Directory : str
         The folder to store data.
-    Code_Directory : str
-        The folder including the code.
-    Maxrix_Directory : str
-        The folder for the matrix
-    nrows : int
-        Number of rows.
-    ncols : int
-        Number of columns.
-    nel : int
-        Total number of cells.
+    MC_current : int
+        Number of the realization.
+
+    Returns
+    -------
+    bool
+        True if resume mode is on and the result file of the realization exists.
+    """
+    return MC_Resume and os.path.exists(os.path.join(Results_Directory, "MC_%.4d_FS_Values.npy" % (MC_current)))
+
+
+def MC_Result_Remove(Results_Directory, MC_List):
+    """
+    This function removes the result files left by an earlier run for the realizations to be calculated,
+    so that the realizations not calculated after a convergence stop do not keep the results of the earlier run.
+
+    Parameters
+    ----------
+    Results_Directory : str
+        The folder to store data.
+    MC_List : list
+        Numbers of the realizations to be calculated.
+
+    Returns
+    -------
+    None.
+    """
+    for MC_current in MC_List:
+        NameResFile = os.path.join(Results_Directory, "MC_%.4d_FS_Values.npy" % (MC_current))
+        if os.path.exists(NameResFile):
+            os.remove(NameResFile)
+
+
+def MC_Result_Save(Results_Directory, MC_current, FS_All_MC_InZone):
+    """
+    This function writes the FS values of a realization and removes its checkpoint.
+    The file is written under a temporary name first so that an interrupted write is never taken as a completed realization.
+
+    Parameters
+    ----------
+    Results_Directory : str
+        The folder to store data.
+    MC_current : int
+        Number of the realization.
+    FS_All_MC_InZone : array of floats
+        FS values of the realization (time instances, rows, columns).
+
+    Returns
+    -------
+    None.
+    """
+    NameResFile = os.path.join(Results_Directory, "MC_%.4d_FS_Values" % (MC_current))
+    np.save(NameResFile + "_Partial", FS_All_MC_InZone)  # Save as .npy
+    os.replace(NameResFile + "_Partial.npy", NameResFile + ".npy")
+
+    NameCheckpoint = os.path.join(Results_Directory, "MC_%.4d_Checkpoint.npz" % (MC_current))
+    if os.path.exists(NameCheckpoint):
+        os.remove(NameCheckpoint)
+
+
+def MC_Checkpoint_Save(Results_Directory, MC_current, EllNext, EllCheckpoint, EllTotal, FS_All_MC, Parameter_Fields, ZmaxInput=None):
+    """
+    This function writes a checkpoint of a partial realization if MC_CheckpointInterval ellipsoids are completed since the last one.
+    The random fields are stored together with the min-FS map so that the realization is continued with the same fields.
+
+    Parameters
+    ----------
+    Results_Directory : str
+        The folder to store data.
+    MC_current : int
+        Number of the realization.
+    EllNext : int
+        Index of the next ellipsoid to be analysed (all ellipsoids before are assigned to FS_All_MC).
+    EllCheckpoint : int
+        Value of EllNext at the last checkpoint.
+    EllTotal : int
+        Total number of ellipsoids.
+    FS_All_MC : list
+        Min FS values of the realization so far.
+    Parameter_Fields : array
+        Random fields of the realization.
+    ZmaxInput : array, optional
+        Depth to bedrock of the realization, if it is variable. The default is None.
+
+    Returns
+    -------
+    int
+        Value of EllNext at the last checkpoint.
+    """
+    if MC_CheckpointInterval == 0 or EllNext - EllCheckpoint < MC_CheckpointInterval or EllNext >= EllTotal:
+        return EllCheckpoint
+
+    Checkpoint = {"EllNext": EllNext, "FS_All_MC": np.asarray(FS_All_MC, dtype=float), "Parameter_Fields": np.asarray(Parameter_Fields, dtype=float)}
+    if ZmaxInput is not None:
+        Checkpoint["ZmaxInput"] = np.asarray(ZmaxInput, dtype=float)
+    NameCheckpoint = os.path.join(Results_Directory, "MC_%.4d_Checkpoint" % (MC_current))
+    np.savez(NameCheckpoint + "_Partial", **Checkpoint)
+    os.replace(NameCheckpoint + "_Partial.npz", NameCheckpoint + ".npz")
+    return EllNext
+
+
+def MC_Checkpoint_Load(Results_Directory, MC_current):
+    """
+    This function reads the checkpoint of a partial realization (only in resume mode).
+
+    Parameters
+    ----------
+    Results_Directory : str
+        The folder to store data.
+    MC_current : int
+        Number of the realization.
+
+    Returns
+    -------
+    tuple or None
+        (EllNext, FS_All_MC, Parameter_Fields, ZmaxInput) or None if there is no checkpoint. ZmaxInput is None if it is not stored.
+    """
+    NameCheckpoint = os.path.join(Results_Directory, "MC_%.4d_Checkpoint.npz" % (MC_current))
+    if not MC_Resume or not os.path.exists(NameCheckpoint):
+        return None
+
+    with np.load(NameCheckpoint) as Checkpoint:
+        ZmaxInput = Checkpoint["ZmaxInput"] if "ZmaxInput" in Checkpoint.files else None
+        print("MC:%d continues from the checkpoint at ellipsoid %d" % (MC_current, int(Checkpoint["EllNext"])))
+        return int(Checkpoint["EllNext"]), Checkpoint["FS_All_MC"].tolist(), Checkpoint["Parameter_Fields"], ZmaxInput
+
+
+## Convergence-driven stopping of the Monte Carlo simulations (see Set_MC_Convergence)
+MC_Convergence = False
+MC_ConvergenceTargetSE = 0.01
+MC_ConvergenceCellFraction = 0.95
+MC_ConvergenceMinMC = 50
+
+
+def Set_MC_Convergence(Convergence, TargetSE=0.01, CellFraction=0.95, MinMC=50):
+    """
+    This function sets the convergence-driven stopping options of the Monte Carlo simulations.
+
+    Parameters
+    ----------
+    Convergence : bool
+        Whether the simulations stop before MCnumber when the probability of failure has converged.
+    TargetSE : float
+        Target standard error of the probability of failure of a cell (0-1).
+    CellFraction : float
+        Fraction of the analysed cells (and time instances) that must reach the target standard error.
+    MinMC : int
+        Minimum number of realizations before the simulations can stop.
+
+    Returns
+    -------
+    None.
+    """
+    global MC_Convergence, MC_ConvergenceTargetSE, MC_ConvergenceCellFraction, MC_ConvergenceMinMC
+    MC_Convergence = bool(Convergence)
+    MC_ConvergenceTargetSE = float(TargetSE)
+    MC_ConvergenceCellFraction = float(CellFraction)
+    MC_ConvergenceMinMC = max(int(MinMC), 1)
+
+
+def MC_Convergence_Update(ConvergenceState, Results_Directory, MC_current):
+    """
+    This function adds a completed realization to the running probability of failure (FS<1.0) and checks the convergence.
+
+    The standard error of a cell is calculated with the adjusted (Agresti-Coull) estimate (x+2)/(n+4),
+    so that cells without any failure do not converge after a few realizations.
+    When the simulations converge, the achieved precision is printed and saved as MC_Convergence.npz.
+
+    Parameters
+    ----------
+    ConvergenceState : dict
+        Running counts of the realizations (an empty dictionary at the start of the simulations).
+    Results_Directory : str
+        The folder to store data.
+    MC_current : int
+        Number of the completed realization.
+
+    Returns
+    -------
+    bool
+        True if convergence-driven stopping is on and the probability of failure has converged.
+    """
+    if not MC_Convergence or MC_ImportanceShift is not None:
+        return False
+
+    FS_Values = np.load(os.path.join(Results_Directory, "MC_%.4d_FS_Values.npy" % (MC_current)))
+    if not ConvergenceState:
+        ConvergenceState["MC"] = 0
+        ConvergenceState["Failure"] = np.zeros(np.shape(FS_Values), dtype=np.int64)
+        ConvergenceState["Analysed"] = np.zeros(np.shape(FS_Values), dtype=bool)
+    ConvergenceState["MC"] += 1
+    ConvergenceState["Failure"] += (FS_Values > 0) & (FS_Values < 1.0)  ## FS=0 is not analysed
+    ConvergenceState["Analysed"] |= FS_Values > 0
+
+    MC_Done = ConvergenceState["MC"]
+    if MC_Done < MC_ConvergenceMinMC or not np.any(ConvergenceState["Analysed"]):
+        return False
+
+    Pf = ConvergenceState["Failure"] / MC_Done
+    PfAdjusted = (ConvergenceState["Failure"] + 2.0) / (MC_Done + 4.0)
+    SE = np.sqrt(PfAdjusted * (1.0 - PfAdjusted) / (MC_Done + 4.0))
+    SE_Analysed = SE[ConvergenceState["Analysed"]]
+    FractionConverged = np.mean(SE_Analysed <= MC_ConvergenceTargetSE)
+    if FractionConverged < MC_ConvergenceCellFraction:
+        return False
+
+    ## Report the achieved precision
+    print(
+        "Monte Carlo simulations converged after %d realizations: %.1f%% of the cells have SE(Pf) <= %g (max SE: %.4f)"
+        % (MC_Done, FractionConverged * 100, MC_ConvergenceTargetSE, np.max(SE_Analysed))
+    )
+    Pf[~ConvergenceState["Analysed"]] = np.nan
+    SE[~ConvergenceState["Analysed"]] = np.nan
+    np.savez(
+        os.path.join(Results_Directory, "MC_Convergence.npz"),
+        MC=MC_Done,
+        Pf=Pf,
+        SE=SE,
+        TargetSE=MC_ConvergenceTargetSE,
+        FractionConverged=FractionConverged,
+    )
+    return True
+
+
+def MC_Failure_Probability(FS_Values, LogWeights=None, FSThreshold=1.0):
+    """
+    This function calculates the probability of failure (FS<FSThreshold) of each cell and the coefficient of variation of the estimate.
+    With importance sampling, the failure indicators are weighted with the likelihood ratios of the realizations.
+
+    Parameters
+    ----------
+    FS_Values : array of floats
+        FS values of the realizations (realizations, cells).
+    LogWeights : list of floats, optional
+        Log of the likelihood ratio of each realization (MC_XXXX_LogWeight.npy). The default is None (weights of 1).
+    FSThreshold : float, optional
+        FS threshold of failure. The default is 1.0.
+
+    Returns
+    -------
+    Pf : array of floats
+        Probability of failure (0-1).
+    CoV : array of floats
+        Coefficient of variation of the probability of failure (nan if Pf is 0).
+    """
+    FS_Values = np.asarray(FS_Values)
+    MC_Done = np.shape(FS_Values)[0]
+    Weights = np.ones(MC_Done) if LogWeights is None else np.exp(np.asarray(LogWeights, dtype=float))
+    Weights = np.reshape(Weights, (MC_Done,) + (1,) * (np.ndim(FS_Values) - 1))
+
+    Failure = np.where(FS_Values < FSThreshold, Weights, 0.0)
+    Pf = np.mean(Failure, axis=0)
+    Variance = np.maximum(np.mean(Failure**2, axis=0) - Pf**2, 0) / MC_Done
+    with np.errstate(divide="ignore", invalid="ignore"):
+        CoV = np.where(Pf > 0, np.sqrt(Variance) / Pf, np.nan)
+    return Pf, CoV
+
+
+def MC_Queue_Until_Converged(queue_mc, MC_List, Processes, Results_Directory, ConvergenceState):
+    """
+    This function puts the realizations to the queue of the processes until the probability of failure converges.
+
+    At most one realization per process waits in the queue or runs, so that only a few realizations
+    are calculated after the convergence. Without convergence-driven stopping, all realizations are put at once.
+    A realization is taken as completed when its result file is written, so the result files left by an earlier
+    run for the realizations of MC_List are removed first (these realizations are calculated again).
+
+    Parameters
+    ----------
+    queue_mc : multiprocessing.Queue
+        Queue of the realizations.
+    MC_List : list
+        Numbers of the realizations to be calculated.
+    Processes : list
+        Processes calculating the realizations.
+    Results_Directory : str
+        The folder to store data.
+    ConvergenceState : dict
+        Running counts of the realizations (see MC_Convergence_Update).
+
+    Returns
+    -------
+    None.
+    """
+    ## Remove the result files of an earlier run (only the completed realizations are skipped in resume mode)
+    MC_Result_Remove(Results_Directory, MC_List)
+
+    if not MC_Convergence:
+        for i in MC_List:
+            queue_mc.put(i)
+        return
+
+    MC_Pending = list(MC_List)
+    MC_Running = []
+    while MC_Pending or MC_Running:
+        while MC_Pending and len(MC_Running) < len(Processes):
+            MC_Running.append(MC_Pending.pop(0))
+            queue_mc.put(MC_Running[-1])
+        ## Wait for a realization to be completed
+        MC_Completed = [i for i in MC_Running if os.path.exists(os.path.join(Results_Directory, "MC_%.4d_FS_Values.npy" % (i)))]
+        if not MC_Completed:
+            if not any(p.is_alive() for p in Processes):
+                return
+            time.sleep(1)
+            continue
+        for i in MC_Completed:
+            MC_Running.remove(i)
+            if MC_Convergence_Update(ConvergenceState, Results_Directory, i):
+                MC_Pending = []
+
+
+# ---------------------------------------------------------------------------------
+def FSCalcEllipsoid_v1_0_SingleRrocess(AnalysisType, FSCalType, RanFieldMethod, InZone, SubDisNum, Results_Directory, Code_Directory, Maxrix_Directory, nrows, ncols, nel, cellsize, EllParam, MCnumber, Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLenX, Parameter_CorrLenY, SaveMat, ZoneInput, SlopeInput, ZmaxArg, ZmaxInput, DEMInput, HwInput, rizeroInput, riInp, AspectInput, TimeToAnalyse, NoData, ProblemName=""):
+    """
+    ## This is the main function in which the calculations are done with single processor.
+    ## Many other functions are called and used inside this function.
+
+    Parameters
+    ----------
+    AnalysisType : str
+        It might be either 'Drained' or 'Undrained'.
+    FSCalType : str
+        It shows which method will be used for FS calculation: 'Normal3D' - 'Bishop3D' - 'Janbu3D'.
+    RanFieldMethod : str
+        It shows which method will be used for random field generation: 'CMD' - 'SCMD' .
+    InZone: array of int
+        The interested zone for the analysis.
+    SubDisNum : int
+         Minimum number of cells desired inside the ellipsoidal sliding surface.
+    Results_Directory : str
+        The folder to store data.
+    Code_Directory : str
+        The folder including the code.
+    Maxrix_Directory : str
+        The folder for the matrix
+    nrows : int
+        Number of rows.
+    ncols : int
+        Number of columns.
+    nel : int
+        Total number of cells.
     cellsize : int
         Cell size.
     EllParam : array of float
@@ -1594,35 +2712,57 @@ def FSCalcEllipsoid_v1_0_SingleRrocess(AnalysisType, FSCalType, RanFieldMethod,
     AspectInput[AspectInput == NoData] = np.nan
     ###########
 
+    ## Running probability of failure for convergence-driven stopping
+    ConvergenceState = {}
+
+    ## Remove the result files of an earlier run (only the completed realizations are skipped in resume mode)
+    MC_Result_Remove(Results_Directory, [i for i in range(MCnumber) if not MC_Result_Exists(Results_Directory, i)])
+
     # MC_current = 0
     for MC_current in range(MCnumber):  # One MC analysis in each for loop
         ## Print current MC number
         print("MC:%d" % (MC_current))
 
-        ## Generate parameter fields
-        Parameter_Fields = Par_Fields(
-            Parameter_Means,
-            Parameter_CoVs,
-            Parameter_Dist,
-            Parameter_CorrLenX,
-            Parameter_CorrLenY,
-            nrows,
-            ncols,
-            cellsize,
-            RanFieldMethod,
-            ZoneInput,
-            Maxrix_Directory,
-            NoData,
-            SaveMat,
-        )
+        ## Skip the realization if it is completed in a previous run (resume)
+        if MC_Result_Exists(Results_Directory, MC_current):
+            if MC_Convergence_Update(ConvergenceState, Results_Directory, MC_current):
+                break
+            continue
+
+        ## Continue the realization from its checkpoint, if there is one (resume). Otherwise, start a new realization.
+        Checkpoint = MC_Checkpoint_Load(Results_Directory, MC_current)
+        if Checkpoint is None:
+            ## Generate parameter fields
+            Parameter_Fields = Par_Fields(
+                Parameter_Means,
+                Parameter_CoVs,
+                Parameter_Dist,
+                Parameter_CorrLenX,
+                Parameter_CorrLenY,
+                nrows,
+                ncols,
+                cellsize,
+                RanFieldMethod,
+                ZoneInput,
+                Maxrix_Directory,
+                NoData,
+                SaveMat,
+                MC_current,
+            )
 
-        ## In case of having variable Zmax in the probabilistic analysis
-        if ZmaxArg[0] == "YES":  ## ZmaxArg = (ZmaxVar, CoV_Zmax, MinZmax)
-            ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData)
+            ## In case of having variable Zmax in the probabilistic analysis
+            if ZmaxArg[0] == "YES":  ## ZmaxArg = (ZmaxVar, CoV_Zmax, MinZmax)
+                ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData, MC_current)
 
-        # ## Allocate FS
-        # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
-        FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
+            # ## Allocate FS
+            # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
+            FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
+            EllStart = 0
+        else:
+            EllStart, FS_All_MC, Parameter_Fields, ZmaxCheckpoint = Checkpoint
+            if ZmaxCheckpoint is not None:
+                ZmaxInput = ZmaxCheckpoint
+        EllCheckpoint = EllStart
 
         """
         ## It is possible to generate an ellipsoidal sliding surface at any cell given.
@@ -1637,7 +2777,7 @@ def FSCalcEllipsoid_v1_0_SingleRrocess(AnalysisType, FSCalType, RanFieldMethod,
         #         EllColumn = j
         #         print(EllRow,EllColumn)
 
-        for i in range(np.shape(InZone)[0]):  ## (InZone change)
+        for i in range(EllStart, np.shape(InZone)[0]):  ## (InZone change)
             ## Current Row and Column for the ellipsoid center
             EllRow, EllColumn = InZone[i]
             # print(EllRow,EllColumn)
@@ -1671,6 +2811,9 @@ def FSCalcEllipsoid_v1_0_SingleRrocess(AnalysisType, FSCalType, RanFieldMethod,
                 ProblemName,
             )
 
+            ## Checkpoint of the partial min-FS map
+            EllCheckpoint = MC_Checkpoint_Save(Results_Directory, MC_current, i + 1, EllCheckpoint, np.shape(InZone)[0], FS_All_MC, Parameter_Fields, ZmaxInput if ZmaxArg[0] == "YES" else None)
+
             # print(FS)
             # t_finish = time.time() ## Time after FS calculation for 1 ellipdoidalsliding surface
             # print(t_finish-t_start) ## Time required to analyse sliding surface
@@ -1690,8 +2833,11 @@ def FSCalcEllipsoid_v1_0_SingleRrocess(AnalysisType, FSCalType, RanFieldMethod,
 
         ## Write FS for the current MC simulation
         os.chdir(Results_Directory)
-        NameResFile = "MC_%.4d_FS_Values" % (MC_current)
-        np.save(NameResFile, FS_All_MC_InZone)  # Save as .npy
+        MC_Result_Save(Results_Directory, MC_current, FS_All_MC_InZone)  # Save as .npy
+
+        ## Stop if the probability of failure has converged
+        if MC_Convergence_Update(ConvergenceState, Results_Directory, MC_current):
+            break
 
     return ()
 
@@ -1807,7 +2953,7 @@ def FSCalcEllipsoid_v1_0_MutiProcess(
             ## "MCRun_v1_0_SingleProcess" performs a MC with single processor in the generation of ellipsoidal sliding surfaces.
             ## "MCRun_v1_0_MultiProcess" utilize multiple processors in the generation of ellipsoidal sliding surfaces.
             ## "MCRun_v1_0_MultiThread" utilize multiple threads in the generation of ellipsoidal sliding surfaces.
-            ## Note: "MCRun_v1_0_MultiThread" is not working well. There is a conflict in the assignment of the FS values.
+            ## "MCRun_v1_0_MultiThread" sends chunks of ellipsoids to the threads. The FS values are assigned while holding a lock.
 
             ## Check Multiprocessing_option and run
             if Multiprocessing_Option == "C-MP-SP":
@@ -1942,9 +3088,18 @@ def FSCalcEllipsoid_v1_0_MutiProcess(
             processes_mc.append(p_mc)
             p_mc.start()
 
+        ## Skip the realizations completed in a previous run (resume)
+        ConvergenceState = {}
+        MC_List = []
         for i in range(MCnumber):
-            queue_mc.put(i)
-            print("queue_mc.put([,]): MC ", i)
+            if not MC_Result_Exists(Results_Directory, i):
+                MC_List.append(i)
+                print("queue_mc.put([,]): MC ", i)
+            elif MC_Convergence_Update(ConvergenceState, Results_Directory, i):
+                MC_List = []
+                break
+        ## Put the realizations until the probability of failure converges
+        MC_Queue_Until_Converged(queue_mc, MC_List, processes_mc, Results_Directory, ConvergenceState)
 
         for _ in range(TOTAL_PROCESSES_MC):
             queue_mc.put(None)
@@ -2113,29 +3268,39 @@ def MCRun_v1_0_SingleProcess(queue_mc, FS_All_MC, AnalysisType, FSCalType, RanFi
         MC_current = int(queue_data_mc)
         print("---->------>----->>>>>", int(MC_current))
 
-        Parameter_Fields = Par_Fields(
-            Parameter_Means,
-            Parameter_CoVs,
-            Parameter_Dist,
-            Parameter_CorrLenX,
-            Parameter_CorrLenY,
-            nrows,
-            ncols,
-            cellsize,
-            RanFieldMethod,
-            ZoneInput,
-            Maxrix_Directory,
-            NoData,
-            SaveMat,
-        )
+        ## Continue the realization from its checkpoint, if there is one (resume). Otherwise, start a new realization.
+        Checkpoint = MC_Checkpoint_Load(Results_Directory, MC_current)
+        if Checkpoint is None:
+            Parameter_Fields = Par_Fields(
+                Parameter_Means,
+                Parameter_CoVs,
+                Parameter_Dist,
+                Parameter_CorrLenX,
+                Parameter_CorrLenY,
+                nrows,
+                ncols,
+                cellsize,
+                RanFieldMethod,
+                ZoneInput,
+                Maxrix_Directory,
+                NoData,
+                SaveMat,
+                MC_current,
+            )
 
-        ## In case of having variable Zmax in the probabilistic analysis
-        if ZmaxArg[0] == "YES":  ## ZmaxArg = (ZmaxVar, CoV_Zmax, MinZmax)
-            ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData)
+            ## In case of having variable Zmax in the probabilistic analysis
+            if ZmaxArg[0] == "YES":  ## ZmaxArg = (ZmaxVar, CoV_Zmax, MinZmax)
+                ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData, MC_current)
 
-        ## Allocate FS
-        # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
-        FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
+            ## Allocate FS
+            # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
+            FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
+            EllStart = 0
+        else:
+            EllStart, FS_All_MC, Parameter_Fields, ZmaxCheckpoint = Checkpoint
+            if ZmaxCheckpoint is not None:
+                ZmaxInput = ZmaxCheckpoint
+        EllCheckpoint = EllStart
 
         """
         ## It is possible to generate an ellipsoidal sliding surface at any cell given.
@@ -2150,7 +3315,7 @@ def MCRun_v1_0_SingleProcess(queue_mc, FS_All_MC, AnalysisType, FSCalType, RanFi
         #         EllColumn = j
         #         # print(EllRow,EllColumn)
 
-        for i in range(np.shape(InZone)[0]):  ## (InZone change)
+        for i in range(EllStart, np.shape(InZone)[0]):  ## (InZone change)
             ## Current Row and Column for the ellipsoid center
             EllRow, EllColumn = InZone[i]
             # print(EllRow,EllColumn)
@@ -2184,6 +3349,9 @@ def MCRun_v1_0_SingleProcess(queue_mc, FS_All_MC, AnalysisType, FSCalType, RanFi
                 ProblemName,
             )
 
+            ## Checkpoint of the partial min-FS map
+            EllCheckpoint = MC_Checkpoint_Save(Results_Directory, MC_current, i + 1, EllCheckpoint, np.shape(InZone)[0], FS_All_MC, Parameter_Fields, ZmaxInput if ZmaxArg[0] == "YES" else None)
+
             # print(FS)
             # t_finish = time.time() ## Time after FS calculation for 1 ellipdoidalsliding surface
             # print(t_finish-t_start) ## Time required to analyse sliding surface
@@ -2196,8 +3364,7 @@ def MCRun_v1_0_SingleProcess(queue_mc, FS_All_MC, AnalysisType, FSCalType, RanFi
 
         ## Write FS for the current MC simulation
         os.chdir(Results_Directory)
-        NameResFile = "MC_%.4d_FS_Values" % (MC_current)
-        np.save(NameResFile, FS_All_MC_InZone)  # Save as .npy
+        MC_Result_Save(Results_Directory, MC_current, FS_All_MC_InZone)  # Save as .npy
 
         ## Take another task from the queue
         queue_data_mc = queue_mc.get()
@@ -2381,15 +3548,18 @@ def MCRun_v1_0_MultiProcess(queue_mc, FS_All_MC, TOTAL_PROCESSES_ELL, AnalysisTy
             Maxrix_Directory,
             NoData,
             SaveMat,
+            MC_current,
         )
 
         ## In case of having variable Zmax in the probabilistic analysis
         if ZmaxArg[0] == "YES":  ## ZmaxArg = (ZmaxVar, CoV_Zmax, MinZmax)
-            ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData)
+            ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData, MC_current)
 
         ## Allocate FS
+        ## Each process has its own FS array (no lock); the minimum of the processes is taken after all ellipsoids are completed.
         # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
-        FS_All_MC = Array("d", [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols), lock=True)  ### (Shared array change)
+        # FS_All_MC = Array("d", [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols), lock=True)  ### (Shared array change)
+        FS_All_MC_Processes = [Array("d", np.shape(TimeToAnalyse)[0] * nrows * ncols, lock=False) for _ in range(TOTAL_PROCESSES_ELL)]
 
         """
         ## It is possible to generate an ellipsoidal sliding surface at any cell given.
@@ -2409,7 +3579,7 @@ def MCRun_v1_0_MultiProcess(queue_mc, FS_All_MC, TOTAL_PROCESSES_ELL, AnalysisTy
                     target=EllipsoidFSWithSubDis_v1_0_MultiProcess,
                     args=(
                         queue_ell,
-                        FS_All_MC,
+                        FS_All_MC_Processes[i],
                         AnalysisType,
                         MCnumber,
                         FSCalType,
@@ -2450,13 +3620,17 @@ def MCRun_v1_0_MultiProcess(queue_mc, FS_All_MC, TOTAL_PROCESSES_ELL, AnalysisTy
             for p_ell in processes_ell:
                 p_ell.join()  ## For Processes
 
-        FS_All_MC_InZone = np.asarray(FS_All_MC)
+        ## Minimum FS of the processes (0: no FS assigned to the cell)
+        FS_All_MC_InZone = np.full(np.shape(TimeToAnalyse)[0] * nrows * ncols, np.inf)
+        for FS_All_MC in FS_All_MC_Processes:
+            FS_All_MC = np.frombuffer(FS_All_MC, dtype=np.float64)
+            np.minimum(FS_All_MC_InZone, np.where(FS_All_MC == 0, np.inf, FS_All_MC), out=FS_All_MC_InZone)
+        FS_All_MC_InZone[np.isinf(FS_All_MC_InZone)] = 0
         FS_All_MC_InZone = np.reshape(FS_All_MC_InZone, (np.shape(TimeToAnalyse)[0], nrows, ncols))  ### (Shared array change)
 
         ## Write FS for the current MC simulation
         os.chdir(Results_Directory)
-        NameResFile = "MC_%.4d_FS_Values" % (MC_current)
-        np.save(NameResFile, FS_All_MC_InZone)  # Save as .npy
+        MC_Result_Save(Results_Directory, MC_current, FS_All_MC_InZone)  # Save as .npy
 
         ## Take another task from the queue
         queue_data_mc = queue_mc.get()
@@ -2474,7 +3648,7 @@ def MCRun_v1_0_MultiThread(queue_mc, FS_All_MC, TOTAL_THREADS_ELL, AnalysisType,
     queue_mc : -
         Queue of the tasks for multiprocessing.
     FS_All_MC : list
-        List for storinf all factor of safety values for all Monte Carlo simulations.
+        List for storinf all factor of safety values for all Monte Carlo simulations (reallocated as an array for each simulation).
     TOTAL_THREADS_ELL: int
         Numbers of threads for generation of ellipsoidal sliding surfaces.
     AnalysisType : str
@@ -2637,15 +3811,17 @@ def MCRun_v1_0_MultiThread(queue_mc, FS_All_MC, TOTAL_THREADS_ELL, AnalysisType,
             Maxrix_Directory,
             NoData,
             SaveMat,
+            MC_current,
         )
 
         ## In case of having variable Zmax in the probabilistic analysis
         if ZmaxArg[0] == "YES":  ## ZmaxArg = (ZmaxVar, CoV_Zmax, MinZmax)
-            ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData)
+            ZmaxInput = Zmax_Variable(SlopeInput, ZmaxArg[1], ZmaxArg[2], nrows, ncols, cellsize, NoData, MC_current)
 
         ## Allocate FS  ### (Shared array change)
         # FS_All_MC = Array('d', [0]*(np.shape(TimeToAnalyse)[0] * nrows * ncols), lock=True)   ### (Shared array change)
-        FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
+        ## The threads share the array without copying it.
+        FS_All_MC = np.zeros(np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
         """
         ## It is possible to generate an ellipsoidal sliding surface at any cell given.
         ## Note: If an ellipsoidal sliding surface is truncated by the boundary of the problem domain, the results will be misleading.
@@ -2693,12 +3869,13 @@ def MCRun_v1_0_MultiThread(queue_mc, FS_All_MC, TOTAL_THREADS_ELL, AnalysisType,
             # for i in range (InZone[0,0],InZone[0,1]+1):      ## Row numbers of interest
             #     for j in range (InZone[1,0],InZone[1,1]+1):   ## Column numbers of interest
             #         EllRow, EllColumn = i,j
-            for i in range(np.shape(InZone)[0]):  ## (InZone change)
-                ## Current Row and Column for the ellipsoid center
-                EllRow, EllColumn = InZone[i]
-                # print(EllRow,EllColumn)
-                queue_ell.put([EllRow, EllColumn, nrows, ncols, MC_current])
-                print("queue_ell.put([,]):", EllRow, ",", EllColumn)
+            ## The ellipsoid centers are sent in chunks. Each thread gets at least one chunk when possible.
+            ChunkSize = max(min(EllThread_ChunkSize, int(np.ceil(np.shape(InZone)[0] / TOTAL_THREADS_ELL))), 1)
+            for i in range(0, np.shape(InZone)[0], ChunkSize):  ## (InZone change)
+                ## Current Rows and Columns for the ellipsoid centers
+                EllChunk = np.asarray(InZone[i : i + ChunkSize])
+                queue_ell.put([EllChunk, nrows, ncols, MC_current])
+                print("queue_ell.put([,]):", EllChunk[0][0], ",", EllChunk[0][1], "(chunk of %d)" % np.shape(EllChunk)[0])
 
             for _ in range(TOTAL_THREADS_ELL):
                 queue_ell.put(None)
@@ -2710,8 +3887,7 @@ def MCRun_v1_0_MultiThread(queue_mc, FS_All_MC, TOTAL_THREADS_ELL, AnalysisType,
 
         ## Write FS for the current MC simulation
         os.chdir(Results_Directory)
-        NameResFile = "MC_%.4d_FS_Values" % (MC_current)
-        np.save(NameResFile, FS_All_MC_InZone)  # Save as .npy
+        MC_Result_Save(Results_Directory, MC_current, FS_All_MC_InZone)  # Save as .npy
 
         ## Take another task from the queue
         queue_data_mc = queue_mc.get()
@@ -2981,108 +4157,24 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
     # plt.colorbar()
     # plt.show()
 
-    ## Allocate temporary index
-    IndexTemp = np.arange(0, nrows * ncols, dtype=int)
-    IndexTemp = np.reshape(IndexTemp, (nrows, ncols))
+    ## Window of the ellipsoid (original cell size). Only the data inside the window are sub-discretisized.
+    SubDisWindow = SubDis_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, ProblemName)
 
+    CountSubDis = 0
     ## Subdiscretisize if the number of cells are low (by halving the cell size and arranging the data).
     ## SubDisNum is the minimum number of cells defined by the user in the main code.
     while np.shape(CellsInside)[0] < SubDisNum:
 
-        ## Save previous Coordinates as old coordinates.
-        if nrows == nrows_org:
-            CoorG_old = CoorG
-        else:
-            CoorG_old = CoorG_new  ## Ignore undefined name error here. It will not require it in the first loop.
+        CountSubDis += 1  ## Check how many times subdiscretisized
 
         ## Halve the cellsize for this part only
         cellsize = cellsize / 2
         nrows = nrows * 2  ## Double the number of rows
         ncols = ncols * 2  ## Double the number of columns
 
-        ## Cell center coordinate according to the left bottom option-1 (Global)
-        ## New coordinates in the discretization
-        CoorG_new = []
-        for i in range(nrows):
-            for j in range(ncols):
-                CoorG_new.append(
-                    [
-                        i,
-                        j,
-                        cellsize / 2 + j * cellsize,
-                        (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                    ]
-                )
-        CoorG_new = np.asarray(CoorG_new)  # (row #, column #, x coordinate, y coordinate)
-
-        ## Follow the index numbers
-        IndexTemp = np.kron(IndexTemp, np.ones((2, 2)))
-
-        ## Arrangement of the soil strength parameters according to new cellsize
-        if AnalysisType == "Drained":
-            ## {c, phi, uws, ksat, diffus} for drained analysis
-            c = np.kron(c, np.ones((2, 2)))  ## Cohesion
-            phi = np.kron(phi, np.ones((2, 2)))  ## Friction angle
-            Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-            Ksat = np.kron(Ksat, np.ones((2, 2)))  ## Hydraulic conductivity
-            Diff0 = np.kron(Diff0, np.ones((2, 2)))  ## Diffusivity
-        elif AnalysisType == "Undrained":
-            ## {Su, uws} for drained analysis
-            Su = np.kron(Su, np.ones((2, 2)))  ## Undrained shear strength
-            Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-
-        ## Arrangments with new cellsize
-        ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-        ## "numpy.kron"
-        SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-        ZmaxInput = np.kron(ZmaxInput, np.ones((2, 2)))  ## Zmax input
-        DEMInput = np.kron(DEMInput, np.ones((2, 2)))  ## DEM input
-        HwInput = np.kron(HwInput, np.ones((2, 2)))  ## Ground water table input
-        rizeroInput = np.kron(rizeroInput, np.ones((2, 2)))  ## Background infiltration rate input
-
-        ## Linear interpolation
-        # ## Slope input
-        # SlopeInput[SlopeInput==NoData]   = np.nan
-        # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-        # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-        # ## Zmax input
-        # ZmaxInput[ZmaxInput==NoData]     = np.nan
-        # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-        # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-        # ## DEM input
-        # DEMInput[DEMInput==NoData]       = np.nan
-        # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-        # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-        # ## Ground water table input
-        # HwInput[HwInput==NoData]         = np.nan
-        # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # HwInput = np.reshape(HwInput, (nrows,ncols))
-        # np.nan_to_num(HwInput,copy=False, nan=NoData)
-        # ## Background infiltration rate input
-        # rizeroInput[rizeroInput==NoData] = np.nan
-        # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-        # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
-
-        ### !!!
-        ##This part is for simplified case
-        if ProblemName == "SimpCase":
-            ## np.kron does not work for the simplified case.
-            ## For simplified case, DEM should be calculated again.
-            # Allocate DEMs
-            # DEMInput = np.zeros((nrows, ncols))
-            # for i in range(ncols - 1, -1, -1):
-            #     for j in range(nrows - 2, -1, -1):
-            #         DEMInput[j, i] = DEMInput[j + 1, i] + (
-            #             cellsize / 2 * np.tan(np.radians(SlopeInput[j + 1, i]))
-            #             + cellsize / 2 * np.tan(np.radians(SlopeInput[j, i]))
-            #         )
-            # DEMInput = DEMInput + 50  # I added but no need.
-            DEMInput = Calculate_DEM_SimpCase(DEMInput, SlopeInput, nrows_org, nrows, ncols, cellsize)
-        ### !!!
+        ## DEM inside the window with the new cellsize ("numpy.kron"). Other data are arranged after the loop.
+        DEMPatch = SubDis_DEMPatch(DEMInput, SlopeInput, SubDisWindow, CountSubDis, nrows_org, cellsize, ProblemName)
+        RowOffset, ColOffset = SubDisWindow[0] * 2**CountSubDis, SubDisWindow[2] * 2**CountSubDis
 
         ## Determine the cell inside the ellipsoid
         ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
@@ -3093,7 +4185,7 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
             nrows,
             ncols,
             cellsize,
-            DEMInput,
+            DEMPatch,
             EllCenterX,
             EllCenterY,
             EllDEMCenter,
@@ -3103,6 +4195,8 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
             Ellb,
             Ellc,
             Ellz,
+            RowOffset,
+            ColOffset,
         )
         CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## correction to the very low values
 
@@ -3124,10 +4218,9 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
         Depths[np.isnan(Depths)] = 0
         ## DEM of the sliding surface
         DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
-        # DEMdiff = (DEMInput[(int(CellsInside[i,0]),int(CellsInside[i,1]))] - DepthDEM[i,0])
         DEMdiff = (
             np.reshape(
-                DEMInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))],
+                DEMPatch[(CellsInside[:, 0].astype(int) - RowOffset, CellsInside[:, 1].astype(int) - ColOffset)],
                 (np.shape(CellsInside)[0], 1),
             )
             - DepthDEM
@@ -3140,9 +4233,30 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
         indexes = np.delete(indexes, RemoveCond, 0)
 
         ## Save the indexes acccording to the original indexing
-        indexesOriginal = IndexTemp.flatten()[indexes]
+        indexesOriginal = (CellsInside[:, 0].astype(int) // 2**CountSubDis) * ncols_org + CellsInside[:, 1].astype(int) // 2**CountSubDis
         indexesOriginal = np.unique(indexesOriginal)
 
+    ## Arrangement of the data according to the new cellsize, only inside the window (instead of the whole grid).
+    ## The cells inside are numbered according to the window from now on.
+    if CountSubDis > 0:
+        CellsInside, indexes, nrows, ncols = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)
+        if AnalysisType == "Drained":
+            ## {c, phi, uws, ksat, diffus} for drained analysis
+            c = SubDis_Patch(c, SubDisWindow, CountSubDis)  ## Cohesion
+            phi = SubDis_Patch(phi, SubDisWindow, CountSubDis)  ## Friction angle
+            Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+            Ksat = SubDis_Patch(Ksat, SubDisWindow, CountSubDis)  ## Hydraulic conductivity
+            Diff0 = SubDis_Patch(Diff0, SubDisWindow, CountSubDis)  ## Diffusivity
+        elif AnalysisType == "Undrained":
+            ## {Su, uws} for drained analysis
+            Su = SubDis_Patch(Su, SubDisWindow, CountSubDis)  ## Undrained shear strength
+            Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+        SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+        ZmaxInput = SubDis_Patch(ZmaxInput, SubDisWindow, CountSubDis)  ## Zmax input
+        DEMInput = DEMPatch  ## DEM input
+        HwInput = SubDis_Patch(HwInput, SubDisWindow, CountSubDis, Reuse=True)  ## Ground water table input
+        rizeroInput = SubDis_Patch(rizeroInput, SubDisWindow, CountSubDis, Reuse=True)  ## Background infiltration rate input
+
     ## Calculation of the weight and thickness
     Weight = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
     Thickness = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
@@ -3538,49 +4652,11 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
 
         elif FSCalType == "Bishop3D":
 
-            FS3D = []
-            for PoreWaterForceCurrent in PoreWaterForce:
-                FS3D_current = root(
-                    FSBishop3D,
-                    1.5,
-                    args=(
-                        c,
-                        phi,
-                        CellsInside,
-                        Weight,
-                        PoreWaterForceCurrent,
-                        ThetaAvr,
-                        Theta,
-                        A,
-                        AngleTangentXZE1,
-                    ),
-                )
-                FS3D_current = FS3D_current.x[0]
-                # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                FS3D.append(FS3D_current)
+            FS3D = FS3D_Surfaces(FSCalType, [(c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
         elif FSCalType == "Janbu3D":
 
-            FS3D = []
-            for PoreWaterForceCurrent in PoreWaterForce:
-                FS3D_current = root(
-                    FSJanbu3D,
-                    1.5,
-                    args=(
-                        c,
-                        phi,
-                        CellsInside,
-                        Weight,
-                        PoreWaterForceCurrent,
-                        ThetaAvr,
-                        Theta,
-                        A,
-                        AngleTangentXZE1,
-                    ),
-                )
-                FS3D_current = FS3D_current.x[0]
-                # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                FS3D.append(FS3D_current)
+            FS3D = FS3D_Surfaces(FSCalType, [(c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
     elif AnalysisType == "Undrained":
 
@@ -3609,49 +4685,11 @@ def EllipsoidFSWithSubDis_v1_0_SingleProcess(FS_All_MC, MC_current, MCnumber, An
 
         elif FSCalType == "Bishop3D":
 
-            FS3D = []
-            for PoreWaterForceCurrent in PoreWaterForce:
-                FS3D_current = root(
-                    FSBishop3D,
-                    1.5,
-                    args=(
-                        Su,
-                        phi,
-                        CellsInside,
-                        Weight,
-                        PoreWaterForceCurrent,
-                        ThetaAvr,
-                        Theta,
-                        A,
-                        AngleTangentXZE1,
-                    ),
-                )
-                FS3D_current = FS3D_current.x[0]
-                # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                FS3D.append(FS3D_current)
+            FS3D = FS3D_Surfaces(FSCalType, [(Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
         elif FSCalType == "Janbu3D":
 
-            FS3D = []
-            for PoreWaterForceCurrent in PoreWaterForce:
-                FS3D_current = root(
-                    FSJanbu3D,
-                    1.5,
-                    args=(
-                        Su,
-                        phi,
-                        CellsInside,
-                        Weight,
-                        PoreWaterForceCurrent,
-                        ThetaAvr,
-                        Theta,
-                        A,
-                        AngleTangentXZE1,
-                    ),
-                )
-                FS3D_current = FS3D_current.x[0]
-                # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                FS3D.append(FS3D_current)
+            FS3D = FS3D_Surfaces(FSCalType, [(Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
     ## Changing these values are only related to the indexing.
     ## I changed overall shared array to the sub-shared arrays. Therefore, indexing needs this adjustment.
@@ -3693,8 +4731,8 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
     ----------
     queue_mc : -
         Queue of the tasks for multiprocessing.
-    FS_All_MC : list
-        List for storinf all factor of safety values for all Monte Carlo simulations.
+    FS_All_MC : Array
+        Shared array (without lock) of the process for storing the min factor of safety values of the current Monte Carlo simulation.
     AnalysisType : str
         It might be either 'Drained' or 'Undrained'.
     MCnumber : int
@@ -3765,6 +4803,9 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
         ProblemName,
     )
 
+    ## Only this process writes to its FS array, so the values are updated without lock.
+    FS_All_MC = np.frombuffer(FS_All_MC, dtype=np.float64)
+
     queue_data = queue.get()
 
     while queue_data is not None:
@@ -3989,107 +5030,24 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
         # plt.colorbar()
         # plt.show()
 
-        ## Allocate temporary index
-        IndexTemp = np.arange(0, nrows * ncols, dtype=int)
-        IndexTemp = np.reshape(IndexTemp, (nrows, ncols))
+        ## Window of the ellipsoid (original cell size). Only the data inside the window are sub-discretisized.
+        SubDisWindow = SubDis_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, ProblemName)
 
+        CountSubDis = 0
         ## Subdiscretisize if the number of cells are low (by halving the cell size and arranging the data).
         ## SubDisNum is the minimum number of cells defined by the user in the main code.
         while np.shape(CellsInside)[0] < SubDisNum:
 
-            ## Save previous Coordinates as old coordinates.
-            if nrows == nrows_org:
-                CoorG_old = CoorG
-            else:
-                CoorG_old = CoorG_new  ## Ignore undefined name error here. It will not require it in the first loop.
+            CountSubDis += 1  ## Check how many times subdiscretisized
 
             ## Halve the cellsize for this part only
             cellsize = cellsize / 2
             nrows = nrows * 2  ## Double the number of rows
             ncols = ncols * 2  ## Double the number of columns
 
-            ## Cell center coordinate according to the left bottom option-1 (Global)
-            CoorG_new = []
-            for i in range(nrows):
-                for j in range(ncols):
-                    CoorG_new.append(
-                        [
-                            i,
-                            j,
-                            cellsize / 2 + j * cellsize,
-                            (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                        ]
-                    )
-            CoorG_new = np.asarray(CoorG_new)  # (row #, column #, x coordinate, y coordinate)
-
-            ## Follow the index numbers
-            IndexTemp = np.kron(IndexTemp, np.ones((2, 2)))
-
-            ## Arrangement of the soil strength parameters according to new cellsize
-            if AnalysisType == "Drained":
-                ## {c, phi, uws, ksat, diffus} for drained analysis
-                c = np.kron(c, np.ones((2, 2)))  ## Cohesion
-                phi = np.kron(phi, np.ones((2, 2)))  ## Friction angle
-                Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-                Ksat = np.kron(Ksat, np.ones((2, 2)))  ## Hydraulic conductivity
-                Diff0 = np.kron(Diff0, np.ones((2, 2)))  ## Diffusivity
-            elif AnalysisType == "Undrained":
-                ## {Su, uws} for drained analysis
-                Su = np.kron(Su, np.ones((2, 2)))  ## Undrained shear strength
-                Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-
-            ## Arrangments with new cellsize
-            ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-            ## "numpy.kron"
-            SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-            ZmaxInput = np.kron(ZmaxInput, np.ones((2, 2)))  ## Zmax input
-            DEMInput = np.kron(DEMInput, np.ones((2, 2)))  ## DEM input
-            HwInput = np.kron(HwInput, np.ones((2, 2)))  ## Ground water table input
-            rizeroInput = np.kron(rizeroInput, np.ones((2, 2)))  ## Background infiltration rate input
-
-            # ## Linear interpolation
-            # ## Slope input
-            # SlopeInput[SlopeInput==NoData]   = np.nan
-            # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-            # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-            # ## Zmax input
-            # ZmaxInput[ZmaxInput==NoData]     = np.nan
-            # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-            # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-            # ## DEM input
-            # DEMInput[DEMInput==NoData]       = np.nan
-            # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-            # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-            # ## Ground water table input
-            # HwInput[HwInput==NoData]         = np.nan
-            # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # HwInput = np.reshape(HwInput, (nrows,ncols))
-            # np.nan_to_num(HwInput,copy=False, nan=NoData)
-            # ## Background infiltration rate input
-            # rizeroInput[rizeroInput==NoData] = np.nan
-            # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-            # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
-
-            ### !!!
-            ##This part is for simplified case
-            if ProblemName == "SimpCase":
-                ## np.kron does not work for the simplified case.
-                ## For simplified case, DEM should be calculated again.
-                # Allocate DEMs
-                # DEMInput = np.zeros((nrows, ncols))
-                # for i in range(ncols - 1, -1, -1):
-                #     for j in range(nrows - 2, -1, -1):
-                #         DEMInput[j, i] = DEMInput[j + 1, i] + (
-                #             cellsize / 2 * np.tan(np.radians(SlopeInput[j + 1, i]))
-                #             + cellsize / 2 * np.tan(np.radians(SlopeInput[j, i]))
-                #         )
-                # DEMInput = DEMInput + 50  # I added but no need.
-                DEMInput = Calculate_DEM_SimpCase(DEMInput, SlopeInput, nrows_org, nrows, ncols, cellsize)
-            ### !!!
+            ## DEM inside the window with the new cellsize ("numpy.kron"). Other data are arranged after the loop.
+            DEMPatch = SubDis_DEMPatch(DEMInput, SlopeInput, SubDisWindow, CountSubDis, nrows_org, cellsize, ProblemName)
+            RowOffset, ColOffset = SubDisWindow[0] * 2**CountSubDis, SubDisWindow[2] * 2**CountSubDis
 
             ## Determine the cell inside the ellipsoid
             ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
@@ -4100,7 +5058,7 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
                 nrows,
                 ncols,
                 cellsize,
-                DEMInput,
+                DEMPatch,
                 EllCenterX,
                 EllCenterY,
                 EllDEMCenter,
@@ -4110,6 +5068,8 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
                 Ellb,
                 Ellc,
                 Ellz,
+                RowOffset,
+                ColOffset,
             )
             CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## correction to the very low values
 
@@ -4131,10 +5091,9 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
             Depths[np.isnan(Depths)] = 0
             ## DEM of the sliding surface
             DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
-            # DEMdiff = (DEMInput[(int(CellsInside[i,0]),int(CellsInside[i,1]))] - DepthDEM[i,0])
             DEMdiff = (
                 np.reshape(
-                    DEMInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))],
+                    DEMPatch[(CellsInside[:, 0].astype(int) - RowOffset, CellsInside[:, 1].astype(int) - ColOffset)],
                     (np.shape(CellsInside)[0], 1),
                 )
                 - DepthDEM
@@ -4147,9 +5106,30 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
             indexes = np.delete(indexes, RemoveCond, 0)
 
             ## Save the indexes acccording to the original indexing
-            indexesOriginal = IndexTemp.flatten()[indexes]
+            indexesOriginal = (CellsInside[:, 0].astype(int) // 2**CountSubDis) * ncols_org + CellsInside[:, 1].astype(int) // 2**CountSubDis
             indexesOriginal = np.unique(indexesOriginal)
 
+        ## Arrangement of the data according to the new cellsize, only inside the window (instead of the whole grid).
+        ## The cells inside are numbered according to the window from now on.
+        if CountSubDis > 0:
+            CellsInside, indexes, nrows, ncols = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)
+            if AnalysisType == "Drained":
+                ## {c, phi, uws, ksat, diffus} for drained analysis
+                c = SubDis_Patch(c, SubDisWindow, CountSubDis)  ## Cohesion
+                phi = SubDis_Patch(phi, SubDisWindow, CountSubDis)  ## Friction angle
+                Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+                Ksat = SubDis_Patch(Ksat, SubDisWindow, CountSubDis)  ## Hydraulic conductivity
+                Diff0 = SubDis_Patch(Diff0, SubDisWindow, CountSubDis)  ## Diffusivity
+            elif AnalysisType == "Undrained":
+                ## {Su, uws} for drained analysis
+                Su = SubDis_Patch(Su, SubDisWindow, CountSubDis)  ## Undrained shear strength
+                Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+            SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+            ZmaxInput = SubDis_Patch(ZmaxInput, SubDisWindow, CountSubDis)  ## Zmax input
+            DEMInput = DEMPatch  ## DEM input
+            HwInput = SubDis_Patch(HwInput, SubDisWindow, CountSubDis, Reuse=True)  ## Ground water table input
+            rizeroInput = SubDis_Patch(rizeroInput, SubDisWindow, CountSubDis, Reuse=True)  ## Background infiltration rate input
+
         ## Calculation of the weight and thickness
         Weight = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
         Thickness = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
@@ -4547,49 +5527,11 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
 
             elif FSCalType == "Bishop3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSBishop3D,
-                        1.5,
-                        args=(
-                            c,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D = FS3D_Surfaces(FSCalType, [(c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
             elif FSCalType == "Janbu3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSJanbu3D,
-                        1.5,
-                        args=(
-                            c,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D = FS3D_Surfaces(FSCalType, [(c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
         elif AnalysisType == "Undrained":
 
@@ -4618,49 +5560,11 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
 
             elif FSCalType == "Bishop3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSBishop3D,
-                        1.5,
-                        args=(
-                            Su,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D = FS3D_Surfaces(FSCalType, [(Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
             elif FSCalType == "Janbu3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSJanbu3D,
-                        1.5,
-                        args=(
-                            Su,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D = FS3D_Surfaces(FSCalType, [(Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1)], FSInitial=1.5)[0]
 
         ## Changing these values are only related to the indexing.
         ## I changed overall shared array to the sub-shared arrays. Therefore, indexing needs this adjustment.
@@ -4680,8 +5584,8 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
             GlobalIndexFS = np.asarray(GlobalIndexFS, dtype=int)
 
             ## Assign the min FS to the cells inside the sliding surface
-            for i in GlobalIndexFS:
-                FS_All_MC[i] = FS3D_current if ((FS_All_MC[i] == 0) or (FS_All_MC[i] > FS3D_current)) else FS_All_MC[i]
+            FS_Cells = FS_All_MC[GlobalIndexFS]
+            FS_All_MC[GlobalIndexFS] = np.where((FS_Cells == 0) | (FS_Cells > FS3D_current), FS3D_current, FS_Cells)
 
         print(
             "************************************************************ MC:",
@@ -4697,16 +5601,23 @@ def EllipsoidFSWithSubDis_v1_0_MultiProcess(queue, FS_All_MC, AnalysisType, MCnu
 
 
 # ---------------------------------------------------------------------------------
+## Maximum number of ellipsoids sent to a thread as one task in "C-MP-MT".
+## The cell-level calculations are NumPy operations, which release the GIL, and the FS of a chunk is solved together.
+EllThread_ChunkSize = 16
+## The threads of a Monte Carlo simulation share the same FS array. Assignments to it are done while holding this lock.
+FS_All_MC_Lock = Lock()
+
+
 def EllipsoidFSWithSubDis_v1_0_MultiThread(queue, FS_All_MC, AnalysisType, MCnumber, FSCalType, SubDisNum, nrows, ncols, nel, cellsize, Parameter_Fields, EllParam, SlopeInput, ZmaxInput, DEMInput, HwInput, rizeroInput, riInp, AspectInput, TimeToAnalyse, NoData, ProblemName=""):
     """
     This function calculates the factor of safety by assuming an ellipsoidal shape, and used in multiple thread function.
 
     Parameters
     ----------
-    queue_mc : -
-        Queue of the tasks for multiprocessing.
-    FS_All_MC : list
-        List for storinf all factor of safety values for all Monte Carlo simulations.
+    queue : -
+        Queue of the tasks for threads. Each task is a chunk of ellipsoid centers.
+    FS_All_MC : array of floats
+        Array for storing the factor of safety values of the current Monte Carlo simulation (shared by the threads).
     AnalysisType : str
         It might be either 'Drained' or 'Undrained'.
     MCnumber : int
@@ -4777,331 +5688,144 @@ def EllipsoidFSWithSubDis_v1_0_MultiThread(queue, FS_All_MC, AnalysisType, MCnum
         ProblemName,
     )
 
+    ## Cell center coordinate according to the left bottom (the same for all ellipsoids)
+    CoorRow, CoorCol = np.divmod(np.arange(nrows * ncols), ncols)
+    CoorG = np.column_stack((CoorRow, CoorCol, cellsize / 2 + CoorCol * cellsize, (nrows - 1) * cellsize + cellsize / 2 - CoorRow * cellsize)).astype(float)  # (row #, column #, x coordinate, y coordinate)
+
     queue_data = queue.get()
 
     while queue_data is not None:
 
-        ## Here, the original parameters are assigned again in order to not change the parameters in the while loop.
-        (
-            AnalysisType,
-            FSCalType,
-            SubDisNum,
-            nrows,
-            ncols,
-            nel,
-            cellsize,
-            Parameter_Fields,
-            EllParam,
-            SlopeInput,
-            ZmaxInput,
-            DEMInput,
-            HwInput,
-            rizeroInput,
-            riInp,
-            AspectInput,
-            TimeToAnalyse,
-            NoData,
-            ProblemName,
-        ) = arg_original_ell[:]
+        ## Extract the prameters from the queue. Each task is a chunk of ellipsoid centers.
+        EllChunk = queue_data[0]
+        nrows_org, ncols_org = int(queue_data[1]), int(queue_data[2])
+        MC_current = int(queue_data[3])
 
-        ## Extract the prameters from the queue
-        EllRow, EllColumn = int(queue_data[0]), int(queue_data[1])
-        nrows_org, ncols_org = int(queue_data[2]), int(queue_data[3])
-        MC_current = int(queue_data[4])
+        ## Surfaces of the chunk. Bishop 3D and Janbu 3D surfaces are solved together.
+        FS3D_Pending, FS3D_PendingOriginal, SolvedSurfaces = [], [], []
 
-        # Assign the parameters
-        if AnalysisType == "Drained":
-            ## {c, phi, uws, ksat, diffus} for drained analysis
-            c = Parameter_Fields[0]  ## Cohesion
-            phi = Parameter_Fields[1]  ## Friction angle
-            Gamma = Parameter_Fields[2]  ## Unit weight
-            Ksat = Parameter_Fields[3]  ## Hydraulic conductivity
-            Diff0 = Parameter_Fields[4]  ## Diffusivity
-        elif AnalysisType == "Undrained":
-            ## {Su, uws} for drained analysis
-            Su = Parameter_Fields[0]  ## Undrained shear strength
-            Gamma = Parameter_Fields[1]  ## Unit weight
+        for EllCurr in range(np.shape(EllChunk)[0]):
 
-        ## Cell center coordinate according to the left bottom
-        ## Option-1 (Global)
-        CoorG = []  ## Allocate
-        for i in range(nrows):
-            for j in range(ncols):
-                CoorG.append(
-                    [
-                        i,
-                        j,
-                        cellsize / 2 + j * cellsize,
-                        (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                    ]
-                )
-        CoorG = np.asarray(CoorG)  # (row #, column #, x coordinate, y coordinate)
-        ## Option-2
-        # Gx = np.linspace(cellsize/2,(ncols-1)*cellsize+cellsize/2,num=ncols)
-        # Gy = np.linspace((nrows-1)*cellsize+cellsize/2,cellsize/2,num=nrows)
-        ## Create a coordinate mesh
-        # CoorGX,CoorGY=np.meshgrid(Gx,Gy)
+            ## Here, the original parameters are assigned again in order to not change the parameters in the while loop.
+            (
+                AnalysisType,
+                FSCalType,
+                SubDisNum,
+                nrows,
+                ncols,
+                nel,
+                cellsize,
+                Parameter_Fields,
+                EllParam,
+                SlopeInput,
+                ZmaxInput,
+                DEMInput,
+                HwInput,
+                rizeroInput,
+                riInp,
+                AspectInput,
+                TimeToAnalyse,
+                NoData,
+                ProblemName,
+            ) = arg_original_ell[:]
 
-        ## Ellipsoidal parameters
-        ## Global coordinates based on EllRow, EllColumn
-        temp = CoorG[np.ix_(CoorG[:, 0] == np.array((EllRow)), np.array([False, True, True, True]))]
-        temp = temp[np.ix_(temp[:, 0] == np.array((EllColumn)), np.array([False, True, True]))]
-        ## Coordinates accotding to the global
-        EllCenterX = temp[0][0]
-        EllCenterY = temp[0][1]
-        ## Ellipsoidal center DEM data
-        EllDEMCenter = DEMInput[EllRow, EllColumn]
-        ## Ellipsoid dimensions and orientation
-        Ella = EllParam[0]
-        Ellb = EllParam[1]
-        Ellc = EllParam[2]
-        Ellz = EllParam[4]  ## Offset of the ellipsoid
+            ## Current Row and Column for the ellipsoid center
+            EllRow, EllColumn = int(EllChunk[EllCurr][0]), int(EllChunk[EllCurr][1])
 
-        ## The inclination of the ellipdoidal sliding surface, Ellbeta value, is calculated as
-        ## the average slope angle within a zone of rectangle with the dimensions of (2*Ella – 2* Ellb).
-        ## Coordinates according to the center of allipsoid, e
-        CoorEll = CoorG[:] - np.array((0, 0, EllCenterX, EllCenterY))
+            # Assign the parameters
+            if AnalysisType == "Drained":
+                ## {c, phi, uws, ksat, diffus} for drained analysis
+                c = Parameter_Fields[0]  ## Cohesion
+                phi = Parameter_Fields[1]  ## Friction angle
+                Gamma = Parameter_Fields[2]  ## Unit weight
+                Ksat = Parameter_Fields[3]  ## Hydraulic conductivity
+                Diff0 = Parameter_Fields[4]  ## Diffusivity
+            elif AnalysisType == "Undrained":
+                ## {Su, uws} for drained analysis
+                Su = Parameter_Fields[0]  ## Undrained shear strength
+                Gamma = Parameter_Fields[1]  ## Unit weight
 
-        ## Check if EllAlpha should be calculated or assigned.
-        EllAlpha_Calc = EllParam[5]
-        if EllAlpha_Calc == "Yes":
-            ########### (Change aspect)
-            ## Calculate the distance (over xy) to the center of the ellipoid
-            Distance_to_Center = np.sqrt(CoorEll[:, 2] ** 2 + CoorEll[:, 3] ** 2)
-            Cell_Inside_Circle = CoorEll[(Distance_to_Center <= Ella)]
-            EllAlpha = np.nanmean(
-                AspectInput[
-                    Cell_Inside_Circle[:, 0].astype(int),
-                    Cell_Inside_Circle[:, 1].astype(int),
-                ]
+            ## Cell center coordinate according to the left bottom, CoorG, is calculated once before the loop.
+            ## Option-2
+            # Gx = np.linspace(cellsize/2,(ncols-1)*cellsize+cellsize/2,num=ncols)
+            # Gy = np.linspace((nrows-1)*cellsize+cellsize/2,cellsize/2,num=nrows)
+            ## Create a coordinate mesh
+            # CoorGX,CoorGY=np.meshgrid(Gx,Gy)
+
+            ## Ellipsoidal parameters
+            ## Global coordinates based on EllRow, EllColumn
+            temp = CoorG[np.ix_(CoorG[:, 0] == np.array((EllRow)), np.array([False, True, True, True]))]
+            temp = temp[np.ix_(temp[:, 0] == np.array((EllColumn)), np.array([False, True, True]))]
+            ## Coordinates accotding to the global
+            EllCenterX = temp[0][0]
+            EllCenterY = temp[0][1]
+            ## Ellipsoidal center DEM data
+            EllDEMCenter = DEMInput[EllRow, EllColumn]
+            ## Ellipsoid dimensions and orientation
+            Ella = EllParam[0]
+            Ellb = EllParam[1]
+            Ellc = EllParam[2]
+            Ellz = EllParam[4]  ## Offset of the ellipsoid
+
+            ## The inclination of the ellipdoidal sliding surface, Ellbeta value, is calculated as
+            ## the average slope angle within a zone of rectangle with the dimensions of (2*Ella – 2* Ellb).
+            ## Coordinates according to the center of allipsoid, e
+            CoorEll = CoorG[:] - np.array((0, 0, EllCenterX, EllCenterY))
+
+            ## Check if EllAlpha should be calculated or assigned.
+            EllAlpha_Calc = EllParam[5]
+            if EllAlpha_Calc == "Yes":
+                ########### (Change aspect)
+                ## Calculate the distance (over xy) to the center of the ellipoid
+                Distance_to_Center = np.sqrt(CoorEll[:, 2] ** 2 + CoorEll[:, 3] ** 2)
+                Cell_Inside_Circle = CoorEll[(Distance_to_Center <= Ella)]
+                EllAlpha = np.nanmean(
+                    AspectInput[
+                        Cell_Inside_Circle[:, 0].astype(int),
+                        Cell_Inside_Circle[:, 1].astype(int),
+                    ]
+                )
+                EllAlpha = EllAlpha - 90  ## 90 is the different between the values
+                ###########
+            elif EllAlpha_Calc == "No":
+                EllAlpha = EllParam[3]
+
+            x1 = CoorEll[:, 2] * np.cos(np.radians(EllAlpha)) - CoorEll[:, 3] * np.sin(np.radians(EllAlpha))
+            y1 = CoorEll[:, 3] * np.cos(np.radians(EllAlpha)) + CoorEll[:, 2] * np.sin(np.radians(EllAlpha))
+            ## Coordinates according to the ellipsoid coordinate system, e'(e rotated by EllAlpha)
+            CoorEll1 = np.concatenate(
+                (
+                    CoorEll[:, [0, 1]],
+                    np.reshape(x1, (np.shape(CoorG)[0], 1)),
+                    np.reshape(y1, (np.shape(CoorG)[0], 1)),
+                ),
+                axis=1,
             )
-            EllAlpha = EllAlpha - 90  ## 90 is the different between the values
-            ###########
-        elif EllAlpha_Calc == "No":
-            EllAlpha = EllParam[3]
+            ## Cells inside the zone of rectangle with the dimensions of (2*Ella – 2* Ellb)
+            CellsInsideRect = CoorEll1[(np.abs(CoorEll1[:, 2]) <= Ella) & (np.abs(CoorEll1[:, 3]) <= Ellb)]
+            ## Slope of the ellipsoid is the average slope around the ellipsoid (a rectangular area)
+            SlopeRect = SlopeInput[CellsInsideRect[:, 0].astype(int), CellsInsideRect[:, 1].astype(int)]
+            SlopeRect = SlopeRect[SlopeRect != NoData]  # Remove the value of no data, NoData
+            EllBeta = np.mean(SlopeRect)
+
+            ##!!!
+            ##This part is for validation problem 3
+            if ProblemName == "Pr3S1Dry" or ProblemName == "Pr3S2Dry" or ProblemName == "Pr3S2Wet":
+                EllBeta = np.degrees(np.arctan(0.5))
+            ##!!!
 
-        x1 = CoorEll[:, 2] * np.cos(np.radians(EllAlpha)) - CoorEll[:, 3] * np.sin(np.radians(EllAlpha))
-        y1 = CoorEll[:, 3] * np.cos(np.radians(EllAlpha)) + CoorEll[:, 2] * np.sin(np.radians(EllAlpha))
-        ## Coordinates according to the ellipsoid coordinate system, e'(e rotated by EllAlpha)
-        CoorEll1 = np.concatenate(
-            (
-                CoorEll[:, [0, 1]],
-                np.reshape(x1, (np.shape(CoorG)[0], 1)),
-                np.reshape(y1, (np.shape(CoorG)[0], 1)),
-            ),
-            axis=1,
-        )
-        ## Cells inside the zone of rectangle with the dimensions of (2*Ella – 2* Ellb)
-        CellsInsideRect = CoorEll1[(np.abs(CoorEll1[:, 2]) <= Ella) & (np.abs(CoorEll1[:, 3]) <= Ellb)]
-        ## Slope of the ellipsoid is the average slope around the ellipsoid (a rectangular area)
-        SlopeRect = SlopeInput[CellsInsideRect[:, 0].astype(int), CellsInsideRect[:, 1].astype(int)]
-        SlopeRect = SlopeRect[SlopeRect != NoData]  # Remove the value of no data, NoData
-        EllBeta = np.mean(SlopeRect)
-
-        ##!!!
-        ##This part is for validation problem 3
-        if ProblemName == "Pr3S1Dry" or ProblemName == "Pr3S2Dry" or ProblemName == "Pr3S2Wet":
-            EllBeta = np.degrees(np.arctan(0.5))
-        ##!!!
-
-        # See = np.zeros((nrows,ncols))
-        # for i in range(np.shape(CellsInsideRect)[0]):
-        #     See[int(CellsInsideRect[i][0]),int(CellsInsideRect[i][1])] = CellsInsideRect[i][1]
-        # import matplotlib.pyplot as plt
-        # fig, axs = plt.subplots(1, 1)
-        # #plt.title('')
-        # plt.imshow(See)
-        # plt.colorbar()
-        # plt.show()
-
-        #########################################################################
-        #########################################################################
-
-        ## Determine the cell inside the ellipsoid
-        ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
-        ## Two function was considered CellsInsideEll and CellsInsideEllV2 considering 2D, and 3D approachs respectively.
-        ## CellsInsideEllV2 is better in identifying the cells inside.
-        # indexes, CellsInside = CellsInsideEll(CoorG,EllCenterX,EllCenterY,Ella,Ellb,Ellc, Ellz, EllAlpha,EllBeta)
-        indexes, CellsInside = CellsInsideEllV2(
-            nrows,
-            ncols,
-            cellsize,
-            DEMInput,
-            EllCenterX,
-            EllCenterY,
-            EllDEMCenter,
-            EllAlpha,
-            EllBeta,
-            Ella,
-            Ellb,
-            Ellc,
-            Ellz,
-        )
-        CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## Correction to the very low values
-
-        ## Calculate the depth at a given cell
-        ## If the DEM of the cell is lower than the DEM of the sliding surface, it is removed.
-        Depths = EllDepth(
-            CellsInside[:, 2],
-            CellsInside[:, 3],
-            EllCenterX,
-            EllCenterY,
-            Ella,
-            Ellb,
-            Ellc,
-            Ellz,
-            EllAlpha,
-            EllBeta,
-        )
-        Depths = np.reshape(Depths, (np.shape(CellsInside)[0], 1))
-        Depths[np.isnan(Depths)] = 0
-        ## DEM of the sliding surface
-        DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
-
-        ##!!!
-        ##This part is for validation problem 2
-        if ProblemName == "Pr2":
-            SlopeInput2 = np.zeros((nrows))
-            SlopeInput2[: int(0.58 / cellsize) + 1] = SlopeInput[1, 1]
-            DEMInput2 = np.zeros((nrows))
-            for i in range(nrows - 1):
-                DEMInput2[i + 1] = DEMInput2[i] + +(cellsize / 2 * np.tan(np.radians(SlopeInput2[i])) + cellsize / 2 * np.tan(np.radians(SlopeInput2[i + 1])))
-            DEMInput2 = DEMInput2 + cellsize / 2 * np.tan(np.radians(SlopeInput[1, 1]))
-            DEMInput2 = DEMInput2[::-1]
-            DEMInput2 = np.transpose([DEMInput2] * ncols)
-
-            DEMInput = DEMInput2
-        ##!!!
-
-        DEMdiff = (
-            np.reshape(
-                DEMInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))],
-                (np.shape(CellsInside)[0], 1),
-            )
-            - DepthDEM
-        )
-        ## Removing condition to eliminate the cells lower than the DEM of the sliding surface
-        RemoveCond = np.where(DEMdiff < 0)[0]
-        CellsInside = np.delete(CellsInside, RemoveCond, 0)
-        Depths = np.delete(Depths, RemoveCond, 0)
-        DepthDEM = np.delete(DepthDEM, RemoveCond, 0)
-        indexes = np.delete(indexes, RemoveCond, 0)
-
-        ## Save the indexes acccording to the original indexing
-        indexesOriginal = indexes
-
-        # # See the current sliding suface
-        # See = np.zeros((nrows,ncols))
-        # for i in range(np.shape(CellsInside)[0]):
-        #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = indexes[i]
-        # import matplotlib.pyplot as plt
-        # fig, axs = plt.subplots(1, 1)
-        # #plt.title('')
-        # plt.imshow(See)
-        # plt.colorbar()
-        # plt.show()
-
-        ## Allocate temporary index
-        IndexTemp = np.arange(0, nrows * ncols, dtype=int)
-        IndexTemp = np.reshape(IndexTemp, (nrows, ncols))
-
-        ## Subdiscretisize if the number of cells are low (by halving the cell size and arranging the data).
-        ## SubDisNum is the minimum number of cells defined by the user in the main code.
-        while np.shape(CellsInside)[0] < SubDisNum:
-
-            ## Save previous Coordinates as old coordinates.
-            if nrows == nrows_org:
-                CoorG_old = CoorG
-            else:
-                CoorG_old = CoorG_new  ## Ignore undefined name error here. It will not require it in the first loop.
-
-            ## Halve the cellsize for this part only
-            cellsize = cellsize / 2
-            nrows = nrows * 2  ## Double the number of rows
-            ncols = ncols * 2  ## Double the number of columns
-
-            ## Cell center coordinate according to the left bottom option-1 (Global)
-            CoorG_new = []
-            for i in range(nrows):
-                for j in range(ncols):
-                    CoorG_new.append(
-                        [
-                            i,
-                            j,
-                            cellsize / 2 + j * cellsize,
-                            (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                        ]
-                    )
-            CoorG_new = np.asarray(CoorG_new)  # (row #, column #, x coordinate, y coordinate)
-
-            ## Follow the index numbers
-            IndexTemp = np.kron(IndexTemp, np.ones((2, 2)))
-
-            ## Arrangement of the soil strength parameters according to new cellsize
-            if AnalysisType == "Drained":
-                ## {c, phi, uws, ksat, diffus} for drained analysis
-                c = np.kron(c, np.ones((2, 2)))  ## Cohesion
-                phi = np.kron(phi, np.ones((2, 2)))  ## Friction angle
-                Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-                Ksat = np.kron(Ksat, np.ones((2, 2)))  ## Hydraulic conductivity
-                Diff0 = np.kron(Diff0, np.ones((2, 2)))  ## Diffusivity
-            elif AnalysisType == "Undrained":
-                ## {Su, uws} for drained analysis
-                Su = np.kron(Su, np.ones((2, 2)))  ## Undrained shear strength
-                Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
+            # See = np.zeros((nrows,ncols))
+            # for i in range(np.shape(CellsInsideRect)[0]):
+            #     See[int(CellsInsideRect[i][0]),int(CellsInsideRect[i][1])] = CellsInsideRect[i][1]
+            # import matplotlib.pyplot as plt
+            # fig, axs = plt.subplots(1, 1)
+            # #plt.title('')
+            # plt.imshow(See)
+            # plt.colorbar()
+            # plt.show()
 
-            ## Arrangments with new cellsize
-            ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-            ## "numpy.kron"
-            SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-            ZmaxInput = np.kron(ZmaxInput, np.ones((2, 2)))  ## Zmax input
-            DEMInput = np.kron(DEMInput, np.ones((2, 2)))  ## DEM input
-            HwInput = np.kron(HwInput, np.ones((2, 2)))  ## Ground water table input
-            rizeroInput = np.kron(rizeroInput, np.ones((2, 2)))  ## Background infiltration rate input
-
-            # ## Linear interpolation
-            # ## Slope input
-            # SlopeInput[SlopeInput==NoData]   = np.nan
-            # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-            # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-            # ## Zmax input
-            # ZmaxInput[ZmaxInput==NoData]     = np.nan
-            # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-            # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-            # ## DEM input
-            # DEMInput[DEMInput==NoData]       = np.nan
-            # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-            # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-            # ## Ground water table input
-            # HwInput[HwInput==NoData]         = np.nan
-            # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # HwInput = np.reshape(HwInput, (nrows,ncols))
-            # np.nan_to_num(HwInput,copy=False, nan=NoData)
-            # ## Background infiltration rate input
-            # rizeroInput[rizeroInput==NoData] = np.nan
-            # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-            # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
-
-            ### !!!
-            ##This part is for simplified case
-            if ProblemName == "SimpCase":
-                ## np.kron does not work for the simplified case.
-                ## For simplified case, DEM should be calculated again.
-                # Allocate DEMs
-                # DEMInput = np.zeros((nrows, ncols))
-                # for i in range(ncols - 1, -1, -1):
-                #     for j in range(nrows - 2, -1, -1):
-                #         DEMInput[j, i] = DEMInput[j + 1, i] + (
-                #             cellsize / 2 * np.tan(np.radians(SlopeInput[j + 1, i]))
-                #             + cellsize / 2 * np.tan(np.radians(SlopeInput[j, i]))
-                #         )
-                # DEMInput = DEMInput + 50  # I added but no need.
-                DEMInput = Calculate_DEM_SimpCase(DEMInput, SlopeInput, nrows_org, nrows, ncols, cellsize)
-            ### !!!
+            #########################################################################
+            #########################################################################
 
             ## Determine the cell inside the ellipsoid
             ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
@@ -5123,7 +5847,7 @@ def EllipsoidFSWithSubDis_v1_0_MultiThread(queue, FS_All_MC, AnalysisType, MCnum
                 Ellc,
                 Ellz,
             )
-            CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## correction to the very low values
+            CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## Correction to the very low values
 
             ## Calculate the depth at a given cell
             ## If the DEM of the cell is lower than the DEM of the sliding surface, it is removed.
@@ -5143,7 +5867,22 @@ def EllipsoidFSWithSubDis_v1_0_MultiThread(queue, FS_All_MC, AnalysisType, MCnum
             Depths[np.isnan(Depths)] = 0
             ## DEM of the sliding surface
             DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
-            # DEMdiff = (DEMInput[(int(CellsInside[i,0]),int(CellsInside[i,1]))] - DepthDEM[i,0])
+
+            ##!!!
+            ##This part is for validation problem 2
+            if ProblemName == "Pr2":
+                SlopeInput2 = np.zeros((nrows))
+                SlopeInput2[: int(0.58 / cellsize) + 1] = SlopeInput[1, 1]
+                DEMInput2 = np.zeros((nrows))
+                for i in range(nrows - 1):
+                    DEMInput2[i + 1] = DEMInput2[i] + +(cellsize / 2 * np.tan(np.radians(SlopeInput2[i])) + cellsize / 2 * np.tan(np.radians(SlopeInput2[i + 1])))
+                DEMInput2 = DEMInput2 + cellsize / 2 * np.tan(np.radians(SlopeInput[1, 1]))
+                DEMInput2 = DEMInput2[::-1]
+                DEMInput2 = np.transpose([DEMInput2] * ncols)
+
+                DEMInput = DEMInput2
+            ##!!!
+
             DEMdiff = (
                 np.reshape(
                     DEMInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))],
@@ -5159,243 +5898,333 @@ def EllipsoidFSWithSubDis_v1_0_MultiThread(queue, FS_All_MC, AnalysisType, MCnum
             indexes = np.delete(indexes, RemoveCond, 0)
 
             ## Save the indexes acccording to the original indexing
-            indexesOriginal = IndexTemp.flatten()[indexes]
-            indexesOriginal = np.unique(indexesOriginal)
+            indexesOriginal = indexes
 
-        ## Calculation of the weight and thickness
-        Weight = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
-        Thickness = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
-        for i in range(np.shape(CellsInside)[0]):
-            Cell_row, Cell_column = int(CellsInside[i, 0]), int(CellsInside[i, 1])
+            # # See the current sliding suface
+            # See = np.zeros((nrows,ncols))
+            # for i in range(np.shape(CellsInside)[0]):
+            #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = indexes[i]
+            # import matplotlib.pyplot as plt
+            # fig, axs = plt.subplots(1, 1)
+            # #plt.title('')
+            # plt.imshow(See)
+            # plt.colorbar()
+            # plt.show()
+
+            ## Window of the ellipsoid (original cell size). Only the data inside the window are sub-discretisized.
+            SubDisWindow = SubDis_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, ProblemName)
+
+            CountSubDis = 0
+            ## Subdiscretisize if the number of cells are low (by halving the cell size and arranging the data).
+            ## SubDisNum is the minimum number of cells defined by the user in the main code.
+            while np.shape(CellsInside)[0] < SubDisNum:
+
+                CountSubDis += 1  ## Check how many times subdiscretisized
+
+                ## Halve the cellsize for this part only
+                cellsize = cellsize / 2
+                nrows = nrows * 2  ## Double the number of rows
+                ncols = ncols * 2  ## Double the number of columns
+
+                ## DEM inside the window with the new cellsize ("numpy.kron"). Other data are arranged after the loop.
+                DEMPatch = SubDis_DEMPatch(DEMInput, SlopeInput, SubDisWindow, CountSubDis, nrows_org, cellsize, ProblemName)
+                RowOffset, ColOffset = SubDisWindow[0] * 2**CountSubDis, SubDisWindow[2] * 2**CountSubDis
+
+                ## Determine the cell inside the ellipsoid
+                ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
+                ## Two function was considered CellsInsideEll and CellsInsideEllV2 considering 2D, and 3D approachs respectively.
+                ## CellsInsideEllV2 is better in identifying the cells inside.
+                # indexes, CellsInside = CellsInsideEll(CoorG,EllCenterX,EllCenterY,Ella,Ellb,Ellc, Ellz, EllAlpha,EllBeta)
+                indexes, CellsInside = CellsInsideEllV2(
+                    nrows,
+                    ncols,
+                    cellsize,
+                    DEMPatch,
+                    EllCenterX,
+                    EllCenterY,
+                    EllDEMCenter,
+                    EllAlpha,
+                    EllBeta,
+                    Ella,
+                    Ellb,
+                    Ellc,
+                    Ellz,
+                    RowOffset,
+                    ColOffset,
+                )
+                CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## correction to the very low values
+
+                ## Calculate the depth at a given cell
+                ## If the DEM of the cell is lower than the DEM of the sliding surface, it is removed.
+                Depths = EllDepth(
+                    CellsInside[:, 2],
+                    CellsInside[:, 3],
+                    EllCenterX,
+                    EllCenterY,
+                    Ella,
+                    Ellb,
+                    Ellc,
+                    Ellz,
+                    EllAlpha,
+                    EllBeta,
+                )
+                Depths = np.reshape(Depths, (np.shape(CellsInside)[0], 1))
+                Depths[np.isnan(Depths)] = 0
+                ## DEM of the sliding surface
+                DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
+                DEMdiff = (
+                    np.reshape(
+                        DEMPatch[(CellsInside[:, 0].astype(int) - RowOffset, CellsInside[:, 1].astype(int) - ColOffset)],
+                        (np.shape(CellsInside)[0], 1),
+                    )
+                    - DepthDEM
+                )
+                ## Removing condition to eliminate the cells lower than the DEM of the sliding surface
+                RemoveCond = np.where(DEMdiff < 0)[0]
+                CellsInside = np.delete(CellsInside, RemoveCond, 0)
+                Depths = np.delete(Depths, RemoveCond, 0)
+                DepthDEM = np.delete(DepthDEM, RemoveCond, 0)
+                indexes = np.delete(indexes, RemoveCond, 0)
+
+                ## Save the indexes acccording to the original indexing
+                indexesOriginal = (CellsInside[:, 0].astype(int) // 2**CountSubDis) * ncols_org + CellsInside[:, 1].astype(int) // 2**CountSubDis
+                indexesOriginal = np.unique(indexesOriginal)
+
+            ## Arrangement of the data according to the new cellsize, only inside the window (instead of the whole grid).
+            ## The cells inside are numbered according to the window from now on.
+            if CountSubDis > 0:
+                CellsInside, indexes, nrows, ncols = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)
+                if AnalysisType == "Drained":
+                    ## {c, phi, uws, ksat, diffus} for drained analysis
+                    c = SubDis_Patch(c, SubDisWindow, CountSubDis)  ## Cohesion
+                    phi = SubDis_Patch(phi, SubDisWindow, CountSubDis)  ## Friction angle
+                    Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+                    Ksat = SubDis_Patch(Ksat, SubDisWindow, CountSubDis)  ## Hydraulic conductivity
+                    Diff0 = SubDis_Patch(Diff0, SubDisWindow, CountSubDis)  ## Diffusivity
+                elif AnalysisType == "Undrained":
+                    ## {Su, uws} for drained analysis
+                    Su = SubDis_Patch(Su, SubDisWindow, CountSubDis)  ## Undrained shear strength
+                    Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+                SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+                ZmaxInput = SubDis_Patch(ZmaxInput, SubDisWindow, CountSubDis)  ## Zmax input
+                DEMInput = DEMPatch  ## DEM input
+                HwInput = SubDis_Patch(HwInput, SubDisWindow, CountSubDis, Reuse=True)  ## Ground water table input
+                rizeroInput = SubDis_Patch(rizeroInput, SubDisWindow, CountSubDis, Reuse=True)  ## Background infiltration rate input
+
+            ## Calculation of the weight and thickness
+            Cell_rows, Cell_columns = CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int)
             ## Depth of the sliding surface at each cell
-            DEMdiff2 = DEMInput[Cell_row, Cell_column] - DepthDEM[i, 0]
+            DEMdiff2 = np.asarray(DEMInput[Cell_rows, Cell_columns]).ravel() - DepthDEM[:, 0]
             ## If the DEM of the sliding surface is higher than the cell's DEM. Thickness becomes zero.
-            Thickness[i] = DEMdiff2 if DEMdiff2 > 0 else 0  ## Thickness
-            Weight[i] = Thickness[i] * cellsize**2 * Gamma[Cell_row, Cell_column]  ## Weight
+            Thickness = np.reshape(np.where(DEMdiff2 > 0, DEMdiff2, 0.0), (np.shape(CellsInside)[0], 1))  ## Thickness
+            Weight = Thickness * cellsize**2 * np.reshape(np.asarray(Gamma[Cell_rows, Cell_columns]), (np.shape(CellsInside)[0], 1))  ## Weight
 
-        # See = np.zeros((nrows,ncols))
-        # for i in range(np.shape(CellsInside)[0]):
-        #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = Thickness[i]
-        # import matplotlib.pyplot as plt
-        # fig, axs = plt.subplots(1, 1)
-        # #plt.title('')
-        # plt.imshow(See)
-        # plt.colorbar()
-        # plt.show()
+            # See = np.zeros((nrows,ncols))
+            # for i in range(np.shape(CellsInside)[0]):
+            #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = Thickness[i]
+            # import matplotlib.pyplot as plt
+            # fig, axs = plt.subplots(1, 1)
+            # #plt.title('')
+            # plt.imshow(See)
+            # plt.colorbar()
+            # plt.show()
 
-        """
-        ## The part of vectos, gradients, normal vectors for the calculation of the slope angles.
-        ## Some lines are commented out. They actually work and can be used but not needed at the current version.
-        """
+            """
+            ## The part of vectos, gradients, normal vectors for the calculation of the slope angles.
+            ## Some lines are commented out. They actually work and can be used but not needed at the current version.
+            """
 
-        ## Coordinate according to the e'' coordinate system (center of ellipsoid)
-        xvalues = np.reshape(
-            CellsInside[:, 2] / np.cos(np.radians(EllBeta)) + Depths[:, 0] * np.sin(np.radians(EllBeta)),
-            (np.shape(CellsInside)[0], 1),
-        )
-        yvalues = np.reshape(CellsInside[:, 3], (np.shape(CellsInside)[0], 1))
-        zvalues = -np.reshape(
-            calz(xvalues[:, 0], yvalues[:, 0], Ella, Ellb, Ellc),
-            (np.shape(CellsInside)[0], 1),
-        )
-        ## zvalues is qeual to zvalues2. Which shows that depths are correct.
-        # zvalues2 = np.reshape( Depths[:,0]  * np.cos(np.radians(EllBeta)) + Ellz  , (np.shape(CellsInside)[0],1) )
+            ## Coordinate according to the e'' coordinate system (center of ellipsoid)
+            xvalues = np.reshape(
+                CellsInside[:, 2] / np.cos(np.radians(EllBeta)) + Depths[:, 0] * np.sin(np.radians(EllBeta)),
+                (np.shape(CellsInside)[0], 1),
+            )
+            yvalues = np.reshape(CellsInside[:, 3], (np.shape(CellsInside)[0], 1))
+            zvalues = -np.reshape(
+                calz(xvalues[:, 0], yvalues[:, 0], Ella, Ellb, Ellc),
+                (np.shape(CellsInside)[0], 1),
+            )
+            ## zvalues is qeual to zvalues2. Which shows that depths are correct.
+            # zvalues2 = np.reshape( Depths[:,0]  * np.cos(np.radians(EllBeta)) + Ellz  , (np.shape(CellsInside)[0],1) )
 
-        ## Cells inside according to e'' coordinate system
-        CellsInsideE11 = np.concatenate((CellsInside[:, 0:2], xvalues, yvalues, zvalues), axis=1)
+            ## Cells inside according to e'' coordinate system
+            CellsInsideE11 = np.concatenate((CellsInside[:, 0:2], xvalues, yvalues, zvalues), axis=1)
 
-        ## Gradient According to e''
-        GradientsE11 = []  ## Allocate
-        for i in range(np.shape(CellsInsideE11)[0]):
-            GradientsE11.append(
+            ## Gradient According to e''
+            GradientsE11 = np.column_stack(
                 (
-                    2 * (CellsInsideE11[i, 2]) / Ella**2,
-                    2 * (CellsInsideE11[i, 3]) / Ellb**2,
-                    2 * (CellsInsideE11[i, 4]) / Ellc**2,
+                    2 * (CellsInsideE11[:, 2]) / Ella**2,
+                    2 * (CellsInsideE11[:, 3]) / Ellb**2,
+                    2 * (CellsInsideE11[:, 4]) / Ellc**2,
                 )
             )
-        GradientsE11 = np.asarray(GradientsE11)
-
-        """
-        ## On XZ'' plane
-        """
 
-        ## Angle between normal vector and x'' axis, on XZ'' plane
-        ## Normal vector
-        n = np.array((GradientsE11[:, 0], GradientsE11[:, 2])).T
-        vx11 = np.array([1.0, 0.0])
-        uvx11 = vx11 / np.linalg.norm(vx11)
+            """
+            ## On XZ'' plane
+            """
 
-        ## Angle of the normal vector on XZ'' according to e'' coordinate system (by dot product)
-        AngleNormalXZE11 = []  ## Allocate
-        for i in range(np.shape(n)[0]):
-            un = n[i] / np.linalg.norm(n[i])
-            AngleNormalXZE11.append(np.degrees(np.arccos(np.dot(un, uvx11))))
-        AngleNormalXZE11 = np.asarray(AngleNormalXZE11)
-        AngleNormalXZE11[np.isnan(AngleNormalXZE11)] = 90
+            ## Angle between normal vector and x'' axis, on XZ'' plane
+            ## Normal vector
+            n = np.array((GradientsE11[:, 0], GradientsE11[:, 2])).T
+            vx11 = np.array([1.0, 0.0])
+            uvx11 = vx11 / np.linalg.norm(vx11)
 
-        ## Angle between tangent line and X'' on XZ'' plane
-        AngleTangentXZE11 = AngleNormalXZE11 - 90
+            ## Angle of the normal vector on XZ'' according to e'' coordinate system (by dot product)
+            AngleNormalXZE11 = Angle_To_Unit_Vector(n, uvx11)
+            AngleNormalXZE11[np.isnan(AngleNormalXZE11)] = 90
 
-        ## Angle between tangent and x' axis (angle - EllBeta) on XZ' plane
-        AngleTangentXZE1 = AngleTangentXZE11 + EllBeta
+            ## Angle between tangent line and X'' on XZ'' plane
+            AngleTangentXZE11 = AngleNormalXZE11 - 90
 
-        # See = np.zeros((nrows,ncols))
-        # for i in range(np.shape(CellsInside)[0]):
-        #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = AngleTangentXZE1[i]
-        # import matplotlib.pyplot as plt
-        # fig, axs = plt.subplots(1, 1)
-        # #plt.title('')
-        # plt.imshow(See)
-        # plt.colorbar()
-        # plt.show()
+            ## Angle between tangent and x' axis (angle - EllBeta) on XZ' plane
+            AngleTangentXZE1 = AngleTangentXZE11 + EllBeta
 
-        """
-        ## On YZ'' plane
-        """
-
-        # ## Angle between normal vector and Y'' axis on YZ'' plane
-        # n = np.array((GradientsE11[:,1],GradientsE11[:,2])).T
-        # vx11= np.array([1.,0.])
-        # uvx11 = vx11 / np.linalg.norm(vx11)
-        # AngleNormalYZE11 =[]
-        # for i in range(np.shape(n)[0]):
-        #     un = n[i] / np.linalg.norm(n[i])
-        #     AngleNormalYZE11.append( np.degrees(np.arccos(np.dot(un, uvx11)) ) )
-        # AngleNormalYZE11 = np.asarray(AngleNormalYZE11)
-        # #AngleNormalYZE11[np.isnan(AngleNormalYZE11)] = 90
-
-        # ## Angle between tangent line and Y''  on YZ'' plane
-        # AngleTangentYZE11 = AngleNormalYZE11 - 90
-
-        # ## Angle between tangent and Y' axis (angle - EllBeta) on YZ' plane
-        # AngleTangentYZE1 = AngleTangentYZE11
-
-        """
-        ## It is also possible to transfer the gradients according to the e' and then calculate the tangents.
-        ## Below you see the code doing this.
-        """
-        # Transform the vector to the e' coordinate system
-        GradientsE1 = np.zeros(((np.shape(CellsInside)[0], 3)))
-        GradientsE1[:, 0] = GradientsE11[:, 0] * np.cos(np.radians(EllBeta)) + GradientsE11[:, 2] * np.sin(np.radians(EllBeta))
-        GradientsE1[:, 1] = GradientsE11[:, 1]
-        GradientsE1[:, 2] = -GradientsE11[:, 0] * np.sin(np.radians(EllBeta)) + GradientsE11[:, 2] * np.cos(np.radians(EllBeta))
-
-        # ## Angle between normal vector and x' axis on XZ' plane
-        # n = np.array((GradientsE1[:,0],GradientsE1[:,2])).T
-        # vx11= np.array([1.,0.])
-        # uvx11 = vx11 / np.linalg.norm(vx11)
-        # AngleNormalXZE11try2 =[]
-        # for i in range(np.shape(n)[0]):
-        #     un = n[i] / np.linalg.norm(n[i])
-        #     AngleNormalXZE11try2.append( np.degrees(np.arccos(np.dot(un, uvx11)) ) )
-        # AngleNormalXZE11try2 = np.asarray(AngleNormalXZE11try2)
-        # # AngleNormalXZE11[np.isnan(AngleNormalXZE11)] = 90
-        # ## Angle between tangent line and X'  on XZ' plane
-        # AngleTangentXZE11try2 = AngleNormalXZE11try2 - 90
-
-        ## Calculation of Asp (Aspect)
-        ## Angle between normal vector and x' axis on XY' plane
-        GradientsE1Minus = -GradientsE1
-        n = np.array((GradientsE1Minus[:, 0], GradientsE1Minus[:, 1])).T
-        vx11 = np.array([1.0, 0.0])
-        uvx11 = vx11 / np.linalg.norm(vx11)
-        AngleNormalXYE1 = []  ## Allocate. It will be assigned to Asp below.
-        for i in range(np.shape(n)[0]):
-            un = n[i] / np.linalg.norm(n[i])
-            AngleNormalXYE1.append(np.degrees(np.arccos(np.dot(un, uvx11))))
-        AngleNormalXYE1 = np.asarray(AngleNormalXYE1)
-        # AngleNormalXZE11[np.isnan(AngleNormalXZE11)] = 90
-
-        ## Calculation of Theta (Dip angle)
-        ## Angle between 3D normal vector and Z' axis.
-        n = np.array((GradientsE1Minus[:, 0], GradientsE1Minus[:, 1], GradientsE1Minus[:, 2])).T
-        vx11 = np.array([0.0, 0.0, 1.0])
-        uvx11 = vx11 / np.linalg.norm(vx11)
-        AngleNormal3DWE1 = []  ## Allocate. It will be assigned to Theta below.
-        for i in range(np.shape(n)[0]):
-            un = n[i] / np.linalg.norm(n[i])
-            AngleNormal3DWE1.append(np.degrees(np.arccos(np.dot(un, uvx11))))
-        AngleNormal3DWE1 = np.asarray(AngleNormal3DWE1)
-
-        ## From now on, the symbols are revised for the FS calculations.
-        Theta = AngleNormal3DWE1  ## Dip angle
-        ## In this model, (Xe',Ye') coordinate system is oriented towards main incilination direction.
-        ## Therefore, min inclination direction of the landslide (AvrAsp) becomes zero with respect to Xe'.
-        AvrAsp = 0
-        Asp = AngleNormalXYE1  ## Aspect of the cells
+            # See = np.zeros((nrows,ncols))
+            # for i in range(np.shape(CellsInside)[0]):
+            #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = AngleTangentXZE1[i]
+            # import matplotlib.pyplot as plt
+            # fig, axs = plt.subplots(1, 1)
+            # #plt.title('')
+            # plt.imshow(See)
+            # plt.colorbar()
+            # plt.show()
 
-        ## The apparent dip of the main direction of inclination of the sliding surface (ThetaAvr) is calculated.
-        ## The details can be seen in Xie et al. (2003) (Doi:10.1061/(ASCE)1090-0241(2003)129:12(1109))
-        TanThetaAvr = np.tan(np.radians(Theta)) * abs(np.cos(np.radians(Asp - AvrAsp)))
-        ThetaAvr = np.degrees(np.arctan(TanThetaAvr))
+            """
+            ## On YZ'' plane
+            """
+
+            # ## Angle between normal vector and Y'' axis on YZ'' plane
+            # n = np.array((GradientsE11[:,1],GradientsE11[:,2])).T
+            # vx11= np.array([1.,0.])
+            # uvx11 = vx11 / np.linalg.norm(vx11)
+            # AngleNormalYZE11 =[]
+            # for i in range(np.shape(n)[0]):
+            #     un = n[i] / np.linalg.norm(n[i])
+            #     AngleNormalYZE11.append( np.degrees(np.arccos(np.dot(un, uvx11)) ) )
+            # AngleNormalYZE11 = np.asarray(AngleNormalYZE11)
+            # #AngleNormalYZE11[np.isnan(AngleNormalYZE11)] = 90
+
+            # ## Angle between tangent line and Y''  on YZ'' plane
+            # AngleTangentYZE11 = AngleNormalYZE11 - 90
+
+            # ## Angle between tangent and Y' axis (angle - EllBeta) on YZ' plane
+            # AngleTangentYZE1 = AngleTangentYZE11
+
+            """
+            ## It is also possible to transfer the gradients according to the e' and then calculate the tangents.
+            ## Below you see the code doing this.
+            """
+            # Transform the vector to the e' coordinate system
+            GradientsE1 = np.zeros(((np.shape(CellsInside)[0], 3)))
+            GradientsE1[:, 0] = GradientsE11[:, 0] * np.cos(np.radians(EllBeta)) + GradientsE11[:, 2] * np.sin(np.radians(EllBeta))
+            GradientsE1[:, 1] = GradientsE11[:, 1]
+            GradientsE1[:, 2] = -GradientsE11[:, 0] * np.sin(np.radians(EllBeta)) + GradientsE11[:, 2] * np.cos(np.radians(EllBeta))
+
+            # ## Angle between normal vector and x' axis on XZ' plane
+            # n = np.array((GradientsE1[:,0],GradientsE1[:,2])).T
+            # vx11= np.array([1.,0.])
+            # uvx11 = vx11 / np.linalg.norm(vx11)
+            # AngleNormalXZE11try2 =[]
+            # for i in range(np.shape(n)[0]):
+            #     un = n[i] / np.linalg.norm(n[i])
+            #     AngleNormalXZE11try2.append( np.degrees(np.arccos(np.dot(un, uvx11)) ) )
+            # AngleNormalXZE11try2 = np.asarray(AngleNormalXZE11try2)
+            # # AngleNormalXZE11[np.isnan(AngleNormalXZE11)] = 90
+            # ## Angle between tangent line and X'  on XZ' plane
+            # AngleTangentXZE11try2 = AngleNormalXZE11try2 - 90
+
+            ## Calculation of Asp (Aspect)
+            ## Angle between normal vector and x' axis on XY' plane
+            GradientsE1Minus = -GradientsE1
+            n = np.array((GradientsE1Minus[:, 0], GradientsE1Minus[:, 1])).T
+            vx11 = np.array([1.0, 0.0])
+            uvx11 = vx11 / np.linalg.norm(vx11)
+            AngleNormalXYE1 = Angle_To_Unit_Vector(n, uvx11)  ## It will be assigned to Asp below.
+            # AngleNormalXZE11[np.isnan(AngleNormalXZE11)] = 90
+
+            ## Calculation of Theta (Dip angle)
+            ## Angle between 3D normal vector and Z' axis.
+            n = np.array((GradientsE1Minus[:, 0], GradientsE1Minus[:, 1], GradientsE1Minus[:, 2])).T
+            vx11 = np.array([0.0, 0.0, 1.0])
+            uvx11 = vx11 / np.linalg.norm(vx11)
+            AngleNormal3DWE1 = Angle_To_Unit_Vector(n, uvx11)  ## It will be assigned to Theta below.
+
+            ## From now on, the symbols are revised for the FS calculations.
+            Theta = AngleNormal3DWE1  ## Dip angle
+            ## In this model, (Xe',Ye') coordinate system is oriented towards main incilination direction.
+            ## Therefore, min inclination direction of the landslide (AvrAsp) becomes zero with respect to Xe'.
+            AvrAsp = 0
+            Asp = AngleNormalXYE1  ## Aspect of the cells
+
+            ## The apparent dip of the main direction of inclination of the sliding surface (ThetaAvr) is calculated.
+            ## The details can be seen in Xie et al. (2003) (Doi:10.1061/(ASCE)1090-0241(2003)129:12(1109))
+            TanThetaAvr = np.tan(np.radians(Theta)) * abs(np.cos(np.radians(Asp - AvrAsp)))
+            ThetaAvr = np.degrees(np.arctan(TanThetaAvr))
+
+            ## This formulation also gives the tangents !!
+            ## This can be checked to see that the above formulation and the previous calculations are resulting in the same values.
+            Tanxz = np.degrees(np.arctan(np.tan(np.radians(Theta)) * np.cos(np.radians(Asp))))
+            # Tanxz = AngleTangentXZE1
+            Tanyz = np.degrees(np.arctan(np.tan(np.radians(Theta)) * np.sin(np.radians(Asp))))
+            ## Limit the slopes and areas (by trial and error).
+            Tanxz[Tanxz > 85.0] = 85.0
+            Tanyz[Tanyz > 85.0] = 85.0
 
-        ## This formulation also gives the tangents !!
-        ## This can be checked to see that the above formulation and the previous calculations are resulting in the same values.
-        Tanxz = np.degrees(np.arctan(np.tan(np.radians(Theta)) * np.cos(np.radians(Asp))))
-        # Tanxz = AngleTangentXZE1
-        Tanyz = np.degrees(np.arctan(np.tan(np.radians(Theta)) * np.sin(np.radians(Asp))))
-        ## Limit the slopes and areas (by trial and error).
-        Tanxz[Tanxz > 85.0] = 85.0
-        Tanyz[Tanyz > 85.0] = 85.0
-
-        # See = np.zeros((nrows,ncols))
-        # for i in range(np.shape(CellsInside)[0]):
-        #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = ThetaAvr[i]
-        # import matplotlib.pyplot as plt
-        # fig, axs = plt.subplots(1, 1)
-        # #plt.title('')
-        # plt.imshow(See)
-        # plt.colorbar()
-        # plt.show()
-        # See = See[67:70,68:87]
+            # See = np.zeros((nrows,ncols))
+            # for i in range(np.shape(CellsInside)[0]):
+            #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = ThetaAvr[i]
+            # import matplotlib.pyplot as plt
+            # fig, axs = plt.subplots(1, 1)
+            # #plt.title('')
+            # plt.imshow(See)
+            # plt.colorbar()
+            # plt.show()
+            # See = See[67:70,68:87]
 
-        ## Calculation of the area by using the formulation given in Xie's or Hungr's papers.
-        A = []  ## Allocate
-        for i in range(np.shape(CellsInside)[0]):
-            A.append((cellsize**2) * ((np.sqrt(1 - ((np.sin(np.radians(Tanyz[i]))) ** 2) * ((np.sin(np.radians((Tanxz[i])))) ** 2)))) / (((np.cos(np.radians((Tanyz[i]))))) * ((np.cos(np.radians((Tanxz[i])))))))
-        A = np.asarray(A)
-        A = np.reshape(A, (np.shape(CellsInside)[0], 1))
+            ## Calculation of the area by using the formulation given in Xie's or Hungr's papers.
+            A = (cellsize**2) * ((np.sqrt(1 - ((np.sin(np.radians(Tanyz))) ** 2) * ((np.sin(np.radians((Tanxz)))) ** 2)))) / (((np.cos(np.radians((Tanyz))))) * ((np.cos(np.radians((Tanxz))))))
+            A = np.reshape(A, (np.shape(CellsInside)[0], 1))
 
-        ## Remove very high area values. When the bishop3D method is used, this does not change the results significanlty.
-        LimitValue = 1 + np.max(Thickness) / cellsize  ## By trials
-        A[A > LimitValue * cellsize**2] = LimitValue * cellsize**2
+            ## Remove very high area values. When the bishop3D method is used, this does not change the results significanlty.
+            LimitValue = 1 + np.max(Thickness) / cellsize  ## By trials
+            A[A > LimitValue * cellsize**2] = LimitValue * cellsize**2
 
-        """
-        ## This part is the truncation part according to the ZmaxInput.
-        ## If maximum depth (ZmaxInput) is less than the thickness to the depth of the sliding surface (Thickness),
-        ## the cell is truncated and the parameters are reassigned/calculated.
-        ## Modified parameters: A, thickness, weight, ThetaAvr and Theta change.
-        """
+            """
+            ## This part is the truncation part according to the ZmaxInput.
+            ## If maximum depth (ZmaxInput) is less than the thickness to the depth of the sliding surface (Thickness),
+            ## the cell is truncated and the parameters are reassigned/calculated.
+            ## Modified parameters: A, thickness, weight, ThetaAvr and Theta change.
+            """
 
-        ZmaxInput = np.reshape(ZmaxInput.flatten(), (nrows * ncols, 1))  ## Reshape
-        condzmax = np.where(ZmaxInput[indexes] < Thickness)[0]  ## Truncation condition
+            ZmaxInput = np.reshape(ZmaxInput.flatten(), (nrows * ncols, 1))  ## Reshape
+            condzmax = np.where(ZmaxInput[indexes] < Thickness)[0]  ## Truncation condition
 
-        ## Arrangement of the parameters using truncation condition above
-        ## Thickness becomes ZmaxInput for the truncated cells.
-        Thickness[condzmax] = ZmaxInput[indexes][condzmax]
+            ## Arrangement of the parameters using truncation condition above
+            ## Thickness becomes ZmaxInput for the truncated cells.
+            Thickness[condzmax] = ZmaxInput[indexes][condzmax]
 
-        ## The slope of the bottom sliding surface is now the slope of the truncated cell at the ground surface.
-        ## Area is recalculated.
+            ## The slope of the bottom sliding surface is now the slope of the truncated cell at the ground surface.
+            ## Area is recalculated.
 
-        TempA = (
-            (cellsize**2)
-            * (
-                (
-                    np.sqrt(
-                        1
-                        - ((np.sin(np.radians(0))) ** 2)
-                        * (
-                            np.square(
-                                np.sin(
-                                    np.radians(
-                                        (
-                                            SlopeInput[
-                                                (
-                                                    CellsInside[:, 0].astype(int),
-                                                    CellsInside[:, 1].astype(int),
-                                                )
-                                            ].T[condzmax]
+            TempA = (
+                (cellsize**2)
+                * (
+                    (
+                        np.sqrt(
+                            1
+                            - ((np.sin(np.radians(0))) ** 2)
+                            * (
+                                np.square(
+                                    np.sin(
+                                        np.radians(
+                                            (
+                                                SlopeInput[
+                                                    (
+                                                        CellsInside[:, 0].astype(int),
+                                                        CellsInside[:, 1].astype(int),
+                                                    )
+                                                ].T[condzmax]
+                                            )
                                         )
                                     )
                                 )
@@ -5403,307 +6232,241 @@ def EllipsoidFSWithSubDis_v1_0_MultiThread(queue, FS_All_MC, AnalysisType, MCnum
                         )
                     )
                 )
-            )
-            / (
-                ((np.cos(np.radians((0)))))
-                * (
-                    (
-                        np.cos(
-                            np.radians(
-                                SlopeInput[
-                                    (
-                                        CellsInside[:, 0].astype(int),
-                                        CellsInside[:, 1].astype(int),
-                                    )
-                                ].T[condzmax]
+                / (
+                    ((np.cos(np.radians((0)))))
+                    * (
+                        (
+                            np.cos(
+                                np.radians(
+                                    SlopeInput[
+                                        (
+                                            CellsInside[:, 0].astype(int),
+                                            CellsInside[:, 1].astype(int),
+                                        )
+                                    ].T[condzmax]
+                                )
                             )
                         )
                     )
                 )
             )
-        )
-        A[condzmax] = np.reshape(TempA, (np.shape(TempA)[0], 1))
+            A[condzmax] = np.reshape(TempA, (np.shape(TempA)[0], 1))
 
-        ## Weight is recalculated.
-        for i in condzmax:
-            # print(i)
-            Weight[i] = ZmaxInput[indexes][i] * cellsize**2 * Gamma.flatten()[indexes][i]  ## Weight
+            ## Weight is recalculated.
+            Weight[condzmax] = np.asarray(ZmaxInput[indexes][condzmax]) * cellsize**2 * np.reshape(np.asarray(Gamma).flatten()[indexes][condzmax], (np.shape(condzmax)[0], 1))  ## Weight
 
-        # Reshape and truncate to the slope of the current cell
-        ThetaAvr = np.reshape(ThetaAvr, (np.shape(CellsInside)[0], 1))
-        Theta = np.reshape(Theta, (np.shape(CellsInside)[0], 1))
-        AngleTangentXZE1 = np.reshape(AngleTangentXZE1, (np.shape(CellsInside)[0], 1))
+            # Reshape and truncate to the slope of the current cell
+            ThetaAvr = np.reshape(ThetaAvr, (np.shape(CellsInside)[0], 1))
+            Theta = np.reshape(Theta, (np.shape(CellsInside)[0], 1))
+            AngleTangentXZE1 = np.reshape(AngleTangentXZE1, (np.shape(CellsInside)[0], 1))
 
-        TempSlope = SlopeInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))].T[condzmax]
-        ThetaAvr[condzmax] = np.reshape(TempSlope, (np.shape(TempSlope)[0], 1))
-        Theta[condzmax] = np.reshape(TempSlope, (np.shape(TempSlope)[0], 1))
-        AngleTangentXZE1[condzmax] = np.reshape(TempSlope, (np.shape(TempSlope)[0], 1))
+            TempSlope = SlopeInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))].T[condzmax]
+            ThetaAvr[condzmax] = np.reshape(TempSlope, (np.shape(TempSlope)[0], 1))
+            Theta[condzmax] = np.reshape(TempSlope, (np.shape(TempSlope)[0], 1))
+            AngleTangentXZE1[condzmax] = np.reshape(TempSlope, (np.shape(TempSlope)[0], 1))
 
-        ## !!!
-        ##This part is for validation problem 1, poblem 2, problem 3 slide 1 dry, problem 3 slide 2 dry
-        if ProblemName == "Pr3S2Dry" or ProblemName == "Pr3S2Wet":
-            ## Correction for truncation angle
-            ## Normally slope of the cell is assigned. Here, zero is assigned.
-            tempvalues = np.ones((np.shape(condzmax)[0], 1)) * (cellsize**2)
-            A[condzmax] = tempvalues
-            ThetaAvr[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
-            Theta[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
-            AngleTangentXZE1[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
+            ## !!!
+            ##This part is for validation problem 1, poblem 2, problem 3 slide 1 dry, problem 3 slide 2 dry
+            if ProblemName == "Pr3S2Dry" or ProblemName == "Pr3S2Wet":
+                ## Correction for truncation angle
+                ## Normally slope of the cell is assigned. Here, zero is assigned.
+                tempvalues = np.ones((np.shape(condzmax)[0], 1)) * (cellsize**2)
+                A[condzmax] = tempvalues
+                ThetaAvr[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
+                Theta[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
+                AngleTangentXZE1[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
 
-            ## Assign weak layer properties for the truncated cells.
-            ## Cohesion
-            c = np.reshape(c.flatten(), (nrows * ncols, 1))
-            tempvalues = c[indexes][:]
-            tempvalues[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
-            c[indexes] = tempvalues
-            c = np.reshape(c, (nrows, ncols))
+                ## Assign weak layer properties for the truncated cells.
+                ## Cohesion
+                c = np.reshape(c.flatten(), (nrows * ncols, 1))
+                tempvalues = c[indexes][:]
+                tempvalues[condzmax] = np.zeros((np.shape(condzmax)[0], 1))
+                c[indexes] = tempvalues
+                c = np.reshape(c, (nrows, ncols))
 
-            ## Friction angle
-            phi = np.reshape(phi.flatten(), (nrows * ncols, 1))
-            # phi[indexes][condzmax] = np.zeros((9520, 1))
-            tempvalues = phi[indexes][:]
-            tempvalues[condzmax] = np.ones((np.shape(condzmax)[0], 1)) * 10.0
-            phi[indexes] = tempvalues
-            phi = np.reshape(phi, (nrows, ncols))
+                ## Friction angle
+                phi = np.reshape(phi.flatten(), (nrows * ncols, 1))
+                # phi[indexes][condzmax] = np.zeros((9520, 1))
+                tempvalues = phi[indexes][:]
+                tempvalues[condzmax] = np.ones((np.shape(condzmax)[0], 1)) * 10.0
+                phi[indexes] = tempvalues
+                phi = np.reshape(phi, (nrows, ncols))
+
+                # See = np.zeros((nrows,ncols))
+                # for i in range(np.shape(CellsInside)[0]):
+                #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = c[int(CellsInside[i][0]),int(CellsInside[i][1])]
+                # fig, axs = plt.subplots(1, 1)
+                # #plt.title('')
+                # plt.imshow(See)
+                # plt.colorbar()
+                # plt.show()
+
+            ## !!!
+
+            ## Remove very high area values again.
+            LimitValue = 1 + np.max(Thickness) / cellsize  ## By trials
+            A[A > LimitValue * cellsize**2] = LimitValue * cellsize**2
+
+            ####################################
+            ## Iverson (2000), infiltraion model
+            ####################################
+            ## The calculation of the pore water forces using Iverson's solution of infiltration (Iverson, 2000)
+            ## Slope parallel flow is assummed.
+            ## If the analysis is undrained, pore water forces are zero. If it is drained, calculations are performed using Iverson's solution-.
+            if AnalysisType == "Drained":
+                PoreWaterForce = HydrologyModel_v1_0(
+                    TimeToAnalyse,
+                    CellsInside,
+                    A,
+                    HwInput,
+                    rizeroInput,
+                    riInp,
+                    Ksat,
+                    Diff0,
+                    Thickness,
+                    SlopeInput,
+                )
+            elif AnalysisType == "Undrained":
+                # PoreWaterForce = np.zeros((np.shape(CellsInside)[0],1))
+                PoreWaterForce = [np.zeros((np.shape(CellsInside)[0], 1))] * np.shape(TimeToAnalyse)[0]
+
+            ## !!!
+            ##This part is for validation problem 1, poblem 2, problem 3 slide 1 dry, problem 3 slide 2 dry
+            if ProblemName == "Pr1" or ProblemName == "Pr2" or ProblemName == "Pr3S1Dry" or ProblemName == "Pr3S2Dry":
+                for corr_n in range(np.shape(PoreWaterForce)[0]):
+                    ## Correction
+                    PoreWaterForce[corr_n] = np.zeros((np.shape(CellsInside)[0], 1))
 
+            if ProblemName == "Pr3S2Wet":
+                for corr_n in range(np.shape(PoreWaterForce)[0]):
+                    ## Correction
+                    Temp = PoreWaterForce[corr_n]
+                    Temp[Temp < 0] = 0.0
+                    PoreWaterForce[corr_n] = Temp
+            ## !!!
             # See = np.zeros((nrows,ncols))
             # for i in range(np.shape(CellsInside)[0]):
-            #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = c[int(CellsInside[i][0]),int(CellsInside[i][1])]
+            #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = PoreWaterForce[i]
+            # import matplotlib.pyplot as plt
             # fig, axs = plt.subplots(1, 1)
             # #plt.title('')
             # plt.imshow(See)
             # plt.colorbar()
             # plt.show()
 
-        ## !!!
-
-        ## Remove very high area values again.
-        LimitValue = 1 + np.max(Thickness) / cellsize  ## By trials
-        A[A > LimitValue * cellsize**2] = LimitValue * cellsize**2
-
-        ####################################
-        ## Iverson (2000), infiltraion model
-        ####################################
-        ## The calculation of the pore water forces using Iverson's solution of infiltration (Iverson, 2000)
-        ## Slope parallel flow is assummed.
-        ## If the analysis is undrained, pore water forces are zero. If it is drained, calculations are performed using Iverson's solution-.
-        if AnalysisType == "Drained":
-            PoreWaterForce = HydrologyModel_v1_0(
-                TimeToAnalyse,
-                CellsInside,
-                A,
-                HwInput,
-                rizeroInput,
-                riInp,
-                Ksat,
-                Diff0,
-                Thickness,
-                SlopeInput,
-            )
-        elif AnalysisType == "Undrained":
-            # PoreWaterForce = np.zeros((np.shape(CellsInside)[0],1))
-            PoreWaterForce = [np.zeros((np.shape(CellsInside)[0], 1))] * np.shape(TimeToAnalyse)[0]
-
-        ## !!!
-        ##This part is for validation problem 1, poblem 2, problem 3 slide 1 dry, problem 3 slide 2 dry
-        if ProblemName == "Pr1" or ProblemName == "Pr2" or ProblemName == "Pr3S1Dry" or ProblemName == "Pr3S2Dry":
-            for corr_n in range(np.shape(PoreWaterForce)[0]):
-                ## Correction
-                PoreWaterForce[corr_n] = np.zeros((np.shape(CellsInside)[0], 1))
-
-        if ProblemName == "Pr3S2Wet":
-            for corr_n in range(np.shape(PoreWaterForce)[0]):
-                ## Correction
-                Temp = PoreWaterForce[corr_n]
-                Temp[Temp < 0] = 0.0
-                PoreWaterForce[corr_n] = Temp
-        ## !!!
-        # See = np.zeros((nrows,ncols))
-        # for i in range(np.shape(CellsInside)[0]):
-        #     See[int(CellsInside[i][0]),int(CellsInside[i][1])] = PoreWaterForce[i]
-        # import matplotlib.pyplot as plt
-        # fig, axs = plt.subplots(1, 1)
-        # #plt.title('')
-        # plt.imshow(See)
-        # plt.colorbar()
-        # plt.show()
-
-        ## Factor of safety calculation for 3D ellipsoidal shape.
-        if AnalysisType == "Drained":
-
-            ## Arrange the cohesion and friction angle with corresponding indexes
-            c = c.flatten()[indexes]
-            c = np.reshape(c, (np.shape(CellsInside)[0], 1))
-            phi = phi.flatten()[indexes]
-            phi = np.reshape(phi, (np.shape(CellsInside)[0], 1))
-
-            ## Calculations are done depending on the method: 'Normal3D' - 'Bishop3D' - 'Janbu3D'
-            if FSCalType == "Normal3D":
+            ## Factor of safety calculation for 3D ellipsoidal shape.
+            if AnalysisType == "Drained":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = FSNormal3D(
-                        c,
-                        phi,
-                        A,
-                        Weight,
-                        PoreWaterForceCurrent,
-                        Theta,
-                        ThetaAvr,
-                        AngleTangentXZE1,
-                    )
-                    # print( "Normal 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                ## Arrange the cohesion and friction angle with corresponding indexes
+                c = c.flatten()[indexes]
+                c = np.reshape(c, (np.shape(CellsInside)[0], 1))
+                phi = phi.flatten()[indexes]
+                phi = np.reshape(phi, (np.shape(CellsInside)[0], 1))
 
-            elif FSCalType == "Bishop3D":
+                ## Calculations are done depending on the method: 'Normal3D' - 'Bishop3D' - 'Janbu3D'
+                if FSCalType == "Normal3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSBishop3D,
-                        1.5,
-                        args=(
+                    FS3D = []
+                    for PoreWaterForceCurrent in PoreWaterForce:
+                        FS3D_current = FSNormal3D(
                             c,
                             phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
                             A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
-
-            elif FSCalType == "Janbu3D":
-
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSJanbu3D,
-                        1.5,
-                        args=(
-                            c,
-                            phi,
-                            CellsInside,
                             Weight,
                             PoreWaterForceCurrent,
-                            ThetaAvr,
                             Theta,
-                            A,
+                            ThetaAvr,
                             AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                        )
+                        # print( "Normal 3D FS is %.5f"%FS3D_current)
+                        FS3D.append(FS3D_current)
 
-        elif AnalysisType == "Undrained":
+                elif FSCalType == "Bishop3D":
 
-            ## Arrange the undrained shear strength and friction angle with corresponding indexes
-            Su = Su.flatten()[indexes]
-            Su = np.reshape(Su, (np.shape(CellsInside)[0], 1))
-            phi = np.zeros((np.shape(CellsInside)[0], 1))
+                    FS3D_Pending.append((c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
-            ## Calculations are done depending on the method: 'Normal3D' - 'Bishop3D' - 'Janbu3D'
-            if FSCalType == "Normal3D":
+                elif FSCalType == "Janbu3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = FSNormal3D(
-                        Su,
-                        phi,
-                        A,
-                        Weight,
-                        PoreWaterForceCurrent,
-                        Theta,
-                        ThetaAvr,
-                        AngleTangentXZE1,
-                    )
-                    # print( "Normal 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                    FS3D_Pending.append((c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
-            elif FSCalType == "Bishop3D":
+            elif AnalysisType == "Undrained":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSBishop3D,
-                        1.5,
-                        args=(
-                            Su,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                ## Arrange the undrained shear strength and friction angle with corresponding indexes
+                Su = Su.flatten()[indexes]
+                Su = np.reshape(Su, (np.shape(CellsInside)[0], 1))
+                phi = np.zeros((np.shape(CellsInside)[0], 1))
 
-            elif FSCalType == "Janbu3D":
+                ## Calculations are done depending on the method: 'Normal3D' - 'Bishop3D' - 'Janbu3D'
+                if FSCalType == "Normal3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSJanbu3D,
-                        1.5,
-                        args=(
+                    FS3D = []
+                    for PoreWaterForceCurrent in PoreWaterForce:
+                        FS3D_current = FSNormal3D(
                             Su,
                             phi,
-                            CellsInside,
+                            A,
                             Weight,
                             PoreWaterForceCurrent,
-                            ThetaAvr,
                             Theta,
-                            A,
+                            ThetaAvr,
                             AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                        )
+                        # print( "Normal 3D FS is %.5f"%FS3D_current)
+                        FS3D.append(FS3D_current)
 
-        ## Changing these values are only related to the indexing.
-        ##I changed overall shared array to the sub-shared arrays. Therefore, indexing needs this adjustment.
-        MCnumber, MC_current = 1, 0  ### (Shared array change)
+                elif FSCalType == "Bishop3D":
 
-        ## Original indexes of the cells inside the sliding surface
-        indexesOriginal = np.asarray(indexesOriginal, dtype=int)
+                    FS3D_Pending.append((Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
-        ## For each time instance, assign the min FS to the cells
-        for TimeInd in range(np.shape(TimeToAnalyse)[0]):
-            # print(TimeInd)
-            ## FS3D value at the current time instance
-            FS3D_current = np.round(FS3D[TimeInd], 5)
+                elif FSCalType == "Janbu3D":
 
-            ## Global indexes
-            GlobalIndexFS = TimeInd * nrows_org * ncols_org * MCnumber + nrows_org * ncols_org * MC_current + (indexesOriginal // ncols_org) * ncols_org + (indexesOriginal % ncols_org)
-            GlobalIndexFS = np.asarray(GlobalIndexFS, dtype=int)
+                    FS3D_Pending.append((Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
-            mutex = Lock()
-            mutex.acquire()
-            ## Assign the min FS to the cells inside the sliding surface
-            for i in GlobalIndexFS:
-                FS_All_MC[i] = FS3D_current if ((FS_All_MC[i] == 0) or (FS_All_MC[i] > FS3D_current)) else FS_All_MC[i]
-            mutex.release()
+            ## Original indexes of the cells inside the sliding surface
+            indexesOriginal = np.asarray(indexesOriginal, dtype=int)
 
-        print(
-            "************************************************************ MC:",
-            int(queue_data[4]),
-            "  Ellipsoid center location:",
-            nrows_org * ncols_org * MC_current + EllRow * ncols_org + EllColumn,
-            "  FS: ",
-            np.round(FS3D, 5),
-        )
+            ## Bishop 3D and Janbu 3D surfaces are solved together when the batch is full or at the last surface of the chunk
+            if FSCalType == "Normal3D":
+                SolvedSurfaces.append((FS3D, indexesOriginal, EllRow * ncols_org + EllColumn))
+            else:
+                FS3D_PendingOriginal.append((indexesOriginal, EllRow * ncols_org + EllColumn))
+                PaddedCells = len(FS3D_Pending) * np.shape(TimeToAnalyse)[0] * max(np.size(Surface[2]) for Surface in FS3D_Pending)
+                if PaddedCells < FS3D_BatchCells and EllCurr < np.shape(EllChunk)[0] - 1:
+                    continue
+                SolvedSurfaces.extend((FS3D,) + PendingOriginal for FS3D, PendingOriginal in zip(FS3D_Surfaces(FSCalType, FS3D_Pending, FSInitial=1.5), FS3D_PendingOriginal))
+                FS3D_Pending, FS3D_PendingOriginal = [], []
+
+        ## Changing these values are only related to the indexing.
+        ##I changed overall shared array to the sub-shared arrays. Therefore, indexing needs this adjustment.
+        MCnumber, MC_current = 1, 0  ### (Shared array change)
+
+        ## The threads share FS_All_MC. The min FS of the whole chunk is assigned at once while holding the lock.
+        with FS_All_MC_Lock:
+            for FS3D, indexesOriginal, EllCenter in SolvedSurfaces:
+
+                ## For each time instance, assign the min FS to the cells
+                for TimeInd in range(np.shape(TimeToAnalyse)[0]):
+                    # print(TimeInd)
+                    ## FS3D value at the current time instance
+                    FS3D_current = np.round(FS3D[TimeInd], 5)
+
+                    ## Global indexes
+                    GlobalIndexFS = TimeInd * nrows_org * ncols_org * MCnumber + nrows_org * ncols_org * MC_current + (indexesOriginal // ncols_org) * ncols_org + (indexesOriginal % ncols_org)
+                    GlobalIndexFS = np.asarray(GlobalIndexFS, dtype=int)
+
+                    ## Assign the min FS to the cells inside the sliding surface
+                    FS_Cells = FS_All_MC[GlobalIndexFS]
+                    FS_All_MC[GlobalIndexFS] = np.where((FS_Cells == 0) | (FS_Cells > FS3D_current), FS3D_current, FS_Cells)
+
+        for FS3D, indexesOriginal, EllCenter in SolvedSurfaces:
+            print(
+                "************************************************************ MC:",
+                int(queue_data[3]),
+                "  Ellipsoid center location:",
+                EllCenter,
+                "  FS: ",
+                np.round(FS3D, 5),
+            )
 
         queue_data = queue.get()
         # return()
@@ -6034,9 +6797,8 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
     # plt.colorbar()
     # plt.show()
 
-    ## Allocate temporary index
-    IndexTemp = np.arange(0, nrows * ncols, dtype=int)
-    IndexTemp = np.reshape(IndexTemp, (nrows, ncols))
+    ## Window of the ellipsoid (original cell size). Only the data inside the window are sub-discretisized.
+    SubDisWindow = SubDis_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, ProblemName)
 
     CountSubDis = 0
     ## Subdiscretisize if the number of cells are low (by halving the cell size and arranging the data).
@@ -6045,100 +6807,14 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
 
         CountSubDis += 1  ## Check how many times subdiscretisized
 
-        ## Save previous Coordinates as old coordinates.
-        ## Old and new coordinates are only for linear interpolation below.
-        if nrows == nrows_org:
-            CoorG_old = CoorG
-        else:
-            CoorG_old = CoorG_new  ## Ignore undefined name error here. It will not require it in the first loop.
-
         ## Halve the cellsize for this part only
         cellsize = cellsize / 2
         nrows = nrows * 2  ## Double the number of rows
         ncols = ncols * 2  ## Double the number of columns
 
-        ## Cell center coordinate according to the left bottom option-1 (Global)
-        CoorG_new = []
-        for i in range(nrows):
-            for j in range(ncols):
-                CoorG_new.append(
-                    [
-                        i,
-                        j,
-                        cellsize / 2 + j * cellsize,
-                        (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                    ]
-                )
-        CoorG_new = np.asarray(CoorG_new)  # (row #, column #, x coordinate, y coordinate)
-
-        ## Follow the index numbers
-        IndexTemp = np.kron(IndexTemp, np.ones((2, 2)))
-
-        # ## Arrangement of the soil strength parameters according to new cellsize
-        # if (AnalysisType == 'Drained'):
-        #     ## {c, phi, uws, ksat, diffus} for drained analysis
-        #     c      = np.kron(c,     np.ones((2,2)))  ## Cohesion
-        #     phi    = np.kron(phi,   np.ones((2,2)))  ## Friction angle
-        #     Gamma  = np.kron(Gamma, np.ones((2,2)))  ## Unit weight
-        #     Ksat   = np.kron(Ksat,  np.ones((2,2)))  ## Hydraulic conductivity
-        #     Diff0  = np.kron(Diff0, np.ones((2,2)))  ## Diffusivity
-        # elif (AnalysisType == 'Undrained'):
-        #     ## {Su, uws} for drained analysis
-        #     Su     = np.kron(Su,    np.ones((2,2)))  ## Undrained shear strength
-        #     Gamma  = np.kron(Gamma, np.ones((2,2)))  ## Unit weight
-
-        ## Arrangments with new cellsize
-        ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-        ## "numpy.kron"
-        SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-        ZmaxInput = np.kron(ZmaxInput, np.ones((2, 2)))  ## Zmax input
-        DEMInput = np.kron(DEMInput, np.ones((2, 2)))  ## DEM input
-        # HwInput    = np.kron(HwInput, np.ones((2,2)))     ## Ground water table input
-        # rizeroInput= np.kron(rizeroInput, np.ones((2,2))) ## Background infiltration rate input
-
-        # ## Linear interpolation
-        # ## Slope input
-        # SlopeInput[SlopeInput==NoData]   = np.nan
-        # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-        # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-        # ## Zmax input
-        # ZmaxInput[ZmaxInput==NoData]     = np.nan
-        # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-        # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-        # ## DEM input
-        # DEMInput[DEMInput==NoData]       = np.nan
-        # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-        # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-        # ## Ground water table input
-        # HwInput[HwInput==NoData]         = np.nan
-        # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # HwInput = np.reshape(HwInput, (nrows,ncols))
-        # np.nan_to_num(HwInput,copy=False, nan=NoData)
-        # ## Background infiltration rate input
-        # rizeroInput[rizeroInput==NoData] = np.nan
-        # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-        # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-        # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
-
-        ### !!!
-        ##This part is for simplified case
-        if ProblemName == "SimpCase":
-            ## np.kron does not work for the simplified case.
-            ## For simplified case, DEM should be calculated again.
-            # Allocate DEMs
-            # DEMInput = np.zeros((nrows, ncols))
-            # for i in range(ncols - 1, -1, -1):
-            #     for j in range(nrows - 2, -1, -1):
-            #         DEMInput[j, i] = DEMInput[j + 1, i] + (
-            #             cellsize / 2 * np.tan(np.radians(SlopeInput[j + 1, i]))
-            #             + cellsize / 2 * np.tan(np.radians(SlopeInput[j, i]))
-            #         )
-            # DEMInput = DEMInput + 50  # I added but no need.
-            DEMInput = Calculate_DEM_SimpCase(DEMInput, SlopeInput, nrows_org, nrows, ncols, cellsize)
-        ### !!!
+        ## DEM inside the window with the new cellsize ("numpy.kron"). Other data are arranged after the loop.
+        DEMPatch = SubDis_DEMPatch(DEMInput, SlopeInput, SubDisWindow, CountSubDis, nrows_org, cellsize, ProblemName)
+        RowOffset, ColOffset = SubDisWindow[0] * 2**CountSubDis, SubDisWindow[2] * 2**CountSubDis
 
         ## Determine the cell inside the ellipsoid
         ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
@@ -6149,7 +6825,7 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
             nrows,
             ncols,
             cellsize,
-            DEMInput,
+            DEMPatch,
             EllCenterX,
             EllCenterY,
             EllDEMCenter,
@@ -6159,6 +6835,8 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
             Ellb,
             Ellc,
             Ellz,
+            RowOffset,
+            ColOffset,
         )
         CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## correction to the very low values
 
@@ -6180,10 +6858,9 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
         Depths[np.isnan(Depths)] = 0
         ## DEM of the sliding surface
         DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
-        # DEMdiff = (DEMInput[(int(CellsInside[i,0]),int(CellsInside[i,1]))] - DepthDEM[i,0])
         DEMdiff = (
             np.reshape(
-                DEMInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))],
+                DEMPatch[(CellsInside[:, 0].astype(int) - RowOffset, CellsInside[:, 1].astype(int) - ColOffset)],
                 (np.shape(CellsInside)[0], 1),
             )
             - DepthDEM
@@ -6196,9 +6873,20 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
         indexes = np.delete(indexes, RemoveCond, 0)
 
         ## Save the indexes acccording to the original indexing
-        indexesOriginal = IndexTemp.flatten()[indexes]
+        indexesOriginal = (CellsInside[:, 0].astype(int) // 2**CountSubDis) * ncols_org + CellsInside[:, 1].astype(int) // 2**CountSubDis
         indexesOriginal = np.unique(indexesOriginal)
 
+    ## The cells inside are stored with the rows and columns of the (sub-discretisized) grid.
+    indexesGrid, CellsInsideGrid = indexes, CellsInside
+
+    ## Arrangement of the data according to the new cellsize, only inside the window (instead of the whole grid).
+    ## The cells inside are numbered according to the window in the calculations below.
+    if CountSubDis > 0:
+        CellsInside, indexes, nrows, ncols = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)
+        SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+        ZmaxInput = SubDis_Patch(ZmaxInput, SubDisWindow, CountSubDis)  ## Zmax input
+        DEMInput = DEMPatch  ## DEM input
+
     ## Calculation of the weight and thickness
     Weight = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
     Thickness = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
@@ -6510,8 +7198,8 @@ def Ellipsoid_Generate(count, SubDisNum, nrows, ncols, nel, cellsize, EllParam,
         EllColumn,
         CountSubDis,
         indexesOriginal,
-        indexes,
-        CellsInside,
+        indexesGrid,
+        CellsInsideGrid,
         A,
         Thickness,
         Theta,
@@ -6878,9 +7566,8 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
         # plt.colorbar()
         # plt.show()
 
-        ## Allocate temporary index
-        IndexTemp = np.arange(0, nrows * ncols, dtype=int)
-        IndexTemp = np.reshape(IndexTemp, (nrows, ncols))
+        ## Window of the ellipsoid (original cell size). Only the data inside the window are sub-discretisized.
+        SubDisWindow = SubDis_Window(nrows, ncols, cellsize, EllCenterX, EllCenterY, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz, ProblemName)
 
         CountSubDis = 0
         ## Subdiscretisize if the number of cells are low (by halving the cell size and arranging the data).
@@ -6889,100 +7576,14 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
 
             CountSubDis += 1  ## Check how many times subdiscretisized
 
-            ## Save previous Coordinates as old coordinates.
-            ## Old and new coordinates are only for linear interpolation below.
-            if nrows == nrows_org:
-                CoorG_old = CoorG
-            else:
-                CoorG_old = CoorG_new  ## Ignore undefined name error here. It will not require it in the first loop.
-
             ## Halve the cellsize for this part only
             cellsize = cellsize / 2
             nrows = nrows * 2  ## Double the number of rows
             ncols = ncols * 2  ## Double the number of columns
 
-            ## Cell center coordinate according to the left bottom option-1 (Global)
-            CoorG_new = []
-            for i in range(nrows):
-                for j in range(ncols):
-                    CoorG_new.append(
-                        [
-                            i,
-                            j,
-                            cellsize / 2 + j * cellsize,
-                            (nrows - 1) * cellsize + cellsize / 2 - i * cellsize,
-                        ]
-                    )
-            CoorG_new = np.asarray(CoorG_new)  # (row #, column #, x coordinate, y coordinate)
-
-            ## Follow the index numbers
-            IndexTemp = np.kron(IndexTemp, np.ones((2, 2)))
-
-            # ## Arrangement of the soil strength parameters according to new cellsize
-            # if (AnalysisType == 'Drained'):
-            #     ## {c, phi, uws, ksat, diffus} for drained analysis
-            #     c      = np.kron(c,     np.ones((2,2)))  ## Cohesion
-            #     phi    = np.kron(phi,   np.ones((2,2)))  ## Friction angle
-            #     Gamma  = np.kron(Gamma, np.ones((2,2)))  ## Unit weight
-            #     Ksat   = np.kron(Ksat,  np.ones((2,2)))  ## Hydraulic conductivity
-            #     Diff0  = np.kron(Diff0, np.ones((2,2)))  ## Diffusivity
-            # elif (AnalysisType == 'Undrained'):
-            #     ## {Su, uws} for drained analysis
-            #     Su     = np.kron(Su,    np.ones((2,2)))  ## Undrained shear strength
-            #     Gamma  = np.kron(Gamma, np.ones((2,2)))  ## Unit weight
-
-            ## Arrangments with new cellsize
-            ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-            ## "numpy.kron"
-            SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-            ZmaxInput = np.kron(ZmaxInput, np.ones((2, 2)))  ## Zmax input
-            DEMInput = np.kron(DEMInput, np.ones((2, 2)))  ## DEM input
-            # HwInput    = np.kron(HwInput, np.ones((2,2)))     ## Ground water table input
-            # rizeroInput= np.kron(rizeroInput, np.ones((2,2))) ## Background infiltration rate input
-
-            # ## Linear interpolation
-            # ## Slope input
-            # SlopeInput[SlopeInput==NoData]   = np.nan
-            # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-            # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-            # ## Zmax input
-            # ZmaxInput[ZmaxInput==NoData]     = np.nan
-            # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-            # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-            # ## DEM input
-            # DEMInput[DEMInput==NoData]       = np.nan
-            # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-            # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-            # ## Ground water table input
-            # HwInput[HwInput==NoData]         = np.nan
-            # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # HwInput = np.reshape(HwInput, (nrows,ncols))
-            # np.nan_to_num(HwInput,copy=False, nan=NoData)
-            # ## Background infiltration rate input
-            # rizeroInput[rizeroInput==NoData] = np.nan
-            # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-            # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
-
-            ### !!!
-            ##This part is for simplified case
-            if ProblemName == "SimpCase":
-                ## np.kron does not work for the simplified case.
-                ## For simplified case, DEM should be calculated again.
-                # Allocate DEMs
-                # DEMInput = np.zeros((nrows, ncols))
-                # for i in range(ncols - 1, -1, -1):
-                #     for j in range(nrows - 2, -1, -1):
-                #         DEMInput[j, i] = DEMInput[j + 1, i] + (
-                #             cellsize / 2 * np.tan(np.radians(SlopeInput[j + 1, i]))
-                #             + cellsize / 2 * np.tan(np.radians(SlopeInput[j, i]))
-                #         )
-                # DEMInput = DEMInput + 50  # I added but no need.
-                DEMInput = Calculate_DEM_SimpCase(DEMInput, SlopeInput, nrows_org, nrows, ncols, cellsize)
-            ### !!!
+            ## DEM inside the window with the new cellsize ("numpy.kron"). Other data are arranged after the loop.
+            DEMPatch = SubDis_DEMPatch(DEMInput, SlopeInput, SubDisWindow, CountSubDis, nrows_org, cellsize, ProblemName)
+            RowOffset, ColOffset = SubDisWindow[0] * 2**CountSubDis, SubDisWindow[2] * 2**CountSubDis
 
             ## Determine the cell inside the ellipsoid
             ## Returned CellsInside variable --> [ row(from top), column(from left), xe', ye' ]
@@ -6993,7 +7594,7 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
                 nrows,
                 ncols,
                 cellsize,
-                DEMInput,
+                DEMPatch,
                 EllCenterX,
                 EllCenterY,
                 EllDEMCenter,
@@ -7003,6 +7604,8 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
                 Ellb,
                 Ellc,
                 Ellz,
+                RowOffset,
+                ColOffset,
             )
             CellsInside[np.abs(CellsInside) < 1e-10] = 0  ## correction to the very low values
 
@@ -7024,10 +7627,9 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
             Depths[np.isnan(Depths)] = 0
             ## DEM of the sliding surface
             DepthDEM = EllDEMCenter - (np.reshape(CellsInside[:, 2], (np.shape(CellsInside)[0], 1)) * np.tan(np.radians(EllBeta)) + Depths)
-            # DEMdiff = (DEMInput[(int(CellsInside[i,0]),int(CellsInside[i,1]))] - DepthDEM[i,0])
             DEMdiff = (
                 np.reshape(
-                    DEMInput[(CellsInside[:, 0].astype(int), CellsInside[:, 1].astype(int))],
+                    DEMPatch[(CellsInside[:, 0].astype(int) - RowOffset, CellsInside[:, 1].astype(int) - ColOffset)],
                     (np.shape(CellsInside)[0], 1),
                 )
                 - DepthDEM
@@ -7040,9 +7642,20 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
             indexes = np.delete(indexes, RemoveCond, 0)
 
             ## Save the indexes acccording to the original indexing
-            indexesOriginal = IndexTemp.flatten()[indexes]
+            indexesOriginal = (CellsInside[:, 0].astype(int) // 2**CountSubDis) * ncols_org + CellsInside[:, 1].astype(int) // 2**CountSubDis
             indexesOriginal = np.unique(indexesOriginal)
 
+        ## The cells inside are stored with the rows and columns of the (sub-discretisized) grid.
+        indexesGrid, CellsInsideGrid = indexes, CellsInside
+
+        ## Arrangement of the data according to the new cellsize, only inside the window (instead of the whole grid).
+        ## The cells inside are numbered according to the window in the calculations below.
+        if CountSubDis > 0:
+            CellsInside, indexes, nrows, ncols = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)
+            SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+            ZmaxInput = SubDis_Patch(ZmaxInput, SubDisWindow, CountSubDis)  ## Zmax input
+            DEMInput = DEMPatch  ## DEM input
+
         ## Calculation of the weight and thickness
         Weight = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
         Thickness = np.zeros((np.shape(CellsInside)[0], 1))  ## Allocate
@@ -7354,8 +7967,8 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
                 EllColumn,
                 CountSubDis,
                 indexesOriginal,
-                indexes,
-                CellsInside,
+                indexesGrid,
+                CellsInsideGrid,
                 A,
                 Thickness,
                 Theta,
@@ -7370,14 +7983,129 @@ def Ellipsoid_Generate_Multi(queue_EllGen, inf_list, nrows, ncols, cellsize, Sub
 
 
 # ---------------------------------------------------------------------------------
-def IndMC_Main(AllInf_sorted, AnalysisType, FSCalType, RanFieldMethod, InZone, Results_Directory, Maxrix_Directory, nrows, ncols, cellsize, MCnumber, Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLenX, Parameter_CorrLenY, SaveMat, SlopeInput, ZoneInput, HwInput, rizeroInput, riInp, TimeToAnalyse, NoData, ProblemName=""):
+## Arrays of the sliding surfaces' information (AllInf) kept in the geometry store.
+## Column indexes in AllInf: 0 count, 1 EllRow, 2 EllColumn, 3 CountSubDis, 4-11 the arrays below.
+GeometryStore_Fields = ["indexesOriginal", "indexes", "CellsInside", "A", "Thickness", "Theta", "ThetaAvr", "AngleTangentXZE1"]
+
+
+def Geometry_Store_Key(InZone, SubDisNum, cellsize, EllParam, SlopeInput, ZmaxInput, DEMInput, AspectInput, NoData, ProblemName=""):
     """
-    ## This is the main function in which the calculations are done with single processor.
+    This function returns the key of the sliding surfaces' information in the geometry store.
+    The key is the hash of the maps and the parameters used in the generation of the ellipsoidal sliding surfaces.
+
+    Parameters
+    ----------
+    InZone : Matrix
+        Row and column numbers of the ellipsoid centers.
+    SubDisNum : int
+         Minimum number of cells desired inside the ellipsoidal sliding surface.
+    cellsize : int
+        Cell size.
+    EllParam : array of float
+        Ellipsoidal parameters.
+    SlopeInput, ZmaxInput, DEMInput, AspectInput : array
+         Slope angle, depth to bedrock, digital elevation map data and aspect.
+    NoData : int
+         The value of No Data.
+    ProblemName : str
+         Name of the problem to reproduce results. The default is ''.
+
+    Returns
+    -------
+    Key : str
+        Key of the sliding surfaces' information.
+
+    """
+    Hash = hashlib.sha1()
+    Hash.update(repr((SubDisNum, float(cellsize), list(EllParam), NoData, ProblemName)).encode())
+    for Map in (InZone, SlopeInput, ZmaxInput, DEMInput, AspectInput):
+        Map = np.ascontiguousarray(Map, dtype=float)
+        Hash.update(repr(np.shape(Map)).encode())
+        Hash.update(Map.tobytes())
+    return Hash.hexdigest()[:20]
+
+
+# ---------------------------------------------------------------------------------
+def Geometry_Store_Save(AllInf_sorted, GeometryStore_Path):
+    """
+    This function writes the sliding surfaces' information to the geometry store.
+    The arrays of all sliding surfaces are concatenated into one .npy file for each field with the offsets of each surface.
+    The folder is written under a temporary name and renamed at the end, so that other runs never read an incomplete store.
 
     Parameters
     ----------
     AllInf_sorted : list
         Sliding surfaces' information, sorted based on the list of Inzone.
+    GeometryStore_Path : str
+        The folder of the sliding surfaces' information in the geometry store.
+
+    Returns
+    -------
+    None.
+
+    """
+    TempPath = "%s.tmp%d" % (GeometryStore_Path, os.getpid())
+    os.makedirs(TempPath, exist_ok=True)
+
+    ## count, EllRow, EllColumn, CountSubDis
+    np.save(os.path.join(TempPath, "Header.npy"), np.asarray([SurfaceData[0:4] for SurfaceData in AllInf_sorted], dtype=int).reshape(-1, 4))
+
+    ## Concatenated arrays and the offsets of each surface
+    for k, Field in enumerate(GeometryStore_Fields):
+        Arrays = [np.asarray(SurfaceData[4 + k]) for SurfaceData in AllInf_sorted]
+        Offsets = np.concatenate(([0], np.cumsum([np.shape(Array)[0] for Array in Arrays]))).astype(int)
+        np.save(os.path.join(TempPath, Field + ".npy"), np.concatenate(Arrays, axis=0))
+        np.save(os.path.join(TempPath, Field + "_Offsets.npy"), Offsets)
+
+    ## Another run may have written the same store in the meantime
+    try:
+        os.rename(TempPath, GeometryStore_Path)
+    except OSError:
+        for File in os.listdir(TempPath):
+            os.remove(os.path.join(TempPath, File))
+        os.rmdir(TempPath)
+
+
+# ---------------------------------------------------------------------------------
+def Geometry_Store_Load(GeometryStore_Path):
+    """
+    This function reads the sliding surfaces' information from the geometry store.
+    The arrays are memory-mapped (read-only), so the processes reading the same store share the data.
+
+    Parameters
+    ----------
+    GeometryStore_Path : str
+        The folder of the sliding surfaces' information in the geometry store.
+
+    Returns
+    -------
+    AllInf_sorted : array of objects
+        Sliding surfaces' information, sorted based on the list of Inzone.
+
+    """
+    Header = np.load(os.path.join(GeometryStore_Path, "Header.npy"))
+    AllInf_sorted = np.empty((np.shape(Header)[0], 4 + len(GeometryStore_Fields)), dtype=object)
+    for i in range(4):
+        AllInf_sorted[:, i] = [int(Value) for Value in Header[:, i]]
+
+    for k, Field in enumerate(GeometryStore_Fields):
+        Array = np.load(os.path.join(GeometryStore_Path, Field + ".npy"), mmap_mode="r")
+        Offsets = np.load(os.path.join(GeometryStore_Path, Field + "_Offsets.npy"))
+        for i in range(np.shape(Header)[0]):
+            AllInf_sorted[i, 4 + k] = Array[Offsets[i] : Offsets[i + 1]]
+
+    return AllInf_sorted
+
+
+# ---------------------------------------------------------------------------------
+def IndMC_Main(AllInf_sorted, AnalysisType, FSCalType, RanFieldMethod, InZone, Results_Directory, Maxrix_Directory, nrows, ncols, cellsize, MCnumber, Parameter_Means, Parameter_CoVs, Parameter_Dist, Parameter_CorrLenX, Parameter_CorrLenY, SaveMat, SlopeInput, ZoneInput, HwInput, rizeroInput, riInp, TimeToAnalyse, NoData, ProblemName=""):
+    """
+    ## This is the main function in which the calculations are done with single processor.
+
+    Parameters
+    ----------
+    AllInf_sorted : list or str
+        Sliding surfaces' information, sorted based on the list of Inzone, or the folder of the information in the geometry store (Geometry_Store_Save).
     AnalysisType : str
         It might be either 'Drained' or 'Undrained'.
     FSCalType : str
@@ -7439,11 +8167,27 @@ def IndMC_Main(AllInf_sorted, AnalysisType, FSCalType, RanFieldMethod, InZone, R
     # FS_All_MC = [0]*(np.shape(TimeToAnalyse)[0] * MCnumber * nrows * ncols) ## multiple time instances
     FS_All_MC = []
 
+    ## Memory-map the sliding surfaces' information from the geometry store
+    if isinstance(AllInf_sorted, str):
+        AllInf_sorted = Geometry_Store_Load(AllInf_sorted)
+
+    ## Running probability of failure for convergence-driven stopping
+    ConvergenceState = {}
+
+    ## Remove the result files of an earlier run (only the completed realizations are skipped in resume mode)
+    MC_Result_Remove(Results_Directory, [i for i in range(MCnumber) if not MC_Result_Exists(Results_Directory, i)])
+
     # MC_current = 0
     for MC_current in range(MCnumber):  # One MC analysis in each for loop
         ## Print current MC number
         print("MC:%d" % (MC_current))
 
+        ## Skip the realization if it is completed in a previous run (resume)
+        if MC_Result_Exists(Results_Directory, MC_current):
+            if MC_Convergence_Update(ConvergenceState, Results_Directory, MC_current):
+                break
+            continue
+
         # FS_All_MC = IndMC_FS(AllInf_sorted,FS_All_MC,MC_current, AnalysisType, FSCalType, RanFieldMethod, \
         #                                     InZone, MCnumber, Results_Directory, Maxrix_Directory, \
         #                                     nrows, ncols, cellsize, \
@@ -7482,6 +8226,10 @@ def IndMC_Main(AllInf_sorted, AnalysisType, FSCalType, RanFieldMethod, InZone, R
             ProblemName,
         )
 
+        ## Stop if the probability of failure has converged
+        if MC_Convergence_Update(ConvergenceState, Results_Directory, MC_current):
+            break
+
     # return(FS_All_MC)
     return ()
 
@@ -7554,22 +8302,28 @@ def IndMC_FS(AllInf_sorted, FS_All_MC, MC_current, AnalysisType, FSCalType, RanF
 
     """
 
-    ## Generate parameter fields
-    Parameter_Fields = Par_Fields(
-        Parameter_Means,
-        Parameter_CoVs,
-        Parameter_Dist,
-        Parameter_CorrLenX,
-        Parameter_CorrLenY,
-        nrows,
-        ncols,
-        cellsize,
-        RanFieldMethod,
-        ZoneInput,
-        Maxrix_Directory,
-        NoData,
-        SaveMat,
-    )
+    ## Continue the realization from its checkpoint, if there is one (resume). Otherwise, generate parameter fields.
+    Checkpoint = MC_Checkpoint_Load(Results_Directory, MC_current)
+    if Checkpoint is None:
+        Parameter_Fields = Par_Fields(
+            Parameter_Means,
+            Parameter_CoVs,
+            Parameter_Dist,
+            Parameter_CorrLenX,
+            Parameter_CorrLenY,
+            nrows,
+            ncols,
+            cellsize,
+            RanFieldMethod,
+            ZoneInput,
+            Maxrix_Directory,
+            NoData,
+            SaveMat,
+            MC_current,
+        )
+        EllStart = 0
+    else:
+        EllStart, FS_All_MC_Checkpoint, Parameter_Fields = Checkpoint[:3]
 
     ## Keep the original values
     nrows_org, ncols_org = nrows, ncols
@@ -7579,10 +8333,14 @@ def IndMC_FS(AllInf_sorted, FS_All_MC, MC_current, AnalysisType, FSCalType, RanF
 
     ## Allocate FS
     # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
-    FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)  ### (Shared array change)
+    FS_All_MC = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols) if Checkpoint is None else FS_All_MC_Checkpoint  ### (Shared array change)
+    EllCheckpoint = EllStart
+
+    ## Bishop 3D and Janbu 3D surfaces waiting to be solved together by FS3D_Surfaces
+    FS3D_Pending, FS3D_PendingOriginal = [], []
 
     # EllCurr = 0
-    for EllCurr in range(np.shape(AllInf_sorted)[0]):
+    for EllCurr in range(EllStart, np.shape(AllInf_sorted)[0]):
 
         ## Keep the original values
         SlopeInput, HwInput, rizeroInput = SlopeInput_org, HwInput_org, rizeroInput_org
@@ -7617,58 +8375,35 @@ def IndMC_FS(AllInf_sorted, FS_All_MC, MC_current, AnalysisType, FSCalType, RanF
             Gamma = Parameter_Fields[1]  ## Unit weight
 
         ## Subdivide the parameters based on the number in the generation of surfaces, CountSubDis
-        for SubDisCurr in range(CountSubDis):
-
-            cellsize = cellsize / 2
+        ## Only the data inside the window of the cells inside are arranged ("numpy.kron"), and the cells are numbered according to the window.
+        ## The patches of the data not changing with the realizations are reused.
+        if CountSubDis > 0:
+            cellsize = cellsize / 2**CountSubDis
+            SubDisWindow = (
+                int(np.min(CellsInside[:, 0].astype(int) // 2**CountSubDis)),
+                int(np.max(CellsInside[:, 0].astype(int) // 2**CountSubDis)),
+                int(np.min(CellsInside[:, 1].astype(int) // 2**CountSubDis)),
+                int(np.max(CellsInside[:, 1].astype(int) // 2**CountSubDis)),
+            )
+            CellsInside, indexes = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)[:2]
 
             ## Arrangement of the soil strength parameters according to new cellsize
             if AnalysisType == "Drained":
                 ## {c, phi, uws, ksat, diffus} for drained analysis
-                c = np.kron(c, np.ones((2, 2)))  ## Cohesion
-                phi = np.kron(phi, np.ones((2, 2)))  ## Friction angle
-                Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-                Ksat = np.kron(Ksat, np.ones((2, 2)))  ## Hydraulic conductivity
-                Diff0 = np.kron(Diff0, np.ones((2, 2)))  ## Diffusivity
+                c = SubDis_Patch(c, SubDisWindow, CountSubDis)  ## Cohesion
+                phi = SubDis_Patch(phi, SubDisWindow, CountSubDis)  ## Friction angle
+                Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+                Ksat = SubDis_Patch(Ksat, SubDisWindow, CountSubDis)  ## Hydraulic conductivity
+                Diff0 = SubDis_Patch(Diff0, SubDisWindow, CountSubDis)  ## Diffusivity
             elif AnalysisType == "Undrained":
                 ## {Su, uws} for drained analysis
-                Su = np.kron(Su, np.ones((2, 2)))  ## Undrained shear strength
-                Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
+                Su = SubDis_Patch(Su, SubDisWindow, CountSubDis)  ## Undrained shear strength
+                Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
 
             ## Arrangments with new cellsize
-            ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-            ## "numpy.kron"
-            SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-            # ZmaxInput  = np.kron(ZmaxInput, np.ones((2,2)))   ## Zmax input
-            # DEMInput   = np.kron(DEMInput, np.ones((2,2)))    ## DEM input
-            HwInput = np.kron(HwInput, np.ones((2, 2)))  ## Ground water table input
-            rizeroInput = np.kron(rizeroInput, np.ones((2, 2)))  ## Background infiltration rate input
-
-            # ## Linear interpolation
-            # ## Slope input
-            # SlopeInput[SlopeInput==NoData]   = np.nan
-            # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-            # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-            # ## Zmax input
-            # ZmaxInput[ZmaxInput==NoData]     = np.nan
-            # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-            # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-            # ## DEM input
-            # DEMInput[DEMInput==NoData]       = np.nan
-            # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-            # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-            # ## Ground water table input
-            # HwInput[HwInput==NoData]         = np.nan
-            # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # HwInput = np.reshape(HwInput, (nrows,ncols))
-            # np.nan_to_num(HwInput,copy=False, nan=NoData)
-            # ## Background infiltration rate input
-            # rizeroInput[rizeroInput==NoData] = np.nan
-            # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-            # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-            # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
+            SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+            HwInput = SubDis_Patch(HwInput, SubDisWindow, CountSubDis, Reuse=True)  ## Ground water table input
+            rizeroInput = SubDis_Patch(rizeroInput, SubDisWindow, CountSubDis, Reuse=True)  ## Background infiltration rate input
 
         ## Calculate the weight using the gamma values
         Weight = Thickness * cellsize**2 * np.expand_dims(Gamma.flatten()[indexes], axis=1)
@@ -7774,49 +8509,13 @@ def IndMC_FS(AllInf_sorted, FS_All_MC, MC_current, AnalysisType, FSCalType, RanF
 
             elif FSCalType == "Bishop3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSBishop3D,
-                        1.5,
-                        args=(
-                            c,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D_Initial = 1.5
+                FS3D_Pending.append((c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
             elif FSCalType == "Janbu3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSJanbu3D,
-                        1.0,
-                        args=(
-                            c,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D_Initial = 1.0
+                FS3D_Pending.append((c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
         elif AnalysisType == "Undrained":
 
@@ -7845,49 +8544,13 @@ def IndMC_FS(AllInf_sorted, FS_All_MC, MC_current, AnalysisType, FSCalType, RanF
 
             elif FSCalType == "Bishop3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSBishop3D,
-                        1.5,
-                        args=(
-                            Su,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D_Initial = 1.5
+                FS3D_Pending.append((Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
             elif FSCalType == "Janbu3D":
 
-                FS3D = []
-                for PoreWaterForceCurrent in PoreWaterForce:
-                    FS3D_current = root(
-                        FSJanbu3D,
-                        1.5,
-                        args=(
-                            Su,
-                            phi,
-                            CellsInside,
-                            Weight,
-                            PoreWaterForceCurrent,
-                            ThetaAvr,
-                            Theta,
-                            A,
-                            AngleTangentXZE1,
-                        ),
-                    )
-                    FS3D_current = FS3D_current.x[0]
-                    # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                    FS3D.append(FS3D_current)
+                FS3D_Initial = 1.5
+                FS3D_Pending.append((Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
         ## Changing these values are only related to the indexing.
         ## I changed overall FS array to the sub-shared arrays. Therefore, indexing needs this adjustment.
@@ -7896,27 +8559,42 @@ def IndMC_FS(AllInf_sorted, FS_All_MC, MC_current, AnalysisType, FSCalType, RanF
         ## Original indexes of the cells inside the sliding surface
         indexesOriginal = np.asarray(indexesOriginal, dtype=int)
 
-        ## For each time instance, assign the min FS to the cells
-        for TimeInd in range(np.shape(TimeToAnalyse)[0]):
-            # print(TimeInd)
-            ## FS3D value at the current time instance
-            FS3D_current = np.round(FS3D[TimeInd], 5)
+        ## Bishop 3D and Janbu 3D surfaces are solved together when the batch is full or at the last surface
+        if FSCalType == "Normal3D":
+            SolvedSurfaces = [(FS3D, indexesOriginal)]
+        else:
+            FS3D_PendingOriginal.append(indexesOriginal)
+            PaddedCells = len(FS3D_Pending) * np.shape(TimeToAnalyse)[0] * max(np.size(Surface[2]) for Surface in FS3D_Pending)
+            if PaddedCells < FS3D_BatchCells and EllCurr < np.shape(AllInf_sorted)[0] - 1:
+                continue
+            SolvedSurfaces = list(zip(FS3D_Surfaces(FSCalType, FS3D_Pending, FSInitial=FS3D_Initial), FS3D_PendingOriginal))
+            FS3D_Pending, FS3D_PendingOriginal = [], []
 
-            ## Global indexes
-            GlobalIndexFS = TimeInd * nrows_org * ncols_org * MCnumber + nrows_org * ncols_org * MC_current + indexesOriginal
-            GlobalIndexFS = np.asarray(GlobalIndexFS, dtype=int)
+        for FS3D, indexesOriginal in SolvedSurfaces:
 
-            ## Assign the min FS to the cells inside the sliding surface
-            for i in GlobalIndexFS:
-                FS_All_MC[i] = FS3D_current if ((FS_All_MC[i] == 0) or (FS_All_MC[i] > FS3D_current)) else FS_All_MC[i]
+            ## For each time instance, assign the min FS to the cells
+            for TimeInd in range(np.shape(TimeToAnalyse)[0]):
+                # print(TimeInd)
+                ## FS3D value at the current time instance
+                FS3D_current = np.round(FS3D[TimeInd], 5)
+
+                ## Global indexes
+                GlobalIndexFS = TimeInd * nrows_org * ncols_org * MCnumber + nrows_org * ncols_org * MC_current + indexesOriginal
+                GlobalIndexFS = np.asarray(GlobalIndexFS, dtype=int)
+
+                ## Assign the min FS to the cells inside the sliding surface
+                for i in GlobalIndexFS:
+                    FS_All_MC[i] = FS3D_current if ((FS_All_MC[i] == 0) or (FS_All_MC[i] > FS3D_current)) else FS_All_MC[i]
+
+        ## Checkpoint of the partial min-FS map (no surface is waiting to be solved here)
+        EllCheckpoint = MC_Checkpoint_Save(Results_Directory, MC_current_org, EllCurr + 1, EllCheckpoint, np.shape(AllInf_sorted)[0], FS_All_MC, Parameter_Fields)
 
     ## Write FS for the current MC simulation
     FS_All_MC_InZone = np.asarray(FS_All_MC)
     FS_All_MC_InZone = np.reshape(FS_All_MC_InZone, (np.shape(TimeToAnalyse)[0], nrows, ncols))  ### (Shared array change)
 
     os.chdir(Results_Directory)
-    NameResFile = "MC_%.4d_FS_Values" % (MC_current_org)
-    np.save(NameResFile, FS_All_MC_InZone)  # Save as .npy
+    MC_Result_Save(Results_Directory, MC_current_org, FS_All_MC_InZone)  # Save as .npy
 
     # return(FS_All_MC)
     return ()
@@ -7931,8 +8609,8 @@ def IndMC_Main_Multi(TOTAL_PROCESSES_IndMC, AllInf_sorted, AnalysisType, FSCalTy
     ----------
     TOTAL_PROCESSES_IndMC : int
         Numbers of processors used for calculating factor of safety of the ellipsoidal sliding surfes.
-    AllInf_sorted : list
-        Sliding surfaces' information, sorted based on the list of Inzone.
+    AllInf_sorted : list or str
+        Sliding surfaces' information, sorted based on the list of Inzone, or the folder of the information in the geometry store (Geometry_Store_Save).
     AnalysisType : str
         It might be either 'Drained' or 'Undrained'.
     FSCalType : str
@@ -8044,9 +8722,18 @@ def IndMC_Main_Multi(TOTAL_PROCESSES_IndMC, AllInf_sorted, AnalysisType, FSCalTy
             processes_mc_ind.append(p_mc_ind)
             p_mc_ind.start()
 
+        ## Skip the realizations completed in a previous run (resume)
+        ConvergenceState = {}
+        MC_List = []
         for i in range(MCnumber):
-            queue_mc_ind.put(i)
-            # print("queue_mc.put([,]): MC ",i)
+            if not MC_Result_Exists(Results_Directory, i):
+                MC_List.append(i)
+                # print("queue_mc.put([,]): MC ",i)
+            elif MC_Convergence_Update(ConvergenceState, Results_Directory, i):
+                MC_List = []
+                break
+        ## Put the realizations until the probability of failure converges
+        MC_Queue_Until_Converged(queue_mc_ind, MC_List, processes_mc_ind, Results_Directory, ConvergenceState)
 
         for _ in range(TOTAL_PROCESSES_IndMC):
             queue_mc_ind.put(None)
@@ -8066,8 +8753,8 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
     ----------
     queue_mc_ind : -
                 Queue of the tasks for multiprocessing for Monte Carlo simulations.
-    AllInf_sorted : list
-        Sliding surfaces' information, sorted based on the list of Inzone.
+    AllInf_sorted : list or str
+        Sliding surfaces' information, sorted based on the list of Inzone, or the folder of the information in the geometry store (Geometry_Store_Save).
     AnalysisType : str
         It might be either 'Drained' or 'Undrained'.
     FSCalType : str
@@ -8152,6 +8839,10 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
         ProblemName,
     )
 
+    ## Memory-map the sliding surfaces' information from the geometry store (shared by the processes)
+    if isinstance(AllInf_sorted, str):
+        AllInf_sorted = Geometry_Store_Load(AllInf_sorted)
+
     queue_data_mc_ind = queue_mc_ind.get()
 
     while queue_data_mc_ind is not None:
@@ -8187,22 +8878,29 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
         MC_current = int(queue_data_mc_ind)
         print("---->------>----->>>>>", int(MC_current))
 
-        ## Generate parameter fields
-        Parameter_Fields = Par_Fields(
-            Parameter_Means,
-            Parameter_CoVs,
-            Parameter_Dist,
-            Parameter_CorrLenX,
-            Parameter_CorrLenY,
-            nrows,
-            ncols,
-            cellsize,
-            RanFieldMethod,
-            ZoneInput,
-            Maxrix_Directory,
-            NoData,
-            SaveMat,
-        )
+        ## Continue the realization from its checkpoint, if there is one (resume). Otherwise, generate parameter fields.
+        Checkpoint = MC_Checkpoint_Load(Results_Directory, MC_current)
+        if Checkpoint is None:
+            ## Generate parameter fields
+            Parameter_Fields = Par_Fields(
+                Parameter_Means,
+                Parameter_CoVs,
+                Parameter_Dist,
+                Parameter_CorrLenX,
+                Parameter_CorrLenY,
+                nrows,
+                ncols,
+                cellsize,
+                RanFieldMethod,
+                ZoneInput,
+                Maxrix_Directory,
+                NoData,
+                SaveMat,
+                MC_current,
+            )
+            EllStart = 0
+        else:
+            EllStart, FSValues_MC_Checkpoint, Parameter_Fields = Checkpoint[:3]
 
         ## Keep the original values
         nrows_org, ncols_org = nrows, ncols
@@ -8210,12 +8908,16 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
         SlopeInput_org, HwInput_org, rizeroInput_org = SlopeInput, HwInput, rizeroInput
 
         ## Allocate
-        FSValues_MC_Current = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols)
+        FSValues_MC_Current = [0] * (np.shape(TimeToAnalyse)[0] * nrows * ncols) if Checkpoint is None else FSValues_MC_Checkpoint
+        EllCheckpoint = EllStart
 
         ## Allocate FS
         # TempLst = {i:[] for i in list(range(0,nrows*ncols))}
+        ## Bishop 3D and Janbu 3D surfaces waiting to be solved together by FS3D_Surfaces
+        FS3D_Pending, FS3D_PendingOriginal = [], []
+
         # EllCurr = 0
-        for EllCurr in range(np.shape(AllInf_sorted)[0]):
+        for EllCurr in range(EllStart, np.shape(AllInf_sorted)[0]):
 
             ## Keep the original values
             SlopeInput, HwInput, rizeroInput = (
@@ -8254,58 +8956,35 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
                 Gamma = Parameter_Fields[1]  ## Unit weight
 
             ## Subdivide the parameters based on the number in the generation of surfaces, CountSubDis
-            for SubDisCurr in range(CountSubDis):
-
-                cellsize = cellsize / 2
+            ## Only the data inside the window of the cells inside are arranged ("numpy.kron"), and the cells are numbered according to the window.
+            ## The patches of the data not changing with the realizations are reused.
+            if CountSubDis > 0:
+                cellsize = cellsize / 2**CountSubDis
+                SubDisWindow = (
+                    int(np.min(CellsInside[:, 0].astype(int) // 2**CountSubDis)),
+                    int(np.max(CellsInside[:, 0].astype(int) // 2**CountSubDis)),
+                    int(np.min(CellsInside[:, 1].astype(int) // 2**CountSubDis)),
+                    int(np.max(CellsInside[:, 1].astype(int) // 2**CountSubDis)),
+                )
+                CellsInside, indexes = SubDis_Local(CellsInside, SubDisWindow, CountSubDis)[:2]
 
                 ## Arrangement of the soil strength parameters according to new cellsize
                 if AnalysisType == "Drained":
                     ## {c, phi, uws, ksat, diffus} for drained analysis
-                    c = np.kron(c, np.ones((2, 2)))  ## Cohesion
-                    phi = np.kron(phi, np.ones((2, 2)))  ## Friction angle
-                    Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
-                    Ksat = np.kron(Ksat, np.ones((2, 2)))  ## Hydraulic conductivity
-                    Diff0 = np.kron(Diff0, np.ones((2, 2)))  ## Diffusivity
+                    c = SubDis_Patch(c, SubDisWindow, CountSubDis)  ## Cohesion
+                    phi = SubDis_Patch(phi, SubDisWindow, CountSubDis)  ## Friction angle
+                    Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
+                    Ksat = SubDis_Patch(Ksat, SubDisWindow, CountSubDis)  ## Hydraulic conductivity
+                    Diff0 = SubDis_Patch(Diff0, SubDisWindow, CountSubDis)  ## Diffusivity
                 elif AnalysisType == "Undrained":
                     ## {Su, uws} for drained analysis
-                    Su = np.kron(Su, np.ones((2, 2)))  ## Undrained shear strength
-                    Gamma = np.kron(Gamma, np.ones((2, 2)))  ## Unit weight
+                    Su = SubDis_Patch(Su, SubDisWindow, CountSubDis)  ## Undrained shear strength
+                    Gamma = SubDis_Patch(Gamma, SubDisWindow, CountSubDis)  ## Unit weight
 
                 ## Arrangments with new cellsize
-                ## You can either use numpy.kron or linear interpolation. Select the desired method below:
-                ## "numpy.kron"
-                SlopeInput = np.kron(SlopeInput, np.ones((2, 2)))  ## Slope input
-                # ZmaxInput  = np.kron(ZmaxInput, np.ones((2,2)))   ## Zmax input
-                # DEMInput   = np.kron(DEMInput, np.ones((2,2)))    ## DEM input
-                HwInput = np.kron(HwInput, np.ones((2, 2)))  ## Ground water table input
-                rizeroInput = np.kron(rizeroInput, np.ones((2, 2)))  ## Background infiltration rate input
-
-                # ## Linear interpolation
-                # ## Slope input
-                # SlopeInput[SlopeInput==NoData]   = np.nan
-                # SlopeInput = griddata(CoorG_old[:,(2,3)], SlopeInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-                # SlopeInput = np.reshape(SlopeInput, (nrows,ncols))
-                # np.nan_to_num(SlopeInput,copy=False, nan=NoData)
-                # ## Zmax input
-                # ZmaxInput[ZmaxInput==NoData]     = np.nan
-                # ZmaxInput = griddata(CoorG_old[:,(2,3)], ZmaxInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-                # ZmaxInput = np.reshape(ZmaxInput, (nrows,ncols))
-                # np.nan_to_num(ZmaxInput,copy=False, nan=NoData)
-                # ## DEM input
-                # DEMInput[DEMInput==NoData]       = np.nan
-                # DEMInput = griddata(CoorG_old[:,(2,3)], DEMInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-                # DEMInput = np.reshape(DEMInput, (nrows,ncols))
-                # np.nan_to_num(DEMInput,copy=False, nan=NoData)
-                # ## Ground water table input
-                # HwInput[HwInput==NoData]         = np.nan
-                # HwInput = griddata(CoorG_old[:,(2,3)], HwInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-                # HwInput = np.reshape(HwInput, (nrows,ncols))
-                # np.nan_to_num(HwInput,copy=False, nan=NoData)
-                # ## Background infiltration rate input
-                # rizeroInput[rizeroInput==NoData] = np.nan
-                # rizeroInput = griddata(CoorG_old[:,(2,3)], rizeroInput.flatten().T, CoorG_new[:,(2,3)], method='linear')
-                # rizeroInput = np.reshape(rizeroInput, (nrows,ncols))
-                # np.nan_to_num(rizeroInput,copy=False, nan=NoData)
+                SlopeInput = SubDis_Patch(SlopeInput, SubDisWindow, CountSubDis, Reuse=True)  ## Slope input
+                HwInput = SubDis_Patch(HwInput, SubDisWindow, CountSubDis, Reuse=True)  ## Ground water table input
+                rizeroInput = SubDis_Patch(rizeroInput, SubDisWindow, CountSubDis, Reuse=True)  ## Background infiltration rate input
 
             ## Calculate the weight using the gamma values
             Weight = Thickness * cellsize**2 * np.expand_dims(Gamma.flatten()[indexes], axis=1)
@@ -8411,49 +9090,13 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
 
                 elif FSCalType == "Bishop3D":
 
-                    FS3D = []
-                    for PoreWaterForceCurrent in PoreWaterForce:
-                        FS3D_current = root(
-                            FSBishop3D,
-                            1.5,
-                            args=(
-                                c,
-                                phi,
-                                CellsInside,
-                                Weight,
-                                PoreWaterForceCurrent,
-                                ThetaAvr,
-                                Theta,
-                                A,
-                                AngleTangentXZE1,
-                            ),
-                        )
-                        FS3D_current = FS3D_current.x[0]
-                        # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                        FS3D.append(FS3D_current)
+                    FS3D_Initial = 1.5
+                    FS3D_Pending.append((c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
                 elif FSCalType == "Janbu3D":
 
-                    FS3D = []
-                    for PoreWaterForceCurrent in PoreWaterForce:
-                        FS3D_current = root(
-                            FSJanbu3D,
-                            1.0,
-                            args=(
-                                c,
-                                phi,
-                                CellsInside,
-                                Weight,
-                                PoreWaterForceCurrent,
-                                ThetaAvr,
-                                Theta,
-                                A,
-                                AngleTangentXZE1,
-                            ),
-                        )
-                        FS3D_current = FS3D_current.x[0]
-                        # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                        FS3D.append(FS3D_current)
+                    FS3D_Initial = 1.0
+                    FS3D_Pending.append((c, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
             elif AnalysisType == "Undrained":
 
@@ -8482,83 +9125,63 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
 
                 elif FSCalType == "Bishop3D":
 
-                    FS3D = []
-                    for PoreWaterForceCurrent in PoreWaterForce:
-                        FS3D_current = root(
-                            FSBishop3D,
-                            1.0,
-                            args=(
-                                Su,
-                                phi,
-                                CellsInside,
-                                Weight,
-                                PoreWaterForceCurrent,
-                                ThetaAvr,
-                                Theta,
-                                A,
-                                AngleTangentXZE1,
-                            ),
-                        )
-                        FS3D_current = FS3D_current.x[0]
-                        # print( "Bishop 3D FS is %.5f"%FS3D_current)
-                        FS3D.append(FS3D_current)
+                    FS3D_Initial = 1.0
+                    FS3D_Pending.append((Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
                 elif FSCalType == "Janbu3D":
 
-                    FS3D = []
-                    for PoreWaterForceCurrent in PoreWaterForce:
-                        FS3D_current = root(
-                            FSJanbu3D,
-                            1.0,
-                            args=(
-                                Su,
-                                phi,
-                                CellsInside,
-                                Weight,
-                                PoreWaterForceCurrent,
-                                ThetaAvr,
-                                Theta,
-                                A,
-                                AngleTangentXZE1,
-                            ),
-                        )
-                        FS3D_current = FS3D_current.x[0]
-                        # print( "Janbu 3D FS is %.5f"%FS3D_current)
-                        FS3D.append(FS3D_current)
+                    FS3D_Initial = 1.0
+                    FS3D_Pending.append((Su, phi, Weight, PoreWaterForce, ThetaAvr, Theta, A, AngleTangentXZE1))
 
             ## Original indexes of the cells inside the sliding surface
             indexesOriginal = np.asarray(indexesOriginal, dtype=int)
 
-            ## For each time instance, assign the min FS to the cells
-            for TimeInd in range(np.shape(TimeToAnalyse)[0]):
-                # print(TimeInd)
-                ## FS3D value at the current time instance
-                FS3D_current = np.round(FS3D[TimeInd], 5)
-
-                """
-                ## Old way to write using shared array
-                """
-
-                # ## Global indexes
-                # GlobalIndexFS   = TimeInd * nrows_org * ncols_org * MCnumber + \
-                #                             nrows_org * ncols_org * MC_current + \
-                #                                 indexesOriginal
-                # GlobalIndexFS = np.asarray(GlobalIndexFS,dtype=int)
-
-                # ## Assign the min FS to the cells inside the sliding surface
-                # for i in GlobalIndexFS:
-                #     FS_All_MC[i] = FS3D_current if ((FS_All_MC[i]==0) or (FS_All_MC[i] > FS3D_current)) else FS_All_MC[i]
-
-                """
-                ## New way to write
-                """
-                ## Index for data in a Monte Carlo, not shared
-                GlobalIndex_MC_Current = TimeInd * nrows_org * ncols_org + indexesOriginal
-                GlobalIndex_MC_Current = np.asarray(GlobalIndex_MC_Current, dtype=int)
-
-                ## Assign the min FS to the cells inside the sliding surface
-                for i in GlobalIndex_MC_Current:
-                    FSValues_MC_Current[i] = FS3D_current if ((FSValues_MC_Current[i] == 0) or (FSValues_MC_Current[i] > FS3D_current)) else FSValues_MC_Current[i]
+            ## Bishop 3D and Janbu 3D surfaces are solved together when the batch is full or at the last surface
+            if FSCalType == "Normal3D":
+                SolvedSurfaces = [(FS3D, indexesOriginal)]
+            else:
+                FS3D_PendingOriginal.append(indexesOriginal)
+                PaddedCells = len(FS3D_Pending) * np.shape(TimeToAnalyse)[0] * max(np.size(Surface[2]) for Surface in FS3D_Pending)
+                if PaddedCells < FS3D_BatchCells and EllCurr < np.shape(AllInf_sorted)[0] - 1:
+                    continue
+                SolvedSurfaces = list(zip(FS3D_Surfaces(FSCalType, FS3D_Pending, FSInitial=FS3D_Initial), FS3D_PendingOriginal))
+                FS3D_Pending, FS3D_PendingOriginal = [], []
+
+            for FS3D, indexesOriginal in SolvedSurfaces:
+
+                ## For each time instance, assign the min FS to the cells
+                for TimeInd in range(np.shape(TimeToAnalyse)[0]):
+                    # print(TimeInd)
+                    ## FS3D value at the current time instance
+                    FS3D_current = np.round(FS3D[TimeInd], 5)
+
+                    """
+                    ## Old way to write using shared array
+                    """
+
+                    # ## Global indexes
+                    # GlobalIndexFS   = TimeInd * nrows_org * ncols_org * MCnumber + \
+                    #                             nrows_org * ncols_org * MC_current + \
+                    #                                 indexesOriginal
+                    # GlobalIndexFS = np.asarray(GlobalIndexFS,dtype=int)
+
+                    # ## Assign the min FS to the cells inside the sliding surface
+                    # for i in GlobalIndexFS:
+                    #     FS_All_MC[i] = FS3D_current if ((FS_All_MC[i]==0) or (FS_All_MC[i] > FS3D_current)) else FS_All_MC[i]
+
+                    """
+                    ## New way to write
+                    """
+                    ## Index for data in a Monte Carlo, not shared
+                    GlobalIndex_MC_Current = TimeInd * nrows_org * ncols_org + indexesOriginal
+                    GlobalIndex_MC_Current = np.asarray(GlobalIndex_MC_Current, dtype=int)
+
+                    ## Assign the min FS to the cells inside the sliding surface
+                    for i in GlobalIndex_MC_Current:
+                        FSValues_MC_Current[i] = FS3D_current if ((FSValues_MC_Current[i] == 0) or (FSValues_MC_Current[i] > FS3D_current)) else FSValues_MC_Current[i]
+
+            ## Checkpoint of the partial min-FS map (no surface is waiting to be solved here)
+            EllCheckpoint = MC_Checkpoint_Save(Results_Directory, MC_current, EllCurr + 1, EllCheckpoint, np.shape(AllInf_sorted)[0], FSValues_MC_Current, Parameter_Fields)
 
         """
         ## New way to write
@@ -8570,8 +9193,7 @@ def IndMC_FS_Multi(queue_mc_ind, AllInf_sorted, AnalysisType, FSCalType, RanFiel
         # FS_All_MC_InZone = FS_All_MC_InZone[:,InZone[0,0]:InZone[0,1]+1, InZone[1,0]:InZone[1,1]+1] ## (InZone change)
         ## Write FS for the current MC simulation
         os.chdir(Results_Directory)
-        NameResFile = "MC_%.4d_FS_Values" % (MC_current)
-        np.save(NameResFile, FS_All_MC_InZone)  # Save as .npy
+        MC_Result_Save(Results_Directory, MC_current, FS_All_MC_InZone)  # Save as .npy
 
         """
         ## Old way to write using shared array
@@ -238,9 +238,17 @@ print(f"GIS_Data_Directory: {GIS_Data_Directory}")
 Results_Directory = os.path.join(Workspace_Root, "3DPLS", config['directories']['output_folder'].replace("./", "").replace("/", "\\"))
 print(f"Results_Directory: {Results_Directory}")
 
+## Get geometry store directory from YAML config (optional). Sliding surfaces are reused by the runs with the same maps and ellipsoid parameters.
+GeometryStore_Directory = config['directories'].get('geometry_store_folder', None)
+if GeometryStore_Directory is not None:
+    GeometryStore_Directory = os.path.join(Workspace_Root, "3DPLS", GeometryStore_Directory.replace("./", "").replace("/", "\\"))
+    print(f"GeometryStore_Directory: {GeometryStore_Directory}")
+
 ## Create directories if they do not exist.
 if os.path.exists(Maxrix_Directory) == False:
     os.makedirs(Maxrix_Directory)
+if GeometryStore_Directory is not None and os.path.exists(GeometryStore_Directory) == False:
+    os.makedirs(GeometryStore_Directory)
 if os.path.exists(Results_Directory) == False:
     os.makedirs(Results_Directory)
 if os.path.exists(Main_Directory + "\\InputData") == False:
@@ -259,6 +267,7 @@ os.chdir(Main_Directory)  ## Change directory
 ## Import the function to read the ASCII grid format files
 os.chdir(Code_Directory)  ## Change directory
 from Functions_3DPLS_v1_1 import ReadData, DataArrange
+from raster_io import read_ascii_grid_header, set_raster_cache
 
 ## Dimensions of the problem domain
 ## The user can define the dimensions or it can be read from the dem file.
@@ -270,19 +279,20 @@ from Functions_3DPLS_v1_1 import ReadData, DataArrange
 ## Entry from dem file (or any other file with ASCII format)
 os.chdir(GIS_Data_Directory)  ## Change directory
 dem_filename = config['gis_files']['dem']
-with open(dem_filename) as f:  ## read information from dem file
-    Temp = f.readlines()[0:7]
-    ncols = int(Temp[0].split()[1])  ## Number of columns
-    nrows = int(Temp[1].split()[1])  ## Number of rows
-    xllcorner = int(float(Temp[2].split()[1]))  ## Corner coodinate
-    yllcorner = int(float(Temp[3].split()[1]))  ## Corner coodinate
-    cellsize = float(Temp[4].split()[1])  ## Cell size
-    if config['gis_config']['read_nodata_from_file']:
-        NoData = int(float(Temp[5].split()[1]))  ## No Data value from file
-    else:
-        NoData = config['gis_config']['nodata_value']  ## No Data value from config
-    nel = nrows * ncols  ## Number of cells
-f.close()
+Temp = read_ascii_grid_header(dem_filename, header_lines=6)  ## read information from dem file (header only)
+ncols = Temp["ncols"]  ## Number of columns
+nrows = Temp["nrows"]  ## Number of rows
+xllcorner = int(Temp.get("xllcorner", Temp.get("xllcenter")))  ## Corner coodinate
+yllcorner = int(Temp.get("yllcorner", Temp.get("yllcenter")))  ## Corner coodinate
+cellsize = Temp["cellsize"]  ## Cell size
+if config['gis_config']['read_nodata_from_file']:
+    NoData = int(Temp["nodata_value"])  ## No Data value from file
+else:
+    NoData = config['gis_config']['nodata_value']  ## No Data value from config
+nel = nrows * ncols  ## Number of cells
+
+## Binary sidecars of the GIS files (<file>.cache.npz) reused by the subsequent runs
+set_raster_cache(config['gis_config'].get('raster_cache', False))
 
 ## Get GIS file names from YAML config
 gis_files_config = config['gis_files']
@@ -334,6 +344,30 @@ print(f"Rainfall input: {riInp[0][0]} m/s for {riInp[1][0]} seconds")
 ## Monte Carlo number from YAML
 MCnumber = config['monte_carlo']['mcnumber']
 print(f"Monte Carlo number: {MCnumber}")
+## Resume: skip the completed realizations and continue the partial ones from their checkpoints
+MCResume = config['monte_carlo'].get('resume', False)
+MCCheckpointInterval = config['monte_carlo'].get('checkpoint_interval', 0)
+from Functions_3DPLS_v1_1 import Set_MC_Resume
+Set_MC_Resume(MCResume, MCCheckpointInterval)
+## Convergence: stop before mcnumber when the probability of failure (FS<1.0) has converged
+MCConvergence = config['monte_carlo'].get('convergence_stop', False)
+MCConvergenceTargetSE = config['monte_carlo'].get('convergence_target_se', 0.01)
+MCConvergenceCellFraction = config['monte_carlo'].get('convergence_cell_fraction', 0.95)
+MCConvergenceMinMC = config['monte_carlo'].get('convergence_min_mcnumber', 50)
+from Functions_3DPLS_v1_1 import Set_MC_Convergence
+Set_MC_Convergence(MCConvergence, MCConvergenceTargetSE, MCConvergenceCellFraction, MCConvergenceMinMC)
+## Sampling of the standard normal inputs: 'MC', 'LHS' (Latin hypercube) or 'Sobol' (scrambled Sobol sequence)
+MCSampling = config['monte_carlo'].get('sampling', 'MC')
+MCSamplingSeed = config['monte_carlo'].get('sampling_seed', None)
+from Functions_3DPLS_v1_1 import Set_MC_Sampling
+## The seed is resolved and recorded (MC_Sampling.npz) once by the main process (see below).
+## The spawned processes re-run this part of the script and only read the recorded seed.
+if __name__ == "__mp_main__":
+    Set_MC_Sampling(MCSampling, MCSamplingSeed, MCnumber, Results_Directory, Worker=True)
+## Importance sampling: shift of the standard normal field of each parameter (e.g. negative for c and phi), None for no shift
+MCImportanceShift = config['monte_carlo'].get('importance_shift', None)
+from Functions_3DPLS_v1_1 import Set_MC_ImportanceSampling
+Set_MC_ImportanceSampling(MCImportanceShift, Results_Directory)
 
 ## Analysis type and soil parameters from YAML
 AnalysisType = config['analysis']['analysis_type']  ## 'Drained'-'Undrained'
@@ -342,6 +376,10 @@ FSCalType = config['analysis']['fs_calculation_type']  ## 'Normal3D' - 'Bishop3D
 ## Random field method from YAML
 RanFieldMethod = config['analysis']['random_field_method']  ## 'CMD' - 'SCMD'
 SaveMat = config['analysis']['save_mat']  ## 'YES' - 'NO'
+## Random field realizations generated per factorization of the correlation matrix (batched product)
+RanFieldBatchSize = config['analysis'].get('random_field_batch_size', 8)
+from Functions_3DPLS_v1_1 import Set_RanField_BatchSize
+Set_RanField_BatchSize(RanFieldBatchSize)
 print(f"Analysis: {AnalysisType}, FS Calculation: {FSCalType}, Random Field: {RanFieldMethod}")
 
 ## Variability of Zmax from YAML
@@ -412,6 +450,7 @@ ProblemName = config['analysis']['problem_name']
 from Functions_3DPLS_v1_1 import FSCalcEllipsoid_v1_0_SingleRrocess, FSCalcEllipsoid_v1_0_MutiProcess
 from operator import itemgetter
 from Functions_3DPLS_v1_1 import Ellipsoid_Generate_Main, Ellipsoid_Generate_Main_Multi, IndMC_Main, IndMC_Main_Multi
+from Functions_3DPLS_v1_1 import Geometry_Store_Key, Geometry_Store_Save
 
 # Allocate processes for Monte Carlo simulations and calculations for ellipsoidal sliding surfaces individually
 print("Total number of processors: %d" % (cpu_count()))
@@ -439,8 +478,12 @@ TOTAL_PROCESSES_EllGen = config['multiprocessing']['total_processes_ellgen']  ##
 # Select "MCRun_v1_0_SingleProcess", "MCRun_v1_0_MultiProcess", "MCRun_v1_0_MultiThread" in "FSCalcEllipsoid_v1_0_MutiProcess" function.
 if __name__ == "__main__":
 
+    ## Sampling of the standard normal inputs, resolved once before the processes are started
+    Set_MC_Sampling(MCSampling, MCSamplingSeed, MCnumber, Results_Directory)
+
     ## Time before the main calculation part of the code
     t1 = time.time()
+    Multiprocessing_Option_Generate = Multiprocessing_Option
 
     #####
     ## Combined Monte Carlo simulations and generation of ellipdoidal sliding surfaces.
@@ -539,8 +582,19 @@ if __name__ == "__main__":
     ## Separated Monte Carlo simulations and generation of ellipdoidal sliding surfaces.
     #####
 
+    ## Sliding surfaces generated before for the same maps and ellipsoid parameters are read from the geometry store.
+    GeometryStore_Path = None
+    if Multiprocessing_Option in ["S-SP-SP", "S-SP-MP", "S-MP-SP", "S-MP-MP"] and GeometryStore_Directory is not None:
+        GeometryStore_Key = Geometry_Store_Key(InZone, SubDisNum, cellsize, EllParam, SlopeInput, ZmaxInput, DEMInput, AspectInput, NoData, ProblemName)
+        GeometryStore_Path = os.path.join(GeometryStore_Directory, "Ellipsoids_" + GeometryStore_Key)
+        if os.path.exists(GeometryStore_Path):
+            print("Sliding surfaces are read from the geometry store:", GeometryStore_Path)
+            AllInf_sorted = GeometryStore_Path
+            Multiprocessing_Option_Generate = None
+            t2 = time.time()
+
     ## Check Multiprocessing_option and generate sliding surfaces
-    if Multiprocessing_Option in ["S-SP-SP", "S-SP-MP"]:
+    if Multiprocessing_Option_Generate in ["S-SP-SP", "S-SP-MP"]:
         print("Run option: (Sliding surfaces: SP)", Multiprocessing_Option)
 
         ## Singleprocessing generation of ellipsoidal sliding surfaces
@@ -557,12 +611,17 @@ if __name__ == "__main__":
         os.chdir(Results_Directory)
         np.save("Elipsoidal_Sliding_Surfaces", AllInf_sorted)
 
+        ## Write to the geometry store; the processes of the Monte Carlo simulations memory-map the store
+        if GeometryStore_Path is not None:
+            Geometry_Store_Save(AllInf_sorted, GeometryStore_Path)
+            AllInf_sorted = GeometryStore_Path
+
         ## Time elapsed for generation of ellipsoidal sliding surfaces
         t2 = time.time()
         print("Time elapsed for generation of ellipsoidal sliding surfaces: ", t2 - t1)
 
     ## Check Multiprocessing_option and generate sliding surfaces
-    if Multiprocessing_Option in ["S-MP-SP", "S-MP-MP"]:
+    if Multiprocessing_Option_Generate in ["S-MP-SP", "S-MP-MP"]:
         print("Run option: (Sliding surfaces: MP)", Multiprocessing_Option)
 
         ## Multiprocessing generation of ellipsoidal sliding surfaces
@@ -592,6 +651,11 @@ if __name__ == "__main__":
         os.chdir(Results_Directory)
         np.save("Elipsoidal_Sliding_Surfaces", AllInf_sorted)
 
+        ## Write to the geometry store; the processes of the Monte Carlo simulations memory-map the store
+        if GeometryStore_Path is not None:
+            Geometry_Store_Save(AllInf_sorted, GeometryStore_Path)
+            AllInf_sorted = GeometryStore_Path
+
         ## Time elapsed for generation of ellipsoidal sliding surfaces
         t2 = time.time()
         print("Time elapsed for generation of ellipsoidal sliding surfaces: ", t2 - t1)
@@ -681,9 +745,10 @@ if __name__ == "__main__":
     """
 
     ## Read the results
+    ## Only the realizations of this run (0 to MCnumber-1) are read; the realizations not calculated after a convergence stop have no file
     os.chdir(Results_Directory)
-    DataFiles = os.listdir()
-    DataFiles = [i for i in DataFiles if i.endswith("FS_Values.npy")]
+    DataFiles = ["MC_%.4d_FS_Values.npy" % (i) for i in range(MCnumber)]
+    DataFiles = [i for i in DataFiles if os.path.exists(i)]
     Result_Files = []
     for i in range(np.size(DataFiles)):
         print(DataFiles[i])
@@ -691,6 +756,14 @@ if __name__ == "__main__":
         Temp2 = [Temp[m].flatten() for m in range(np.shape(Temp)[0])]
         Result_Files.append(Temp2)
 
+    ## Log of the likelihood ratio of each realization with importance sampling (0 without)
+    ## The weights are only read with importance sampling, so that the files of an earlier run do not reweight the realizations
+    LogWeights = []
+    ImportanceSampling = MCImportanceShift is not None and np.any(np.asarray(MCImportanceShift, dtype=float) != 0)
+    for i in range(np.size(DataFiles)):
+        NameWeight = DataFiles[i].replace("FS_Values", "LogWeight")
+        LogWeights.append(float(np.load(NameWeight)) if ImportanceSampling and os.path.exists(NameWeight) else 0.0)
+
     ## Rearrange a list for each time instances
     Results_Time = []
     for i in range(np.shape(Result_Files[0])[0]):  ## over time
@@ -783,20 +856,24 @@ if __name__ == "__main__":
 
     os.chdir(Results_Directory)
 
-    ## Calculate the mean
+    ## Calculate the probability of failure and its coefficient of variation
+    from Functions_3DPLS_v1_1 import MC_Failure_Probability
     PfData = []
+    PfCoVData = []
     for i in range(np.shape(Results_Time)[0]):
         Temp = Results_Time[i]        ## FS data at one time instance
-        Temp_MC = np.shape(Temp)[0]   ## MC number
         Index_zero = np.where(Temp[0] == 0)
 
-        Temp = np.where(Temp<1.0,1,0) ## FS<1.0
-        Temp = np.sum(Temp, axis=0)   ## Number of failure
-        Temp = Temp / Temp_MC * 100  ## Probability of failure calculation
+        Temp, TempCoV = MC_Failure_Probability(Temp, LogWeights, 1.0)  ## FS<1.0 (weighted with importance sampling)
+        Temp = Temp * 100  ## Probability of failure (%)
 
         Temp[Index_zero] = np.nan
-        Temp = np.reshape(Temp, (nrows,ncols))
-        PfData.append(Temp)
+        TempCoV[Index_zero] = np.nan
+        PfData.append(np.reshape(Temp, (nrows,ncols)))
+        PfCoVData.append(np.reshape(TempCoV, (nrows,ncols)))
+
+    ## Save the maps of all time instances
+    np.savez(os.path.join(Results_Directory, "PfMaps.npz"), Pf=np.asarray(PfData), CoV=np.asarray(PfCoVData))
 
     ## Select a time instance
     PfData = PfData[0]
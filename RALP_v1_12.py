@@ -3908,6 +3908,7 @@ def RALP_GUI():
 				######################################
 				shutil.copy(overall_input_folder_str.get(), output_folder_str.get()+f".\\{file_name_only}")
 				shutil.copy(r"./main_3DTSP_v20260429.py", output_folder_str.get()+r"./main_3DTSP_v20260429.py")
+				shutil.copy(r"./raster_io.py", output_folder_str.get()+r"./raster_io.py")
 
 			#####################
 			## generate dictionary hold input file 
@@ -5378,6 +5379,7 @@ def RALP_GUI():
 				## copy paste the main_3DTS script
 				######################################
 				shutil.copy(r"./main_3DTSP_v20260429.py", output_folder_str.get()+r"./main_3DTSP_v20260429.py")
+				shutil.copy(r"./raster_io.py", output_folder_str.get()+r"./raster_io.py")
 
 
 		##########################################
@@ -5930,6 +5932,7 @@ def RALP_GUI():
 			######################################
 			shutil.copy(r"./Main_3DPLS_v1_1_yaml.py", output_folder_str.get()+"/3DPLS/Codes/"+r"./Main_3DPLS_v1_1_yaml.py")
 			shutil.copy(r"./Functions_3DPLS_v1_1.py", output_folder_str.get()+"/3DPLS/Codes/"+r"./Functions_3DPLS_v1_1.py")
+			shutil.copy(r"./raster_io.py", output_folder_str.get()+"/3DPLS/Codes/"+r"./raster_io.py")
 
 		######################################
 		## status
@@ -8005,6 +8008,7 @@ def RALP_GUI():
 			######################################
 			shutil.copy(r"./Main_3DPLS_v1_1_yaml.py", output_folder_str.get()+"/3DPLS/Codes/"+r"./Main_3DPLS_v1_1_yaml.py")
 			shutil.copy(r"./Functions_3DPLS_v1_1.py", output_folder_str.get()+"/3DPLS/Codes/"+r"./Functions_3DPLS_v1_1.py")
+			shutil.copy(r"./raster_io.py", output_folder_str.get()+"/3DPLS/Codes/"+r"./raster_io.py")
 
 			######################################
 			## generate YAML file and save in input directory
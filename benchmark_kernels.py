@@ -0,0 +1,640 @@
+"""
+Benchmark of the main computational kernels of 3DTSP and 3DPLS on synthetic inputs.
+
+A synthetic DEM (inclined slope with ridges, valleys and smooth roughness), soil thickness, material rasters and
+a rainfall history are generated for each grid size, and the kernels are timed in a single process:
+
+    read_GIS_data, generate_output_GIS      - ascii grid read and write (whole grid)
+    dip_aspect                              - DEM_slope_aspect_MP_v3, the per-cell kernel of compute_dip_aspect
+    green_ampt                              - compute_GA_nonUniRain_slanted_MP, one time step
+    infinite_slope_FS                       - critical_depth_inf_FS_MP
+    slip_generation_stage1/stage2           - generate_global_superellipse_grouping_MP_v1_00, generate_3DTS_slip_groupings_mp_v4_00
+    slope_stability_3D                      - critical_depth_group_3D_FS_HungrJanbu_MP_v10_00
+    UCA_graph, UCA_count                    - DEM_Z_diff_MP_equal_flow and count_UCA_cells_MP_v2 on a window of the grid
+    random_field                            - generate_random_field_step (whole grid)
+    3DPLS_ellipsoid_geometry, 3DPLS_ellipsoid_FS - CellsInsideEllV2 and FS3D_Surfaces (Bishop 3D)
+    import_3DTSP, spawn_pool                - start-up: import of main_3DTSP in a new interpreter, and a spawn Pool
+                                              (the workers import this script, main_3DTSP and 3DPLS) with one map
+
+The per-cell (or per-slip-surface) kernels are timed on a random sample of at most "--sample" items, so that the
+large grids (e.g. 4000 x 4000) can be benchmarked; the throughput is reported in items per second. The parallel
+scaling of the stages is recorded by the stage metrics of 3DTSP instead (see stage_metrics_apply).
+
+Usage:
+    python benchmark_kernels.py --sizes 100 400 1000 --sample 2000
+    python benchmark_kernels.py --sizes 400 --compare "./benchmark_results/benchmark - 20260101_120000.json"
+    python benchmark_kernels.py --sizes 1000 --write-inputs ./synthetic_1000/
+
+The results are saved to "{output}/benchmark - {date_time}.json"; with --compare, the throughput of each kernel is
+compared with an earlier results file and the exit code is 1 if any kernel is slower than the tolerance.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import main_3DTSP_v20260429 as TSP
+import Functions_3DPLS_v1_1 as PLS
+
+## Kernel families (the name used with --kernels) and the kernels timed by each
+KERNEL_FAMILIES = {
+    "io": ("generate_output_GIS", "read_GIS_data"),
+    "dip_aspect": ("dip_aspect",),
+    "green_ampt": ("green_ampt",),
+    "infinite_slope_FS": ("infinite_slope_FS",),
+    "slip_3D": ("slip_generation_stage1", "slip_generation_stage2", "slope_stability_3D"),
+    "UCA": ("UCA_graph", "UCA_count"),
+    "random_field": ("random_field",),
+    "3DPLS": ("3DPLS_ellipsoid_geometry", "3DPLS_ellipsoid_FS"),
+    "startup": ("import_3DTSP", "spawn_pool"),
+}
+
+## Decimal places used by 3DTSP (see the rounding in main_3DTSP)
+DZ = 0.25
+DZ_DP, RATE_DP, T_DP, THETA_DP, PRESS_DP, CUMUL_DP, FS_DP = 5, 12, 2, 6, 4, 6, 3
+GAMMA_W = 9.81
+FS_CRIT = 1.3
+
+
+def smooth_random_field(rng, n_cells, corr_cells):
+    """
+    Generate a smooth standard normal field by Gaussian filtering of white noise in the frequency domain.
+
+    Parameters
+    ----------
+    rng : numpy Generator
+        Random number generator.
+    n_cells : int
+        Number of rows and columns.
+    corr_cells : float
+        Correlation length in number of cells.
+
+    Returns
+    -------
+    field : 2D numpy array
+        Field with zero mean and unit standard deviation.
+    """
+    noise = rng.standard_normal((n_cells, n_cells))
+    freq = np.fft.fftfreq(n_cells)
+    kernel = np.exp(-0.5 * (2 * np.pi * corr_cells) ** 2 * (freq[:, None] ** 2 + freq[None, :] ** 2))
+    field = np.real(np.fft.ifft2(np.fft.fft2(noise) * kernel))
+    return (field - np.mean(field)) / max(np.std(field), 1e-12)
+
+
+def generate_synthetic_inputs(n_cells, cellsize=5.0, mean_slope_deg=25.0, seed=0, rain_steps=6, peak_intensity_mmphr=20.0):
+    """
+    Generate a synthetic DEM, soil thickness, material rasters and rainfall history.
+
+    The DEM is a slope rising to the north (mean_slope_deg) with ridges and valleys across the slope and
+    smooth roughness, so that the dip and aspect vary as in a natural hillslope. The arrays are ordered as in
+    3DTSP (first row at the smallest y-coordinate).
+
+    Parameters
+    ----------
+    n_cells : int
+        Number of rows and columns of the grid.
+    cellsize : float
+        Cell size (m). The default is 5.0.
+    mean_slope_deg : float
+        Mean slope angle (degrees). The default is 25.0.
+    seed : int
+        Seed of the random number generator. The default is 0.
+    rain_steps : int
+        Number of hourly time steps of the rainfall history. The default is 6.
+    peak_intensity_mmphr : float
+        Peak rainfall intensity (mm/hr) of the triangular storm. The default is 20.0.
+
+    Returns
+    -------
+    synthetic : dict
+        Grid ("gridUniqueX", "gridUniqueY", "cellsize"), topography ("DEM_surface", "DEM_base", "soil_thickness",
+        "dip_deg", "aspect_deg", "DEM_noData"), material rasters (3DTSP names) and "rainfall_history"
+        ([start hr, end hr, intensity mm/hr] for each time step, as rainfall_history in the 3DTSP input file).
+    """
+    rng = np.random.default_rng(seed)
+    gridUniqueX = np.arange(n_cells) * cellsize
+    gridUniqueY = np.arange(n_cells) * cellsize
+    grid_x, grid_y = np.meshgrid(gridUniqueX, gridUniqueY)
+    length = n_cells * cellsize
+
+    ## Topography - inclined plane, ridges and valleys (about 3 across the grid) and roughness
+    relief = 0.05 * length * np.tan(np.radians(mean_slope_deg))
+    DEM_surface = (
+        np.tan(np.radians(mean_slope_deg)) * grid_y
+        + relief * np.sin(2 * np.pi * 3 * grid_x / length) * (0.5 + 0.5 * grid_y / length)
+        + 0.25 * relief * smooth_random_field(rng, n_cells, max(n_cells / 20, 2))
+        + 100.0
+    )
+
+    ## Soil thickness - thinner on the ridges, 0.5 to 5 m
+    soil_thickness = np.clip(2.5 - 0.8 * np.sin(2 * np.pi * 3 * grid_x / length) + 0.7 * smooth_random_field(rng, n_cells, max(n_cells / 30, 2)), 0.5, 5.0)
+    soil_thickness = np.round(soil_thickness / DZ) * DZ
+    DEM_base = DEM_surface - soil_thickness
+
+    ## Dip and aspect (from the gradient; only used as inputs of the kernels)
+    dz_dy, dz_dx = np.gradient(DEM_surface, cellsize)
+    dip_deg = np.degrees(np.arctan(np.sqrt(dz_dx**2 + dz_dy**2)))
+    aspect_deg = np.remainder(450 - np.degrees(np.arctan2(-dz_dy, -dz_dx)), 360)
+
+    ## Material rasters - smooth lognormal or normal variation around typical values of a silty sand
+    def material_field(mean, cov, lognormal=False):
+        field = smooth_random_field(rng, n_cells, max(n_cells / 25, 2))
+        if lognormal:
+            sigma = np.sqrt(np.log(1 + cov**2))
+            return np.exp(np.log(mean) - 0.5 * sigma**2 + sigma * field)
+        return mean * (1 + cov * field)
+
+    synthetic = {
+        "n_cells": n_cells,
+        "cellsize": cellsize,
+        "gridUniqueX": gridUniqueX,
+        "gridUniqueY": gridUniqueY,
+        "DEM_surface": DEM_surface,
+        "DEM_base": DEM_base,
+        "soil_thickness": soil_thickness,
+        "DEM_noData": np.ones((n_cells, n_cells), dtype=int),
+        "dip_deg": dip_deg,
+        "aspect_deg": aspect_deg,
+        "k_sat": material_field(1e-5, 0.5, lognormal=True),
+        "initial_suction": np.full((n_cells, n_cells), 10.0),
+        "SWCC_a": np.full((n_cells, n_cells), 33.33),
+        "SWCC_n": np.full((n_cells, n_cells), 2.0),
+        "SWCC_m": np.full((n_cells, n_cells), 0.5),
+        "theta_sat": np.clip(material_field(0.40, 0.05), 0.3, 0.5),
+        "theta_residual": np.full((n_cells, n_cells), 0.05),
+        "unit_weight": np.clip(material_field(18.0, 0.05), 15.0, 21.0),
+        "phi": np.clip(material_field(30.0, 0.1), 20.0, 40.0),
+        "phi_b": np.full((n_cells, n_cells), 15.0),
+        "c": np.clip(material_field(5.0, 0.3, lognormal=True), 0.0, 20.0),
+        "veg_areal_weight": np.full((n_cells, n_cells), 0.5),
+        "root_c_base": np.full((n_cells, n_cells), 1.0),
+        "root_c_side": np.full((n_cells, n_cells), 2.0),
+        "root_depth": np.full((n_cells, n_cells), 1.0),
+    }
+
+    ## Rainfall history - triangular storm peaking at one third of the duration
+    peak_step = max(rain_steps // 3, 1)
+    synthetic["rainfall_history"] = [
+        [step, step + 1, round(peak_intensity_mmphr * (1 - abs(step + 0.5 - peak_step) / rain_steps), 2)] for step in range(rain_steps)
+    ]
+    # spatial variation of the rainfall intensity (m/s) of the peak time step
+    synthetic["rain_I"] = synthetic["rainfall_history"][peak_step][2] / 1000 / 3600 * np.clip(1 + 0.2 * smooth_random_field(rng, n_cells, max(n_cells / 10, 2)), 0.5, 1.5)
+
+    return synthetic
+
+
+def write_synthetic_inputs(synthetic, folder):
+    """
+    Write the synthetic DEM, soil thickness and material rasters as ascii grids (.asc) and the rainfall history as YAML.
+
+    The rasters are written with the first row at the north, as expected by 3DTSP and 3DPLS.
+
+    Parameters
+    ----------
+    synthetic : dict
+        Synthetic inputs (see generate_synthetic_inputs).
+    folder : str
+        Output folder.
+    """
+    os.makedirs(folder, exist_ok=True)
+    header = "ncols %d\nnrows %d\nxllcenter %.3f\nyllcenter %.3f\ncellsize %.3f\nNODATA_value -9999" % (
+        synthetic["n_cells"], synthetic["n_cells"], synthetic["gridUniqueX"][0], synthetic["gridUniqueY"][0], synthetic["cellsize"]
+    )
+    for key in ["DEM_surface", "soil_thickness", "dip_deg", "aspect_deg", "k_sat", "unit_weight", "phi", "c", "theta_sat"]:
+        fmt = "%.4e" if key == "k_sat" else "%.3f"
+        np.savetxt(os.path.join(folder, "synthetic_%d - %s.asc" % (synthetic["n_cells"], key)), np.flipud(synthetic[key]), fmt=fmt, header=header, comments="")
+    with open(os.path.join(folder, "synthetic_%d - rainfall_history.yaml" % synthetic["n_cells"]), "w") as f:
+        f.write("rain_unit: \"mm/hr\"\nrainfall_history: %s\n" % json.dumps(synthetic["rainfall_history"]))
+
+
+def sample_cells(synthetic, sample, rng):
+    """Return a random sample of at most "sample" (row, column) indices of the cells with soil thicker than DZ."""
+    rows, cols = np.nonzero(synthetic["soil_thickness"] > DZ)
+    picked = rng.choice(np.size(rows), size=min(sample, np.size(rows)), replace=False)
+    return [(int(rows[k]), int(cols[k])) for k in np.sort(picked)]
+
+
+def initial_hydraulics(synthetic, cells):
+    """Return the initial state and the Green-Ampt ponding parameters of the given cells (compute_initial_hydro_DEM_mp_v2)."""
+    s = synthetic
+    hydro = {}
+    for i, j in cells:
+        # SWCC model 0 = van Genuchten (1980)
+        _, _, _, psi_r, delta_theta, _, _, T_p, T_pp = TSP.compute_initial_hydro_DEM_mp_v2(
+            (i, j, 0, s["initial_suction"][i, j], s["SWCC_a"][i, j], s["SWCC_n"][i, j], s["SWCC_m"][i, j], s["theta_sat"][i, j], s["theta_residual"][i, j], 0.0, s["k_sat"][i, j], s["rain_I"][i, j], 0.0, GAMMA_W)
+        )
+        hydro[(i, j)] = (float(psi_r), float(delta_theta), float(T_p), float(T_pp))
+    return hydro
+
+
+###########################################################################
+## kernels - each prepare function returns [(kernel, number of items, unit, function to time), ...]
+###########################################################################
+def prepare_io(synthetic, sample, rng, work_folder):
+    s = synthetic
+    deltaX = deltaY = s["cellsize"]
+    folder = os.path.join(work_folder, "io_%d" % s["n_cells"]) + "/"
+    os.makedirs(folder, exist_ok=True)
+    file_name = "synthetic - DEM_surface.asc"
+
+    def write():
+        TSP.generate_output_GIS("asc", folder, "synthetic", "DEM_surface", s["DEM_surface"], s["DEM_noData"], -9999, s["gridUniqueX"], s["gridUniqueY"], deltaX, deltaY, "row", 3, 3, 3)
+
+    def read():
+        TSP.read_GIS_data(file_name, folder, full_output=False)
+
+    cells = s["n_cells"] ** 2
+    return [("generate_output_GIS", cells, "cells", write), ("read_GIS_data", cells, "cells", read)]
+
+
+def prepare_dip_aspect(synthetic, sample, rng, work_folder):
+    s = synthetic
+    mp_input = [(i, j, s["gridUniqueX"][j], s["gridUniqueY"][i], s["DEM_surface"], s["gridUniqueX"], s["gridUniqueY"], 1) for (i, j) in sample_cells(s, sample, rng)]
+    return [("dip_aspect", len(mp_input), "cells", lambda: [TSP.DEM_slope_aspect_MP_v3(item) for item in mp_input])]
+
+
+def prepare_green_ampt(synthetic, sample, rng, work_folder):
+    s = synthetic
+    cells = sample_cells(s, sample, rng)
+    hydro = initial_hydraulics(s, cells)
+    dt = 3600.0
+    mp_input = []
+    for i, j in cells:
+        psi_r, delta_theta, T_p, T_pp = hydro[(i, j)]
+        # initially dry soil above the groundwater table at the bedrock - see the initial state in main_3DTSP
+        mp_input.append(
+            (i, j, s["DEM_surface"][i, j], s["DEM_base"][i, j], s["soil_thickness"][i, j], 0.0, s["DEM_surface"][i, j], s["DEM_base"][i, j], s["rain_I"][i, j], s["k_sat"][i, j], dt, dt, T_p, T_pp, delta_theta,
+             psi_r / GAMMA_W, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, CUMUL_DP, T_DP, RATE_DP, DZ_DP, 0.0, 0.8 * s["theta_sat"][i, j], s["theta_residual"][i, j], s["theta_sat"][i, j], 0.0)
+        )
+    return [("green_ampt", len(mp_input), "cells", lambda: [TSP.compute_GA_nonUniRain_slanted_MP(item) for item in mp_input])]
+
+
+def hydraulic_state(synthetic):
+    """Groundwater table at mid-depth and wetting front 0.5 m below the surface - a state where some cells fail."""
+    s = synthetic
+    gwt_z = s["DEM_base"] + 0.5 * s["soil_thickness"]
+    wet_z = np.maximum(s["DEM_surface"] - 0.5, gwt_z)
+    return gwt_z, wet_z
+
+
+def prepare_infinite_slope_FS(synthetic, sample, rng, work_folder):
+    s = synthetic
+    cells = sample_cells(s, sample, rng)
+    hydro = initial_hydraulics(s, cells)
+    gwt_z, wet_z = hydraulic_state(s)
+    mp_input = [
+        (i, j, s["DEM_base"][i, j], s["DEM_surface"][i, j], s["phi"][i, j], s["phi_b"][i, j], s["c"][i, j], s["unit_weight"][i, j], s["dip_deg"][i, j], gwt_z[i, j], wet_z[i, j],
+         s["initial_suction"][i, j], hydro[(i, j)][0], FS_CRIT, GAMMA_W, DZ, False, DZ_DP, PRESS_DP)
+        for (i, j) in cells
+    ]
+    return [("infinite_slope_FS", len(mp_input), "cells", lambda: [TSP.critical_depth_inf_FS_MP(item) for item in mp_input])]
+
+
+def prepare_slip_3D(synthetic, sample, rng, work_folder):
+    s = synthetic
+    n = s["n_cells"]
+    cells = sample_cells(s, sample, rng)
+    hydro = initial_hydraulics(s, cells)
+    psi_r = np.full((n, n), float(np.mean([value[0] for value in hydro.values()])))
+    gwt_z, wet_z = hydraulic_state(s)
+    zeros = np.zeros((n, n))
+    DEM_grid_num = np.arange(n * n).reshape((n, n)).astype(int)
+
+    ## slip surfaces of 1x1 to 3x3 cells (superellipse n = 2, a/b = 1)
+    group_side_slip_surf_grouping = TSP.generate_local_superellipse_grouping_v1_10(1, 3, [2.0], [1.0])
+    stage1_input = [(i, j, 1, 3, group_side_slip_surf_grouping, n, n, DEM_grid_num) for (i, j) in cells]
+    result = {}
+
+    def stage1():
+        result["stage1"] = [TSP.generate_global_superellipse_grouping_MP_v1_00(item) for item in stage1_input]
+
+    def stage2():
+        unique_slip_surf = sorted(set(itertools.chain.from_iterable(result["stage1"])), key=str)
+        unique_slip_surf = [unique_slip_surf[k] for k in np.sort(rng.choice(len(unique_slip_surf), size=min(sample, len(unique_slip_surf)), replace=False))]
+        stage2_input = [
+            (slip_i, DEM_grid_num, s["DEM_surface"], s["soil_thickness"], s["dip_deg"], s["aspect_deg"], gwt_z, wet_z, psi_r, s["initial_suction"], s["unit_weight"], s["phi"], s["phi_b"], s["c"],
+             s["veg_areal_weight"], s["root_c_base"], s["root_c_side"], s["root_depth"], zeros, zeros, zeros, zeros, zeros, zeros, zeros, zeros, zeros, zeros)
+            for slip_i in unique_slip_surf
+        ]
+        result["stage2_num"] = len(stage2_input)
+        result["stage2"] = [TSP.generate_3DTS_slip_groupings_mp_v4_00(item) for item in stage2_input]
+
+    def slope_stability_3D():
+        [TSP.critical_depth_group_3D_FS_HungrJanbu_MP_v10_00(item) for item in result["FS_input"]]
+
+    ## the slip surfaces are generated before timing the next kernel
+    stage1()
+    stage2()
+    # inputs of the 3D slope stability as in perform_3DTSP_iteration_v2 (root strength model 0 = constant)
+    result["FS_input"] = [tuple(list(slip_data) + [30, 0.005, s["cellsize"], s["cellsize"], DZ, GAMMA_W, FS_CRIT, True, True, True, 0, DZ_DP, PRESS_DP]) for slip_data in result["stage2"]]
+
+    return [
+        ("slip_generation_stage1", len(stage1_input), "cells", stage1),
+        ("slip_generation_stage2", result["stage2_num"], "slip surfaces", stage2),
+        ("slope_stability_3D", len(result["FS_input"]), "slip surfaces", slope_stability_3D),
+    ]
+
+
+def prepare_UCA(synthetic, sample, rng, work_folder):
+    from scipy.sparse import csr_matrix
+
+    s = synthetic
+    ## window of about "sample" cells - the flow graph is built for the whole window
+    side = max(min(s["n_cells"], int(np.sqrt(sample))), 3)
+    DEM = s["DEM_surface"][:side, :side]
+    gridUniqueX, gridUniqueY = s["gridUniqueX"][:side], s["gridUniqueY"][:side]
+    deltaX = deltaY = s["cellsize"]
+    DEM_i, DEM_j = np.mgrid[0:side, 0:side]
+    i_flatten, j_flatten = np.ravel(DEM_i), np.ravel(DEM_j)
+    graph_input = [(k, i_flatten[k], j_flatten[k], gridUniqueX[j_flatten[k]], gridUniqueY[i_flatten[k]], DEM, i_flatten, j_flatten, gridUniqueX, gridUniqueY, deltaX, deltaY, 3) for k in range(side * side)]
+    result = {}
+
+    def UCA_graph():
+        graph_ij = np.array(list(set(itertools.chain.from_iterable(TSP.DEM_Z_diff_MP_equal_flow(item) for item in graph_input))))
+        result["graph_T"] = csr_matrix((np.ones(len(graph_ij)), (graph_ij[:, 0], graph_ij[:, 1])), shape=(side * side, side * side)).T
+
+    def UCA_count():
+        [TSP.count_UCA_cells_MP_v2((i_flatten[k], j_flatten[k], k, result["graph_T"])) for k in range(side * side)]
+
+    return [("UCA_graph", side * side, "cells", UCA_graph), ("UCA_count", side * side, "cells", UCA_count)]
+
+
+def prepare_random_field(synthetic, sample, rng, work_folder):
+    s = synthetic
+    ## correlation length of 10 cells in both directions
+    CorrMatX = TSP.compute_correlation_matrix_step_mp((s["gridUniqueX"], 10 * s["cellsize"]))
+    CorrMatY = TSP.compute_correlation_matrix_step_mp((s["gridUniqueY"], 10 * s["cellsize"]))
+    n = s["n_cells"]
+    return [("random_field", n * n, "cells", lambda: TSP.generate_random_field_step(n, n, CorrMatX, CorrMatY, 1e-5, 0.5, "LN", 1e-7, 1e-3))]
+
+
+def prepare_3DPLS(synthetic, sample, rng, work_folder):
+    s = synthetic
+    n = s["n_cells"]
+    cellsize = s["cellsize"]
+    ## 3DPLS grids have the first row at the north
+    DEM = np.flipud(s["DEM_surface"])
+    slope = np.flipud(s["dip_deg"])
+    aspect = np.flipud(s["aspect_deg"])
+    phi = np.flipud(s["phi"])
+    c = np.flipud(s["c"])
+    unit_weight = np.flipud(s["unit_weight"])
+
+    ## ellipsoids of 12 x 6 cells and 2 m depth centred at the sampled cells, moving in the aspect direction
+    Ella, Ellb, Ellc, Ellz = 6 * cellsize, 3 * cellsize, 2.0, 0.0
+    ellipsoids = [
+        (cellsize / 2 + j * cellsize, (n - 1) * cellsize + cellsize / 2 - i * cellsize, DEM[i, j], aspect[i, j], slope[i, j])
+        for (i, j) in sample_cells(s, sample, rng)
+    ]
+    result = {}
+
+    def geometry():
+        result["cells_inside"] = [
+            (ell, PLS.CellsInsideEllV2(n, n, cellsize, DEM, EllCenterX, EllCenterY, EllDEMCenter, EllAlpha, EllBeta, Ella, Ellb, Ellc, Ellz)[1])
+            for ell in ellipsoids
+            for (EllCenterX, EllCenterY, EllDEMCenter, EllAlpha, EllBeta) in [ell]
+        ]
+
+    geometry()
+
+    ## sliding surfaces - depth of the ellipsoid below each cell and pore water forces for 3 time instances
+    surfaces = []
+    for (_, _, _, _, EllBeta), cells_inside in result["cells_inside"]:
+        if np.size(cells_inside) == 0:
+            continue
+        rows, cols = cells_inside[:, 0].astype(int), cells_inside[:, 1].astype(int)
+        depth = Ellc * np.sqrt(np.clip(1 - (cells_inside[:, 2] / Ella) ** 2 - (cells_inside[:, 3] / Ellb) ** 2, 0.01, 1))
+        theta = slope[rows, cols]
+        area = cellsize**2 / np.cos(np.radians(theta))
+        weight = unit_weight[rows, cols] * depth * cellsize**2
+        pore_water_force = np.array([GAMMA_W * ratio * depth * area for ratio in (0.2, 0.5, 0.8)])
+        surfaces.append((c[rows, cols], phi[rows, cols], weight, pore_water_force, np.full(np.size(rows), EllBeta), theta, area, np.ones(np.size(rows))))
+
+    return [
+        ("3DPLS_ellipsoid_geometry", len(ellipsoids), "ellipsoids", geometry),
+        ("3DPLS_ellipsoid_FS", len(surfaces), "ellipsoids", lambda: PLS.FS3D_Surfaces("Bishop3D", surfaces)),
+    ]
+
+
+def startup_task(x):
+    """Trivial task of the spawn Pool of prepare_startup."""
+    return x
+
+
+def prepare_startup(synthetic, sample, rng, work_folder):
+    ## start-up does not depend on the grid - a new interpreter imports main_3DTSP (the heavy backends are imported lazily),
+    ## and the spawned workers of a Pool import the main module (this script with main_3DTSP and 3DPLS) before the first task
+    code_folder = os.path.dirname(os.path.abspath(__file__))
+    pool_num = max(min(4, os.cpu_count() or 1), 1)
+
+    def import_3DTSP():
+        subprocess.run([sys.executable, "-c", "import main_3DTSP_v20260429"], cwd=code_folder, check=True)
+
+    def spawn_pool():
+        with mp.get_context("spawn").Pool(pool_num) as pool:
+            pool.map(startup_task, range(pool_num))
+
+    return [("import_3DTSP", 1, "imports", import_3DTSP), ("spawn_pool", pool_num, "processes", spawn_pool)]
+
+
+PREPARE_FUNCTIONS = {
+    "io": prepare_io,
+    "dip_aspect": prepare_dip_aspect,
+    "green_ampt": prepare_green_ampt,
+    "infinite_slope_FS": prepare_infinite_slope_FS,
+    "slip_3D": prepare_slip_3D,
+    "UCA": prepare_UCA,
+    "random_field": prepare_random_field,
+    "3DPLS": prepare_3DPLS,
+    "startup": prepare_startup,
+}
+
+
+###########################################################################
+## run, save and compare
+###########################################################################
+def time_kernel(kernel_function, memory=True):
+    """
+    Time a kernel and optionally measure the peak memory it allocates.
+
+    Parameters
+    ----------
+    kernel_function : callable
+        Kernel to time.
+    memory : bool
+        If True, the kernel is run a second time with tracemalloc to measure the peak allocated memory
+        (tracemalloc slows the kernel down, so the timing is from the first run). The default is True.
+
+    Returns
+    -------
+    dict
+        "wall_s", "cpu_s", "peak_alloc_MB" (None if memory is False) and "peak_rss_MB" (process high-water mark, None on Windows).
+    """
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    kernel_function()
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    peak_alloc = None
+    if memory:
+        tracemalloc.start()
+        kernel_function()
+        peak_alloc = tracemalloc.get_traced_memory()[1] / 1024**2
+        tracemalloc.stop()
+
+    return {"wall_s": wall_time, "cpu_s": cpu_time, "peak_alloc_MB": peak_alloc, "peak_rss_MB": TSP.read_3DTSP_resource_usage()["peak_rss_MB"]}
+
+
+def run_benchmark(sizes, families, sample=2000, cellsize=5.0, seed=0, memory=True, work_folder="./benchmark_results/work/", write_inputs=None):
+    """
+    Run the benchmark of the kernel families for each grid size.
+
+    Parameters
+    ----------
+    sizes : list of int
+        Number of rows and columns of the synthetic grids.
+    families : list of str
+        Kernel families (keys of KERNEL_FAMILIES).
+    sample : int
+        Maximum number of cells (or slip surfaces, ellipsoids) timed by the per-cell kernels. The default is 2000.
+    cellsize : float
+        Cell size (m). The default is 5.0.
+    seed : int
+        Seed of the synthetic inputs and of the samples. The default is 0.
+    memory : bool
+        Measure the peak allocated memory of each kernel (see time_kernel). The default is True.
+    work_folder : str
+        Folder of the files written by the kernels. The default is "./benchmark_results/work/".
+    write_inputs : str
+        If not None, the synthetic inputs are also written to this folder (see write_synthetic_inputs).
+
+    Returns
+    -------
+    results : list of dict
+        Timing of each kernel and grid size.
+    """
+    results = []
+    for n_cells in sizes:
+        synthetic_start = time.perf_counter()
+        synthetic = generate_synthetic_inputs(n_cells, cellsize=cellsize, seed=seed)
+        print("grid %d x %d - synthetic inputs generated in %.2f s" % (n_cells, n_cells, time.perf_counter() - synthetic_start))
+        if write_inputs is not None:
+            write_synthetic_inputs(synthetic, write_inputs)
+
+        for family in families:
+            rng = np.random.default_rng([seed, n_cells])
+            for kernel, items, unit, kernel_function in PREPARE_FUNCTIONS[family](synthetic, sample, rng, work_folder):
+                timing = time_kernel(kernel_function, memory=memory)
+                record = {"kernel": kernel, "size": n_cells, "cells": n_cells**2, "items": items, "unit": unit}
+                record.update(timing)
+                record["items_per_s"] = items / timing["wall_s"] if timing["wall_s"] > 0 else None
+                results.append(record)
+                print(
+                    "    %-28s %10d %-14s %10.3f s %14s %s/s   peak alloc %s MB"
+                    % (kernel, items, unit, timing["wall_s"], "-" if record["items_per_s"] is None else "{:,.0f}".format(record["items_per_s"]), unit,
+                       "-" if timing["peak_alloc_MB"] is None else "%.1f" % timing["peak_alloc_MB"])
+                )
+    return results
+
+
+def benchmark_metadata():
+    """Return the versions of Python, numpy and scipy, the platform, the number of CPUs and the git commit (if any)."""
+    import scipy
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date_time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_results(results, baseline_path, tolerance=0.2):
+    """
+    Compare the throughput of each kernel and grid size with an earlier results file.
+
+    Parameters
+    ----------
+    results : list of dict
+        Results of run_benchmark.
+    baseline_path : str
+        Earlier results file (JSON saved by this script).
+    tolerance : float
+        Relative decrease of the throughput reported as a regression. The default is 0.2.
+
+    Returns
+    -------
+    regressions : list of str
+        Kernels and grid sizes slower than the baseline by more than the tolerance.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {(record["kernel"], record["size"]): record for record in json.load(f)["results"]}
+
+    regressions = []
+    print("\ncomparison with %s (throughput ratio = current / baseline):" % baseline_path)
+    for record in results:
+        base_record = baseline.get((record["kernel"], record["size"]))
+        if base_record is None or not base_record["items_per_s"] or not record["items_per_s"]:
+            continue
+        ratio = record["items_per_s"] / base_record["items_per_s"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  <- regression"
+            regressions.append("%s (%d x %d)" % (record["kernel"], record["size"], record["size"]))
+        print("    %-28s %6d %8.2f%s" % (record["kernel"], record["size"], ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the 3DTSP and 3DPLS kernels on synthetic inputs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400], help="number of rows and columns of the synthetic grids (default: 100 200 400)")
+    parser.add_argument("--kernels", nargs="+", choices=list(KERNEL_FAMILIES.keys()), default=list(KERNEL_FAMILIES.keys()), help="kernel families to run (default: all)")
+    parser.add_argument("--sample", type=int, default=2000, help="maximum number of items timed by the per-cell kernels (default: 2000)")
+    parser.add_argument("--cellsize", type=float, default=5.0, help="cell size in m (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic inputs (default: 0)")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure the peak allocated memory (halves the run time)")
+    parser.add_argument("--output", default="./benchmark_results/", help="folder of the results (default: ./benchmark_results/)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare the throughput with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative decrease of the throughput reported as a regression (default: 0.2)")
+    parser.add_argument("--write-inputs", default=None, help="also write the synthetic inputs (asc rasters and rainfall history) to this folder")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.sizes, args.kernels, sample=args.sample, cellsize=args.cellsize, seed=args.seed, memory=not args.no_memory,
+        work_folder=os.path.join(args.output, "work") + "/", write_inputs=args.write_inputs,
+    )
+
+    os.makedirs(args.output, exist_ok=True)
+    settings = {"sizes": args.sizes, "kernels": args.kernels, "sample": args.sample, "cellsize": args.cellsize, "seed": args.seed}
+    results_path = os.path.join(args.output, "benchmark - %s.json" % time.strftime("%Y%m%d_%H%M%S"))
+    with open(results_path, "w") as f:
+        json.dump({"metadata": benchmark_metadata(), "settings": settings, "results": results}, f, indent=4)
+    print("\nresults saved to %s" % results_path)
+
+    if args.compare is not None:
+        regressions = compare_results(results, args.compare, tolerance=args.tolerance)
+        if len(regressions) > 0:
+            print("\nthroughput regression: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
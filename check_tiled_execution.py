@@ -0,0 +1,212 @@
+"""
+Check that the tiled execution of 3DTSP (tiled_execution) reproduces the simulation of the full DEM.
+
+The same input is simulated twice with main_3DTSP - once over the full DEM and once split into tiles - and every ascii
+grid (.asc) result stitched from the tiles is compared with the result of the full DEM. Without --input, a small
+probabilistic infinite slope simulation of the test case DEM (test_case_3DTS, 21 x 21 cells) with two Monte Carlo
+iterations and correlated random fields of phi and c is used, so that the random fields are compared across the tiles.
+
+The upslope contributing area (UCA) is computed inside each tile (see tiled_execution in the input template), so the
+debris-flow results of an input with DEM_debris_flow_criteria_apply only match if DEM_UCA_filename or
+DEM_debris_flow_initiation_filename is provided.
+
+Usage:
+    python check_tiled_execution.py
+    python check_tiled_execution.py --input "./03-Input/input.yaml" --tile-size 200 200 --tolerance 1e-6
+
+The exit code is 1 if any result differs by more than the tolerance or is missing from the tiled execution.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from copy import deepcopy
+
+import numpy as np
+import yaml
+
+from raster_io import read_ascii_grid
+
+## Input of the default check - test case DEM with correlated random fields of phi and c
+TEST_CASE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_case_3DTS") + "/"
+DEFAULT_INPUT = {
+    "filename": "tiled_check",
+    "input_folder_path": TEST_CASE_FOLDER,
+    "output_folder_path": "./",
+    "restarting_simulation_JSON": None,
+    "results_format": "asc",
+    "generate_plot": False,
+    "unit_weight_of_water": 9.81,
+    "FS_crit": 1.3,
+    "monte_carlo_iteration_max": 2,
+    "monte_carlo_sampling_method": "MC",
+    "monte_carlo_sampling_seed": 12345,
+    "vertical_spacing": 0.25,
+    "termination_apply": False,
+    "landslide_to_debris_flow_threshold": {"depth": 0.5, "area": 100, "volume": 50},
+    "DEM_surf_dip_infiltration_apply": False,
+    "DEM_debris_flow_criteria_apply": False,
+    "FS_analysis_method": "infinite",
+    "cell_size_3DFS_min": 1,
+    "cell_size_3DFS_max": 3,
+    "superellipse_power": [1.0, 2.0],
+    "superellipse_eccentricity_ratio": [1.0],
+    "3D_FS_iteration_limit": 30,
+    "3D_FS_convergence_tolerance": 0.005,
+    "apply_side_resistance_3D": True,
+    "apply_root_resistance_3D": False,
+    "DEM_UCA_compute_all": False,
+    "max_cpu_num": 2,
+    "stage_metrics_apply": False,
+    "tiled_execution": None,
+    "rain_unit": "mm/hr",
+    "rainfall_history": [[0, 1, 10], [1, 2, 20]],
+    "dt_iteration": 1,
+    "ET_unit": None,
+    "ET_history": None,
+    "field_capacity_suction": 33.0,
+    "DEM_file_name": "DEM_25deg_100mx100m_20x20.asc",
+    "material_file_name": None,
+    "soil_depth_data": ["uniform", 2],
+    "ground_water_data": ["thickness above bedrock", 0.0],
+    "dip_surf_filename": None,
+    "aspect_surf_filename": None,
+    "dip_base_filename": None,
+    "aspect_base_filename": None,
+    "local_cell_sizes_slope": 1,
+    "DEM_debris_flow_initiation_filename": None,
+    "DEM_neighbor_directed_graph_filename": None,
+    "DEM_UCA_filename": None,
+    "material": {
+        "1": {
+            "hydraulic": {"k_sat": 9.65e-06, "initial_suction": 10, "SWCC_model": "vG", "SWCC_a": 33.33, "SWCC_n": 2.0, "SWCC_m": 0.5,
+                          "theta_sat": 0.3831, "theta_residual": 0.0462, "soil_m_v": 0, "max_surface_storage": 0},
+            "soil": {"unit_weight": 18.0, "phi": [25.0, 0.1, "LN", 30, 30, 10, 40], "phi_b": 10.0, "c": [3.0, 0.3, "LN", 20, 40, 0.1, 20]},
+            "root": {"veg_areal_weight": 0.0, "model": "constant", "parameters": [0.0, 0.0, 0.0]},
+        }
+    },
+    "material_GIS": None,
+    "actual_landslide_inventory_region": None,
+}
+
+
+def run_3DTSP(input_data, folder, tiled_execution):
+    """
+    Write the input YAML file of a simulation in the folder and run main_3DTSP.
+
+    Parameters
+    ----------
+    input_data : dict
+        Input data of the simulation.
+    folder : str
+        Folder of the input file and the results ("{folder}results/").
+    tiled_execution : dict or None
+        tiled_execution of the simulation (None for the full DEM).
+
+    Returns
+    -------
+    str
+        Folder of the results.
+    """
+    os.makedirs(folder, exist_ok=True)
+    run_input_data = deepcopy(input_data)
+    run_input_data["output_folder_path"] = os.path.abspath(folder) + "/results/"
+    run_input_data["restarting_simulation_JSON"] = None
+    run_input_data["results_format"] = "asc"
+    run_input_data["generate_plot"] = False
+    run_input_data["termination_apply"] = False
+    run_input_data["tiled_execution"] = tiled_execution
+
+    input_file_name = os.path.join(folder, "input.yaml")
+    with open(input_file_name, "w") as f:
+        yaml.safe_dump(run_input_data, f, sort_keys=False)
+
+    with open(os.path.join(folder, "log.txt"), "w") as log_file:
+        main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main_3DTSP_v20260429.py")
+        return_code = subprocess.call([sys.executable, main_script, os.path.abspath(input_file_name)], stdout=log_file, stderr=subprocess.STDOUT)
+    if return_code != 0:
+        print("simulation stopped with exit code %d - see %s" % (return_code, os.path.join(folder, "log.txt")))
+        sys.exit(1)
+
+    return run_input_data["output_folder_path"]
+
+
+def compare_results(full_folder, tiled_folder, tolerance=1e-6):
+    """
+    Compare the ascii grid results of the full DEM with the results stitched from the tiles.
+
+    Parameters
+    ----------
+    full_folder : str
+        Results of the full DEM.
+    tiled_folder : str
+        Results of the tiled execution (the "tiles/" folder of the tiles is skipped).
+    tolerance : float, optional
+        Maximum absolute difference of a grid cell. Default is 1e-6.
+
+    Returns
+    -------
+    list
+        Relative file names of the results that differ or are not stitched.
+    """
+    mismatches = []
+    compared_num = 0
+    for (dir_path, dir_names, file_names) in os.walk(full_folder):
+        dir_names[:] = [dir_name for dir_name in dir_names if dir_name != "tiles"]
+        for file_name in sorted(file_names):
+            if file_name.split(".")[-1].lower() != "asc":
+                continue
+            relative_file_name = os.path.relpath(os.path.join(dir_path, file_name), full_folder)
+            if not os.path.exists(os.path.join(tiled_folder, relative_file_name)):
+                print("%s - not stitched" % relative_file_name)
+                mismatches.append(relative_file_name)
+                continue
+
+            full_grid = np.asarray(read_ascii_grid(os.path.join(full_folder, relative_file_name))[0], dtype=float)
+            tiled_grid = np.asarray(read_ascii_grid(os.path.join(tiled_folder, relative_file_name))[0], dtype=float)
+            compared_num += 1
+            if full_grid.shape != tiled_grid.shape:
+                print("%s - grid shape %s != %s" % (relative_file_name, full_grid.shape, tiled_grid.shape))
+                mismatches.append(relative_file_name)
+                continue
+            max_difference = np.max(np.abs(full_grid - tiled_grid))
+            if max_difference > tolerance:
+                print("%s - max difference %.6g" % (relative_file_name, max_difference))
+                mismatches.append(relative_file_name)
+
+    print("%d result files compared, %d differ" % (compared_num, len(mismatches)))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the tiled execution of 3DTSP reproduces the simulation of the full DEM.")
+    parser.add_argument("--input", default=None, help="input JSON or YAML file (default: probabilistic test case of test_case_3DTS)")
+    parser.add_argument("--tile-size", type=int, nargs="+", default=[8, 12], help="rows and columns of the tile interiors (default: 8 12)")
+    parser.add_argument("--halo-cells", type=int, default=None, help="halo cells of the tiles (default: derived by 3DTSP)")
+    parser.add_argument("--tile-parallel-num", type=int, default=2, help="number of tiles run concurrently (default: 2)")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="maximum absolute difference of a grid cell (default: 1e-6)")
+    parser.add_argument("--output", default="./tiled_check/", help="folder of the two simulations (default: ./tiled_check/)")
+    args = parser.parse_args()
+
+    if args.input is None:
+        input_data = deepcopy(DEFAULT_INPUT)
+    else:
+        with open(args.input, "r") as f:
+            input_data = yaml.safe_load(f)   # JSON is a subset of YAML
+        if input_data.get("monte_carlo_sampling_seed", None) is None:
+            input_data["monte_carlo_sampling_seed"] = 12345   # the two simulations need the same random fields
+
+    tiled_execution = {"tile_size": args.tile_size if len(args.tile_size) > 1 else args.tile_size[0], "halo_cells": args.halo_cells, "tile_parallel_num": args.tile_parallel_num}
+
+    print("simulation of the full DEM ...")
+    full_folder = run_3DTSP(input_data, os.path.join(args.output, "full"), None)
+    print("tiled execution ...")
+    tiled_folder = run_3DTSP(input_data, os.path.join(args.output, "tiled"), tiled_execution)
+
+    if len(compare_results(full_folder, tiled_folder, tolerance=args.tolerance)) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -209,44 +209,40 @@ import warnings
 import json
 import yaml
 from copy import deepcopy
-from scipy.optimize import fixed_point
+
+## heavy or optional backends (scipy.optimize/stats/interpolate/sparse/linalg/ndimage, pykrige, scikit-learn, laspy, plotly)
+## are imported in the functions using them, so that the multiprocessing workers (which import this module again with
+## "spawn" on Windows and macOS) only load what their stage needs
 
 ## import geoFileConvert
 import csv
-import laspy
-from scipy.stats import mode
-
-# root strength
-from scipy.stats import gamma as gamma_func 
-
-## interpolation functions
-from scipy.interpolate import griddata
-from scipy.interpolate import interp1d
-from pykrige.ok import OrdinaryKriging
-from pykrige.uk import UniversalKriging
-from pykrige.ok3d import OrdinaryKriging3D
-from pykrige.uk3d import UniversalKriging3D
-
-# dip and aspect
-from sklearn.linear_model import LinearRegression
+from raster_io import read_ascii_grid, read_ascii_grid_header, set_raster_cache, split_ascii_grid, merge_ascii_grid   # ascii grid reader shared with 3DPLS
 
 ## multiprocessing
 import multiprocessing as mp
+from multiprocessing.connection import wait as mp_connection_wait
 
 ## UCA
 # from scipy.stats import rankdata
-from scipy.sparse import csr_matrix, save_npz, load_npz
-from scipy.sparse.csgraph import dijkstra
 import itertools
 
+## sharded execution
+import time
+import socket
+
+## stage metrics - peak memory and CPU time of child processes (not available on Windows)
+try:
+	import resource
+except ImportError:
+	resource = None
+
 ## probabilistic analysis
-from scipy.linalg import cholesky
+import zlib
+import shutil
 
 ## plotly plotting
 # import kaleido
 # import plotly.io as pio
-from plotly.offline import plot
-import plotly.graph_objs as go
 
 # for Hoshen-Kopelman algorithm
 from typing import Tuple, Dict
@@ -425,6 +421,12 @@ def interpKrig(DEMname, interpType, xRange=None, yRange=None, zRange=None, gridM
 				1. subdivide the values of limits (max and min) of each orthogonal direction into specified steps
 	"""
 
+	from scipy.interpolate import griddata, interp1d
+	from pykrige.ok import OrdinaryKriging
+	from pykrige.uk import UniversalKriging
+	from pykrige.ok3d import OrdinaryKriging3D
+	from pykrige.uk3d import UniversalKriging3D
+
 	## set up libraries
 	# import modules
 	# import numpy as np
@@ -813,6 +815,12 @@ def interpKrig_v2_0(DEMname, interpType, xRange=None, yRange=None, zRange=None,
 				1. subdivide the values of limits (max and min) of each orthogonal direction into specified steps
 	"""
 
+	from scipy.interpolate import griddata, interp1d
+	from pykrige.ok import OrdinaryKriging
+	from pykrige.uk import UniversalKriging
+	from pykrige.ok3d import OrdinaryKriging3D
+	from pykrige.uk3d import UniversalKriging3D
+
 	''' set up '''
 	# import modules
 	# import numpy as np
@@ -1339,6 +1347,8 @@ def las2xyz(inFileName, outFileName=None, outFileFormat='csv', saveOutputFile=Fa
 		dataset (numpy array): 3 columns based XYZ of the LiDAR las data 
 	"""
 
+	import laspy
+
 	# convert las to csv i.e. xyz
 	inFile = laspy.file.File(inFileName+'.las', mode="r")
 
@@ -1429,6 +1439,9 @@ def xyz2las(inFileName, inFileFormat='csv', outFileName=None, offsets=[None,None
 	# output
 		outFileName			:	output xyz file name 
 	'''
+
+	from scipy.stats import mode
+	import laspy
 	
 	# import python modules
 	# import laspy
@@ -1580,6 +1593,8 @@ def asc2xyz_v2(inFileName, outFileName=None, saveOutputFile=False, user_nodata_z
 		outFileName			:	output xyz file name
 	'''
 
+	from scipy.interpolate import griddata
+
 	# import python modules
 	# import numpy as np
 
@@ -1934,6 +1949,10 @@ def grd2pointXY(inFileName, XYcoord, interpType='lin', data_diff=2, single_outpu
 		dim_value		:	list of Z output value from grd file (exact or interpolated) [Z]
 	'''
 
+	from scipy.interpolate import griddata
+	from pykrige.ok import OrdinaryKriging
+	from pykrige.uk import UniversalKriging
+
 	# import python modules
 	# import numpy as np
 
@@ -2625,6 +2644,10 @@ def compute_Z_v3_0(part_xy, local_xy, local_z, interp_method):
 			5. exponential
 	'''
 
+	from scipy.interpolate import griddata
+	from pykrige.ok import OrdinaryKriging
+	from pykrige.uk import UniversalKriging
+
 	# both coordinates exactly at grid points or at the csv file corner 
 	if len(local_xy) == 1:
 		return float(local_z[0])
@@ -2736,14 +2759,41 @@ def compute_ij_v1_1(x0, y0, gridUniqueX, gridUniqueY, deltaX, deltaY):
 ###########################################################################
 ## read specific GIS data from files
 ###########################################################################
+## data types of the rasters held in memory
+def generate_3DTSP_raster_dtypes(raster_precision="double", cell_num=0):
+	"""Data types of the rasters held in memory for the given raster precision.
+
+	Parameters
+	----------
+	raster_precision : str, optional
+		"double" (default) keeps every raster in float64 (and int64 for masks and ids). "single" stores the material properties, 
+		slope angles and rates in float32, the masks in int8, the model ids in int16 and the DEM cell numbers in int32, 
+		while the elevations and depths (compared against dz), the cumulative water balance and the times to ponding stay in float64.
+		The minimum factor of safety of each DEM cell (compared against FS_crit) is always reduced in float64.
+	cell_num : int, optional
+		number of DEM cells - the DEM cell numbers stay in int64 if they do not fit in int32. Defaults to 0.
+
+	Returns
+	-------
+	dict
+		numpy data type of each raster kind {"elevation", "accumulation", "property", "state", "mask", "model_id", "cell_id"}
+	"""
+	if raster_precision == "double":
+		return {"elevation": np.float64, "accumulation": np.float64, "property": np.float64, "state": np.float64, "mask": np.int64, "model_id": np.int64, "cell_id": np.int64}
+	elif raster_precision == "single":
+		cell_id_dtype = np.int32 if cell_num < np.iinfo(np.int32).max else np.int64
+		return {"elevation": np.float64, "accumulation": np.float64, "property": np.float32, "state": np.float32, "mask": np.int8, "model_id": np.int16, "cell_id": cell_id_dtype}
+	raise ValueError(f"raster_precision must be \"double\" or \"single\", not {raster_precision}")
+
 ## read GIS data and convert file format
-def read_GIS_data(GIS_file_name, input_folder_path, full_output=False):
+def read_GIS_data(GIS_file_name, input_folder_path, full_output=False, dtype=None):
 	"""read GIS data and convert file format
 
 	Args:
 		GIS_file_name (string): file name of the GIS file in csv, asc, grd, or las file format.
 		input_folder_path (string): directory to the folder containing the GIS_file_name.
 		full_output (bool, optional): if set to True, every generated data are returned. if False, only the GIS data in returned. Defaults to False.
+		dtype (numpy data type, optional): data type of GIS_surface (see generate_3DTSP_raster_dtypes); integer types are rounded. Defaults to None (float64).
 
 	Returns:
 		GIS_surface (2D numpy array): GIS data arranged into DEM-like structure in 2D array.
@@ -2758,6 +2808,8 @@ def read_GIS_data(GIS_file_name, input_folder_path, full_output=False):
 		XYZ_row_or_col_increase_first (string): [only returned when full_output == True] required information when exporting GIS data into files. if "col", the column ("x") data cycles first in XYZ table format. if "row", the row ("y") data cycles first in XYZ table format.
 	"""
 
+	from scipy.interpolate import griddata
+
 	# find file type [csv, las, grd, asc]
 	GIS_file_name_list = GIS_file_name.split('.')
 	GIS_file_name_type = GIS_file_name_list[-1]
@@ -2771,7 +2823,7 @@ def read_GIS_data(GIS_file_name, input_folder_path, full_output=False):
 		GIS_surface_xyz = np.array(csv2list(input_folder_path+GIS_file_name))
 		GIS_surface, gridUniqueX, gridUniqueY, deltaX, deltaY = xyz2mesh(input_folder_path+GIS_file_name, exportAll=True) 
 
-	elif GIS_file_name_type in ['las', 'grd', 'asc']:
+	elif GIS_file_name_type in ['las', 'grd']:
 		# create xyz data and convert to csv data
 		if GIS_file_name_type == 'las':
 			GIS_surface_xyz = las2xyz(input_folder_path+GIS_file_name_only, outFileName=input_folder_path+GIS_file_name_only, outFileFormat='csv', saveOutputFile=False)
@@ -2779,23 +2831,47 @@ def read_GIS_data(GIS_file_name, input_folder_path, full_output=False):
 		elif GIS_file_name_type == 'grd':
 			GIS_surface_xyz = grd2xyz_v2(input_folder_path+GIS_file_name_only, headDataOutput=False, outFileName=input_folder_path+GIS_file_name_only, saveOutputFile=False)
 
-		elif GIS_file_name_type == 'asc':
-			GIS_surface_xyz = asc2xyz_v2(input_folder_path+GIS_file_name_only, outFileName=input_folder_path+GIS_file_name_only, saveOutputFile=False, user_nodata_z='neighbor')
-
 		GIS_surface, gridUniqueX, gridUniqueY, deltaX, deltaY = xyz2mesh(GIS_surface_xyz, exportAll=True) 
 
+	# ascii grid is read directly into the mesh grid (same result as asc2xyz_v2 and xyz2mesh)
+	elif GIS_file_name_type == 'asc':
+		# single precision rasters are parsed (and cached) in float32; integer rasters are parsed in float64 and rounded below
+		asc_dtype = dtype if dtype is not None and np.dtype(dtype).kind == "f" else float
+		GIS_surf_raw_asc_mesh, asc_header = read_ascii_grid(input_folder_path+GIS_file_name, dtype=asc_dtype)
+		ncols, nrows = GIS_surf_raw_asc_mesh.shape[1], GIS_surf_raw_asc_mesh.shape[0]
+		xllcorner = asc_header.get("xllcorner", asc_header.get("xllcenter"))
+		yllcorner = asc_header.get("yllcorner", asc_header.get("yllcenter"))
+		cellsize = asc_header["cellsize"]
+		nodata_value = asc_header.get("nodata_value", -9999)
+
+		# 1st row of ascii grid is the top of the raster, while the mesh grid rows are sorted by increasing y
+		gridUniqueX = np.linspace(xllcorner, xllcorner+cellsize*(ncols-1), ncols)
+		gridUniqueY = np.linspace(yllcorner+cellsize*(nrows-1), yllcorner, nrows)[::-1]
+		deltaX = abs(gridUniqueX[0]-gridUniqueX[1])		# spacing between x grids
+		deltaY = abs(gridUniqueY[0]-gridUniqueY[1])		# spacing between y grids
+
+		# noData cells take the value of the nearest cell with data
+		GIS_surface = np.copy(GIS_surf_raw_asc_mesh)
+		noData_i, noData_j = np.where(GIS_surf_raw_asc_mesh == nodata_value)
+		if len(noData_i) > 0:
+			withData_i, withData_j = np.where(GIS_surf_raw_asc_mesh != nodata_value)
+			xy_Data = np.vstack((gridUniqueX[withData_j], gridUniqueY[::-1][withData_i])).transpose()
+			GIS_surface[noData_i, noData_j] = griddata(xy_Data, GIS_surf_raw_asc_mesh[withData_i, withData_j], (gridUniqueX[noData_j], gridUniqueY[::-1][noData_i]), method='nearest')
+		GIS_surface = np.flipud(GIS_surface)
+
 	# if ascii files are used, noData may be present. For efficiency these regions are categorized as noData and subsequently ignored through the analysis
 	# for default, assume they are all cell is filled. 0 = noData, 1 = yesData
 	if GIS_file_name_type == 'asc':
-		GIS_surf_raw_asc_xyz, ncols, nrows, xllcorner, yllcorner, cellsize, nodata_value = asc2xyz_v2(input_folder_path+GIS_file_name_only, outFileName=None, saveOutputFile=False, user_nodata_z=None, output_meta=True)
-		GIS_surf_raw_asc_mesh = xyz2mesh(GIS_surf_raw_asc_xyz, exportAll=False) 
-		GIS_noData = np.where(GIS_surf_raw_asc_mesh == nodata_value, 0, 1)
+		GIS_noData = np.where(np.flipud(GIS_surf_raw_asc_mesh) == nodata_value, 0, 1)
 	else:
 		nodata_value = -9999
 		GIS_noData = np.ones((GIS_surface.shape))
 
 	# check if row increases first or column first in csv file
-	if abs(GIS_surface_xyz[0][0] - GIS_surface_xyz[1][0]) == 0 and abs(GIS_surface_xyz[0][1] - GIS_surface_xyz[1][1]) > 0:  # col increases first
+	# ascii grid is converted to XYZ with the x (column) cycling first
+	if GIS_file_name_type == 'asc':
+		XYZ_row_or_col_increase_first = "row" if ncols > 1 else "col"
+	elif abs(GIS_surface_xyz[0][0] - GIS_surface_xyz[1][0]) == 0 and abs(GIS_surface_xyz[0][1] - GIS_surface_xyz[1][1]) > 0:  # col increases first
 		XYZ_row_or_col_increase_first = "col"
 	elif abs(GIS_surface_xyz[0][0] - GIS_surface_xyz[1][0]) > 0 and abs(GIS_surface_xyz[0][1] - GIS_surface_xyz[1][1]) == 0:  # row increases first
 		XYZ_row_or_col_increase_first = "row"
@@ -2803,6 +2879,13 @@ def read_GIS_data(GIS_file_name, input_folder_path, full_output=False):
 		print("if the csv XYZ file format seems to be wrong? Please check the csv file")
 		sys.exit(3)	
 	
+	# data type of the GIS data held in memory
+	if dtype is not None:
+		if np.dtype(dtype).kind in "iub":
+			GIS_surface = np.rint(GIS_surface).astype(dtype)
+		else:
+			GIS_surface = GIS_surface.astype(dtype, copy=False)
+
 	# decimal places of grid X and Y values
 	dx_dp = -decimal.Decimal(str(deltaX)).as_tuple().exponent
 	dy_dp = -decimal.Decimal(str(deltaY)).as_tuple().exponent
@@ -3314,6 +3397,8 @@ def DEM_slope_aspect_MP_v3(DEM_slope_MP_inputs):
 		dip_deg (float): steepest planar slope in degrees
 		aspect_deg (float): azimuth (bearing) angle direction aligned to downward dip inclination in degrees
 	"""
+
+	from sklearn.linear_model import LinearRegression
 	
 	i, j, x, y, DEM, gridUniqueX, gridUniqueY, local_cell_sizes_slope = DEM_slope_MP_inputs
 	local_xy, local_z = local_cell_v3_2(local_cell_sizes_slope, x, y, DEM, gridUniqueX, gridUniqueY, None)
@@ -3675,7 +3760,7 @@ def u_w_array_round(z_array, gw_z, front_z, z_b, z_t, psi_i, psi_r, gamma_w=9.81
 		u_w = np.where(z_array >= front_z, -psi_r, -psi_i)
 
 		# below the groundwater level
-		if isinstance(slope_base, (int, float)):
+		if isinstance(slope_base, (int, float, np.number)):
 			fully_sat_u_w = gamma_w*(gw_z-z_array)*(np.cos(np.radians(slope_base))**2)
 		else:
 			fully_sat_u_w = gamma_w*(gw_z-z_array)
@@ -3684,7 +3769,7 @@ def u_w_array_round(z_array, gw_z, front_z, z_b, z_t, psi_i, psi_r, gamma_w=9.81
 	# wetting front reached impermeable layer and groundwater level is rising
 	# two layars : (top) saturated by rain, (low) saturated by groundwater table
 	elif front_z <= max(z_b, gw_z) and (gw_z < z_t):
-		if isinstance(slope_base, (int, float)):
+		if isinstance(slope_base, (int, float, np.number)):
 			fully_sat_u_w = gamma_w*(gw_z-z_array)*(np.cos(np.radians(slope_base))**2)
 		else:
 			fully_sat_u_w = gamma_w*(gw_z-z_array)
@@ -3694,7 +3779,7 @@ def u_w_array_round(z_array, gw_z, front_z, z_b, z_t, psi_i, psi_r, gamma_w=9.81
 	# groundwater level increases beyond the ground surface - ponding
 	# two layars : (top) ponding by rain, (low) saturated by groundwater table
 	elif gw_z >= z_t: 
-		if isinstance(slope_base, (int, float)):
+		if isinstance(slope_base, (int, float, np.number)):
 			fully_sat_u_w = gamma_w*(gw_z-z_array)*(np.cos(np.radians(slope_base))**2)
 		else:
 			fully_sat_u_w = gamma_w*(gw_z-z_array)
@@ -3734,7 +3819,7 @@ def u_w_ind_round(z, gw_z, front_z, z_b, z_t, psi_i, psi_r, gamma_w=9.81, slope_
 		
 		# below the groundwater level
 		elif z <= gw_z:
-			if isinstance(slope_base, (int, float)):
+			if isinstance(slope_base, (int, float, np.number)):
 				u_w = gamma_w*(gw_z-z)*(np.cos(np.radians(slope_base))**2)
 			else:
 				u_w = gamma_w*(gw_z-z)
@@ -3753,7 +3838,7 @@ def u_w_ind_round(z, gw_z, front_z, z_b, z_t, psi_i, psi_r, gamma_w=9.81, slope_
 
 		# below groundwater table -> positive pore-water pressure
 		else:
-			if isinstance(slope_base, (int, float)):
+			if isinstance(slope_base, (int, float, np.number)):
 				u_w = max(gamma_w*(gw_z-z)*(np.cos(np.radians(slope_base))**2), 0)  # lateral groundwater flow
 			else:
 				u_w = max(gamma_w*(gw_z-z), 0)
@@ -3761,7 +3846,7 @@ def u_w_ind_round(z, gw_z, front_z, z_b, z_t, psi_i, psi_r, gamma_w=9.81, slope_
 	# groundwater level increases beyond the ground surface - ponding
 	# two layars : (top) ponding by rain, (low) saturated by groundwater table
 	elif gw_z >= z_t: 
-		if isinstance(slope_base, (int, float)):
+		if isinstance(slope_base, (int, float, np.number)):
 			u_w = max(gamma_w*(gw_z-z)*(np.cos(np.radians(slope_base))**2), 0)   # lateral groundwater flow
 		else:
 			u_w = max(gamma_w*(gw_z-z), 0)
@@ -3786,6 +3871,8 @@ def GA_F_slanted_iter_noF0comp_timePondingDuring(t_all, F0, S0, t0, tp, tpp, rai
 
 def compute_GA_nonUniRain_slanted_MP(compute_GA_slanted_nonUniRain_input):
 	
+	from scipy.optimize import fixed_point
+
 	i, j, z_top, z_bottom, z_length, infil_zw_pre, wetting_front_z_pre, gwt_z_pre, rain_I, k_sat_z, cur_t, dt, T_p, T_pp, delta_theta, psi_r_head, infil_cumul_F_pre, slope_beta_deg, P_pre, S_pre, RO_pre, infil_rate_f_pre, S_max, cumul_dp, t_dp, rate_dp, dz_dp, ET_rate, theta_FC, theta_residual, theta_sat, ET_cumul_pre = compute_GA_slanted_nonUniRain_input
 	'''
 	rate_dp 	# rate - f, I
@@ -4691,6 +4778,8 @@ def critical_depth_group_3D_FS_HungrJanbu_MP_v10_00(critical_depth_3D_FS_MP_inpu
 
 	# output - failure_soil_thickness, min_comp_FS_over_depth
 
+	from scipy.stats import gamma as gamma_func
+
 	# open up inputs	
 	# 0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2, 28iteration_max, 29min_FS_diff, 30deltaX, 31deltaY, 32dz, 33gamma_w, 34FS_crit, 35correctFS_bool, 36FS_3D_apply_side, 37FS_3D_apply_root, 38DEM_root_model, 39dz_dp, 40press_dp
 	truncated_inside_row_y_col_x_global_idx, local_ext_id, local_z_t, local_z_b, local_gw_z, local_front_z, local_psi_r, local_psi_i, local_base_dip_rad, local_base_aspect_rad, local_gamma_s, local_phi_eff_rad, local_phi_b_rad, local_c, local_veg_areal_weight, local_root_c_base, local_root_c_side, local_root_depth, local_root_vZ_alpha2, local_root_vZ_beta2, local_root_vZ_RR_max, local_root_gamma, local_root_alpha1, local_root_beta1, local_root_DBH, local_root_d_tri, local_root_DB_alpha2, local_root_DB_beta2, iteration_max, min_FS_diff, deltaX, deltaY, dz, gamma_w, FS_crit, correctFS_bool, FS_3D_apply_side, FS_3D_apply_root, DEM_root_model, dz_dp, press_dp = critical_depth_3D_FS_MP_input
@@ -5329,6 +5418,8 @@ def count_UCA_cells_MP_v2(count_UCA_cells_inputs):
 	Returns:
 		tuple: (row, col, point index, number of connections)
 	"""
+
+	from scipy.sparse.csgraph import dijkstra
 	i, j, point_idx, DEM_neighbor_directed_graph_T = count_UCA_cells_inputs
 
 	# if precessor != -9999 or dist_matrix != inf, then there is a path that flows into selected point_idx
@@ -5441,6 +5532,11 @@ def read_RISD_json_yaml_input_v20260228(input_file_name):
 	elif isinstance(input_file_name, dict):
 		json_yaml_input_data = deepcopy(input_file_name)
 
+	# binary sidecars of the ASCII grid files (<file>.cache.npz) reused by the subsequent runs - see raster_io.py
+	if "original_input" in json_yaml_input_data.keys() and "iterations" in json_yaml_input_data.keys():
+		set_raster_cache(json_yaml_input_data["original_input"].get("raster_cache", False))
+	else:
+		set_raster_cache(json_yaml_input_data.get("raster_cache", False))
 
 	##################################################################################################################
 	## to restart 3DTSP simulations
@@ -5508,11 +5604,14 @@ def read_RISD_json_yaml_input_v20260228(input_file_name):
 		# restarting of the analysis
 		if isinstance(json_yaml_input_data["restarting_simulation_JSON"], str) and (("json" in json_yaml_input_data["restarting_simulation_JSON"]) or ("JSON" in json_yaml_input_data["restarting_simulation_JSON"])):
 			if "\\" in json_yaml_input_data["restarting_simulation_JSON"] or "/" in json_yaml_input_data["restarting_simulation_JSON"]:
-				with open(json_yaml_input_data["restarting_simulation_JSON"], 'r') as json_file:
-					restarting_simulation_dict = json.load(json_file)
+				restarting_simulation_JSON_path = json_yaml_input_data["restarting_simulation_JSON"]
 			else:
-				with open(input_folder_path+json_yaml_input_data["restarting_simulation_JSON"], 'r') as json_file:
-					restarting_simulation_dict = json.load(json_file)
+				restarting_simulation_JSON_path = input_folder_path+json_yaml_input_data["restarting_simulation_JSON"]
+			with open(restarting_simulation_JSON_path, 'r') as json_file:
+				restarting_simulation_dict = json.load(json_file)
+
+			# add the time steps completed after the JSON file was last exported
+			restarting_simulation_dict = replay_3DTSP_results_journal(restarting_simulation_dict, f"{os.path.splitext(restarting_simulation_JSON_path)[0]}.jsonl", verbose=True)
 
 			filename = restarting_simulation_dict["original_input"]["filename"]
 			input_folder_path = restarting_simulation_dict["original_input"]["input_folder_path"]
@@ -5994,8 +6093,108 @@ def compute_correlation_matrix_step_mp(corr_mat_inputs):
 
 	return CorrMat
 
+## standard normal inputs of the random fields for the sampling strategy of the Monte Carlo iterations
+def generate_standard_normal_sample(n_row, n_col, sampling=None):
+	"""
+	## Generate the standard normal inputs of a random field for a single Monte Carlo iteration.
+
+	Each field of each iteration draws from its own stream derived from the seed, the field name and the sample index, so that
+	the random fields are reproducible and independent of the process generating them. With "LHS", each cell is assigned a random
+	linear permutation (a*sample_index + b) mod sample_num of the strata, so that an iteration is generated without the other 
+	iterations. "Sobol" is used up to 21201 cells (the dimension limit of the sequence); larger grids use "LHS".
+
+	Args:
+		n_row (int): number of rows in DEM domain
+		n_col (int): number of columns in DEM domain
+		sampling (dict): sampling strategy {"method": "MC", "LHS" or "Sobol", "seed": int, "sample_num": int, "sample_index": int, "field": str}
+			if None, the global random state is used
+
+	Returns:
+		U (2D array): standard normal inputs (n_row, n_col)
+	"""
+
+	from scipy.stats import qmc
+	from scipy.special import ndtri
+
+	if sampling is None:
+		return np.random.normal(0, 1, (n_row, n_col))
+
+	field_key = zlib.crc32(str(sampling["field"]).encode())
+	sample_num = max(int(sampling["sample_num"]), 1)
+	sample_index = int(sampling["sample_index"])
+	cell_num = n_row*n_col
+
+	# plain Monte Carlo
+	if sampling["method"] == "MC":
+		return np.random.default_rng([sampling["seed"], field_key, sample_index]).standard_normal((n_row, n_col))
+
+	# scrambled Sobol sequence - the same sequence is shared by all iterations and the point at sample_index is used
+	if sampling["method"] == "Sobol" and cell_num <= 21201:
+		sobol_sequence = qmc.Sobol(cell_num, scramble=True, seed=np.random.default_rng([sampling["seed"], field_key]))
+		if sample_index > 0:
+			sobol_sequence.fast_forward(sample_index)
+		sample_prob = sobol_sequence.random(1)[0]
+
+	# Latin hypercube - random linear permutation of the strata for each cell (a coprime to sample_num)
+	else:
+		design_rng = np.random.default_rng([sampling["seed"], field_key])
+		perm_a = design_rng.integers(1, max(sample_num, 2), cell_num)
+		perm_b = design_rng.integers(0, sample_num, cell_num)
+		coprime_check = (np.gcd(perm_a, sample_num) == 1)
+		while not np.all(coprime_check):
+			perm_a[~coprime_check] = design_rng.integers(1, sample_num, np.count_nonzero(~coprime_check))
+			coprime_check = (np.gcd(perm_a, sample_num) == 1)
+		strata = (perm_a*sample_index + perm_b) % sample_num
+		sample_prob = (strata + np.random.default_rng([sampling["seed"], field_key, sample_index]).random(cell_num))/sample_num
+
+	sample_prob = np.clip(sample_prob, np.finfo(float).eps, 1 - np.finfo(float).eps)
+	return np.reshape(ndtri(sample_prob), (n_row, n_col))
+
+## grid coordinates of the correlation matrices of the random fields
+def generate_random_field_grid(uniqueGridX, uniqueGridY, deltaX, deltaY, sampling=None):
+	"""
+	## Return the grid coordinates used for the correlation matrices of the random fields.
+
+	With tiled execution (sampling["window"], see perform_3DTSP_tiled), the random fields are generated for the full DEM 
+	and the window of the tile is used, so the coordinates are extended to the full DEM.
+
+	Args:
+		uniqueGridX (array): grid X coordinates of the DEM
+		uniqueGridY (array): grid Y coordinates of the DEM
+		deltaX (float): cell size in X direction
+		deltaY (float): cell size in Y direction
+		sampling (dict): sampling strategy of the standard normal inputs - default None
+
+	Returns:
+		uniqueGridX (array): grid X coordinates of the random fields
+		uniqueGridY (array): grid Y coordinates of the random fields
+	"""
+	window = sampling.get("window", None) if sampling is not None else None
+	if window is None:
+		return uniqueGridX, uniqueGridY
+	return uniqueGridX[0] + deltaX*(np.arange(window["n_col"]) - window["col_min"]), uniqueGridY[0] + deltaY*(np.arange(window["n_row"]) - window["row_min"])
+
+## sampling strategy of a random field for a single Monte Carlo iteration
+def generate_iteration_sampling(sampling, monte_carlo_iter, field, parameter=None):
+	"""
+	## Add the sample index, field name and importance sampling shift of a Monte Carlo iteration to the sampling strategy.
+
+	Args:
+		sampling (dict): sampling strategy {"method", "seed", "sample_num", "importance_shift"} or None
+		monte_carlo_iter (int): Monte Carlo iteration number (sample index = monte_carlo_iter - 1)
+		field (str): name of the random field
+		parameter (str): name of the parameter in sampling["importance_shift"] - default None (no shift)
+
+	Returns:
+		sampling (dict): sampling strategy of the field (see generate_standard_normal_sample) or None
+	"""
+	if sampling is None:
+		return None
+	shift = float(sampling.get("importance_shift", {}).get(parameter, 0.0)) if parameter is not None else 0.0
+	return {**sampling, "sample_index": int(monte_carlo_iter)-1, "field": field, "shift": shift}
+
 ## when random distribution is used
-def generate_random_field_step(n_row, n_col, CorrMatX, CorrMatY, ParMean, ParCoV, DistType, ParMin, ParMax):
+def generate_random_field_step(n_row, n_col, CorrMatX, CorrMatY, ParMean, ParCoV, DistType, ParMin, ParMax, sampling=None, return_log_weight=False):
 	"""
 	## Generate random field with given correlation matrix and parameter statistical distributions.
 
@@ -6009,30 +6208,57 @@ def generate_random_field_step(n_row, n_col, CorrMatX, CorrMatY, ParMean, ParCoV
 		DistType (str): distribution type {normal 'N' or lognormal 'LN'}
 		ParMin (float): minimum value of the parameter
 		ParMax (float): maximum value of the parameter
+		sampling (dict): sampling strategy of the standard normal inputs (see generate_standard_normal_sample) - default None
+			with importance sampling, sampling["shift"] is the mean of the standard normal field 
+			with sampling["window"] = {"n_row", "n_col", "row_min", "col_min"}, the inputs are drawn for the full DEM of a tile 
+			(see perform_3DTSP_tiled) and CorrMatX and CorrMatY are the correlation matrices of the full DEM, so that the tile 
+			receives the window of the random field of the full DEM
+		return_log_weight (bool): return the log of the likelihood ratio of the inputs (importance sampling weight) - default False
 
 	Returns:
 		ParInp (2D array): generated random field of the parameter clipped between ParMin and ParMax
+		log_weight (float): log of the likelihood ratio of the inputs (0 without shift) - only if return_log_weight is True
 	"""
 
+	from scipy.linalg import cholesky, solve_triangular
+
 	## Cholesky decomposition
 	Ax = cholesky(CorrMatX, lower=True)
 	Ay = cholesky(CorrMatY, lower=True)
 
 	## uniform random number between 0 and 1
-	U = np.transpose(np.random.normal(0, 1, (n_row, n_col))) 
+	# tiled execution - inputs of the full DEM, and the rows of the Cholesky factors of the DEM cells in the tile
+	window = sampling.get("window", None) if sampling is not None else None
+	if window is None:
+		U = np.transpose(generate_standard_normal_sample(n_row, n_col, sampling)) 
+		Ax_window, Ay_window = Ax, Ay
+	else:
+		U = np.transpose(generate_standard_normal_sample(window["n_row"], window["n_col"], sampling)) 
+		Ax_window = Ax[window["col_min"]:window["col_min"]+n_col]
+		Ay_window = Ay[window["row_min"]:window["row_min"]+n_row]
+
+	## importance sampling - shift the inputs so that the mean of the standard normal field is the shift (Ax U_shift Ay^T = shift)
+	# likelihood ratio of the inputs: exp(-U_shift.U + |U_shift|^2/2)
+	log_weight = 0.0
+	if sampling is not None and sampling.get("shift", 0.0) != 0:
+		U_shift = sampling["shift"]*np.outer(solve_triangular(Ax, np.ones(Ax.shape[0]), lower=True), solve_triangular(Ay, np.ones(Ay.shape[0]), lower=True))
+		U = U + U_shift
+		log_weight = float(-np.sum(U_shift*U) + 0.5*np.sum(U_shift**2))
 
 	# For normal distribution
 	if DistType == "N":
-		ParInp = ParMean + (ParCoV * ParMean) * np.transpose(np.matmul(np.matmul(Ax, U), np.transpose(Ay)))
+		ParInp = ParMean + (ParCoV * ParMean) * np.transpose(np.matmul(np.matmul(Ax_window, U), np.transpose(Ay_window)))
 	# For lognormal distribution
 	elif DistType == "LN": 
 		SigLnPar = np.sqrt(np.log(1 + ParCoV**2))
 		MuLnPar = np.log(ParMean) - 0.5 * SigLnPar**2
-		ParInp = np.exp(MuLnPar + SigLnPar * np.transpose(np.matmul(np.matmul(Ax, U), np.transpose(Ay))))
+		ParInp = np.exp(MuLnPar + SigLnPar * np.transpose(np.matmul(np.matmul(Ax_window, U), np.transpose(Ay_window))))
 
 	# clip the values to be within the min and max range
 	ParInp = np.clip(ParInp, ParMin, ParMax)  
 
+	if return_log_weight:
+		return ParInp, log_weight
 	return ParInp
 
 ###########################################################################
@@ -6041,7 +6267,7 @@ def generate_random_field_step(n_row, n_col, CorrMatX, CorrMatY, ParMean, ParCoV
 ## multiprocessing function to generate random field for each iteration of Monte-Carlo simulation
 def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_inputs):
 
-	monte_carlo_iter, DEM_material_id, matID_list, mat_dict, corr_X_mats_dict, corr_Y_mats_dict, dx_dp, dy_dp, dz_dp, rate_dp, theta_dp, press_dp, cumul_dp, n_row, n_col, gridUniqueX, gridUniqueY, deltaX, deltaY, folder_dir, save_file_name, output_txt_format, XYZ_row_or_col_increase_first, DEM_noData, nodata_value, plot_option = random_field_inputs
+	monte_carlo_iter, DEM_material_id, matID_list, mat_dict, corr_X_mats_dict, corr_Y_mats_dict, dx_dp, dy_dp, dz_dp, rate_dp, theta_dp, press_dp, cumul_dp, n_row, n_col, gridUniqueX, gridUniqueY, deltaX, deltaY, folder_dir, save_file_name, output_txt_format, XYZ_row_or_col_increase_first, DEM_noData, nodata_value, plot_option, sampling = random_field_inputs
 	
 	###############################################################
 	## basic information computed
@@ -6065,6 +6291,9 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 	DEM_SWCC_model = np.zeros((DEM_material_id.shape), dtype=int)
 	DEM_root_model = np.zeros((DEM_material_id.shape), dtype=int)
 
+	# log of the likelihood ratio of the random field inputs (importance sampling weight of the iteration)
+	importance_log_weight = 0.0
+
 	monte_carlo_iter_filename_dict_t = {
 		"hydraulic": {
 			"SWCC_model": None,
@@ -6090,7 +6319,8 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 			"parameters_constant": None,
 			"parameters_van_Zadelhoff": None,
 			"parameters_DiBiagio": None,
-		}
+		},
+		"importance_log_weight": None
 	}
 
 	###############################################################
@@ -6129,14 +6359,17 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 		for matID in matID_list:
 			# assign the random field parameters to the grid cells (zero or positive correlation length)					
 			if isinstance(mat_dict[matID]["hydraulic"][hydraulic_key], list) and (isinstance(mat_dict[matID]["hydraulic"][hydraulic_key][3], (int, float)) and isinstance(mat_dict[matID]["hydraulic"][hydraulic_key][4], (int, float))) and ((mat_dict[matID]["hydraulic"][hydraulic_key][3] >= 0) and (mat_dict[matID]["hydraulic"][hydraulic_key][4] >= 0)):
-				ParInp = generate_random_field_step(n_row, n_col,  
+				ParInp, field_log_weight = generate_random_field_step(n_row, n_col,  
 								corr_X_mats_dict[mat_dict[matID]["hydraulic"][hydraulic_key][3]], # CorrMatX = CorrMatX_dict[CorrLengthX]
 								corr_Y_mats_dict[mat_dict[matID]["hydraulic"][hydraulic_key][4]], # CorrMatY = CorrMatY_dict[CorrLengthY]
 								mat_dict[matID]["hydraulic"][hydraulic_key][0], # ParMean
 								mat_dict[matID]["hydraulic"][hydraulic_key][1], # ParCoV
 								mat_dict[matID]["hydraulic"][hydraulic_key][2], # DistType
 								mat_dict[matID]["hydraulic"][hydraulic_key][5], # ParMin
-								mat_dict[matID]["hydraulic"][hydraulic_key][6]) # ParMax
+								mat_dict[matID]["hydraulic"][hydraulic_key][6], # ParMax
+								generate_iteration_sampling(sampling, monte_carlo_iter, f"{matID} - hydraulic - {hydraulic_key}", hydraulic_key), # sampling strategy
+								True) # return importance sampling weight
+				importance_log_weight += field_log_weight
 
 			# assign the deterministic - infinite correlation length (CorrLengthX, CorrLengthY) or zero coefficient of variation (CoV)
 			elif isinstance(mat_dict[matID]["hydraulic"][hydraulic_key], list) and (isinstance(mat_dict[matID]["hydraulic"][hydraulic_key][3], str) and isinstance(mat_dict[matID]["hydraulic"][hydraulic_key][4], str)) and ((mat_dict[matID]["hydraulic"][hydraulic_key][3] == "inf") or (mat_dict[matID]["hydraulic"][hydraulic_key][4] == "inf") or (mat_dict[matID]["hydraulic"][hydraulic_key][1] == 0)):
@@ -6173,14 +6406,17 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 		for matID in matID_list:	
 			# assign the random field parameters to the grid cells (zero or positive correlation length)					
 			if isinstance(mat_dict[matID]["soil"][soil_key], list) and (isinstance(mat_dict[matID]["soil"][soil_key][3], (int, float)) and isinstance(mat_dict[matID]["soil"][soil_key][4], (int, float))) and ((mat_dict[matID]["soil"][soil_key][3] >= 0) and (mat_dict[matID]["soil"][soil_key][4] >= 0)):
-				ParInp = generate_random_field_step(n_row, n_col,  
+				ParInp, field_log_weight = generate_random_field_step(n_row, n_col,  
 								corr_X_mats_dict[mat_dict[matID]["soil"][soil_key][3]], # CorrMatX = CorrMatX_dict[CorrLengthX]
 								corr_Y_mats_dict[mat_dict[matID]["soil"][soil_key][4]], # CorrMatY = CorrMatY_dict[CorrLengthY]
 								mat_dict[matID]["soil"][soil_key][0], # ParMean
 								mat_dict[matID]["soil"][soil_key][1], # ParCoV
 								mat_dict[matID]["soil"][soil_key][2], # DistType
 								mat_dict[matID]["soil"][soil_key][5], # ParMin
-								mat_dict[matID]["soil"][soil_key][6]) # ParMax
+								mat_dict[matID]["soil"][soil_key][6], # ParMax
+								generate_iteration_sampling(sampling, monte_carlo_iter, f"{matID} - soil - {soil_key}", soil_key), # sampling strategy
+								True) # return importance sampling weight
+				importance_log_weight += field_log_weight
 
 			# assign the deterministic - infinite correlation length (CorrLengthX, CorrLengthY) or zero coefficient of variation (CoV)
 			elif isinstance(mat_dict[matID]["soil"][soil_key], list) and (isinstance(mat_dict[matID]["soil"][soil_key][3], str) and isinstance(mat_dict[matID]["soil"][soil_key][4], str)) and ((mat_dict[matID]["soil"][soil_key][3] == "inf") or (mat_dict[matID]["soil"][soil_key][4] == "inf") or (mat_dict[matID]["soil"][soil_key][1] == 0)):
@@ -6241,14 +6477,17 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 	for matID in matID_list:	
 		# assign the random field parameters to the grid cells (zero or positive correlation length)					
 		if isinstance(mat_dict[matID]["root"]["veg_areal_weight"], list) and (isinstance(mat_dict[matID]["root"]["veg_areal_weight"][3], (int, float)) and isinstance(mat_dict[matID]["root"]["veg_areal_weight"][4], (int, float))) and ((mat_dict[matID]["root"]["veg_areal_weight"][3] >= 0) and (mat_dict[matID]["root"]["veg_areal_weight"][4] >= 0)):
-			ParInp = generate_random_field_step(n_row, n_col,  
+			ParInp, field_log_weight = generate_random_field_step(n_row, n_col,  
 							corr_X_mats_dict[mat_dict[matID]["root"]["veg_areal_weight"][3]], # CorrMatX = CorrMatX_dict[CorrLengthX]
 							corr_Y_mats_dict[mat_dict[matID]["root"]["veg_areal_weight"][4]], # CorrMatY = CorrMatY_dict[CorrLengthY]
 							mat_dict[matID]["root"]["veg_areal_weight"][0], # ParMean
 							mat_dict[matID]["root"]["veg_areal_weight"][1], # ParCoV
 							mat_dict[matID]["root"]["veg_areal_weight"][2], # DistType
 							mat_dict[matID]["root"]["veg_areal_weight"][5], # ParMin
-							mat_dict[matID]["root"]["veg_areal_weight"][6]) # ParMax
+							mat_dict[matID]["root"]["veg_areal_weight"][6], # ParMax
+							generate_iteration_sampling(sampling, monte_carlo_iter, f"{matID} - root - veg_areal_weight", "veg_areal_weight"), # sampling strategy
+							True) # return importance sampling weight
+			importance_log_weight += field_log_weight
 
 		# assign the deterministic - infinite correlation length (CorrLengthX, CorrLengthY) or zero coefficient of variation (CoV)
 		elif isinstance(mat_dict[matID]["root"]["veg_areal_weight"], list) and (isinstance(mat_dict[matID]["root"]["veg_areal_weight"][3], str) and isinstance(mat_dict[matID]["root"]["veg_areal_weight"][4], str)) and ((mat_dict[matID]["root"]["veg_areal_weight"][3] == "inf") or (mat_dict[matID]["root"]["veg_areal_weight"][4] == "inf") or (mat_dict[matID]["root"]["veg_areal_weight"][1] == 0)):
@@ -6303,7 +6542,8 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 								mat_dict[matID]["root"]["parameters"][param_idx][1], # ParCoV
 								mat_dict[matID]["root"]["parameters"][param_idx][2], # DistType
 								mat_dict[matID]["root"]["parameters"][param_idx][5], # ParMin
-								mat_dict[matID]["root"]["parameters"][param_idx][6]) # ParMax
+								mat_dict[matID]["root"]["parameters"][param_idx][6], # ParMax
+								generate_iteration_sampling(sampling, monte_carlo_iter, f"{matID} - root - parameters - {param_idx}")) # sampling strategy
 
 			# assign the deterministic - infinite correlation length (CorrLengthX, CorrLengthY) or zero coefficient of variation (CoV)
 			elif isinstance(mat_dict[matID]["root"]["parameters"][param_idx], list) and (isinstance(mat_dict[matID]["root"]["parameters"][param_idx][3], str) and isinstance(mat_dict[matID]["root"]["parameters"][param_idx][4], str)) and ((mat_dict[matID]["root"]["parameters"][param_idx][3] == "inf") or (mat_dict[matID]["root"]["parameters"][param_idx][4] == "inf") or (mat_dict[matID]["root"]["parameters"][param_idx][1] == 0)):
@@ -6412,10 +6652,12 @@ def generate_random_field_step_monte_carlo_iter_mp_filenameOnly_v2(random_field_
 	if os.path.exists(f"{out_folder_dir}{save_file_name} - root_d_tri - i{monte_carlo_iter}.html") == False and plot_option:
 		plot_DEM_mat_map_v8_0(f"{out_folder_dir}", f"{save_file_name} - root_d_tri - i{monte_carlo_iter}", 'root_d_tri', gridUniqueX, gridUniqueY, None, DEM_param_veg_d_tri, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
 
+	monte_carlo_iter_filename_dict_t["importance_log_weight"] = importance_log_weight
+
 	return monte_carlo_iter_filename_dict_t
 
 ## Define random material parameter step Monte Carlo
-def define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, uniqueGridX, uniqueGridY, deltaX, deltaY, mat_dict, max_cpu_num, iterations=500, output_folder_dir="./", save_file_name="", output_txt_format="csv", XYZ_row_or_col_increase_first="row", DEM_noData=None, nodata_value=-9999, dz_incre=0.1, plot=False):
+def define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, uniqueGridX, uniqueGridY, deltaX, deltaY, mat_dict, max_cpu_num, iterations=500, output_folder_dir="./", save_file_name="", output_txt_format="csv", XYZ_row_or_col_increase_first="row", DEM_noData=None, nodata_value=-9999, dz_incre=0.1, plot=False, sampling=None):
 	"""
 	## Random fields are created.
 
@@ -6455,6 +6697,9 @@ def define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, unique
 		the increment value for the Z-axis. (default=0.1)
 	plot : bool 
 		whether to plot the generated random field data. If True, the generated random field data will be plotted. (default=False)
+	sampling : dict
+		sampling strategy of the standard normal inputs {"method": "MC", "LHS" or "Sobol", "seed": int, "sample_num": int}; 
+		the sample index of each iteration is (iteration - 1). If None, the global random state is used. (default=None)
 
 	Returns
 	-------
@@ -6493,6 +6738,9 @@ def define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, unique
 	corL_X_set_unique_input = []
 	corL_Y_set_unique_input = []
 
+	# tiled execution - correlation matrices of the full DEM (see generate_random_field_grid)
+	uniqueGridX_field, uniqueGridY_field = generate_random_field_grid(uniqueGridX, uniqueGridY, deltaX, deltaY, sampling)
+
 	for matID in matID_list:
 		for key_level1 in mat_dict[matID]:
 
@@ -6500,30 +6748,30 @@ def define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, unique
 				for key_level2 in mat_dict[matID][key_level1]:
 					if isinstance(mat_dict[matID][key_level1][key_level2], list) and (mat_dict[matID][key_level1][key_level2][3] not in corLX_unique):
 						corLX_unique.append( mat_dict[matID][key_level1][key_level2][3] ) 
-						corL_X_set_unique_input.append( (uniqueGridX, mat_dict[matID][key_level1][key_level2][3]) )			
+						corL_X_set_unique_input.append( (uniqueGridX_field, mat_dict[matID][key_level1][key_level2][3]) )			
 						
 					if isinstance(mat_dict[matID][key_level1][key_level2], list) and (mat_dict[matID][key_level1][key_level2][4] not in corLY_unique):
 						corLY_unique.append( mat_dict[matID][key_level1][key_level2][4] )
-						corL_Y_set_unique_input.append( (uniqueGridY, mat_dict[matID][key_level1][key_level2][4]) )
+						corL_Y_set_unique_input.append( (uniqueGridY_field, mat_dict[matID][key_level1][key_level2][4]) )
 
 			elif key_level1 == "root":   # nest list exists in the material dictionary related to root
 				for key_level2 in mat_dict[matID][key_level1]:
 					if key_level2 != "parameters" and isinstance(mat_dict[matID][key_level1][key_level2], list) and (mat_dict[matID][key_level1][key_level2][3] not in corLX_unique):
 						corLX_unique.append( mat_dict[matID][key_level1][key_level2][3] )
-						corL_X_set_unique_input.append( (uniqueGridX, mat_dict[matID][key_level1][key_level2][3]) )
+						corL_X_set_unique_input.append( (uniqueGridX_field, mat_dict[matID][key_level1][key_level2][3]) )
 					if key_level2 != "parameters" and isinstance(mat_dict[matID][key_level1][key_level2], list) and (mat_dict[matID][key_level1][key_level2][4] not in corLY_unique):
 						corLY_unique.append( mat_dict[matID][key_level1][key_level2][4] )
-						corL_Y_set_unique_input.append( (uniqueGridY, mat_dict[matID][key_level1][key_level2][4]) )
+						corL_Y_set_unique_input.append( (uniqueGridY_field, mat_dict[matID][key_level1][key_level2][4]) )
 
 					if key_level2 == "parameters":
 						for idx in range(3):
 							if isinstance(mat_dict[matID][key_level1][key_level2][idx], list) and (mat_dict[matID][key_level1][key_level2][idx][3] not in corLX_unique):
 								corLX_unique.append( mat_dict[matID][key_level1][key_level2][idx][3])
-								corL_X_set_unique_input.append( (uniqueGridX, mat_dict[matID][key_level1][key_level2][idx][3]) )
+								corL_X_set_unique_input.append( (uniqueGridX_field, mat_dict[matID][key_level1][key_level2][idx][3]) )
 
 							if isinstance(mat_dict[matID][key_level1][key_level2][idx], list) and (mat_dict[matID][key_level1][key_level2][idx][4] not in corLY_unique):
 								corLY_unique.append( mat_dict[matID][key_level1][key_level2][idx][4] )
-								corL_Y_set_unique_input.append( (uniqueGridY, mat_dict[matID][key_level1][key_level2][idx][4]) )
+								corL_Y_set_unique_input.append( (uniqueGridY_field, mat_dict[matID][key_level1][key_level2][idx][4]) )
 
 	if len(corLX_unique) != 0 and len(corLY_unique) != 0:
 
@@ -6557,7 +6805,7 @@ def define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, unique
 	## generating random fields for Monte-Carlo iterations through multiprocessing
 	###############################################################
 	# multiprocessing input
-	random_field_inputs = [(monte_carlo_iter+1, DEM_material_id, matID_list, mat_dict, corr_mats_X_dict, corr_mats_Y_dict, dx_dp, dy_dp, dz_dp, rate_dp, theta_dp, press_dp, cumul_dp, n_row, n_col, uniqueGridX, uniqueGridY, deltaX, deltaY, output_folder_dir, save_file_name, output_txt_format, XYZ_row_or_col_increase_first, DEM_noData, nodata_value, plot) for monte_carlo_iter in range(iterations)]
+	random_field_inputs = [(monte_carlo_iter+1, DEM_material_id, matID_list, mat_dict, corr_mats_X_dict, corr_mats_Y_dict, dx_dp, dy_dp, dz_dp, rate_dp, theta_dp, press_dp, cumul_dp, n_row, n_col, uniqueGridX, uniqueGridY, deltaX, deltaY, output_folder_dir, save_file_name, output_txt_format, XYZ_row_or_col_increase_first, DEM_noData, nodata_value, plot, sampling) for monte_carlo_iter in range(iterations)]
 
 	# multiprocessing output
 	with mp.Pool(processes=max_cpu_num) as pool: 
@@ -6584,7 +6832,7 @@ def generate_rainfall_GIS_each_time_step(rainfall_GIS_each_time_step_input):
 
 	Parameters
 	-------
-	time : int
+	time_idx : int
 		Time step.
 	monte_carlo_iter : int
 		Monte Carlo iteration number.	
@@ -6635,15 +6883,19 @@ def generate_rainfall_GIS_each_time_step(rainfall_GIS_each_time_step_input):
 		If True, generate plots for the output data.
 	convert_intensity : float
 		unit conversion for rainfall intensity
+	sampling : dict
+		sampling strategy of the standard normal inputs (see define_random_rainfall_step_monte_carlo)
 
 	Returns
 	-------
 	rain_I_filename : str
 		Rainfall intensity GIS data filename
 	"""	
+
+	from scipy.interpolate import griddata
 	
 	# unpack the input
-	time, monte_carlo_iter, start_t, end_t, r_data, n_row, n_col, uniqueGridX, uniqueGridY, deltaX, deltaY, corr_mats_X_dict, corr_mats_Y_dict, input_folder_path, output_folder_path, output_txt_format, filename, DEM_noData, nodata_value, XYZ_row_or_col_increase_first, dx_dp, dy_dp, I_dp, plot_option, convert_intensity = rainfall_GIS_each_time_step_input
+	time_idx, monte_carlo_iter, start_t, end_t, r_data, n_row, n_col, uniqueGridX, uniqueGridY, deltaX, deltaY, corr_mats_X_dict, corr_mats_Y_dict, input_folder_path, output_folder_path, output_txt_format, filename, DEM_noData, nodata_value, XYZ_row_or_col_increase_first, dx_dp, dy_dp, I_dp, plot_option, convert_intensity, sampling = rainfall_GIS_each_time_step_input
 
 	out_folder_dir = f"{output_folder_path}iteration_{monte_carlo_iter}/intensity/"
 
@@ -6700,7 +6952,8 @@ def generate_rainfall_GIS_each_time_step(rainfall_GIS_each_time_step_input):
 									r_data[rD][3], # ParCoV
 									r_data[rD][4], # DistType
 									r_data[rD][7], # ParMin
-									r_data[rD][8]) # ParMax
+									r_data[rD][8], # ParMax
+									generate_iteration_sampling(sampling, monte_carlo_iter, f"{filename} - t{time_idx} - {rD}")) # sampling strategy
 
 			# assign the deterministic - infinite correlation length (CorrLengthX, CorrLengthY) or zero coefficient of variation (CoV)
 			elif ((isinstance(r_data[rD][5], str) and (r_data[rD][5] == "inf"))) or ((isinstance(r_data[rD][6], str) and (r_data[rD][6] == "inf"))) or ((isinstance(r_data[rD][3], (int, float)) and (r_data[rD][3] == 0))):
@@ -6713,7 +6966,7 @@ def generate_rainfall_GIS_each_time_step(rainfall_GIS_each_time_step_input):
 			rain_I_GIS[DEM_material_id_row_I, DEM_material_id_col_J] = ParInp[DEM_material_id_row_I, DEM_material_id_col_J]
 
 	# generate output file 
-	generate_output_GIS(output_txt_format, out_folder_dir, filename, "rain_I", rain_I_GIS, DEM_noData, nodata_value, uniqueGridX, uniqueGridY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, I_dp, time=time, iteration=monte_carlo_iter)
+	generate_output_GIS(output_txt_format, out_folder_dir, filename, "rain_I", rain_I_GIS, DEM_noData, nodata_value, uniqueGridX, uniqueGridY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, I_dp, time=time_idx, iteration=monte_carlo_iter)
 
 	# get unit for rainfall intensity from convert_intensity
 	if abs(round(1/convert_intensity) - 1) <= 1e-3:
@@ -6736,13 +6989,13 @@ def generate_rainfall_GIS_each_time_step(rainfall_GIS_each_time_step_input):
 		rain_I_unit = "mm/hr"
 	
 	# generate the plot
-	if os.path.exists(f"{out_folder_dir}{filename} - rain_I[{rain_I_unit.replace('/', '_')}] - t{time} - i{monte_carlo_iter}.html") == False and plot_option:
-		plot_DEM_mat_map_v8_0(f"{out_folder_dir}", f"{filename} - rain_I[{rain_I_unit.replace('/', '_')}] - t{time} - i{monte_carlo_iter}", f'rain_I[{rain_I_unit}]', uniqueGridX, uniqueGridY, None, rain_I_GIS*(1.0/convert_intensity), contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+	if os.path.exists(f"{out_folder_dir}{filename} - rain_I[{rain_I_unit.replace('/', '_')}] - t{time_idx} - i{monte_carlo_iter}.html") == False and plot_option:
+		plot_DEM_mat_map_v8_0(f"{out_folder_dir}", f"{filename} - rain_I[{rain_I_unit.replace('/', '_')}] - t{time_idx} - i{monte_carlo_iter}", f'rain_I[{rain_I_unit}]', uniqueGridX, uniqueGridY, None, rain_I_GIS*(1.0/convert_intensity), contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
 
-	return (start_t, end_t, f"{out_folder_dir}", f"{filename} - rain_I - t{time} - i{monte_carlo_iter}.{output_txt_format}")
+	return (start_t, end_t, f"{out_folder_dir}", f"{filename} - rain_I - t{time_idx} - i{monte_carlo_iter}.{output_txt_format}")
 
 ## Define random rainfall step Monte Carlo 
-def define_random_rainfall_step_monte_carlo(rain_time_I, uniqueGridX, uniqueGridY, deltaX, deltaY, max_cpu_num, input_folder_path, output_folder_path, filename, convert_intensity, iterations=500, output_txt_format="csv", XYZ_row_or_col_increase_first="row", DEM_noData=None, nodata_value=-9999, I_dp=9, plot=False):	
+def define_random_rainfall_step_monte_carlo(rain_time_I, uniqueGridX, uniqueGridY, deltaX, deltaY, max_cpu_num, input_folder_path, output_folder_path, filename, convert_intensity, iterations=500, output_txt_format="csv", XYZ_row_or_col_increase_first="row", DEM_noData=None, nodata_value=-9999, I_dp=9, plot=False, sampling=None):	
 	"""Random fields are created for rainfall
 
 	Parameters
@@ -6786,6 +7039,9 @@ def define_random_rainfall_step_monte_carlo(rain_time_I, uniqueGridX, uniqueGrid
 		decimal points for rainfall intensity. (default=9)
 	plot : bool 
 		whether to plot the generated random field data. If True, the generated random field data will be plotted. (default=False)
+	sampling : dict
+		sampling strategy of the standard normal inputs {"method": "MC", "LHS" or "Sobol", "seed": int, "sample_num": int}; 
+		the sample index of each iteration is (iteration - 1). If None, the global random state is used. (default=None)
 	"""
 
 	###############################################################
@@ -6809,14 +7065,17 @@ def define_random_rainfall_step_monte_carlo(rain_time_I, uniqueGridX, uniqueGrid
 	corL_X_set_unique_input = []
 	corL_Y_set_unique_input = []
 
+	# tiled execution - correlation matrices of the full DEM (see generate_random_field_grid)
+	uniqueGridX_field, uniqueGridY_field = generate_random_field_grid(uniqueGridX, uniqueGridY, deltaX, deltaY, sampling)
+
 	for (_,_,r_data) in rain_time_I:
 		if isinstance(r_data, list) and len(r_data) > 0 and len(r_data[0]) == 9:  # probabilistic of rain gauge points for nearest neighbor interpolation (or Voronoi diagram)
 			for idx in range(len(r_data)):
 				# format = [[0X, 1Y, 2Mean, 3CoV, 4Prob. Dist., 5Corr. Length X, 6Corr. Length Y, 7Min, 8Max], ...]
 				corLX_unique.append(r_data[idx][5])
 				corLY_unique.append(r_data[idx][6])
-				corL_X_set_unique_input.append((uniqueGridX, r_data[idx][5]))
-				corL_Y_set_unique_input.append((uniqueGridY, r_data[idx][6]))
+				corL_X_set_unique_input.append((uniqueGridX_field, r_data[idx][5]))
+				corL_Y_set_unique_input.append((uniqueGridY_field, r_data[idx][6]))
 
 	if len(corLX_unique) != 0 and len(corLY_unique) != 0:
 
@@ -6851,8 +7110,8 @@ def define_random_rainfall_step_monte_carlo(rain_time_I, uniqueGridX, uniqueGrid
 	###############################################################
 	rainfall_GIS_each_time_step_input = []
 	for monte_carlo_iter in range(1,iterations+1):
-		for time,(start_t,end_t,r_data) in enumerate(rain_time_I):
-			rainfall_GIS_each_time_step_input.append((time, monte_carlo_iter, start_t, end_t, r_data, n_row, n_col, uniqueGridX, uniqueGridY, deltaX, deltaY, corr_mats_X_dict, corr_mats_Y_dict, input_folder_path, output_folder_path, output_txt_format, filename, DEM_noData, nodata_value, XYZ_row_or_col_increase_first, dx_dp, dy_dp, I_dp, plot, convert_intensity))
+		for time_idx,(start_t,end_t,r_data) in enumerate(rain_time_I):
+			rainfall_GIS_each_time_step_input.append((time_idx, monte_carlo_iter, start_t, end_t, r_data, n_row, n_col, uniqueGridX, uniqueGridY, deltaX, deltaY, corr_mats_X_dict, corr_mats_Y_dict, input_folder_path, output_folder_path, output_txt_format, filename, DEM_noData, nodata_value, XYZ_row_or_col_increase_first, dx_dp, dy_dp, I_dp, plot, convert_intensity, sampling))
 
 	# multiprocessing output
 	with mp.Pool(processes=max_cpu_num) as pool: 
@@ -6899,6 +7158,9 @@ def plot_DEM_mat_map_v8_0(folder_path, plot_naming, z_label, gridUniqueX, gridUn
 		html files: 2D heatmap plot of DEM_data
 	"""
 
+	from plotly.offline import plot
+	import plotly.graph_objs as go
+
 	##############################################################
 	## prefined features
 	##############################################################
@@ -7142,6 +7404,8 @@ def plot_DEM_mat_animation_v8_0(folder_path, plot_naming, z_label, gridUniqueX,
 		html files: 2D heatmap plot animation of DEM_data
 	"""
 
+	import plotly.graph_objs as go
+
 	##############################################################
 	## prefined features
 	##############################################################
@@ -7621,349 +7885,2020 @@ def hoshen_kopelman(grid: np.ndarray, connectivity: int = 4) -> Tuple[np.ndarray
     return H_out, sizes
 
 ###########################################################################
-## run rainfall infiltration and slope stability analysis from input JSON file 
+## incremental cluster tracking of landslide or debris-flow source - termination condition
 ###########################################################################
-def perform_3DTSP_v2(monte_carlo_iter_filename_dict):
-	"""Run the combined infiltration and slope stability analysis for each Monte Carlo iteration.
+def add_3DTSP_cluster_label(cluster_tracker, size, volume, bbox, first_cell):
+	"""Add new cluster labels (roots) to the cluster tracker and return the first new label.
+
+	size, volume, bbox and first_cell can be a single value (bbox: [row min, row max, column min, column max])
+	or arrays to add multiple labels at once.
+	"""
+	new_label = cluster_tracker["label_num"]
+	new_label_num = np.size(size)
+
+	# grow the per-label arrays when full
+	if new_label+new_label_num > len(cluster_tracker["parent"]):
+		capacity = max(2*len(cluster_tracker["parent"]), new_label+new_label_num)
+		cluster_tracker["parent"] = np.concatenate((cluster_tracker["parent"], np.arange(len(cluster_tracker["parent"]), capacity, dtype=np.int64)))
+		for key in ["size", "volume", "first_cell"]:
+			cluster_tracker[key] = np.concatenate((cluster_tracker[key], np.zeros(capacity-len(cluster_tracker[key]), dtype=cluster_tracker[key].dtype)))
+		cluster_tracker["bbox"] = np.concatenate((cluster_tracker["bbox"], np.zeros((capacity-len(cluster_tracker["bbox"]), 4), dtype=np.int64)))
+
+	new_label_slice = slice(new_label, new_label+new_label_num)
+	cluster_tracker["parent"][new_label_slice] = np.arange(new_label, new_label+new_label_num)
+	cluster_tracker["size"][new_label_slice] = size
+	cluster_tracker["volume"][new_label_slice] = volume
+	cluster_tracker["bbox"][new_label_slice] = bbox
+	cluster_tracker["first_cell"][new_label_slice] = first_cell
+	cluster_tracker["label_num"] += new_label_num
+
+	return new_label
+
+def find_3DTSP_cluster_root(cluster_tracker, cluster_label):
+	"""Find the root label of a cluster label (union-find with path compression)."""
+	parent = cluster_tracker["parent"]
+	root = cluster_label
+	while parent[root] != root:
+		root = parent[root]
+	while parent[cluster_label] != root:
+		parent[cluster_label], cluster_label = root, parent[cluster_label]
+	return root
+
+def find_3DTSP_cluster_root_array(cluster_tracker, cluster_label_array):
+	"""Find the root labels of an array of cluster labels (0 = no cluster)."""
+	parent = cluster_tracker["parent"]
+	root_array = parent[cluster_label_array]
+	while True:
+		next_root_array = parent[root_array]
+		if np.array_equal(next_root_array, root_array):
+			return root_array
+		root_array = next_root_array
+
+def union_3DTSP_cluster(cluster_tracker, label_a, label_b):
+	"""Merge the clusters of two labels and their area, volume, bounding box and first cell."""
+	root_a = find_3DTSP_cluster_root(cluster_tracker, label_a)
+	root_b = find_3DTSP_cluster_root(cluster_tracker, label_b)
+	if root_a == root_b:
+		return root_a
+
+	# attach the smaller cluster to the larger cluster
+	if cluster_tracker["size"][root_a] < cluster_tracker["size"][root_b]:
+		root_a, root_b = root_b, root_a
+
+	cluster_tracker["parent"][root_b] = root_a
+	cluster_tracker["size"][root_a] += cluster_tracker["size"][root_b]
+	cluster_tracker["volume"][root_a] += cluster_tracker["volume"][root_b]
+	cluster_tracker["bbox"][root_a, [0, 2]] = np.minimum(cluster_tracker["bbox"][root_a, [0, 2]], cluster_tracker["bbox"][root_b, [0, 2]])
+	cluster_tracker["bbox"][root_a, [1, 3]] = np.maximum(cluster_tracker["bbox"][root_a, [1, 3]], cluster_tracker["bbox"][root_b, [1, 3]])
+	cluster_tracker["first_cell"][root_a] = min(cluster_tracker["first_cell"][root_a], cluster_tracker["first_cell"][root_b])
+
+	# only root labels store the cluster data
+	cluster_tracker["size"][root_b] = 0
+	cluster_tracker["volume"][root_b] = 0.0
+
+	return root_a
+
+def label_3DTSP_cluster_window(cluster_tracker, cluster_mask, row_min, col_min, depth, connectivity):
+	"""Label the clusters inside a window of the grid and add them to the cluster tracker as new labels.
 
 	Parameters
 	----------
-	monte_carlo_iter_filename_dict : dict
-		Dictionary containing the filenames for each Monte Carlo iteration.
+	cluster_tracker : dict
+		Cluster tracker; updated in place.
+	cluster_mask : numpy array (bool)
+		Source cells inside the window.
+	row_min, col_min : int
+		Row and column of the top-left cell of the window in the grid.
+	depth : numpy array
+		Failure depth inside the window.
+	connectivity : int
+		4 or 8. Determines neighbor connectivity.
 	"""
 
-	#####################################
-	## import input files from original input
-	#####################################
-	# filename, input_folder_path, output_folder_path, restarting_simulation_dict, monte_carlo_iteration_max, output_txt_format, plot_option, gamma_w, FS_crit, dz, termination_apply, landslide_to_debris_flow_threshold, DEM_surf_dip_infiltration_apply, DEM_debris_flow_criteria_apply, FS_3D_analysis, FS_3D_iter_limit, FS_3D_tol, cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio, FS_3D_apply_side, FS_3D_apply_root, DEM_UCA_compute_all, cpu_num, dt, rain_time_I, DEM_file_name, material_file_name, soil_depth_model, soil_depth_data, ground_water_model, ground_water_data, dip_surf_filename, aspect_surf_filename, dip_base_filename, aspect_base_filename, local_cell_sizes_slope, DEM_debris_flow_initiation_filename, DEM_neighbor_directed_graph_filename, DEM_UCA_filename, material, material_GIS, convert_time, convert_intensity, actual_landslide_inventory_region, ET_time_I, field_capacity_suction = read_RISD_json_yaml_input_v20260228(input_JSON_YAML_file_name)
+	from scipy.ndimage import label as ndimage_label
+	structure = np.ones((3, 3), dtype=int) if connectivity == 8 else None
+	window_label, cluster_num = ndimage_label(cluster_mask, structure=structure)
+	if cluster_num == 0:
+		return
 
-	copy_input = deepcopy(monte_carlo_iter_filename_dict["original_input"])
-	copy_input["restarting_simulation_JSON"] = None
+	grid_col_num = cluster_tracker["source"].shape[1]
+	window_col_num = cluster_mask.shape[1]
+	window_label_flat = window_label.ravel()
+	window_size = np.bincount(window_label_flat, minlength=cluster_num+1)[1:]
+	window_volume = np.bincount(window_label_flat, weights=np.where(cluster_mask, depth, 0).ravel(), minlength=cluster_num+1)[1:]
 
-	filename, _, output_folder_path, _, monte_carlo_iteration_max, output_txt_format, plot_option, gamma_w, FS_crit, dz, termination_apply, landslide_to_debris_flow_threshold, DEM_surf_dip_infiltration_apply, DEM_debris_flow_criteria_apply, FS_3D_analysis, FS_3D_iter_limit, FS_3D_tol, cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio, FS_3D_apply_side, FS_3D_apply_root, _, cpu_num, dt, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _ = read_RISD_json_yaml_input_v20260228(copy_input) 
-	
-	#####################################
-	# store new dictionary
-	#####################################
-	monte_carlo_iter_result_filename_dict = deepcopy(monte_carlo_iter_filename_dict)
+	# bounding box and first cell in raster order of each cluster - in grid rows and columns
+	cluster_cell_idx = np.flatnonzero(window_label_flat)
+	cluster_cell_label = window_label_flat[cluster_cell_idx] - 1
+	cluster_cell_row = row_min + cluster_cell_idx // window_col_num
+	cluster_cell_col = col_min + cluster_cell_idx % window_col_num
 
-	# slope analysis results for each monte-carlo simulation if not existing
-	output_folder_path_iter_temp = f"{output_folder_path}iteration_"
-	for iter_num in range(1,monte_carlo_iteration_max+1):
-	 
-		# create output folder for each Monte Carlo iteration slope stability analysis
-		if not os.path.exists(f"{output_folder_path_iter_temp}{iter_num}/slope/"):
-			os.makedirs(f"{output_folder_path_iter_temp}{iter_num}/slope/", exist_ok=True)			
+	window_bbox = np.zeros((cluster_num, 4), dtype=np.int64)
+	window_bbox[:, [0, 2]] = np.iinfo(np.int64).max
+	np.minimum.at(window_bbox[:, 0], cluster_cell_label, cluster_cell_row)
+	np.maximum.at(window_bbox[:, 1], cluster_cell_label, cluster_cell_row)
+	np.minimum.at(window_bbox[:, 2], cluster_cell_label, cluster_cell_col)
+	np.maximum.at(window_bbox[:, 3], cluster_cell_label, cluster_cell_col)
 
-		# create template for slope stability analysis results
-		if "min_FS" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"] = {}
-		if "crit_FS_z" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["crit_FS_z"] = {}
-		if "debris_flow_source" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"] = {}
-		if "landslide_source" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"] = {}
-		if "runout_depth_source" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["runout_depth_source"] = {}
+	window_first_cell = np.full(cluster_num, np.iinfo(np.int64).max, dtype=np.int64)
+	np.minimum.at(window_first_cell, cluster_cell_label, cluster_cell_row*grid_col_num + cluster_cell_col)
 
-	#####################################
-	# check if all Monte Carlo iterations are completed
-	#####################################
-	check_all_monte_carlo_iterations_completed = 0
-	for iter_num, filename_dict in monte_carlo_iter_filename_dict["iterations"].items(): 
-		# check if simulation is completed
-		if ("min_FS" in filename_dict.keys()) and ((len(filename_dict["intensity"]) == len(filename_dict["min_FS"]) == len(filename_dict["gwt_z"])) or ((len(filename_dict["intensity"]) <= len(filename_dict["min_FS"])) and (len(filename_dict["intensity"]) <= len(filename_dict["gwt_z"])) and (len(filename_dict["min_FS"]) == len(filename_dict["gwt_z"])))):
-			check_all_monte_carlo_iterations_completed += 1 
+	first_new_label = add_3DTSP_cluster_label(cluster_tracker, window_size, window_volume, window_bbox, window_first_cell)
 
-	if check_all_monte_carlo_iterations_completed == monte_carlo_iteration_max:
-		print(f"		All Monte Carlo iterations Completed.\n")
-		return monte_carlo_iter_result_filename_dict
- 
-	#####################################
-	## import input files from Monte Carlo iteration dictionary
-	#####################################
-	## constant with time - DEM and grid data
-	DEM_surface, _, _ = read_GIS_data(monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_surface"][1], monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_surface"][0], full_output=False)
-	DEM_noData, _, _ = read_GIS_data(monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_noData"][1], monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_noData"][0], full_output=False)
+	labels_window = cluster_tracker["labels"][row_min:row_min+cluster_mask.shape[0], col_min:col_min+window_col_num]
+	labels_window[cluster_mask] = window_label[cluster_mask] + (first_new_label-1)
 
-	## grid information
-	nodata_value = monte_carlo_iter_filename_dict["iterations"]["1"]["nodata_value"]
-	XYZ_row_or_col_increase_first = monte_carlo_iter_filename_dict["iterations"]["1"]["XYZ_row_or_col_increase_first"]
-	deltaX = monte_carlo_iter_filename_dict["iterations"]["1"]["deltaX"]
-	deltaY = monte_carlo_iter_filename_dict["iterations"]["1"]["deltaY"]
-	gridUniqueX = np.arange(monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueX_min"], monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueX_max"]+0.1*deltaX, deltaX)
-	gridUniqueY = np.arange(monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueY_min"], monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueY_max"]+0.1*deltaY, deltaY)
+def update_3DTSP_cluster_tracker(cluster_tracker, source, depth, connectivity=4, rebuild_ratio=0.05):
+	"""Update the clusters of landslide (or debris-flow) source cells from the cells changed since the previous time step.
 
-	## decimal point information
-	dx_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["dx_dp"]
-	dy_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["dy_dp"]
-	dz_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["dz_dp"]
-	rate_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["rate_dp"]
-	t_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["t_dp"]
-	theta_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["theta_dp"]
-	press_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["press_dp"]
-	cumul_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["cumul_dp"]
-	FS_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["FS_dp"]
+	The cluster labels are kept with union-find, and the area (cell number), volume, bounding box and first cell 
+	of each cluster are updated only for the changed cells: new source cells are merged with the neighboring clusters 
+	and only the clusters which lost cells are labeled again inside their bounding box (as they may be split).
+	The whole grid is labeled when there is no tracker (first time step) or many cells are changed.
 
-	######################################################
-	## generate all possible combinations of DEM cell groupings for 3D slope stability analysis
-	######################################################	
-	# this is same for all Monte Carlo iterations so run this outside the loop once
-	if isinstance(FS_3D_analysis, bool) and FS_3D_analysis:
+	Parameters
+	----------
+	cluster_tracker : dict or None
+		Cluster tracker returned at the previous time step. If None, the clusters are labeled from the whole grid.
+	source : numpy array
+		Landslide or debris-flow source (1) at each DEM cell.
+	depth : numpy array
+		Failure depth (crit_FS_z) at each DEM cell.
+	connectivity : int, optional
+		4 or 8. Determines neighbor connectivity.
+	rebuild_ratio : float, optional
+		Fraction of changed DEM cells above which the clusters are labeled from the whole grid.
 
-		print('The programming is generating the slip surface data for 3D slope stability analysis ... \n')
-		
-		###################
-		## generate local slip surfaces (plan-view) using superellipse shape
-		###################
-		group_side_slip_surf_grouping = generate_local_superellipse_grouping_v1_10(cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio)
-		# group_side_N_min, group_side_N_max, n_param, x_a_y_b_ratio
+	Returns
+	-------
+	dict
+		Cluster tracker.
+	"""
+	source = (source == 1)
+	depth = np.where(source, depth, 0.0)
+	grid_col_num = source.shape[1]
 
-		###################
-		## simply generate DEM cell groupings in global coordinates 
-		###################
-		# assign unique number to each DEM cell 
-		# use to identify unique cell groupings
-		DEM_grid_num = np.arange(int(len(gridUniqueY)*len(gridUniqueX))).reshape((len(gridUniqueY), len(gridUniqueX))).astype(int)
+	if cluster_tracker is not None:
+		added_cell_idx = np.flatnonzero(source & ~cluster_tracker["source"])
+		removed_cell_idx = np.flatnonzero(cluster_tracker["source"] & ~source)
 
-		# multiprocess input file			
-		generate_global_superellipse_slip_surface_input = []
-		for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))): 
-			generate_global_superellipse_slip_surface_input.append((i, j, cell_size_3DFS_min, cell_size_3DFS_max, group_side_slip_surf_grouping, len(gridUniqueY), len(gridUniqueX), DEM_grid_num))
-			# g_row_y, g_col_x, group_side_N_min, group_side_N_max, group_side_slip_surf_grouping, len_DEM_y_grid, len_DEM_x_grid, DEM_grid_num
+	#############################
+	## label clusters from the whole grid
+	#############################
+	if cluster_tracker is None or len(added_cell_idx)+len(removed_cell_idx) > rebuild_ratio*source.size:
+		cluster_tracker = {
+			"labels": np.zeros(source.shape, dtype=np.int64),
+			"parent": np.arange(64, dtype=np.int64),
+			"size": np.zeros(64, dtype=np.int64),
+			"volume": np.zeros(64, dtype=float),
+			"bbox": np.zeros((64, 4), dtype=np.int64), 	# [row min, row max, column min, column max]
+			"first_cell": np.zeros(64, dtype=np.int64),  # first cell in raster order - for same order as hoshen_kopelman
+			"label_num": 1,  # label 0 = no cluster
+			"source": source,
+			"depth": depth
+		}
+		label_3DTSP_cluster_window(cluster_tracker, source, 0, 0, depth, connectivity)
+		return cluster_tracker
 
-		# generate all possible combinations of DEM cell groupings
-		pool_generate_3DTS_slip_stage1 = mp.Pool(cpu_num)
+	labels_flat = cluster_tracker["labels"].ravel()
+	depth_flat = depth.ravel()
+	previous_depth_flat = cluster_tracker["depth"].ravel()
 
-		slip_surface_data_stage1 = pool_generate_3DTS_slip_stage1.map(generate_global_superellipse_grouping_MP_v1_00, generate_global_superellipse_slip_surface_input)   
-		# all_slip_surf_data_temp - current
+	#############################
+	## change of failure depth in the cells remaining in the clusters
+	#############################
+	depth_changed_cell_idx = np.flatnonzero(source.ravel() & cluster_tracker["source"].ravel() & (depth_flat != previous_depth_flat))
+	if len(depth_changed_cell_idx) > 0:
+		depth_changed_root = find_3DTSP_cluster_root_array(cluster_tracker, labels_flat[depth_changed_cell_idx])
+		np.add.at(cluster_tracker["volume"], depth_changed_root, depth_flat[depth_changed_cell_idx] - previous_depth_flat[depth_changed_cell_idx])
 
-		pool_generate_3DTS_slip_stage1.close()
-		pool_generate_3DTS_slip_stage1.join()
+	#############################
+	## removed cells - the cluster may be split
+	#############################
+	split_root_list = []
+	if len(removed_cell_idx) > 0:
+		removed_root = find_3DTSP_cluster_root_array(cluster_tracker, labels_flat[removed_cell_idx])
+		np.subtract.at(cluster_tracker["size"], removed_root, 1)
+		np.subtract.at(cluster_tracker["volume"], removed_root, previous_depth_flat[removed_cell_idx])
+		labels_flat[removed_cell_idx] = 0
+		split_root_list = np.unique(removed_root).tolist()
 
-		# only take in unique DEM cell groupings
-		unique_slip_surf_grouping_DEM_grid_num = list(set(list(itertools.chain.from_iterable(slip_surface_data_stage1))))
-		# unique_slip_surf_grouping_DEM_grid_num_list = [list(item) if isinstance(item, tuple) else int(item) for item in unique_slip_surf_grouping_DEM_grid_num]  
+	#############################
+	## added cells - merge with neighboring clusters
+	#############################
+	if connectivity == 8:
+		neighbor_offset_list = [(-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)]
+	else:
+		neighbor_offset_list = [(-1,0), (0,-1), (0,1), (1,0)]
+	
+	grid_row_num = source.shape[0]
+	for cell_idx in added_cell_idx.tolist():
+		i, j = divmod(cell_idx, grid_col_num)
+		cell_label = add_3DTSP_cluster_label(cluster_tracker, 1, float(depth_flat[cell_idx]), (i, i, j, j), cell_idx)
+		labels_flat[cell_idx] = cell_label
 
+		for (di, dj) in neighbor_offset_list:
+			if 0 <= i+di < grid_row_num and 0 <= j+dj < grid_col_num and cluster_tracker["labels"][i+di, j+dj] != 0:
+				union_3DTSP_cluster(cluster_tracker, cell_label, cluster_tracker["labels"][i+di, j+dj])
 
-	######################################
-	# run the Monte Carlo iterations
-	######################################
-	for iter_num, filename_dict in monte_carlo_iter_filename_dict["iterations"].items(): 
-	 
-		#####################################
-		## import input files from Monte Carlo iteration dictionary - subjected to change over time
-		#####################################
-		bedrock_surface, _, _ = read_GIS_data(filename_dict["bedrock_surface"][1], filename_dict["bedrock_surface"][0], full_output=False)
-		soil_thickness, _, _ = read_GIS_data(filename_dict["soil_thickness"][1], filename_dict["soil_thickness"][0], full_output=False)
-		
-		dip_surf_deg, _, _ = read_GIS_data(filename_dict["dip_surf_deg"][1], filename_dict["dip_surf_deg"][0], full_output=False)
-		# aspect_surf_deg, _, _ = read_GIS_data(filename_dict["aspect_surf_deg"][1], filename_dict["aspect_surf_deg"][0], full_output=False)	
-		dip_base_deg, _, _ = read_GIS_data(filename_dict["dip_base_deg"][1], filename_dict["dip_base_deg"][0], full_output=False)
-		aspect_base_deg, _, _ = read_GIS_data(filename_dict["aspect_base_deg"][1], filename_dict["aspect_base_deg"][0], full_output=False)
+	cluster_tracker["source"] = source
+	cluster_tracker["depth"] = depth
 
-		if isinstance(FS_3D_analysis, bool) and FS_3D_analysis: 
-			DEM_debris_flow_criteria, _, _ = read_GIS_data(filename_dict["DEM_debris_flow_criteria"][1], filename_dict["DEM_debris_flow_criteria"][0], full_output=False) 
-		else:
-			DEM_debris_flow_criteria = np.ones_like(DEM_surface)
+	#############################
+	## label again the clusters which lost cells inside their bounding box
+	#############################
+	for split_root in set(find_3DTSP_cluster_root(cluster_tracker, root) for root in split_root_list):
+		row_min, row_max, col_min, col_max = cluster_tracker["bbox"][split_root]
+		cluster_window_mask = (find_3DTSP_cluster_root_array(cluster_tracker, cluster_tracker["labels"][row_min:row_max+1, col_min:col_max+1]) == split_root) & source[row_min:row_max+1, col_min:col_max+1]
 
-		#####################################
-		# check if simulation is completed
-		#####################################
-		if ("min_FS" in filename_dict.keys()) and ((len(filename_dict["intensity"]) == len(filename_dict["min_FS"]) == len(filename_dict["gwt_z"])) or ((len(filename_dict["intensity"]) <= len(filename_dict["min_FS"])) and (len(filename_dict["intensity"]) <= len(filename_dict["gwt_z"])) and (len(filename_dict["min_FS"]) == len(filename_dict["gwt_z"])))):
-			print(f"Monte Carlo iteration {iter_num} completed.")
-			continue 
-	
-		#####################################
-		# run the simulation
-		#####################################
-		print(f"Running Monte Carlo iteration {iter_num} ...")
+		cluster_tracker["size"][split_root] = 0
+		cluster_tracker["volume"][split_root] = 0.0
+		label_3DTSP_cluster_window(cluster_tracker, cluster_window_mask, row_min, col_min, depth[row_min:row_max+1, col_min:col_max+1], connectivity)
 
-		#####################################
-		# extract inputs specific to the iterations
-		#####################################
-		max_time_step = len(filename_dict["intensity"])
-		if ("min_FS" in filename_dict.keys()) and (len(filename_dict["min_FS"]) >= 1):
-			start_time_step = len(filename_dict["min_FS"])-1
-		else:
-			start_time_step = 0
-		
-		## material - hydraulic properties
-		# SWCC_model, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_model"][1], filename_dict["material"]["hydraulic"]["SWCC_model"][0], full_output=False)
-		# SWCC_a, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_a"][1], filename_dict["material"]["hydraulic"]["SWCC_a"][0], full_output=False)
-		# SWCC_n, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_n"][1], filename_dict["material"]["hydraulic"]["SWCC_n"][0], full_output=False)
-		# SWCC_m, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_m"][1], filename_dict["material"]["hydraulic"]["SWCC_m"][0], full_output=False)
-		k_sat, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["k_sat"][1], filename_dict["material"]["hydraulic"]["k_sat"][0], full_output=False)
-		initial_suction, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["initial_suction"][1], filename_dict["material"]["hydraulic"]["initial_suction"][0], full_output=False)
-		theta_sat, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_sat"][1], filename_dict["material"]["hydraulic"]["theta_sat"][0], full_output=False)
-		theta_residual, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_residual"][1], filename_dict["material"]["hydraulic"]["theta_residual"][0], full_output=False)
-		theta_FC, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_FC"][1], filename_dict["material"]["hydraulic"]["theta_FC"][0], full_output=False)
-		# soil_m_v, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["soil_m_v"][1], filename_dict["material"]["hydraulic"]["soil_m_v"][0], full_output=False)
-		S_max, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["max_surface_storage"][1], filename_dict["material"]["hydraulic"]["max_surface_storage"][0], full_output=False)
-		# theta_initial, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_initial"][1], filename_dict["material"]["hydraulic"]["theta_initial"][0], full_output=False)
-		psi_r, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["psi_r"][1], filename_dict["material"]["hydraulic"]["psi_r"][0], full_output=False)
-		delta_theta, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["delta_theta"][1], filename_dict["material"]["hydraulic"]["delta_theta"][0], full_output=False)
-		# F_p, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["F_p"][1], filename_dict["material"]["hydraulic"]["F_p"][0], full_output=False)
-		# z_p, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["z_p"][1], filename_dict["material"]["hydraulic"]["z_p"][0], full_output=False)
-		T_p, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["T_p"][1], filename_dict["material"]["hydraulic"]["T_p"][0], full_output=False)
-		T_pp, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["T_pp"][1], filename_dict["material"]["hydraulic"]["T_pp"][0], full_output=False)
-
-		## material - soil strength properties
-		soil_unit_weight, _, _ = read_GIS_data(filename_dict["material"]["soil"]["unit_weight"][1], filename_dict["material"]["soil"]["unit_weight"][0], full_output=False)
-		soil_phi, _, _ = read_GIS_data(filename_dict["material"]["soil"]["phi"][1], filename_dict["material"]["soil"]["phi"][0], full_output=False)
-		soil_phi_b, _, _ = read_GIS_data(filename_dict["material"]["soil"]["phi_b"][1], filename_dict["material"]["soil"]["phi_b"][0], full_output=False)
-		soil_c, _, _ = read_GIS_data(filename_dict["material"]["soil"]["c"][1], filename_dict["material"]["soil"]["c"][0], full_output=False)
-
-		## material - root reinforcement properties 
-		veg_areal_weight, _, _ = read_GIS_data(filename_dict["material"]["root"]["veg_areal_weight"][1], filename_dict["material"]["root"]["veg_areal_weight"][0], full_output=False)
-		root_model, _, _ = read_GIS_data(filename_dict["material"]["root"]["model"][1], filename_dict["material"]["root"]["model"][0], full_output=False)
-		root_c_base, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_constant"][0][1], filename_dict["material"]["root"]["parameters_constant"][0][0], full_output=False)
-		root_c_side, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_constant"][1][1], filename_dict["material"]["root"]["parameters_constant"][1][0], full_output=False)
-		root_depth, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_constant"][2][1], filename_dict["material"]["root"]["parameters_constant"][2][0], full_output=False)
-		root_vZ_alpha2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_van_Zadelhoff"][0][1], filename_dict["material"]["root"]["parameters_van_Zadelhoff"][0][0], full_output=False)
-		root_vZ_beta2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_van_Zadelhoff"][1][1], filename_dict["material"]["root"]["parameters_van_Zadelhoff"][1][0], full_output=False)
-		root_vZ_RR_max, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_van_Zadelhoff"][2][1], filename_dict["material"]["root"]["parameters_van_Zadelhoff"][2][0], full_output=False)
-		root_DB_gamma, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][0][1], filename_dict["material"]["root"]["parameters_DiBiagio"][0][0], full_output=False)
-		root_DB_alpha1, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][1][1], filename_dict["material"]["root"]["parameters_DiBiagio"][1][0], full_output=False)
-		root_DB_beta1, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][2][1], filename_dict["material"]["root"]["parameters_DiBiagio"][2][0], full_output=False)
-		root_DB_DBH, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][3][1], filename_dict["material"]["root"]["parameters_DiBiagio"][3][0], full_output=False)
-		root_DB_d_tri, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][4][1], filename_dict["material"]["root"]["parameters_DiBiagio"][4][0], full_output=False)
-		root_DB_alpha2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][5][1], filename_dict["material"]["root"]["parameters_DiBiagio"][5][0], full_output=False)
-		root_DB_beta2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][6][1], filename_dict["material"]["root"]["parameters_DiBiagio"][6][0], full_output=False)
-
-		##################
-		# taking the superellipse shapes, generate slip surface soil cell data
-		##################
-		if isinstance(FS_3D_analysis, bool):
-
-			#####################################
-			# read GIS data of hydraulic properties for initial set-up
-			#####################################
-			# gwt_dz_t, _, _ = read_GIS_data(filename_dict["gwt_dz"][str(start_time_step)][1], filename_dict["gwt_dz"][str(start_time_step)][0], full_output=False)
-			gwt_z_t, _, _ = read_GIS_data(filename_dict["gwt_z"][str(start_time_step)][1], filename_dict["gwt_z"][str(start_time_step)][0], full_output=False)
-			Surface_Storage_t, _, _ = read_GIS_data(filename_dict["Surface_Storage"][str(start_time_step)][1], filename_dict["Surface_Storage"][str(start_time_step)][0], full_output=False)
-			Precipitation_t, _, _ = read_GIS_data(filename_dict["Precipitation"][str(start_time_step)][1], filename_dict["Precipitation"][str(start_time_step)][0], full_output=False)
-			Runoff_t, _, _ = read_GIS_data(filename_dict["Runoff"][str(start_time_step)][1], filename_dict["Runoff"][str(start_time_step)][0], full_output=False)
-			f_rate_t, _, _ = read_GIS_data(filename_dict["f_rate"][str(start_time_step)][1], filename_dict["f_rate"][str(start_time_step)][0], full_output=False)
-			F_cumul_t, _, _ = read_GIS_data(filename_dict["F_cumul"][str(start_time_step)][1], filename_dict["F_cumul"][str(start_time_step)][0], full_output=False)
-			z_w_t, _, _ = read_GIS_data(filename_dict["z_w"][str(start_time_step)][1], filename_dict["z_w"][str(start_time_step)][0], full_output=False)
-			wet_z_t, _, _ = read_GIS_data(filename_dict["wet_z"][str(start_time_step)][1], filename_dict["wet_z"][str(start_time_step)][0], full_output=False)
+	return cluster_tracker
 
-		#####################################
-		# generate all slip surface soil column data
-		#####################################
-		if isinstance(FS_3D_analysis, bool) and FS_3D_analysis:
+def compute_3DTSP_largest_cluster(cluster_tracker, deltaX, deltaY):
+	"""Compute the area, volume and maximum failure depth of the cluster with the largest area.
 
-			# all_slip_surf_data - all unique slip surface soil cell data
-			# index = slip surface ID, data = [0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2] 
-			# cell_all_affecting_slip - find all slip surface containing given (global_row_y, global_col_x)
+	Parameters
+	----------
+	cluster_tracker : dict
+		Cluster tracker returned by update_3DTSP_cluster_tracker.
+	deltaX, deltaY : float
+		DEM cell size.
 
-			# multiprocess input file
-			generate_slip_surface_cell_input = [] 
-			for unique_slip_surface_i in unique_slip_surf_grouping_DEM_grid_num: 
-				generate_slip_surface_cell_input.append((unique_slip_surface_i, DEM_grid_num, DEM_surface, soil_thickness, dip_base_deg, aspect_base_deg, gwt_z_t, wet_z_t, psi_r, initial_suction, soil_unit_weight, soil_phi, soil_phi_b, soil_c, veg_areal_weight, root_c_base, root_c_side, root_depth, root_vZ_alpha2, root_vZ_beta2, root_vZ_RR_max, root_DB_gamma, root_DB_alpha1, root_DB_beta1, root_DB_DBH, root_DB_d_tri, root_DB_alpha2, root_DB_beta2))
-				# unique_slip_surface_i, DEM_grid_num, DEM_surface, DEM_soil_thickness, dip_base, aspect_base, DEM_gwt_z, DEM_wetting_front_z, DEM_psi_r, DEM_initial_suction, DEM_soil_unit_weight, DEM_soil_phi, DEM_soil_phi_b, DEM_soil_c, DEM_veg_areal_weight, DEM_root_c_base, DEM_root_c_side, DEM_root_depth, DEM_root_vZ_alpha2, DEM_root_vZ_beta2, DEM_root_vZ_RR_max, root_DB_gamma, root_DB_alpha1, root_DB_beta1, root_DB_DBH, root_DB_d_tri, root_DB_alpha2, root_DB_beta2
+	Returns
+	-------
+	largest_cluster_area : float
+		Area of the largest cluster.
+	largest_cluster_volume : float
+		Volume of the largest cluster.
+	largest_cluster_max_depth : float
+		Maximum failure depth of the largest cluster.
+	"""
+	cluster_size = cluster_tracker["size"][:cluster_tracker["label_num"]]
+	largest_cluster_size = int(cluster_size.max())
+	if largest_cluster_size == 0:
+		return 0, 0, 0
 
-			# generate all possible combinations of DEM cell groupings
-			pool_generate_3DTS_slip_stage2 = mp.Pool(cpu_num)
+	# same cluster as hoshen_kopelman when multiple clusters have the largest area - the first in raster order
+	largest_root_candidates = np.flatnonzero(cluster_size == largest_cluster_size)
+	largest_root = largest_root_candidates[np.argmin(cluster_tracker["first_cell"][largest_root_candidates])]
 
-			all_slip_surf_data = pool_generate_3DTS_slip_stage2.map(generate_3DTS_slip_groupings_mp_v4_00, generate_slip_surface_cell_input)   
-			# all_slip_surf_data 
+	row_min, row_max, col_min, col_max = cluster_tracker["bbox"][largest_root]
+	largest_cluster_mask = (find_3DTSP_cluster_root_array(cluster_tracker, cluster_tracker["labels"][row_min:row_max+1, col_min:col_max+1]) == largest_root)
 
-			pool_generate_3DTS_slip_stage2.close()
-			pool_generate_3DTS_slip_stage2.join()
+	largest_cluster_area = largest_cluster_size*deltaX*deltaY
+	largest_cluster_volume = float(cluster_tracker["volume"][largest_root]*deltaX*deltaY)
+	largest_cluster_max_depth = float(max(np.max(cluster_tracker["depth"][row_min:row_max+1, col_min:col_max+1][largest_cluster_mask]), 0))
 
-			#####################################
-			# generate all slip surface soil column data for 3D slope stability analysis
-			#####################################
-			compute_t_3DFS_input = []
-			for slip_data_temp in all_slip_surf_data:
+	return largest_cluster_area, largest_cluster_volume, largest_cluster_max_depth
 
-				try:
-					slip_data = slip_data_temp[:]
+###########################################################################
+## Monte Carlo iteration scheduler - iteration-level or cell-level parallelism
+###########################################################################
+def map_3DTSP_stage_MP(mp_function, mp_input, cpu_num):
+	"""Map a per-cell or per-slip-surface function over its inputs.
 
-					# critical_depth_3D_FS_MP_input
-					# 0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2
-					
-					# 28iteration_max, 29min_FS_diff, 30deltaX, 31deltaY, 32dz, 33gamma_w, 34FS_crit, 35correctFS_bool, 36FS_3D_apply_side, 37FS_3D_apply_root
-					slip_data.extend( [FS_3D_iter_limit, FS_3D_tol, deltaX, deltaY, dz, gamma_w, FS_crit, True, FS_3D_apply_side, FS_3D_apply_root] )
-					
-					# DEM root model - use the most frequent root strength model
-					DEM_root_model_mode = int(mode([ root_model[i, j] for (i, j) in slip_data[0][:] ])[0])
+	When cpu_num > 1 a multiprocessing pool is used (cell-level parallelism), otherwise the inputs
+	are computed serially in the current process. The serial branch is used when several Monte Carlo
+	iterations already run concurrently in their own processes (iteration-level parallelism).
 
-					# 38DEM_root_model, 39dz_dp, 40press_dp
-					slip_data.extend( [DEM_root_model_mode, dz_dp, press_dp] )
-					
-					# store multiprocessing inputs
-					compute_t_3DFS_input.append(tuple(slip_data))
-					del slip_data
+	Parameters
+	----------
+	mp_function : callable
+		Function applied to each input tuple.
+	mp_input : list
+		List of input tuples.
+	cpu_num : int
+		Number of processes used for the stage.
 
-				except:  # skip if something is not correctly generated
-					pass 
+	Returns
+	-------
+	list
+		Output of mp_function for each input tuple, in the same order as mp_input.
+	"""
+	if cpu_num <= 1:
+		return list(map(mp_function, mp_input))
 
-		#############################
-		## Physically-based slope stability at time step = starting time step
-		#############################
-		if FS_3D_analysis is not None: 
+	pool_stage = mp.Pool(cpu_num)
+	mp_output = pool_stage.map(mp_function, mp_input)
+	pool_stage.close()
+	pool_stage.join()
 
-			### cell 3D slope stability
-			if FS_3D_analysis:
+	return mp_output
 
-				###################
-				## update water-related information and perform slope stability analysis for each generated slip surface
-				###################
-				# multiprocessing analysis
-				pool_1DGA_3DFS_t = mp.Pool(cpu_num)
+def screen_3DTSP_slip_surfaces_MP(compute_t_3DFS_input, FS_screen, bedrock_surface, DEM_surface, soil_phi, soil_phi_b, soil_c, soil_unit_weight, dip_base_deg, gwt_z, wet_z, initial_suction, psi_r, FS_crit, gamma_w, dz, dz_dp, press_dp, cpu_num):
+	"""Perform the 3D slope stability analysis of the slip surfaces, skipping the slip surfaces that cannot fail.
 
-				t_output_failSoil_critFS = pool_1DGA_3DFS_t.map(critical_depth_group_3D_FS_HungrJanbu_MP_v10_00, compute_t_3DFS_input)   # Hungr 1989 + side resistance + root resistance
-				# index = slip surface ID number
-				# failure_soil_thickness_per_DEM_cell, min_comp_FS for each generated slip surface
+	The infinite slope factor of safety without side and root resistance (critical_depth_inf_FS_MP) of the DEM cells 
+	is used as a cheap screening bound of the 3D factor of safety. The slip surfaces whose DEM cells all have an 
+	infinite slope factor of safety >= FS_screen are not analysed with critical_depth_group_3D_FS_HungrJanbu_MP_v10_00. 
+	Skipped slip surfaces are given an infinite factor of safety, so that they are left out of the minimum factor of 
+	safety of the DEM cells; only the DEM cells without any analysed slip surface take the screening bound (the smallest 
+	infinite slope factor of safety of the DEM cells of their skipped slip surfaces), without failure depth.
 
-				pool_1DGA_3DFS_t.close()
-				pool_1DGA_3DFS_t.join()
+	Parameters
+	----------
+	compute_t_3DFS_input : list
+		Inputs of critical_depth_group_3D_FS_HungrJanbu_MP_v10_00 for each slip surface.
+	FS_screen : float
+		Factor of safety from which the slip surface is skipped (FS_crit + screening margin).
+	bedrock_surface, DEM_surface, soil_phi, soil_phi_b, soil_c, soil_unit_weight, dip_base_deg, gwt_z, wet_z, initial_suction, psi_r : numpy array
+		Inputs of critical_depth_inf_FS_MP at each DEM cell.
+	FS_crit, gamma_w, dz, dz_dp, press_dp : float or int
+		Inputs of critical_depth_inf_FS_MP.
+	cpu_num : int
+		Number of processes used for the stage (see map_3DTSP_stage_MP).
 
-				###################
-				## critical FS per each cell 
-				###################
-				min_comp_FS = np.ones(DEM_surface.shape)*9999 		  # for noData -> 9999
-				failure_soil_thickness = np.zeros(DEM_surface.shape)
-	
-				for ((failure_soil_thickness_per_DEM_cell, min_comp_FS_comp), slip_data) in zip(t_output_failSoil_critFS, compute_t_3DFS_input):
-					for idx,(t_y_row, t_x_col) in enumerate(slip_data[0]):
+	Returns
+	-------
+	list
+		Output of critical_depth_group_3D_FS_HungrJanbu_MP_v10_00 for each slip surface, in the order of compute_t_3DFS_input.
+		Skipped slip surfaces have zero failure depth and infinite factor of safety.
+	int
+		Number of skipped slip surfaces.
+	numpy array
+		Screening bound of the factor of safety at the DEM cells of the skipped slip surfaces (NaN at the other DEM cells).
+	"""
+	# DEM cells of all slip surfaces
+	screen_cell_set = set()
+	for slip_data in compute_t_3DFS_input:
+		screen_cell_set.update((t_y_row, t_x_col) for (t_y_row, t_x_col) in slip_data[0])
+
+	# i, j, z_b, z_t, phi, phi_b, c, gamma_s, alpha, gw_z, front_z, psi_i, psi_r, FS_crit, gamma_w, dz, check_only, dz_dp, press_dp = critical_depth_inf_FS_MP_input
+	compute_t_inf_slope_input = [(i, j, bedrock_surface[i,j], DEM_surface[i,j], soil_phi[i,j], soil_phi_b[i,j], soil_c[i,j], soil_unit_weight[i,j], dip_base_deg[i,j], gwt_z[i,j], wet_z[i,j], initial_suction[i,j], psi_r[i,j], FS_crit, gamma_w, dz, False, dz_dp, press_dp) for (i, j) in sorted(screen_cell_set)]
+
+	# infinite slope factor of safety of each DEM cell (max = 10)
+	screen_FS = np.ones(DEM_surface.shape)*10
+	for (i, j, _, min_FSi) in map_3DTSP_stage_MP(critical_depth_inf_FS_MP, compute_t_inf_slope_input, cpu_num):
+		screen_FS[i, j] = min(min_FSi, 10)
+
+	# skip the slip surfaces with all DEM cells above FS_screen
+	t_output_failSoil_critFS = [None]*len(compute_t_3DFS_input)
+	skipped_FS = np.full(DEM_surface.shape, np.nan)
+	compute_slip_idx_list = []
+	for slip_idx, slip_data in enumerate(compute_t_3DFS_input):
+		slip_screen_FS = min(screen_FS[t_y_row, t_x_col] for (t_y_row, t_x_col) in slip_data[0])
+		if slip_screen_FS >= FS_screen:
+			t_output_failSoil_critFS[slip_idx] = ([0.0]*len(slip_data[0]), np.inf)
+			for (t_y_row, t_x_col) in slip_data[0]:
+				skipped_FS[t_y_row, t_x_col] = np.fmin(skipped_FS[t_y_row, t_x_col], slip_screen_FS)
+		else:
+			compute_slip_idx_list.append(slip_idx)
+
+	# 3D slope stability analysis of the remaining slip surfaces
+	compute_t_3DFS_output = map_3DTSP_stage_MP(critical_depth_group_3D_FS_HungrJanbu_MP_v10_00, [compute_t_3DFS_input[slip_idx] for slip_idx in compute_slip_idx_list], cpu_num)
+	for slip_idx, slip_output in zip(compute_slip_idx_list, compute_t_3DFS_output):
+		t_output_failSoil_critFS[slip_idx] = slip_output
+
+	return t_output_failSoil_critFS, len(compute_t_3DFS_input) - len(compute_slip_idx_list), skipped_FS
+
+def select_3DTSP_parallel_scheme(active_cell_num, remaining_iteration_num, cpu_num, parallel_mode="cell", min_cells_per_cpu=50000):
+	"""Decide how the available CPUs are split between concurrent Monte Carlo iterations and the cells of each iteration.
+
+	Every stage of an iteration (Green-Ampt, slope stability) creates a new multiprocessing pool per time step. 
+	For small and medium grids the pool overhead dominates the computation, so it is faster to run 
+	several iterations concurrently with fewer (or one) CPUs each.
+
+	Parameters
+	----------
+	active_cell_num : int
+		Number of DEM cells (or slip surfaces for 3D analysis) computed at each time step.
+	remaining_iteration_num : int
+		Number of Monte Carlo iterations that still need to be computed.
+	cpu_num : int
+		Total number of CPUs available.
+	parallel_mode : str, optional
+		"cell" - run iterations one after another with all CPUs used at cell-level (original scheme, default)
+		"auto" - select from the grid size, iteration count and cpu_num
+		"iteration" - run as many iterations concurrently as CPUs, each computed serially
+	min_cells_per_cpu : int, optional
+		Minimum number of cells assigned to each CPU before cell-level parallelism becomes worthwhile ("auto" mode).
+
+	Returns
+	-------
+	tuple
+		(number of concurrent iterations, number of CPUs used by each iteration)
+	"""
+	cpu_num = max(int(cpu_num), 1)
+	remaining_iteration_num = max(int(remaining_iteration_num), 1)
+
+	if parallel_mode == "cell" or remaining_iteration_num == 1 or cpu_num == 1:
+		return 1, cpu_num
+
+	elif parallel_mode == "iteration":
+		iter_parallel_num = min(cpu_num, remaining_iteration_num)
+		return iter_parallel_num, max(cpu_num//iter_parallel_num, 1)
+
+	elif parallel_mode == "auto":
+		# CPUs that a single iteration can use efficiently at cell-level
+		cpu_num_per_iter = int(np.clip(np.ceil(active_cell_num/max(min_cells_per_cpu, 1)), 1, cpu_num))
+
+		# remaining CPUs are used to run iterations concurrently
+		iter_parallel_num = min(max(cpu_num//cpu_num_per_iter, 1), remaining_iteration_num)
+
+		# redistribute any idle CPUs when there are fewer iterations left than available slots
+		cpu_num_per_iter = max(cpu_num//iter_parallel_num, 1)
+
+		return iter_parallel_num, cpu_num_per_iter
+
+	else:
+		print(f"parallel_iteration_mode '{parallel_mode}' is not recognized. Options: 'auto', 'cell', 'iteration'. The 'cell' option is used.")
+		return 1, cpu_num
+
+def check_3DTSP_iteration_completed(filename_dict):
+	"""Check if the Monte Carlo iteration has computed the slope stability for every time step.
+
+	Parameters
+	----------
+	filename_dict : dict
+		Filename dictionary of a single Monte Carlo iteration.
+
+	Returns
+	-------
+	bool
+		True if the iteration is completed.
+	"""
+	if ("min_FS" in filename_dict.keys()) and ((len(filename_dict["intensity"]) == len(filename_dict["min_FS"]) == len(filename_dict["gwt_z"])) or ((len(filename_dict["intensity"]) <= len(filename_dict["min_FS"])) and (len(filename_dict["intensity"]) <= len(filename_dict["gwt_z"])) and (len(filename_dict["min_FS"]) == len(filename_dict["gwt_z"])))):
+		return True
+	return False
+
+def export_3DTSP_results_JSON(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num=None):
+	"""Export the results filename dictionary to JSON file to keep track of the simulation.
+
+	Parameters
+	----------
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the input and result filenames for each Monte Carlo iteration.
+	results_JSON_path : str
+		JSON file path and name.
+	iter_num : int or str, optional
+		If specified, only the dictionary of the given Monte Carlo iteration is exported.
+		Used by the iteration-level parallel scheme so that each process writes its own file.
+	"""
+	if iter_num is None:
+		export_dict = monte_carlo_iter_result_filename_dict
+	else:
+		export_dict = {"iteration": str(iter_num), "results": monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]}
+
+	# write to temporary file and rename to avoid leaving incomplete JSON file when the process is stopped during writing
+	with open(f"{results_JSON_path}.tmp", 'w') as f:
+		json.dump(export_dict, f, indent=4, cls=json_serialize)
+	os.replace(f"{results_JSON_path}.tmp", results_JSON_path)
+
+def merge_3DTSP_iteration_results_JSON(monte_carlo_iter_result_filename_dict, iteration_JSON_path):
+	"""Merge the results JSON file exported by a single Monte Carlo iteration into the results filename dictionary.
+
+	Parameters
+	----------
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the input and result filenames for each Monte Carlo iteration.
+	iteration_JSON_path : str
+		JSON file path and name exported with export_3DTSP_results_JSON(..., iter_num=iter_num). 
+		Its journal file (".jsonl") is also replayed if it exists.
+
+	Returns
+	-------
+	dict
+		monte_carlo_iter_result_filename_dict updated with the results of the iteration.
+	"""
+	if os.path.exists(iteration_JSON_path):
+		with open(iteration_JSON_path, 'r') as f:
+			iteration_result_dict = json.load(f)
+
+		monte_carlo_iter_result_filename_dict["iterations"][str(iteration_result_dict["iteration"])] = iteration_result_dict["results"]
+
+	# time steps completed after the iteration JSON file was last exported
+	monte_carlo_iter_result_filename_dict = replay_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, f"{os.path.splitext(iteration_JSON_path)[0]}.jsonl")
+
+	return monte_carlo_iter_result_filename_dict
+
+def append_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num, time_step, iteration_only_JSON=False, compaction_interval=50):
+	"""Append the results of a completed time step to the journal file of the results JSON file.
+
+	Only the new results filenames of the time step are written as a single line to the journal ("{results_JSON_path without .json}.jsonl"),
+	instead of rewriting the whole results filename dictionary every time step. Every compaction_interval time steps, 
+	the results JSON file is exported and the journal is cleared (see compact_3DTSP_results_journal).
+
+	Parameters
+	----------
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the input and result filenames for each Monte Carlo iteration.
+	results_JSON_path : str
+		JSON file path and name.
+	iter_num : int or str
+		Monte Carlo iteration number.
+	time_step : int or str
+		Completed time step.
+	iteration_only_JSON : bool, optional
+		If True, only the results of the given iteration are exported to results_JSON_path when compacting.
+	compaction_interval : int, optional
+		Number of time steps between exporting the results JSON file. If None or zero, the journal is never compacted.
+	"""
+	iteration_dict = monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]
+	journal_entry = {
+		"iteration": str(iter_num),
+		"time_step": str(time_step),
+		"results": {var_name: var_dict[str(time_step)] for var_name, var_dict in iteration_dict.items() if isinstance(var_dict, dict) and str(time_step) in var_dict.keys()}
+	}
+
+	# a single line per time step - a line partially written when the process is stopped is ignored when replaying
+	with open(f"{os.path.splitext(results_JSON_path)[0]}.jsonl", 'a') as f:
+		f.write(json.dumps(journal_entry, cls=json_serialize)+"\n")
+
+	if compaction_interval and int(time_step) % compaction_interval == 0:
+		compact_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num=(iter_num if iteration_only_JSON else None))
+
+def compact_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num=None):
+	"""Export the results JSON file and remove its journal file.
+
+	Parameters
+	----------
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the input and result filenames for each Monte Carlo iteration.
+	results_JSON_path : str
+		JSON file path and name.
+	iter_num : int or str, optional
+		If specified, only the dictionary of the given Monte Carlo iteration is exported.
+	"""
+	export_3DTSP_results_JSON(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num=iter_num)
+
+	# the journal replayed on top of the exported JSON file gives the same results, so stopping before the removal is safe
+	journal_path = f"{os.path.splitext(results_JSON_path)[0]}.jsonl"
+	if os.path.exists(journal_path):
+		os.remove(journal_path)
+
+def replay_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, journal_path, verbose=False):
+	"""Add the results filenames recorded in the journal file to the results filename dictionary.
+
+	Parameters
+	----------
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the input and result filenames for each Monte Carlo iteration; 
+		loaded from the results JSON file exported before the journal was started.
+	journal_path : str
+		Journal file path and name written by append_3DTSP_results_journal.
+	verbose : bool, optional
+		If True, the number of replayed time steps is printed. Defaults to False, 
+		as the journal of every iteration is replayed when the results of the iterations are merged.
+
+	Returns
+	-------
+	dict
+		monte_carlo_iter_result_filename_dict updated with the time steps recorded in the journal.
+	"""
+	if not os.path.exists(journal_path):
+		return monte_carlo_iter_result_filename_dict
+
+	replay_count = 0
+	with open(journal_path, 'r') as f:
+		for journal_line in f:
+			try:
+				journal_entry = json.loads(journal_line)
+			except json.JSONDecodeError:
+				# line partially written when the process was stopped
+				break
+
+			iteration_dict = monte_carlo_iter_result_filename_dict["iterations"][journal_entry["iteration"]]
+			for var_name, var_results in journal_entry["results"].items():
+				if var_name not in iteration_dict.keys():
+					iteration_dict[var_name] = {}
+				iteration_dict[var_name][journal_entry["time_step"]] = var_results
+			replay_count += 1
+
+	if verbose:
+		print(f"Replayed {replay_count} time step(s) from the results journal file {journal_path}\n")
+
+	return monte_carlo_iter_result_filename_dict
+
+def claim_3DTSP_iteration_shard(shard_folder_path, iter_num, worker_id, lock_timeout, iteration_JSON_path):
+	"""Claim a Monte Carlo iteration for the sharded execution by creating its lock file.
+
+	The lock file is created with O_CREAT | O_EXCL, which is atomic on a shared file system, so that
+	each iteration is computed by a single worker. If the worker holding the lock has not exported 
+	any progress (iteration JSON and journal files) for longer than lock_timeout, the lock is taken over by an atomic rename.
+
+	Parameters
+	----------
+	shard_folder_path : str
+		Folder shared by all workers to store the lock and completion files.
+	iter_num : str
+		Monte Carlo iteration number.
+	worker_id : str
+		Unique name of the worker (host name and process ID).
+	lock_timeout : float or None
+		Time (in seconds) without progress after which the lock of another worker is considered stale. If None, locks are never taken over.
+	iteration_JSON_path : str
+		Results JSON file of the iteration; its journal file is updated every time step by the worker computing the iteration.
+
+	Returns
+	-------
+	bool
+		True if the iteration is claimed by this worker.
+	"""
+	lock_path = f"{shard_folder_path}iteration_{iter_num}.lock"
+	done_path = f"{shard_folder_path}iteration_{iter_num}.done"
+
+	if os.path.exists(done_path):
+		return False
+
+	try:
+		lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+
+	except FileExistsError:
+		# claimed by other worker - check whether the worker stopped making progress 
+		if lock_timeout is None:
+			return False
+
+		try:
+			last_progress_time = os.path.getmtime(lock_path)
+		except FileNotFoundError:
+			return False
+		for progress_path in [iteration_JSON_path, f"{os.path.splitext(iteration_JSON_path)[0]}.jsonl"]:
+			if os.path.exists(progress_path):
+				last_progress_time = max(last_progress_time, os.path.getmtime(progress_path))
+
+		if time.time() - last_progress_time < lock_timeout:
+			return False
+
+		# only a single worker can rename the stale lock file
+		stale_lock_path = f"{lock_path}.stale.{worker_id}"
+		try:
+			os.rename(lock_path, stale_lock_path)
+		except OSError:
+			return False
+
+		# another worker re-claimed the iteration between the check and the rename - give back the lock
+		if time.time() - os.path.getmtime(stale_lock_path) < lock_timeout:
+			os.rename(stale_lock_path, lock_path)
+			return False
+
+		try:
+			lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+		except FileExistsError:
+			return False
+
+		print(f"Worker {worker_id} took over Monte Carlo iteration {iter_num} from a stale lock.\n")
+
+	with os.fdopen(lock_fd, 'w') as f:
+		json.dump({"worker_id": worker_id, "host": socket.gethostname(), "pid": os.getpid(), "claim_time": time.time()}, f)
+
+	return True
+
+def complete_3DTSP_iteration_shard(shard_folder_path, iter_num, worker_id):
+	"""Mark the Monte Carlo iteration as completed for the sharded execution.
+
+	Parameters
+	----------
+	shard_folder_path : str
+		Folder shared by all workers to store the lock and completion files.
+	iter_num : str
+		Monte Carlo iteration number.
+	worker_id : str
+		Unique name of the worker (host name and process ID).
+	"""
+	# write to temporary file and rename to avoid other workers reading incomplete file
+	done_path = f"{shard_folder_path}iteration_{iter_num}.done"
+	with open(f"{done_path}.{worker_id}.tmp", 'w') as f:
+		json.dump({"worker_id": worker_id, "complete_time": time.time()}, f)
+	os.replace(f"{done_path}.{worker_id}.tmp", done_path)
+
+def merge_3DTSP_shard_results(monte_carlo_iter_result_filename_dict, monte_carlo_iter_filename_dict, shard_folder_path, worker_id, output_folder_path, filename):
+	"""Merge the iteration results JSON files of all sharded workers into a single results filename dictionary.
+
+	Only performed when all Monte Carlo iterations are completed and by a single worker at a time (merge lock file).
+	The merged dictionary is exported to "all_input_results.json" and used for run_probabilistic_results_v2_00.
+
+	Parameters
+	----------
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the result filenames of the iterations computed by this worker.
+	monte_carlo_iter_filename_dict : dict
+		Dictionary containing the input filenames for each Monte Carlo iteration.
+	shard_folder_path : str
+		Folder shared by all workers to store the lock and completion files.
+	worker_id : str
+		Unique name of the worker (host name and process ID).
+	output_folder_path : str
+		Output folder path.
+	filename : str
+		Project filename.
+
+	Returns
+	-------
+	dict or None
+		Merged results filename dictionary. None if other workers are still computing or merging.
+	"""
+	# check if all iterations are completed by any of the workers
+	incomplete_iter_num_list = []
+	for iter_num, filename_dict in monte_carlo_iter_filename_dict["iterations"].items():
+		if check_3DTSP_iteration_completed(filename_dict):
+			continue
+		if not os.path.exists(f"{shard_folder_path}iteration_{iter_num}.done"):
+			incomplete_iter_num_list.append(iter_num)
+
+	if incomplete_iter_num_list:
+		print(f"Worker {worker_id} has no more Monte Carlo iterations to claim. {len(incomplete_iter_num_list)} iteration(s) are still computed by other workers; the last worker to finish merges the results.\n")
+		return None
+
+	# only a single worker merges at a time
+	merge_lock_path = f"{shard_folder_path}merge.lock"
+	try:
+		merge_lock_fd = os.open(merge_lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+	except FileExistsError:
+		print("The results of Monte Carlo iterations are merged by another worker.\n")
+		return None
+
+	try:
+		with os.fdopen(merge_lock_fd, 'w') as f:
+			f.write(worker_id)
+
+		for iter_num in monte_carlo_iter_filename_dict["iterations"].keys():
+			iteration_JSON_path = f"{output_folder_path}iteration_{iter_num}/{filename} - results - i{iter_num}.json"
+			monte_carlo_iter_result_filename_dict = merge_3DTSP_iteration_results_JSON(monte_carlo_iter_result_filename_dict, iteration_JSON_path)
+
+		export_3DTSP_results_JSON(monte_carlo_iter_result_filename_dict, f"{output_folder_path}{filename} - all_input_results.json")
+
+	finally:
+		os.remove(merge_lock_path)
+
+	print(f"Worker {worker_id} merged the results of all Monte Carlo iterations.\n")
+
+	return monte_carlo_iter_result_filename_dict
+
+###########################################################################
+## online probabilistic statistics - accumulated while Monte Carlo iterations are computed
+###########################################################################
+def generate_3DTSP_online_statistics(grid_shape, FS_thresholds):
+	"""Generate empty running statistics of the Monte Carlo iterations for a single time step.
+
+	Parameters
+	----------
+	grid_shape : tuple
+		Shape of the DEM grid (rows, columns).
+	FS_thresholds : list
+		Factor of safety thresholds used to count the iterations with min_FS below each threshold.
+
+	Returns
+	-------
+	dict
+		Running statistics:
+			"iterations" - Monte Carlo iteration numbers already added
+			"FS_thresholds" - factor of safety thresholds
+			"landslide_count", "debris_flow_count" - number of iterations with landslide or debris-flow source at each DEM cell
+			"FS_count" - number of iterations with computed min_FS (min_FS >= 0) at each DEM cell
+			"min_FS_mean", "min_FS_M2", "crit_FS_z_mean", "crit_FS_z_M2" - running mean and sum of squared deviation (Welford's algorithm)
+			"FS_below_count" - number of iterations with min_FS < FS_thresholds[k] at each DEM cell - shape (len(FS_thresholds), rows, columns)
+			"landslide_weight", "debris_flow_weight", "FS_below_weight" - sum of the importance sampling weights of the counted iterations
+			"landslide_weight_sq", "debris_flow_weight_sq" - sum of the squared weights (variance of the probability)
+	"""
+	return {
+		"iterations": np.zeros(0, dtype=int),
+		"FS_thresholds": np.array(FS_thresholds, dtype=float),
+		"landslide_count": np.zeros(grid_shape, dtype=np.int32),
+		"debris_flow_count": np.zeros(grid_shape, dtype=np.int32),
+		"FS_count": np.zeros(grid_shape, dtype=np.int32),
+		"min_FS_mean": np.zeros(grid_shape, dtype=float),
+		"min_FS_M2": np.zeros(grid_shape, dtype=float),
+		"crit_FS_z_mean": np.zeros(grid_shape, dtype=float),
+		"crit_FS_z_M2": np.zeros(grid_shape, dtype=float),
+		"FS_below_count": np.zeros((len(FS_thresholds),)+tuple(grid_shape), dtype=np.int32),
+		"landslide_weight": np.zeros(grid_shape, dtype=float),
+		"landslide_weight_sq": np.zeros(grid_shape, dtype=float),
+		"debris_flow_weight": np.zeros(grid_shape, dtype=float),
+		"debris_flow_weight_sq": np.zeros(grid_shape, dtype=float),
+		"FS_below_weight": np.zeros((len(FS_thresholds),)+tuple(grid_shape), dtype=float)
+	}
+
+def add_3DTSP_online_statistics(online_statistics, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, weight=1.0):
+	"""Add the slope stability results of a single Monte Carlo iteration to the running statistics.
+
+	Parameters
+	----------
+	online_statistics : dict
+		Running statistics (see generate_3DTSP_online_statistics); updated in place.
+	iter_num : int or str
+		Monte Carlo iteration number.
+	min_comp_FS : numpy array
+		Minimum factor of safety at each DEM cell (-1 if not computed).
+	failure_soil_thickness : numpy array
+		Failure depth (crit_FS_z) at each DEM cell.
+	landslide_source : numpy array
+		Landslide source (1) at each DEM cell.
+	debris_flow_source : numpy array
+		Debris-flow source (1) at each DEM cell.
+	weight : float, optional
+		Importance sampling weight (likelihood ratio) of the iteration; 1 without importance sampling.
+
+	Returns
+	-------
+	bool
+		False if the iteration was already added, e.g. a time step recomputed when restarting the simulation.
+	"""
+	if int(iter_num) in online_statistics["iterations"]:
+		return False
+
+	online_statistics["iterations"] = np.append(online_statistics["iterations"], int(iter_num))
+	online_statistics["landslide_count"] += (landslide_source == 1)
+	online_statistics["debris_flow_count"] += (debris_flow_source == 1)
+	online_statistics["landslide_weight"] += weight*(landslide_source == 1)
+	online_statistics["landslide_weight_sq"] += weight**2*(landslide_source == 1)
+	online_statistics["debris_flow_weight"] += weight*(debris_flow_source == 1)
+	online_statistics["debris_flow_weight_sq"] += weight**2*(debris_flow_source == 1)
+
+	# running mean and variance of the DEM cells with computed FS
+	valid_FS = (min_comp_FS >= 0)
+	online_statistics["FS_count"][valid_FS] += 1
+	valid_FS_count = online_statistics["FS_count"][valid_FS]
+	for stat_name, stat_value in [("min_FS", min_comp_FS), ("crit_FS_z", failure_soil_thickness)]:
+		delta = stat_value[valid_FS] - online_statistics[f"{stat_name}_mean"][valid_FS]
+		online_statistics[f"{stat_name}_mean"][valid_FS] += delta/valid_FS_count
+		online_statistics[f"{stat_name}_M2"][valid_FS] += delta*(stat_value[valid_FS] - online_statistics[f"{stat_name}_mean"][valid_FS])
+
+	for thres_idx, FS_thres in enumerate(online_statistics["FS_thresholds"]):
+		online_statistics["FS_below_count"][thres_idx] += (valid_FS & (min_comp_FS < FS_thres))
+		online_statistics["FS_below_weight"][thres_idx] += weight*(valid_FS & (min_comp_FS < FS_thres))
+
+	return True
+
+def merge_3DTSP_online_statistics(online_statistics, added_statistics):
+	"""Merge the running statistics of other Monte Carlo iterations, e.g. accumulated by another worker, into the running statistics.
+
+	The running mean and sum of squared deviation are combined with the parallel form of Welford's algorithm (Chan et al.).
+
+	Parameters
+	----------
+	online_statistics : dict
+		Running statistics (see generate_3DTSP_online_statistics); updated in place.
+	added_statistics : dict
+		Running statistics of other Monte Carlo iterations with the same FS thresholds.
+	"""
+	online_statistics["iterations"] = np.append(online_statistics["iterations"], added_statistics["iterations"]).astype(int)
+	for stat_name in ["landslide_count", "debris_flow_count", "FS_below_count", "landslide_weight", "landslide_weight_sq", "debris_flow_weight", "debris_flow_weight_sq", "FS_below_weight"]:
+		online_statistics[stat_name] += added_statistics[stat_name]
+
+	FS_count_a = online_statistics["FS_count"].astype(float)
+	FS_count_b = added_statistics["FS_count"].astype(float)
+	FS_count_total = np.maximum(FS_count_a + FS_count_b, 1)
+	for stat_name in ["min_FS", "crit_FS_z"]:
+		delta = added_statistics[f"{stat_name}_mean"] - online_statistics[f"{stat_name}_mean"]
+		online_statistics[f"{stat_name}_M2"] += added_statistics[f"{stat_name}_M2"] + delta**2*FS_count_a*FS_count_b/FS_count_total
+		online_statistics[f"{stat_name}_mean"] += delta*FS_count_b/FS_count_total
+	online_statistics["FS_count"] += added_statistics["FS_count"]
+
+def generate_3DTSP_online_statistics_path(online_statistics_folder, filename, time_label, worker_id=None):
+	"""Return the NPZ file path and name of the running statistics of a time step.
+
+	Parameters
+	----------
+	online_statistics_folder : str
+		Folder of the running statistics ("{output_folder_path}probabilistic_results/online_statistics/").
+	filename : str
+		Name of the simulation.
+	time_label : str
+		Time step of the running statistics, e.g. "t5" or "final".
+	worker_id : str or None, optional
+		Worker accumulating the running statistics. If None, the running statistics merged from all workers.
+
+	Returns
+	-------
+	str
+		"{online_statistics_folder}{filename} - online_statistics - {time_label}.npz" if worker_id is None, otherwise
+		"{online_statistics_folder}{time_label}/{filename} - online_statistics - {time_label} - w{worker_id}.npz".
+	"""
+	if worker_id is None:
+		return f"{online_statistics_folder}{filename} - online_statistics - {time_label}.npz"
+	return f"{online_statistics_folder}{time_label}/{filename} - online_statistics - {time_label} - w{worker_id}.npz"
+
+def list_3DTSP_worker_online_statistics(online_statistics_folder, filename, time_label):
+	"""Return the NPZ files of the running statistics of a time step accumulated by each worker.
+
+	Parameters
+	----------
+	online_statistics_folder : str
+		Folder of the running statistics.
+	filename : str
+		Name of the simulation.
+	time_label : str
+		Time step of the running statistics, e.g. "t5" or "final".
+
+	Returns
+	-------
+	list
+		NPZ file paths and names, sorted by name.
+	"""
+	worker_statistics_folder = f"{online_statistics_folder}{time_label}/"
+	if not os.path.exists(worker_statistics_folder):
+		return []
+	worker_statistics_prefix = f"{filename} - online_statistics - {time_label} - w"
+	return [worker_statistics_folder+worker_statistics_file for worker_statistics_file in sorted(os.listdir(worker_statistics_folder)) if worker_statistics_file.startswith(worker_statistics_prefix) and worker_statistics_file.endswith(".npz")]
+
+def load_3DTSP_online_statistics(online_statistics_path):
+	"""Load the running statistics exported with save_3DTSP_online_statistics.
+
+	Parameters
+	----------
+	online_statistics_path : str
+		NPZ file path and name.
+
+	Returns
+	-------
+	dict or None
+		Running statistics. None if the file does not exist.
+	"""
+	if not os.path.exists(online_statistics_path):
+		return None
+
+	with np.load(online_statistics_path) as online_statistics_npz:
+		online_statistics = {key: online_statistics_npz[key] for key in online_statistics_npz.files}
+
+	# files exported before the importance sampling weights were added - all iterations have a weight of 1
+	for count_name, weight_name in [("landslide_count", "landslide_weight"), ("landslide_count", "landslide_weight_sq"), ("debris_flow_count", "debris_flow_weight"), ("debris_flow_count", "debris_flow_weight_sq"), ("FS_below_count", "FS_below_weight")]:
+		if weight_name not in online_statistics:
+			online_statistics[weight_name] = online_statistics[count_name].astype(float)
+
+	return online_statistics
+
+def save_3DTSP_online_statistics(online_statistics_path, online_statistics):
+	"""Export the running statistics to NPZ file.
+
+	The file is written to a temporary file and renamed, so that an incomplete file is not left when the process is 
+	stopped during writing and other processes reading the file always see a complete file.
+
+	Parameters
+	----------
+	online_statistics_path : str
+		NPZ file path and name.
+	online_statistics : dict
+		Running statistics.
+	"""
+	online_statistics_temp_path = f"{online_statistics_path}.{socket.gethostname()}_{os.getpid()}.tmp"
+	with open(online_statistics_temp_path, 'wb') as f:
+		np.savez(f, **online_statistics)
+	os.replace(online_statistics_temp_path, online_statistics_path)
+
+def load_3DTSP_merged_online_statistics(online_statistics_folder, filename, time_label):
+	"""Load the running statistics of a time step and merge the running statistics accumulated by all workers into it.
+
+	Running statistics of a worker already merged (left when the process was stopped before removing them) are skipped.
+
+	Parameters
+	----------
+	online_statistics_folder : str
+		Folder of the running statistics.
+	filename : str
+		Name of the simulation.
+	time_label : str
+		Time step of the running statistics, e.g. "t5" or "final".
+
+	Returns
+	-------
+	online_statistics : dict or None
+		Running statistics of all workers. None if no running statistics are exported, or if an iteration is counted 
+		by more than one file (the running statistics are then computed again from the GIS files).
+	worker_statistics_path_list : list
+		NPZ files of the workers read.
+	"""
+	online_statistics = load_3DTSP_online_statistics(generate_3DTSP_online_statistics_path(online_statistics_folder, filename, time_label))
+	worker_statistics_path_list = list_3DTSP_worker_online_statistics(online_statistics_folder, filename, time_label)
+
+	for worker_statistics_path in worker_statistics_path_list:
+		worker_statistics = load_3DTSP_online_statistics(worker_statistics_path)
+		if worker_statistics is None:
+			continue
+		if online_statistics is None:
+			online_statistics = worker_statistics
+			continue
+		if not np.array_equal(online_statistics["FS_thresholds"], worker_statistics["FS_thresholds"]):
+			return None, worker_statistics_path_list
+
+		counted_iterations = np.isin(worker_statistics["iterations"], online_statistics["iterations"])
+		if np.all(counted_iterations):
+			continue
+		elif np.any(counted_iterations):
+			return None, worker_statistics_path_list
+		merge_3DTSP_online_statistics(online_statistics, worker_statistics)
+
+	return online_statistics, worker_statistics_path_list
+
+def update_3DTSP_online_statistics(online_statistics_folder, filename, time_label, worker_id, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, FS_thresholds, weight=1.0):
+	"""Add the slope stability results of a single Monte Carlo iteration to the running statistics of the worker.
+
+	Each worker (process computing Monte Carlo iterations one after another) accumulates its own NPZ file, so that 
+	concurrent iterations do not wait for each other and no lock file is needed; the files of all workers are merged 
+	once in collect_3DTSP_online_statistics. Iterations already counted in the running statistics of any worker are 
+	skipped, so that the time step recomputed when restarting the simulation is not counted twice.
+
+	Parameters
+	----------
+	online_statistics_folder : str
+		Folder of the running statistics.
+	filename : str
+		Name of the simulation.
+	time_label : str
+		Time step of the running statistics, e.g. "t5" or "final".
+	worker_id : str
+		Worker computing the iteration; only one iteration of a worker is computed at a time.
+	iter_num : int or str
+		Monte Carlo iteration number.
+	min_comp_FS : numpy array
+		Minimum factor of safety at each DEM cell (-1 if not computed).
+	failure_soil_thickness : numpy array
+		Failure depth (crit_FS_z) at each DEM cell.
+	landslide_source : numpy array
+		Landslide source (1) at each DEM cell.
+	debris_flow_source : numpy array
+		Debris-flow source (1) at each DEM cell.
+	FS_thresholds : list
+		Factor of safety thresholds; used when the NPZ file of the worker is first generated.
+	weight : float, optional
+		Importance sampling weight (likelihood ratio) of the iteration; 1 without importance sampling.
+	"""
+	online_statistics_path = generate_3DTSP_online_statistics_path(online_statistics_folder, filename, time_label, worker_id)
+
+	# an iteration is only computed by one worker at a time - the other files are from other iterations or stopped processes
+	for other_statistics_path in [generate_3DTSP_online_statistics_path(online_statistics_folder, filename, time_label)]+list_3DTSP_worker_online_statistics(online_statistics_folder, filename, time_label):
+		if other_statistics_path == online_statistics_path or not os.path.exists(other_statistics_path):
+			continue
+		with np.load(other_statistics_path) as other_statistics_npz:
+			if int(iter_num) in other_statistics_npz["iterations"]:
+				return
+
+	online_statistics = load_3DTSP_online_statistics(online_statistics_path)
+	if online_statistics is None:
+		os.makedirs(os.path.dirname(online_statistics_path), exist_ok=True)
+		online_statistics = generate_3DTSP_online_statistics(min_comp_FS.shape, FS_thresholds)
+
+	if add_3DTSP_online_statistics(online_statistics, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, weight):
+		save_3DTSP_online_statistics(online_statistics_path, online_statistics)
+
+def collect_3DTSP_online_statistics(online_statistics_folder, filename, time_label, monte_carlo_iter_result_filename_dict, time_step_list, FS_thresholds, grid_shape):
+	"""Merge the running statistics of all workers and add the iterations missing from it by reading their results GIS files.
+
+	Iterations are missing when the simulation was computed before the running statistics were exported, or
+	when the process was stopped after exporting the results of the final time step of the iteration. The running 
+	statistics are computed again from the GIS files when they include iterations after len(time_step_list), e.g. 
+	iterations completed out of order before the Monte Carlo simulation converged, so that only the iterations 
+	1, 2, ..., len(time_step_list) are counted.
+
+	The merged running statistics are exported to "{online_statistics_folder}{filename} - online_statistics - {time_label}.npz"
+	and the files of the workers are removed.
+
+	Parameters
+	----------
+	online_statistics_folder : str
+		Folder of the running statistics.
+	filename : str
+		Name of the simulation.
+	time_label : str
+		Time step of the running statistics, e.g. "t5" or "final".
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the input and result filenames for each Monte Carlo iteration.
+	time_step_list : list
+		Time step (int) of the results for each Monte Carlo iteration 1, 2, ..., monte_carlo_iteration_max.
+	FS_thresholds : list
+		Factor of safety thresholds.
+	grid_shape : tuple
+		Shape of the DEM grid (rows, columns).
+
+	Returns
+	-------
+	dict
+		Running statistics including all Monte Carlo iterations.
+	"""
+	online_statistics, worker_statistics_path_list = load_3DTSP_merged_online_statistics(online_statistics_folder, filename, time_label)
+
+	# FS thresholds changed after the running statistics were exported - compute again from the GIS files
+	if online_statistics is not None and not np.array_equal(online_statistics["FS_thresholds"], np.array(FS_thresholds, dtype=float)):
+		online_statistics = None
+	# iterations removed after the Monte Carlo simulation converged - compute again from the GIS files of the kept iterations
+	if online_statistics is not None and np.any((online_statistics["iterations"] < 1) | (online_statistics["iterations"] > len(time_step_list))):
+		online_statistics = None
+	if online_statistics is None:
+		online_statistics = generate_3DTSP_online_statistics(grid_shape, FS_thresholds)
+
+	for iter_idx, time_step in enumerate(time_step_list):
+		iter_num = iter_idx + 1
+		if iter_num in online_statistics["iterations"]:
+			continue
+
+		iter_result_dict = monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]
+		min_comp_FS, _, _ = read_GIS_data(iter_result_dict["min_FS"][str(time_step)][1], iter_result_dict["min_FS"][str(time_step)][0], full_output=False)
+		failure_soil_thickness, _, _ = read_GIS_data(iter_result_dict["crit_FS_z"][str(time_step)][1], iter_result_dict["crit_FS_z"][str(time_step)][0], full_output=False)
+		landslide_source, _, _ = read_GIS_data(iter_result_dict["landslide_source"][str(time_step)][1], iter_result_dict["landslide_source"][str(time_step)][0], full_output=False)
+		debris_flow_source, _, _ = read_GIS_data(iter_result_dict["debris_flow_source"][str(time_step)][1], iter_result_dict["debris_flow_source"][str(time_step)][0], full_output=False)
+
+		add_3DTSP_online_statistics(online_statistics, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, np.exp(iter_result_dict.get("sampling", {}).get("log_weight", 0.0)))
+
+	# export the merged running statistics before removing the files of the workers
+	save_3DTSP_online_statistics(generate_3DTSP_online_statistics_path(online_statistics_folder, filename, time_label), online_statistics)
+	for worker_statistics_path in worker_statistics_path_list:
+		os.remove(worker_statistics_path)
+	if os.path.exists(f"{online_statistics_folder}{time_label}/") and len(os.listdir(f"{online_statistics_folder}{time_label}/")) == 0:
+		os.rmdir(f"{online_statistics_folder}{time_label}/")
+
+	return online_statistics
+
+def check_3DTSP_monte_carlo_convergence(online_statistics_folder, filename, target_SE, cell_fraction, min_iteration):
+	"""Check if the probability of landslide at the final time step has converged over the Monte Carlo iterations.
+
+	The standard error of each DEM cell is computed with the adjusted (Agresti-Coull) probability (x+2)/(n+4), so that 
+	DEM cells without any landslide do not converge after a few iterations. Only DEM cells with computed FS are checked.
+
+	Parameters
+	----------
+	online_statistics_folder : str
+		Folder of the running statistics; the running statistics of all workers at the final time step are merged.
+	filename : str
+		Name of the simulation.
+	target_SE : float
+		Target standard error of the probability of landslide (0-1).
+	cell_fraction : float
+		Fraction of DEM cells that must reach target_SE.
+	min_iteration : int
+		Minimum number of completed Monte Carlo iterations.
+
+	Returns
+	-------
+	dict or None
+		Achieved precision:
+			"converged" - True if the probability of landslide has converged
+			"iterations" - number of completed Monte Carlo iterations
+			"target_SE", "cell_fraction" - convergence criteria
+			"converged_cell_fraction" - fraction of DEM cells with standard error <= target_SE
+			"max_SE", "mean_SE" - maximum and mean standard error of the DEM cells
+		None if no Monte Carlo iteration is completed.
+	"""
+	online_statistics, _ = load_3DTSP_merged_online_statistics(online_statistics_folder, filename, "final")
+	if online_statistics is None or len(online_statistics["iterations"]) == 0:
+		return None
+
+	iter_count = len(online_statistics["iterations"])
+	valid_cells = (online_statistics["FS_count"] > 0)
+	if not np.any(valid_cells):
+		return None
+
+	landslide_prob_adjusted = (online_statistics["landslide_count"][valid_cells] + 2.0)/(iter_count + 4.0)
+	landslide_prob_SE = np.sqrt(landslide_prob_adjusted*(1.0 - landslide_prob_adjusted)/(iter_count + 4.0))
+	converged_cell_fraction = float(np.mean(landslide_prob_SE <= target_SE))
+
+	return {
+		"converged": bool(iter_count >= min_iteration and converged_cell_fraction >= cell_fraction),
+		"iterations": int(iter_count),
+		"target_SE": float(target_SE),
+		"cell_fraction": float(cell_fraction),
+		"converged_cell_fraction": converged_cell_fraction,
+		"max_SE": float(np.max(landslide_prob_SE)),
+		"mean_SE": float(np.mean(landslide_prob_SE))
+	}
+
+###########################################################################
+## stage timing and resource instrumentation
+###########################################################################
+def generate_3DTSP_stage_metrics(metrics_folder, filename, iter_num=None, profile_stages=None):
+	"""Create the stage metrics tracker of a Monte Carlo iteration, or of the set-up shared by all iterations.
+
+	Each stage timed with start_3DTSP_stage and stop_3DTSP_stage is appended as a JSON line to
+	"{metrics_folder}{filename} - stage_metrics - i{iter_num}.jsonl" ("- setup.jsonl" when iter_num is None).
+
+	Parameters
+	----------
+	metrics_folder : str or None
+		Folder of the stage metrics files. If None, the stages are not recorded and None is returned.
+	filename : str
+		Project filename.
+	iter_num : str or int, optional
+		Monte Carlo iteration number. None for the set-up stages shared by all iterations.
+	profile_stages : list of str or str, optional
+		Stages profiled with cProfile ("all" for all stages). The profile of each stage is accumulated over the time steps and
+		saved to "{metrics_folder}profile/{filename} - {stage} - i{iter_num}.prof" (readable with pstats or snakeviz).
+
+	Returns
+	-------
+	dict or None
+		Stage metrics tracker.
+	"""
+	if metrics_folder is None:
+		return None
+
+	os.makedirs(metrics_folder, exist_ok=True)
+	iter_label = "setup" if iter_num is None else f"i{iter_num}"
+
+	if isinstance(profile_stages, str):
+		profile_stages = [profile_stages]
+	profile_stages = list(profile_stages or [])
+	if len(profile_stages) > 0:
+		os.makedirs(f"{metrics_folder}profile/", exist_ok=True)
+
+	return {
+		"metrics_path": f"{metrics_folder}{filename} - stage_metrics - {iter_label}.jsonl",
+		"profile_path": f"{metrics_folder}profile/{filename} - " + "{stage}" + f" - {iter_label}.prof",
+		"iteration": None if iter_num is None else str(iter_num),
+		"profile_stages": profile_stages,
+		"profilers": {},
+		"worker": f"{socket.gethostname()}_{os.getpid()}"
+	}
+
+def read_3DTSP_resource_usage():
+	"""Return the CPU time and peak resident set size of this process and of its terminated child processes.
+
+	The child processes (multiprocessing pool workers and concurrent Monte Carlo iterations) are counted once they are joined.
+	The peak resident set size is a high-water mark since the start of the process, not of a single stage.
+
+	Returns
+	-------
+	dict
+		"cpu_s" - CPU time of this process (s)
+		"cpu_children_s" - CPU time of the terminated child processes (s), None on Windows
+		"peak_rss_MB" - peak resident set size of this process (MB), None on Windows
+		"children_peak_rss_MB" - largest peak resident set size of the terminated child processes (MB), None on Windows
+	"""
+	resource_usage = {"cpu_s": time.process_time(), "cpu_children_s": None, "peak_rss_MB": None, "children_peak_rss_MB": None}
+	if resource is None:
+		return resource_usage
+
+	# ru_maxrss is in bytes on macOS and in kilobytes on Linux
+	rss_to_MB = 1/1024**2 if sys.platform == "darwin" else 1/1024
+	usage_self = resource.getrusage(resource.RUSAGE_SELF)
+	usage_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+	resource_usage["cpu_children_s"] = usage_children.ru_utime + usage_children.ru_stime
+	resource_usage["peak_rss_MB"] = usage_self.ru_maxrss*rss_to_MB
+	resource_usage["children_peak_rss_MB"] = usage_children.ru_maxrss*rss_to_MB
+
+	return resource_usage
+
+def start_3DTSP_stage(stage_metrics, stage, time_step=None):
+	"""Start timing a stage of the simulation.
+
+	Parameters
+	----------
+	stage_metrics : dict or None
+		Stage metrics tracker (see generate_3DTSP_stage_metrics). If None, nothing is recorded.
+	stage : str
+		Stage name, e.g. "read_inputs", "green_ampt", "slope_stability", "reduction", "write_outputs", "plots".
+	time_step : int, optional
+		Time step of the results computed by the stage.
+
+	Returns
+	-------
+	dict or None
+		Stage timer passed to stop_3DTSP_stage.
+	"""
+	if stage_metrics is None:
+		return None
+
+	stage_profiler = None
+	if stage in stage_metrics["profile_stages"] or "all" in stage_metrics["profile_stages"]:
+		import cProfile
+		stage_profiler = stage_metrics["profilers"].setdefault(stage, cProfile.Profile())
+		stage_profiler.enable()
+
+	return {
+		"stage": stage,
+		"time_step": time_step,
+		"wall_start": time.perf_counter(),
+		"resource_start": read_3DTSP_resource_usage(),
+		"profiler": stage_profiler
+	}
+
+def stop_3DTSP_stage(stage_metrics, stage_timer, item_num=None):
+	"""Stop timing a stage of the simulation and append its metrics to the stage metrics file.
+
+	Parameters
+	----------
+	stage_metrics : dict or None
+		Stage metrics tracker (see generate_3DTSP_stage_metrics). If None, nothing is recorded.
+	stage_timer : dict or None
+		Stage timer returned by start_3DTSP_stage.
+	item_num : int, optional
+		Number of items handled by the stage - DEM cells or slip surfaces computed, or DEM cells of the rasters read, written or plotted.
+	"""
+	if stage_metrics is None or stage_timer is None:
+		return
+
+	wall_time = time.perf_counter() - stage_timer["wall_start"]
+	resource_end = read_3DTSP_resource_usage()
+	resource_start = stage_timer["resource_start"]
+
+	if stage_timer["profiler"] is not None:
+		stage_timer["profiler"].disable()
+		stage_timer["profiler"].dump_stats(stage_metrics["profile_path"].format(stage=stage_timer["stage"]))
+
+	stage_record = {
+		"iteration": stage_metrics["iteration"],
+		"time_step": stage_timer["time_step"],
+		"stage": stage_timer["stage"],
+		"wall_s": wall_time,
+		"cpu_s": resource_end["cpu_s"] - resource_start["cpu_s"],
+		"cpu_children_s": None if resource_end["cpu_children_s"] is None else resource_end["cpu_children_s"] - resource_start["cpu_children_s"],
+		"peak_rss_MB": resource_end["peak_rss_MB"],
+		"children_peak_rss_MB": resource_end["children_peak_rss_MB"],
+		"items": None if item_num is None else int(item_num),
+		"worker": stage_metrics["worker"],
+		"time": time.time()
+	}
+
+	with open(stage_metrics["metrics_path"], "a") as f:
+		f.write(json.dumps(stage_record) + "\n")
+
+def summarize_3DTSP_stage_metrics(metrics_folder, filename):
+	"""Summarize the stage metrics of all Monte Carlo iterations and export "{filename} - stage_metrics_summary.json".
+
+	Parameters
+	----------
+	metrics_folder : str
+		Folder of the stage metrics files (see generate_3DTSP_stage_metrics).
+	filename : str
+		Project filename.
+
+	Returns
+	-------
+	dict or None
+		Totals of each stage over all time steps and iterations ("stages") and the wall time of each iteration ("iterations").
+		None if no stage is recorded.
+	"""
+	if not os.path.exists(metrics_folder):
+		return None
+
+	stage_summary = {}
+	iteration_wall_time = {}
+	for metrics_file in sorted(os.listdir(metrics_folder)):
+		if not (metrics_file.startswith(f"{filename} - stage_metrics - ") and metrics_file.endswith(".jsonl")):
+			continue
+		with open(f"{metrics_folder}{metrics_file}", "r") as f:
+			for line in f:
+				try:
+					stage_record = json.loads(line)
+				except ValueError:   # last line of a stopped process
+					continue
+
+				stage_total = stage_summary.setdefault(stage_record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "items": 0, "peak_rss_MB": None})
+				stage_total["calls"] += 1
+				stage_total["wall_s"] += stage_record["wall_s"]
+				stage_total["cpu_s"] += stage_record["cpu_s"] + (stage_record["cpu_children_s"] or 0.0)
+				stage_total["items"] += stage_record["items"] or 0
+				for rss_key in ["peak_rss_MB", "children_peak_rss_MB"]:
+					if stage_record[rss_key] is not None:
+						stage_total["peak_rss_MB"] = max(stage_total["peak_rss_MB"] or 0.0, stage_record[rss_key])
+
+				iter_label = "setup" if stage_record["iteration"] is None else stage_record["iteration"]
+				iteration_wall_time[iter_label] = iteration_wall_time.get(iter_label, 0.0) + stage_record["wall_s"]
+
+	if len(stage_summary) == 0:
+		return None
+
+	for stage_total in stage_summary.values():
+		stage_total["items_per_s"] = stage_total["items"]/stage_total["wall_s"] if stage_total["wall_s"] > 0 else None
+
+	stage_metrics_summary = {"stages": stage_summary, "iterations": iteration_wall_time}
+	with open(f"{metrics_folder}{filename} - stage_metrics_summary.json", "w") as f:
+		json.dump(stage_metrics_summary, f, indent=4)
+
+	# print the stages from the most time consuming
+	total_wall_time = sum(stage_total["wall_s"] for stage_total in stage_summary.values())
+	print(f"Stage metrics ({metrics_folder}):")
+	print(f"	{'stage':<24}{'calls':>8}{'wall (s)':>12}{'wall (%)':>10}{'CPU (s)':>12}{'items/s':>14}{'peak RSS (MB)':>16}")
+	for stage, stage_total in sorted(stage_summary.items(), key=lambda stage_item: -stage_item[1]["wall_s"]):
+		items_per_s = "-" if not stage_total["items_per_s"] else f"{stage_total['items_per_s']:,.0f}"
+		peak_rss = "-" if stage_total["peak_rss_MB"] is None else f"{stage_total['peak_rss_MB']:,.0f}"
+		print(f"	{stage:<24}{stage_total['calls']:>8}{stage_total['wall_s']:>12.2f}{100*stage_total['wall_s']/max(total_wall_time, 1e-12):>10.1f}{stage_total['cpu_s']:>12.2f}{items_per_s:>14}{peak_rss:>16}")
+	print("")
+
+	return stage_metrics_summary
+
+def perform_3DTSP_iteration_v2(iter_num, filename_dict, monte_carlo_iter_result_filename_dict, iteration_shared_data, cpu_num_iter, results_JSON_path, iteration_only_JSON=False, worker_id=None):
+	"""Run the combined infiltration and slope stability analysis for a single Monte Carlo iteration.
+
+	Parameters
+	----------
+	iter_num : str
+		Monte Carlo iteration number.
+	filename_dict : dict
+		Input filename dictionary of the Monte Carlo iteration.
+	monte_carlo_iter_result_filename_dict : dict
+		Dictionary containing the result filenames; updated in place for the given iteration.
+	iteration_shared_data : dict
+		Inputs, grid information and slip surface data shared by all Monte Carlo iterations (see perform_3DTSP_v2).
+	cpu_num_iter : int
+		Number of CPUs used for the cell-level multiprocessing within this iteration.
+	results_JSON_path : str
+		JSON file path and name to keep track of the simulation. The results of each time step are appended to 
+		its journal file and the JSON file is exported every "results_journal_compaction_interval" time steps.
+	iteration_only_JSON : bool, optional
+		If True, only the results of this iteration are exported to results_JSON_path.
+	worker_id : str or None, optional
+		Worker accumulating the running statistics of the iteration (see update_3DTSP_online_statistics); 
+		only one iteration of a worker is computed at a time. If None, "{hostname}_{process id}".
+
+	Returns
+	-------
+	dict
+		monte_carlo_iter_result_filename_dict with the results of the given iteration.
+	"""
+
+	from scipy.stats import mode
+
+	#####################################
+	## unpack data shared by all Monte Carlo iterations
+	#####################################
+	filename = iteration_shared_data["filename"]
+	output_folder_path = iteration_shared_data["output_folder_path"]
+	output_txt_format = iteration_shared_data["output_txt_format"]
+	plot_option = iteration_shared_data["plot_option"]
+	gamma_w = iteration_shared_data["gamma_w"]
+	FS_crit = iteration_shared_data["FS_crit"]
+	dz = iteration_shared_data["dz"]
+	termination_apply = iteration_shared_data["termination_apply"]
+	landslide_to_debris_flow_threshold = iteration_shared_data["landslide_to_debris_flow_threshold"]
+	DEM_surf_dip_infiltration_apply = iteration_shared_data["DEM_surf_dip_infiltration_apply"]
+	DEM_debris_flow_criteria_apply = iteration_shared_data["DEM_debris_flow_criteria_apply"]
+	FS_3D_analysis = iteration_shared_data["FS_3D_analysis"]
+	FS_3D_iter_limit = iteration_shared_data["FS_3D_iter_limit"]
+	FS_3D_tol = iteration_shared_data["FS_3D_tol"]
+	FS_3D_apply_side = iteration_shared_data["FS_3D_apply_side"]
+	FS_3D_apply_root = iteration_shared_data["FS_3D_apply_root"]
+	FS_3D_screening_margin = iteration_shared_data["FS_3D_screening_margin"]
+	dt = iteration_shared_data["dt"]
+	FS_thresholds = iteration_shared_data["FS_thresholds"]
+	results_journal_compaction_interval = iteration_shared_data["results_journal_compaction_interval"]
+	raster_dtypes = iteration_shared_data["raster_dtypes"]
+
+	DEM_surface = iteration_shared_data["DEM_surface"]
+	DEM_noData = iteration_shared_data["DEM_noData"]
+	nodata_value = iteration_shared_data["nodata_value"]
+	XYZ_row_or_col_increase_first = iteration_shared_data["XYZ_row_or_col_increase_first"]
+	deltaX = iteration_shared_data["deltaX"]
+	deltaY = iteration_shared_data["deltaY"]
+	gridUniqueX = iteration_shared_data["gridUniqueX"]
+	gridUniqueY = iteration_shared_data["gridUniqueY"]
+
+	dx_dp = iteration_shared_data["dx_dp"]
+	dy_dp = iteration_shared_data["dy_dp"]
+	dz_dp = iteration_shared_data["dz_dp"]
+	rate_dp = iteration_shared_data["rate_dp"]
+	t_dp = iteration_shared_data["t_dp"]
+	theta_dp = iteration_shared_data["theta_dp"]
+	press_dp = iteration_shared_data["press_dp"]
+	cumul_dp = iteration_shared_data["cumul_dp"]
+	FS_dp = iteration_shared_data["FS_dp"]
+
+	unique_slip_surf_grouping_DEM_grid_num = iteration_shared_data["unique_slip_surf_grouping_DEM_grid_num"]
+	DEM_grid_num = iteration_shared_data["DEM_grid_num"]
+
+	# running statistics of all Monte Carlo iterations for the probabilistic analysis
+	online_statistics_folder = f"{output_folder_path}probabilistic_results/online_statistics/"
+	if worker_id is None:
+		worker_id = f"{socket.gethostname()}_{os.getpid()}"
+	# importance sampling weight (likelihood ratio) of the iteration - 1 without importance sampling
+	importance_weight = float(np.exp(filename_dict.get("sampling", {}).get("log_weight", 0.0)))
+	# wall time, CPU time and memory usage of each stage (see generate_3DTSP_stage_metrics)
+	stage_metrics = generate_3DTSP_stage_metrics(iteration_shared_data["stage_metrics_folder"], filename, iter_num, iteration_shared_data["stage_metrics_profile"])
+
+
+ 
+	#####################################
+	## import input files from Monte Carlo iteration dictionary - subjected to change over time
+	#####################################
+	stage_timer = start_3DTSP_stage(stage_metrics, "read_inputs")
+	bedrock_surface, _, _ = read_GIS_data(filename_dict["bedrock_surface"][1], filename_dict["bedrock_surface"][0], full_output=False, dtype=raster_dtypes["elevation"])
+	soil_thickness, _, _ = read_GIS_data(filename_dict["soil_thickness"][1], filename_dict["soil_thickness"][0], full_output=False, dtype=raster_dtypes["elevation"])
+	
+	dip_surf_deg, _, _ = read_GIS_data(filename_dict["dip_surf_deg"][1], filename_dict["dip_surf_deg"][0], full_output=False, dtype=raster_dtypes["property"])
+	# aspect_surf_deg, _, _ = read_GIS_data(filename_dict["aspect_surf_deg"][1], filename_dict["aspect_surf_deg"][0], full_output=False)	
+	dip_base_deg, _, _ = read_GIS_data(filename_dict["dip_base_deg"][1], filename_dict["dip_base_deg"][0], full_output=False, dtype=raster_dtypes["property"])
+	aspect_base_deg, _, _ = read_GIS_data(filename_dict["aspect_base_deg"][1], filename_dict["aspect_base_deg"][0], full_output=False, dtype=raster_dtypes["property"])
+
+	if isinstance(FS_3D_analysis, bool) and FS_3D_analysis: 
+		DEM_debris_flow_criteria, _, _ = read_GIS_data(filename_dict["DEM_debris_flow_criteria"][1], filename_dict["DEM_debris_flow_criteria"][0], full_output=False, dtype=raster_dtypes["mask"]) 
+	else:
+		DEM_debris_flow_criteria = np.ones(DEM_surface.shape, dtype=raster_dtypes["mask"])
+	stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+	#####################################
+	# check if simulation is completed
+	#####################################
+	if check_3DTSP_iteration_completed(filename_dict):
+		print(f"Monte Carlo iteration {iter_num} completed.")
+		return monte_carlo_iter_result_filename_dict
+
+	#####################################
+	# run the simulation
+	#####################################
+	print(f"Running Monte Carlo iteration {iter_num} ...")
+
+	#####################################
+	# extract inputs specific to the iterations
+	#####################################
+	max_time_step = len(filename_dict["intensity"])
+	if ("min_FS" in filename_dict.keys()) and (len(filename_dict["min_FS"]) >= 1):
+		start_time_step = len(filename_dict["min_FS"])-1
+	else:
+		start_time_step = 0
+	
+	stage_timer = start_3DTSP_stage(stage_metrics, "read_inputs", start_time_step)
+	## material - hydraulic properties
+	# SWCC_model, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_model"][1], filename_dict["material"]["hydraulic"]["SWCC_model"][0], full_output=False)
+	# SWCC_a, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_a"][1], filename_dict["material"]["hydraulic"]["SWCC_a"][0], full_output=False)
+	# SWCC_n, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_n"][1], filename_dict["material"]["hydraulic"]["SWCC_n"][0], full_output=False)
+	# SWCC_m, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["SWCC_m"][1], filename_dict["material"]["hydraulic"]["SWCC_m"][0], full_output=False)
+	k_sat, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["k_sat"][1], filename_dict["material"]["hydraulic"]["k_sat"][0], full_output=False, dtype=raster_dtypes["property"])
+	initial_suction, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["initial_suction"][1], filename_dict["material"]["hydraulic"]["initial_suction"][0], full_output=False, dtype=raster_dtypes["property"])
+	theta_sat, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_sat"][1], filename_dict["material"]["hydraulic"]["theta_sat"][0], full_output=False, dtype=raster_dtypes["property"])
+	theta_residual, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_residual"][1], filename_dict["material"]["hydraulic"]["theta_residual"][0], full_output=False, dtype=raster_dtypes["property"])
+	theta_FC, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_FC"][1], filename_dict["material"]["hydraulic"]["theta_FC"][0], full_output=False, dtype=raster_dtypes["property"])
+	# soil_m_v, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["soil_m_v"][1], filename_dict["material"]["hydraulic"]["soil_m_v"][0], full_output=False)
+	S_max, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["max_surface_storage"][1], filename_dict["material"]["hydraulic"]["max_surface_storage"][0], full_output=False, dtype=raster_dtypes["property"])
+	# theta_initial, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["theta_initial"][1], filename_dict["material"]["hydraulic"]["theta_initial"][0], full_output=False)
+	psi_r, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["psi_r"][1], filename_dict["material"]["hydraulic"]["psi_r"][0], full_output=False, dtype=raster_dtypes["property"])
+	delta_theta, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["delta_theta"][1], filename_dict["material"]["hydraulic"]["delta_theta"][0], full_output=False, dtype=raster_dtypes["property"])
+	# F_p, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["F_p"][1], filename_dict["material"]["hydraulic"]["F_p"][0], full_output=False)
+	# z_p, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["z_p"][1], filename_dict["material"]["hydraulic"]["z_p"][0], full_output=False)
+	T_p, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["T_p"][1], filename_dict["material"]["hydraulic"]["T_p"][0], full_output=False, dtype=raster_dtypes["accumulation"])
+	T_pp, _, _ = read_GIS_data(filename_dict["material"]["hydraulic"]["T_pp"][1], filename_dict["material"]["hydraulic"]["T_pp"][0], full_output=False, dtype=raster_dtypes["accumulation"])
+
+	## material - soil strength properties
+	soil_unit_weight, _, _ = read_GIS_data(filename_dict["material"]["soil"]["unit_weight"][1], filename_dict["material"]["soil"]["unit_weight"][0], full_output=False, dtype=raster_dtypes["property"])
+	soil_phi, _, _ = read_GIS_data(filename_dict["material"]["soil"]["phi"][1], filename_dict["material"]["soil"]["phi"][0], full_output=False, dtype=raster_dtypes["property"])
+	soil_phi_b, _, _ = read_GIS_data(filename_dict["material"]["soil"]["phi_b"][1], filename_dict["material"]["soil"]["phi_b"][0], full_output=False, dtype=raster_dtypes["property"])
+	soil_c, _, _ = read_GIS_data(filename_dict["material"]["soil"]["c"][1], filename_dict["material"]["soil"]["c"][0], full_output=False, dtype=raster_dtypes["property"])
+
+	## material - root reinforcement properties 
+	veg_areal_weight, _, _ = read_GIS_data(filename_dict["material"]["root"]["veg_areal_weight"][1], filename_dict["material"]["root"]["veg_areal_weight"][0], full_output=False, dtype=raster_dtypes["property"])
+	root_model, _, _ = read_GIS_data(filename_dict["material"]["root"]["model"][1], filename_dict["material"]["root"]["model"][0], full_output=False, dtype=raster_dtypes["model_id"])
+	root_c_base, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_constant"][0][1], filename_dict["material"]["root"]["parameters_constant"][0][0], full_output=False, dtype=raster_dtypes["property"])
+	root_c_side, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_constant"][1][1], filename_dict["material"]["root"]["parameters_constant"][1][0], full_output=False, dtype=raster_dtypes["property"])
+	root_depth, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_constant"][2][1], filename_dict["material"]["root"]["parameters_constant"][2][0], full_output=False, dtype=raster_dtypes["property"])
+	root_vZ_alpha2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_van_Zadelhoff"][0][1], filename_dict["material"]["root"]["parameters_van_Zadelhoff"][0][0], full_output=False, dtype=raster_dtypes["property"])
+	root_vZ_beta2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_van_Zadelhoff"][1][1], filename_dict["material"]["root"]["parameters_van_Zadelhoff"][1][0], full_output=False, dtype=raster_dtypes["property"])
+	root_vZ_RR_max, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_van_Zadelhoff"][2][1], filename_dict["material"]["root"]["parameters_van_Zadelhoff"][2][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_gamma, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][0][1], filename_dict["material"]["root"]["parameters_DiBiagio"][0][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_alpha1, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][1][1], filename_dict["material"]["root"]["parameters_DiBiagio"][1][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_beta1, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][2][1], filename_dict["material"]["root"]["parameters_DiBiagio"][2][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_DBH, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][3][1], filename_dict["material"]["root"]["parameters_DiBiagio"][3][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_d_tri, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][4][1], filename_dict["material"]["root"]["parameters_DiBiagio"][4][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_alpha2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][5][1], filename_dict["material"]["root"]["parameters_DiBiagio"][5][0], full_output=False, dtype=raster_dtypes["property"])
+	root_DB_beta2, _, _ = read_GIS_data(filename_dict["material"]["root"]["parameters_DiBiagio"][6][1], filename_dict["material"]["root"]["parameters_DiBiagio"][6][0], full_output=False, dtype=raster_dtypes["property"])
+
+	##################
+	# taking the superellipse shapes, generate slip surface soil cell data
+	##################
+	if isinstance(FS_3D_analysis, bool):
+
+		#####################################
+		# read GIS data of hydraulic properties for initial set-up
+		#####################################
+		# gwt_dz_t, _, _ = read_GIS_data(filename_dict["gwt_dz"][str(start_time_step)][1], filename_dict["gwt_dz"][str(start_time_step)][0], full_output=False)
+		gwt_z_t, _, _ = read_GIS_data(filename_dict["gwt_z"][str(start_time_step)][1], filename_dict["gwt_z"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["elevation"])
+		Surface_Storage_t, _, _ = read_GIS_data(filename_dict["Surface_Storage"][str(start_time_step)][1], filename_dict["Surface_Storage"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+		Precipitation_t, _, _ = read_GIS_data(filename_dict["Precipitation"][str(start_time_step)][1], filename_dict["Precipitation"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+		Runoff_t, _, _ = read_GIS_data(filename_dict["Runoff"][str(start_time_step)][1], filename_dict["Runoff"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+		f_rate_t, _, _ = read_GIS_data(filename_dict["f_rate"][str(start_time_step)][1], filename_dict["f_rate"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["state"])
+		F_cumul_t, _, _ = read_GIS_data(filename_dict["F_cumul"][str(start_time_step)][1], filename_dict["F_cumul"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+		z_w_t, _, _ = read_GIS_data(filename_dict["z_w"][str(start_time_step)][1], filename_dict["z_w"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["elevation"])
+		wet_z_t, _, _ = read_GIS_data(filename_dict["wet_z"][str(start_time_step)][1], filename_dict["wet_z"][str(start_time_step)][0], full_output=False, dtype=raster_dtypes["elevation"])
+	stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+	#####################################
+	# generate all slip surface soil column data
+	#####################################
+	if isinstance(FS_3D_analysis, bool) and FS_3D_analysis:
+
+		# all_slip_surf_data - all unique slip surface soil cell data
+		# index = slip surface ID, data = [0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2] 
+		# cell_all_affecting_slip - find all slip surface containing given (global_row_y, global_col_x)
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "slip_generation_stage2")
+		# multiprocess input file
+		generate_slip_surface_cell_input = [] 
+		for unique_slip_surface_i in unique_slip_surf_grouping_DEM_grid_num: 
+			generate_slip_surface_cell_input.append((unique_slip_surface_i, DEM_grid_num, DEM_surface, soil_thickness, dip_base_deg, aspect_base_deg, gwt_z_t, wet_z_t, psi_r, initial_suction, soil_unit_weight, soil_phi, soil_phi_b, soil_c, veg_areal_weight, root_c_base, root_c_side, root_depth, root_vZ_alpha2, root_vZ_beta2, root_vZ_RR_max, root_DB_gamma, root_DB_alpha1, root_DB_beta1, root_DB_DBH, root_DB_d_tri, root_DB_alpha2, root_DB_beta2))
+			# unique_slip_surface_i, DEM_grid_num, DEM_surface, DEM_soil_thickness, dip_base, aspect_base, DEM_gwt_z, DEM_wetting_front_z, DEM_psi_r, DEM_initial_suction, DEM_soil_unit_weight, DEM_soil_phi, DEM_soil_phi_b, DEM_soil_c, DEM_veg_areal_weight, DEM_root_c_base, DEM_root_c_side, DEM_root_depth, DEM_root_vZ_alpha2, DEM_root_vZ_beta2, DEM_root_vZ_RR_max, root_DB_gamma, root_DB_alpha1, root_DB_beta1, root_DB_DBH, root_DB_d_tri, root_DB_alpha2, root_DB_beta2
+
+		# generate all possible combinations of DEM cell groupings
+		all_slip_surf_data = map_3DTSP_stage_MP(generate_3DTS_slip_groupings_mp_v4_00, generate_slip_surface_cell_input, cpu_num_iter)   
+		# all_slip_surf_data 
+
+		#####################################
+		# generate all slip surface soil column data for 3D slope stability analysis
+		#####################################
+		compute_t_3DFS_input = []
+		for slip_data_temp in all_slip_surf_data:
+
+			try:
+				slip_data = slip_data_temp[:]
+
+				# critical_depth_3D_FS_MP_input
+				# 0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2
+				
+				# 28iteration_max, 29min_FS_diff, 30deltaX, 31deltaY, 32dz, 33gamma_w, 34FS_crit, 35correctFS_bool, 36FS_3D_apply_side, 37FS_3D_apply_root
+				slip_data.extend( [FS_3D_iter_limit, FS_3D_tol, deltaX, deltaY, dz, gamma_w, FS_crit, True, FS_3D_apply_side, FS_3D_apply_root] )
+				
+				# DEM root model - use the most frequent root strength model
+				DEM_root_model_mode = int(mode([ root_model[i, j] for (i, j) in slip_data[0][:] ])[0])
+
+				# 38DEM_root_model, 39dz_dp, 40press_dp
+				slip_data.extend( [DEM_root_model_mode, dz_dp, press_dp] )
+				
+				# store multiprocessing inputs
+				compute_t_3DFS_input.append(tuple(slip_data))
+				del slip_data
+
+			except:  # skip if something is not correctly generated
+				pass 
+		stop_3DTSP_stage(stage_metrics, stage_timer, len(compute_t_3DFS_input))
+
+	#############################
+	## Physically-based slope stability at time step = starting time step
+	#############################
+	if FS_3D_analysis is not None: 
+
+		### cell 3D slope stability
+		if FS_3D_analysis:
+
+			###################
+			## update water-related information and perform slope stability analysis for each generated slip surface
+			###################
+			stage_timer = start_3DTSP_stage(stage_metrics, "slope_stability", start_time_step)
+			# multiprocessing analysis
+			screening_skipped_FS = None
+			if FS_3D_screening_margin is None:
+				t_output_failSoil_critFS = map_3DTSP_stage_MP(critical_depth_group_3D_FS_HungrJanbu_MP_v10_00, compute_t_3DFS_input, cpu_num_iter)   # Hungr 1989 + side resistance + root resistance
+			# skip the slip surfaces with infinite slope FS >= FS_crit + margin
+			else:
+				t_output_failSoil_critFS, screening_skip_num, screening_skipped_FS = screen_3DTSP_slip_surfaces_MP(compute_t_3DFS_input, FS_crit+FS_3D_screening_margin, bedrock_surface, DEM_surface, soil_phi, soil_phi_b, soil_c, soil_unit_weight, dip_base_deg, gwt_z_t, wet_z_t, initial_suction, psi_r, FS_crit, gamma_w, dz, dz_dp, press_dp, cpu_num_iter)
+				monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["FS_3D_screening"][str(start_time_step)] = [screening_skip_num, len(compute_t_3DFS_input)]
+			stop_3DTSP_stage(stage_metrics, stage_timer, len(compute_t_3DFS_input))
+			# index = slip surface ID number
+			# failure_soil_thickness_per_DEM_cell, min_comp_FS for each generated slip surface
+
+			###################
+			## critical FS per each cell 
+			###################
+			stage_timer = start_3DTSP_stage(stage_metrics, "reduction", start_time_step)
+			min_comp_FS = np.full(DEM_surface.shape, 9999, dtype=np.float64) 		  # for noData -> 9999; float64 for the comparison with FS_crit
+			failure_soil_thickness = np.zeros(DEM_surface.shape, dtype=raster_dtypes["state"])
+
+			for ((failure_soil_thickness_per_DEM_cell, min_comp_FS_comp), slip_data) in zip(t_output_failSoil_critFS, compute_t_3DFS_input):
+				for idx,(t_y_row, t_x_col) in enumerate(slip_data[0]):
+					# save the minimum computed factor of safety and track the corresponding failure soil thickness
+					if min_comp_FS[t_y_row, t_x_col] > min_comp_FS_comp:
+						min_comp_FS[t_y_row, t_x_col] = min_comp_FS_comp
+						failure_soil_thickness[t_y_row, t_x_col] = failure_soil_thickness_per_DEM_cell[idx]
+
+			# DEM cells with only skipped slip surfaces - screening bound of the factor of safety
+			if screening_skipped_FS is not None:
+				min_comp_FS = np.where((min_comp_FS == 9999) & ~np.isnan(screening_skipped_FS), screening_skipped_FS, min_comp_FS)
+
+			# revert noData from 9999 to -1
+			min_comp_FS = np.where(min_comp_FS == 9999, -1, min_comp_FS)
+
+		### infinite slope stability analysis
+		else:
+
+			stage_timer = start_3DTSP_stage(stage_metrics, "slope_stability", start_time_step)
+			# multiprocessing input
+			compute_t_inf_slope_input = []
+			for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))): 
+				
+				# skip any DEM cell with soil depth less than the minimum depth increment - too small for analysis
+				if soil_thickness[i,j] <= dz or DEM_noData[i,j] == 0:
+					continue
+
+				# i, j, z_b, z_t, phi, phi_b, c, gamma_s, alpha, gw_z, front_z, psi_i, psi_r, FS_crit, gamma_w, dz, check_only, dz_dp, press_dp = critical_depth_inf_FS_MP_input
+				compute_t_inf_slope_input.append( (i, j, bedrock_surface[i,j], DEM_surface[i,j], soil_phi[i,j], soil_phi_b[i,j], soil_c[i,j], soil_unit_weight[i,j], dip_base_deg[i,j], gwt_z_t[i,j], wet_z_t[i,j], initial_suction[i,j], psi_r[i,j], FS_crit, gamma_w, dz, False, dz_dp, press_dp) )
+
+			t_output_FS_data = map_3DTSP_stage_MP(critical_depth_inf_FS_MP, compute_t_inf_slope_input, cpu_num_iter)
+			stop_3DTSP_stage(stage_metrics, stage_timer, len(compute_t_inf_slope_input))
+			# i, j, failure_soil_thickness_t, min_comp_FS_t
+
+			## join and store the FS output
+			stage_timer = start_3DTSP_stage(stage_metrics, "reduction", start_time_step)
+			min_comp_FS = np.full(bedrock_surface.shape, -1, dtype=np.float64) 		# float64 for the comparison with FS_crit
+			failure_soil_thickness = np.zeros(bedrock_surface.shape, dtype=raster_dtypes["state"])
+
+			for (i,j,crit_zz,min_FSi) in t_output_FS_data:
+
+				if min_FSi == 9999: # all error
+					min_FSi = -1
+				min_FSi = min(min_FSi, 10) # in case of very large FS value
+
+				min_comp_FS[i,j] = min_FSi
+				failure_soil_thickness[i,j] = crit_zz
+
+		################################################################
+		## debris-flow initiation
+		################################################################
+		# landslide source - slope cell with FS < critical FS
+		landslide_source = np.where((min_comp_FS < FS_crit) & (soil_thickness > dz), 1, 0).astype(raster_dtypes["mask"])
+
+		# debris-flow initiation condition applied -> check if slope failure become debris-flow
+		if DEM_debris_flow_criteria_apply:
+			debris_flow_source = np.where((min_comp_FS < FS_crit) & (DEM_debris_flow_criteria == 1) & (soil_thickness > dz), 1, 0).astype(raster_dtypes["mask"])
+		# debris-flow initiation condition not applied -> then all slope can become debris-flow
+		else:  
+			debris_flow_source = np.copy(landslide_source)
+    
+		# failure depth of debris flow source area - for runout analysis
+		runout_depth_source = np.where(debris_flow_source == 1, failure_soil_thickness, 0)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+		################################################################
+		## store and export data 
+		################################################################
+		# add results to the filename dictionary
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{start_time_step} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["crit_FS_z"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{start_time_step} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{start_time_step} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{start_time_step} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["runout_depth_source"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{start_time_step} - i{iter_num}.{output_txt_format}"]
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "plots", start_time_step)
+		# plot data
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - min_FS - t{start_time_step} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{start_time_step} - i{iter_num}", 'FS', gridUniqueX, gridUniqueY, None, min_comp_FS, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - crit_FS_z - t{start_time_step} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{start_time_step} - i{iter_num}", 'fail_dz', gridUniqueX, gridUniqueY, None, failure_soil_thickness, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - debris_flow_source - t{start_time_step} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{start_time_step} - i{iter_num}", 'dfs', gridUniqueX, gridUniqueY, None, debris_flow_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - landslide_source - t{start_time_step} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{start_time_step} - i{iter_num}", 'source', gridUniqueX, gridUniqueY, None, landslide_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - runout_depth_source - t{start_time_step} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{start_time_step} - i{iter_num}", 'run_h0', gridUniqueX, gridUniqueY, None, runout_depth_source, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "write_outputs", start_time_step)
+		# export data
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "min_FS", min_comp_FS, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, FS_dp, time=start_time_step, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "crit_FS_z", failure_soil_thickness, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=start_time_step, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "debris_flow_source", debris_flow_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=start_time_step, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "landslide_source", landslide_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=start_time_step, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "runout_depth_source", runout_depth_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=start_time_step, iteration=iter_num)
+
+		# add to the running statistics of all iterations
+		update_3DTSP_online_statistics(online_statistics_folder, filename, f"t{start_time_step}", worker_id, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, FS_thresholds, weight=importance_weight)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+		#############################
+		## progress track
+		############################# 
+		start_time = filename_dict["intensity"][str(start_time_step)][2] 
+		if start_time >= 3600: 	# time is in hours
+			print(f"iteration {iter_num}, completed time-step: {start_time_step}, current time: {start_time/3600:.2f}hr; completion: {100*(start_time_step)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
+		else:  # time is in seconds
+			print(f"iteration {iter_num}, completed time-step: {start_time_step}, current time: {start_time:,}s; completion: {100*(start_time_step)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
+
+		# append the results of the time step to the journal - save to keep track of the simulations
+		stage_timer = start_3DTSP_stage(stage_metrics, "manifest_save", start_time_step)
+		append_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num, start_time_step, iteration_only_JSON=iteration_only_JSON, compaction_interval=results_journal_compaction_interval)
+		stop_3DTSP_stage(stage_metrics, stage_timer)
+
+	#####################################
+	## iterate through time steps
+	#####################################
+	# landslide (or debris-flow) source clusters for the termination condition
+	cluster_tracker = None
+
+	for time_step in range(start_time_step, max_time_step):
+		
+		#####################################
+		# GIS data at given time step
+		#####################################
+		stage_timer = start_3DTSP_stage(stage_metrics, "read_inputs", time_step+1)
+		rain_t, _, _ = read_GIS_data(filename_dict["intensity"][str(time_step)][1], filename_dict["intensity"][str(time_step)][0], full_output=False, dtype=raster_dtypes["state"])
+		cur_time = filename_dict["intensity"][str(time_step)][3] # end of the time in the current time step
+
+		# ET rate at current time step
+		if "ET_rate" in filename_dict and str(time_step) in filename_dict["ET_rate"]:
+			ET_t, _, _ = read_GIS_data(filename_dict["ET_rate"][str(time_step)][1], filename_dict["ET_rate"][str(time_step)][0], full_output=False, dtype=raster_dtypes["state"])
+		else:
+			ET_t = np.zeros(DEM_surface.shape, dtype=raster_dtypes["state"])
+   
+		if time_step == start_time_step:
+			# gwt_dz_t, _, _ = read_GIS_data(filename_dict["gwt_dz"][str(time_step)][1], filename_dict["gwt_dz"][str(time_step)][0], full_output=False)
+			gwt_z_t, _, _ = read_GIS_data(filename_dict["gwt_z"][str(time_step)][1], filename_dict["gwt_z"][str(time_step)][0], full_output=False, dtype=raster_dtypes["elevation"])
+			Surface_Storage_t, _, _ = read_GIS_data(filename_dict["Surface_Storage"][str(time_step)][1], filename_dict["Surface_Storage"][str(time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+			Precipitation_t, _, _ = read_GIS_data(filename_dict["Precipitation"][str(time_step)][1], filename_dict["Precipitation"][str(time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+			Runoff_t, _, _ = read_GIS_data(filename_dict["Runoff"][str(time_step)][1], filename_dict["Runoff"][str(time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+			f_rate_t, _, _ = read_GIS_data(filename_dict["f_rate"][str(time_step)][1], filename_dict["f_rate"][str(time_step)][0], full_output=False, dtype=raster_dtypes["state"])
+			F_cumul_t, _, _ = read_GIS_data(filename_dict["F_cumul"][str(time_step)][1], filename_dict["F_cumul"][str(time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+			z_w_t, _, _ = read_GIS_data(filename_dict["z_w"][str(time_step)][1], filename_dict["z_w"][str(time_step)][0], full_output=False, dtype=raster_dtypes["elevation"])
+			wet_z_t, _, _ = read_GIS_data(filename_dict["wet_z"][str(time_step)][1], filename_dict["wet_z"][str(time_step)][0], full_output=False, dtype=raster_dtypes["elevation"])
+			if "ET_cumul" in filename_dict and str(time_step) in filename_dict["ET_cumul"]:
+				ET_cumul_t, _, _ = read_GIS_data(filename_dict["ET_cumul"][str(time_step)][1], filename_dict["ET_cumul"][str(time_step)][0], full_output=False, dtype=raster_dtypes["accumulation"])
+			else:
+				ET_cumul_t = np.zeros(DEM_surface.shape, dtype=raster_dtypes["accumulation"])
+		else:
+			# gwt_dz_t = np.copy(gwt_dz_new_f)
+			gwt_z_t = np.copy(gwt_z_new_f)
+			Surface_Storage_t = np.copy(S_f)
+			Precipitation_t = np.copy(P_f)
+			Runoff_t = np.copy(RO_f)
+			f_rate_t = np.copy(infil_rate_f_f)
+			F_cumul_t = np.copy(infil_cumul_F_f)
+			z_w_t = np.copy(infil_zw_f)
+			wet_z_t = np.copy(wetting_front_z_f)
+			ET_cumul_t = np.copy(ET_cumul_f)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+		#####################################################
+		## 1D transient Green-Ampt analysis
+		######################################################
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "green_ampt", time_step+1)
+		# multiprocessing data setup
+		compute_GA_slanted_nonUniRain_input = []
+		for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))):
+
+			# skip any DEM cell with soil depth less than the minimum depth increment - too small for analysis
+			if soil_thickness[i,j] <= dz or DEM_noData[i,j] == 0:
+				continue
+
+			if DEM_surf_dip_infiltration_apply:
+				surf_dip_i = dip_surf_deg[i,j]
+			else:
+				surf_dip_i = 0 
+
+			# general surface (90 > beta >= 0)
+			# i, j, z_top, z_bottom, z_length, infil_zw_pre, wetting_front_z_pre, gwt_z_pre, rain_I, k_sat_z, cur_t, dt, T_p, T_pp, delta_theta, psi_r_head, infil_cumul_F_pre, slope_beta_deg, P_pre, S_pre, RO_pre, infil_rate_f_pre, S_max, cumul_dp, t_dp, rate_dp, dz_dp, ET_rate, theta_FC, theta_residual, theta_sat, ET_cumul_pre = compute_GA_slanted_nonUniRain_input
+			compute_GA_slanted_nonUniRain_input.append( (i, j, DEM_surface[i,j], bedrock_surface[i,j], soil_thickness[i,j], z_w_t[i,j], wet_z_t[i,j], gwt_z_t[i,j], rain_t[i,j], k_sat[i,j], cur_time, dt, T_p[i,j], T_pp[i,j], delta_theta[i,j], psi_r[i,j]/gamma_w, F_cumul_t[i,j], surf_dip_i, Precipitation_t[i,j], Surface_Storage_t[i,j], Runoff_t[i,j], f_rate_t[i,j], S_max[i,j], cumul_dp, t_dp, rate_dp, dz_dp, ET_t[i,j], theta_FC[i,j], theta_residual[i,j], theta_sat[i,j], ET_cumul_t[i,j]) )
+
+		# run infilatration analysis
+		comp_1DGS_output = map_3DTSP_stage_MP(compute_GA_nonUniRain_slanted_MP, compute_GA_slanted_nonUniRain_input, cpu_num_iter)
+		stop_3DTSP_stage(stage_metrics, stage_timer, len(compute_GA_slanted_nonUniRain_input))
+		# i, j, P_new, S_new, RO_new, infil_cumul_F_new, infil_rate_f_new, gwt_z_new, infil_zw_new, wetting_front_z_new, ET_cumul_new
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "reduction", time_step+1)
+		# join and store computed data
+		P_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["accumulation"])
+		S_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["accumulation"])
+		RO_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["accumulation"])
+		infil_rate_f_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["state"])
+		infil_cumul_F_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["accumulation"])
+		infil_zw_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["elevation"])
+		wetting_front_z_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["elevation"])
+		gwt_z_new_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["elevation"])
+		gwt_dz_new_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["elevation"])
+		ET_cumul_f = np.zeros(DEM_surface.shape, dtype=raster_dtypes["accumulation"])
+		for (i, j, P_new, S_new, RO_new, infil_cumul_F_new, infil_rate_f_new, gwt_z_new, infil_zw_new, wetting_front_z_new, ET_cumul_new) in comp_1DGS_output:
+			P_f[i,j] = P_new
+			S_f[i,j] = S_new
+			RO_f[i,j] = RO_new
+			infil_rate_f_f[i,j] = infil_rate_f_new
+			infil_cumul_F_f[i,j] = infil_cumul_F_new
+			infil_zw_f[i,j] = infil_zw_new
+			wetting_front_z_f[i,j] = wetting_front_z_new
+			gwt_z_new_f[i,j] = gwt_z_new
+			gwt_dz_new_f[i,j] = DEM_surface[i,j] - gwt_z_new  
+			ET_cumul_f[i,j] = ET_cumul_new
+		stop_3DTSP_stage(stage_metrics, stage_timer, len(comp_1DGS_output))
+
+		# add results to the filename dictionary
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["gwt_dz"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_dz - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["gwt_z"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_z - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["Surface_Storage"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Surface_Storage - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["Precipitation"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Precipitation - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["Runoff"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Runoff - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["f_rate"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - f_rate - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["F_cumul"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - F_cumul - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["z_w"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - z_w - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["wet_z"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - wet_z - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+		monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["ET_cumul"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - ET_cumul - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "plots", time_step+1)
+		# generate plots
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - gwt_dz - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_dz - t{time_step+1} - i{iter_num}", 'gwt_dz', gridUniqueX, gridUniqueY, None, gwt_dz_new_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - gwt_z - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_z - t{time_step+1} - i{iter_num}", 'gwt_z', gridUniqueX, gridUniqueY, None, gwt_z_new_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - Surface_Storage - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Surface_Storage - t{time_step+1} - i{iter_num}", 'S', gridUniqueX, gridUniqueY, None, S_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - Precipitation - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Precipitation - t{time_step+1} - i{iter_num}", 'P', gridUniqueX, gridUniqueY, None, P_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - Runoff - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Runoff - t{time_step+1} - i{iter_num}", 'RO', gridUniqueX, gridUniqueY, None, RO_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - f_rate - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - f_rate - t{time_step+1} - i{iter_num}", 'f', gridUniqueX, gridUniqueY, None, infil_rate_f_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - F_cumul - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - F_cumul - t{time_step+1} - i{iter_num}", 'F', gridUniqueX, gridUniqueY, None, infil_cumul_F_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - z_w - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - z_w - t{time_step+1} - i{iter_num}", 'z_w', gridUniqueX, gridUniqueY, None, infil_zw_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - wet_z - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - wet_z - t{time_step+1} - i{iter_num}", 'wet_z', gridUniqueX, gridUniqueY, None, wetting_front_z_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - ET_cumul - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+			plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - ET_cumul - t{time_step+1} - i{iter_num}", 'ET_cumul', gridUniqueX, gridUniqueY, None, ET_cumul_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+		stage_timer = start_3DTSP_stage(stage_metrics, "write_outputs", time_step+1)
+		# generate output file
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "gwt_dz", gwt_dz_new_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "gwt_z", gwt_z_new_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "Surface_Storage", S_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "Precipitation", P_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "Runoff", RO_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "f_rate", infil_rate_f_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, rate_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "F_cumul", infil_cumul_F_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "z_w", infil_zw_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "wet_z", wetting_front_z_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
+		generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "ET_cumul", ET_cumul_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+		#############################
+		## Physically-based slope stability
+		#############################
+		if FS_3D_analysis is not None: 
+
+			### cell 3D slope stability
+			if FS_3D_analysis:
+
+				###################
+				## update water-related information and perform slope stability analysis for each generated slip surface
+				###################
+				stage_timer = start_3DTSP_stage(stage_metrics, "slope_stability", time_step+1)
+				# multiprocessing input
+				compute_t_3DFS_input_temp = compute_t_3DFS_input[:]
+				del compute_t_3DFS_input
+
+				compute_t_3DFS_input = []
+				for slip_data_temp in compute_t_3DFS_input_temp:
+		
+					slip_data = list(slip_data_temp)
+
+					# critical_depth_3D_FS_MP_input
+					# 0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2, 28iteration_max, 29min_FS_diff, 30deltaX, 31deltaY, 32dz, 33gamma_w, 34FS_crit, 35correctFS_bool, 36FS_3D_apply_side, 37FS_3D_apply_root, 38DEM_root_model, 39dz_dp, 40press_dp
+
+
+					# only the groundwater condition has changed since pervious simulation
+					# only change 4local_gw_z and 5local_front_z
+					new_local_gw_z = []
+					new_local_front_z = []
+					for (t_y_row, t_x_col) in slip_data[0]:
+						new_local_gw_z.append(gwt_z_new_f[t_y_row, t_x_col])
+						new_local_front_z.append(wetting_front_z_f[t_y_row, t_x_col])
+
+					slip_data[4] = new_local_gw_z[:]
+					slip_data[5] = new_local_front_z[:]
+
+					compute_t_3DFS_input.append(slip_data[:])
+					del slip_data
+
+				screening_skipped_FS = None
+				if FS_3D_screening_margin is None:
+					t_output_failSoil_critFS = map_3DTSP_stage_MP(critical_depth_group_3D_FS_HungrJanbu_MP_v10_00, compute_t_3DFS_input, cpu_num_iter)   # Hungr 1989 + side resistance + root resistance
+				# skip the slip surfaces with infinite slope FS >= FS_crit + margin
+				else:
+					t_output_failSoil_critFS, screening_skip_num, screening_skipped_FS = screen_3DTSP_slip_surfaces_MP(compute_t_3DFS_input, FS_crit+FS_3D_screening_margin, bedrock_surface, DEM_surface, soil_phi, soil_phi_b, soil_c, soil_unit_weight, dip_base_deg, gwt_z_new_f, wetting_front_z_f, initial_suction, psi_r, FS_crit, gamma_w, dz, dz_dp, press_dp, cpu_num_iter)
+					monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["FS_3D_screening"][str(time_step+1)] = [screening_skip_num, len(compute_t_3DFS_input)]
+				stop_3DTSP_stage(stage_metrics, stage_timer, len(compute_t_3DFS_input))
+				# index = slip surface ID number
+				# failure_soil_thickness_per_DEM_cell, min_comp_FS for each generated slip surface
+
+				###################
+				## critical FS per each cell 
+				###################
+
+				stage_timer = start_3DTSP_stage(stage_metrics, "reduction", time_step+1)
+				min_comp_FS = np.full(DEM_surface.shape, 9999, dtype=np.float64) 		  # for noData -> 9999; float64 for the comparison with FS_crit
+				failure_soil_thickness = np.zeros(DEM_surface.shape, dtype=raster_dtypes["state"])
+	
+				for ((failure_soil_thickness_per_DEM_cell, min_comp_FS_comp), slip_data) in zip(t_output_failSoil_critFS, compute_t_3DFS_input):
+					for idx,(t_y_row, t_x_col) in enumerate(slip_data[0]):
 						# save the minimum computed factor of safety and track the corresponding failure soil thickness
 						if min_comp_FS[t_y_row, t_x_col] > min_comp_FS_comp:
 							min_comp_FS[t_y_row, t_x_col] = min_comp_FS_comp
 							failure_soil_thickness[t_y_row, t_x_col] = failure_soil_thickness_per_DEM_cell[idx]
 
+				# DEM cells with only skipped slip surfaces - screening bound of the factor of safety
+				if screening_skipped_FS is not None:
+					min_comp_FS = np.where((min_comp_FS == 9999) & ~np.isnan(screening_skipped_FS), screening_skipped_FS, min_comp_FS)
+
 				# revert noData from 9999 to -1
 				min_comp_FS = np.where(min_comp_FS == 9999, -1, min_comp_FS)
 
 			### infinite slope stability analysis
 			else:
 
+				stage_timer = start_3DTSP_stage(stage_metrics, "slope_stability", time_step+1)
 				# multiprocessing input
 				compute_t_inf_slope_input = []
 				for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))): 
 					
 					# skip any DEM cell with soil depth less than the minimum depth increment - too small for analysis
-					if DEM_soil_thickness[i,j] <= dz or DEM_noData[i,j] == 0:
+					if soil_thickness[i,j] <= dz or DEM_noData[i,j] == 0:
 						continue
 
 					# i, j, z_b, z_t, phi, phi_b, c, gamma_s, alpha, gw_z, front_z, psi_i, psi_r, FS_crit, gamma_w, dz, check_only, dz_dp, press_dp = critical_depth_inf_FS_MP_input
-					compute_t_inf_slope_input.append( (i, j, bedrock_surface[i,j], DEM_surface[i,j], soil_phi[i,j], soil_phi_b[i,j], soil_c[i,j], soil_unit_weight[i,j], dip_base_deg[i,j], gwt_z_t[i,j], wet_z_t[i,j], initial_suction[i,j], psi_r[i,j], FS_crit, gamma_w, dz, False, dz_dp, press_dp) )
+					compute_t_inf_slope_input.append( (i, j, bedrock_surface[i,j], DEM_surface[i,j], soil_phi[i,j], soil_phi_b[i,j], soil_c[i,j], soil_unit_weight[i,j], dip_base_deg[i,j], gwt_z_new_f[i,j], wetting_front_z_f[i,j], initial_suction[i,j], psi_r[i,j], FS_crit, gamma_w, dz, False, dz_dp, press_dp) )
 
-				pool_1DGA_infS_t = mp.Pool(cpu_num)
-
-				t_output_FS_data = pool_1DGA_infS_t.map(critical_depth_inf_FS_MP, compute_t_inf_slope_input)
+				t_output_FS_data = map_3DTSP_stage_MP(critical_depth_inf_FS_MP, compute_t_inf_slope_input, cpu_num_iter)
+				stop_3DTSP_stage(stage_metrics, stage_timer, len(compute_t_inf_slope_input))
 				# i, j, failure_soil_thickness_t, min_comp_FS_t
 
-				pool_1DGA_infS_t.close()
-				pool_1DGA_infS_t.join()
-
 				## join and store the FS output
-				min_comp_FS = np.ones(bedrock_surface.shape)*-1
-				failure_soil_thickness = np.zeros(bedrock_surface.shape)
+				stage_timer = start_3DTSP_stage(stage_metrics, "reduction", time_step+1)
+				min_comp_FS = np.full(bedrock_surface.shape, -1, dtype=np.float64) 		# float64 for the comparison with FS_crit
+				failure_soil_thickness = np.zeros(bedrock_surface.shape, dtype=raster_dtypes["state"])
 
 				for (i,j,crit_zz,min_FSi) in t_output_FS_data:
 
@@ -7978,407 +9913,492 @@ def perform_3DTSP_v2(monte_carlo_iter_filename_dict):
 			## debris-flow initiation
 			################################################################
 			# landslide source - slope cell with FS < critical FS
-			landslide_source = np.where((min_comp_FS < FS_crit) & (soil_thickness > dz), 1, 0)
+			landslide_source = np.where((min_comp_FS < FS_crit) & (soil_thickness > dz), 1, 0).astype(raster_dtypes["mask"])
 
 			# debris-flow initiation condition applied -> check if slope failure become debris-flow
 			if DEM_debris_flow_criteria_apply:
-				debris_flow_source = np.where((min_comp_FS < FS_crit) & (DEM_debris_flow_criteria == 1) & (soil_thickness > dz), 1, 0)
+				debris_flow_source = np.where((min_comp_FS < FS_crit) & (DEM_debris_flow_criteria == 1) & (soil_thickness > dz), 1, 0).astype(raster_dtypes["mask"])
 			# debris-flow initiation condition not applied -> then all slope can become debris-flow
 			else:  
 				debris_flow_source = np.copy(landslide_source)
-    
+
 			# failure depth of debris flow source area - for runout analysis
 			runout_depth_source = np.where(debris_flow_source == 1, failure_soil_thickness, 0)
+			stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
 
 			################################################################
 			## store and export data 
 			################################################################
 			# add results to the filename dictionary
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{start_time_step} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["crit_FS_z"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{start_time_step} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{start_time_step} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{start_time_step} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["runout_depth_source"][str(start_time_step)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{start_time_step} - i{iter_num}.{output_txt_format}"]
-
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["crit_FS_z"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["runout_depth_source"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{time_step+1} - i{iter_num}.{output_txt_format}"]
+    
+			stage_timer = start_3DTSP_stage(stage_metrics, "plots", time_step+1)
 			# plot data
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - min_FS - t{start_time_step} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{start_time_step} - i{iter_num}", 'FS', gridUniqueX, gridUniqueY, None, min_comp_FS, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - crit_FS_z - t{start_time_step} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{start_time_step} - i{iter_num}", 'fail_dz', gridUniqueX, gridUniqueY, None, failure_soil_thickness, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - debris_flow_source - t{start_time_step} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{start_time_step} - i{iter_num}", 'dfs', gridUniqueX, gridUniqueY, None, debris_flow_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - landslide_source - t{start_time_step} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{start_time_step} - i{iter_num}", 'source', gridUniqueX, gridUniqueY, None, landslide_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - runout_depth_source - t{start_time_step} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{start_time_step} - i{iter_num}", 'run_h0', gridUniqueX, gridUniqueY, None, runout_depth_source, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - min_FS - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{time_step+1} - i{iter_num}", 'FS', gridUniqueX, gridUniqueY, None, min_comp_FS, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - crit_FS_z - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{time_step+1} - i{iter_num}", 'fail_dz', gridUniqueX, gridUniqueY, None, failure_soil_thickness, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - debris_flow_source - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{time_step+1} - i{iter_num}", 'dfs', gridUniqueX, gridUniqueY, None, debris_flow_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
+			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - landslide_source - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{time_step+1} - i{iter_num}", 'source', gridUniqueX, gridUniqueY, None, landslide_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
+			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - runout_depth_source - t{time_step+1} - i{iter_num}.html") == False and plot_option:
+				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{time_step+1} - i{iter_num}", 'run_h0', gridUniqueX, gridUniqueY, None, runout_depth_source, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+			stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+			stage_timer = start_3DTSP_stage(stage_metrics, "write_outputs", time_step+1)
+			# export data
+			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "min_FS", min_comp_FS, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, FS_dp, time=time_step+1, iteration=iter_num)
+			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "crit_FS_z", failure_soil_thickness, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
+			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "debris_flow_source", debris_flow_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=time_step+1, iteration=iter_num)
+			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "landslide_source", landslide_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=time_step+1, iteration=iter_num)
+			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "runout_depth_source", runout_depth_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=time_step+1, iteration=iter_num)
+
+			# add to the running statistics of all iterations
+			update_3DTSP_online_statistics(online_statistics_folder, filename, f"t{time_step+1}", worker_id, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, FS_thresholds, weight=importance_weight)
+			stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+		#############################
+		## progress track
+		############################# 
+		if cur_time >= 3600: 	# time is in hours
+			print(f"iteration {iter_num}, completed time-step: {time_step+1}, current time: {cur_time/3600:.2f}hr; completion: {100*(time_step+1)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
+		else:  # time is in seconds
+			print(f"iteration {iter_num}, completed time-step: {time_step+1}, current time: {cur_time:,}s; completion: {100*(time_step+1)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
+
+		# append the results of the time step to the journal - save to keep track of the simulations
+		stage_timer = start_3DTSP_stage(stage_metrics, "manifest_save", time_step+1)
+		append_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path, iter_num, time_step+1, iteration_only_JSON=iteration_only_JSON, compaction_interval=results_journal_compaction_interval)
+		stop_3DTSP_stage(stage_metrics, stage_timer)
+
+		#############################
+		## termination condition
+		############################# 
+		# terminate when enough landslide failure or debris-flow source has occurred during the simulation
+		if termination_apply:
+			stage_timer = start_3DTSP_stage(stage_metrics, "termination_check", time_step+1)
+			# clusters are updated only from the cells changed since the previous time step
+			# only consider orthogonal connection (connectivity=4) for landslide source clustering
+			if DEM_debris_flow_criteria_apply: # get debris flow source 
+				cluster_tracker = update_3DTSP_cluster_tracker(cluster_tracker, debris_flow_source, failure_soil_thickness, connectivity=4)
+			else:  # find threshold based on landslide source
+				cluster_tracker = update_3DTSP_cluster_tracker(cluster_tracker, landslide_source, failure_soil_thickness, connectivity=4)
+
+			# determine the landslide cluster souce with the largest area i.e. size
+			largest_cluster_area, largest_cluster_volume, largest_cluster_max_depth = compute_3DTSP_largest_cluster(cluster_tracker, deltaX, deltaY)
+			stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+			if (largest_cluster_max_depth >= landslide_to_debris_flow_threshold["depth"] and 
+				largest_cluster_area >= landslide_to_debris_flow_threshold["area"] and 
+				largest_cluster_volume >= landslide_to_debris_flow_threshold["volume"]):
+        
+				print(f"Termination condition is met at iteration {iter_num}, time-step {time_step+1} with landslide cluster with max failure depth {largest_cluster_max_depth:.2f}m, area {largest_cluster_area:.2f}m^2, and volume {largest_cluster_volume:.2f}m^3. Simulation is terminated.\n")
+				break
+
+	#############################
+	## results at the final time step - for the probabilistic analysis
+	#############################
+	if FS_3D_analysis is not None:
+		stage_timer = start_3DTSP_stage(stage_metrics, "write_outputs")
+		np.savez_compressed(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - final_source - i{iter_num}.npz", landslide_source=(landslide_source == 1), debris_flow_source=(debris_flow_source == 1))
+		update_3DTSP_online_statistics(online_statistics_folder, filename, "final", worker_id, iter_num, min_comp_FS, failure_soil_thickness, landslide_source, debris_flow_source, FS_thresholds, weight=importance_weight)
+		stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+	# number of 3D slip surface analyses skipped by the infinite slope screening over all time steps
+	if FS_3D_analysis and FS_3D_screening_margin is not None and len(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["FS_3D_screening"]) > 0:
+		screening_skip_num, screening_slip_num = np.sum(list(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["FS_3D_screening"].values()), axis=0)
+		print(f"iteration {iter_num} - infinite slope screening skipped {screening_skip_num:,} of {screening_slip_num:,} 3D slip surface analyses ({100*screening_skip_num/max(screening_slip_num, 1):.1f}%)")
+
+	print(f'		 Computation of combined rainfall infiltration and slope stability for iteration {iter_num} is completed!\n')
+
+	return monte_carlo_iter_result_filename_dict
+
+
+###########################################################################
+## run rainfall infiltration and slope stability analysis from input JSON file 
+###########################################################################
+def perform_3DTSP_v2(monte_carlo_iter_filename_dict):
+	"""Run the combined infiltration and slope stability analysis for each Monte Carlo iteration.
+
+	Parameters
+	----------
+	monte_carlo_iter_filename_dict : dict
+		Dictionary containing the filenames for each Monte Carlo iteration.
+	"""
+
+	#####################################
+	## import input files from original input
+	#####################################
+	# filename, input_folder_path, output_folder_path, restarting_simulation_dict, monte_carlo_iteration_max, output_txt_format, plot_option, gamma_w, FS_crit, dz, termination_apply, landslide_to_debris_flow_threshold, DEM_surf_dip_infiltration_apply, DEM_debris_flow_criteria_apply, FS_3D_analysis, FS_3D_iter_limit, FS_3D_tol, cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio, FS_3D_apply_side, FS_3D_apply_root, DEM_UCA_compute_all, cpu_num, dt, rain_time_I, DEM_file_name, material_file_name, soil_depth_model, soil_depth_data, ground_water_model, ground_water_data, dip_surf_filename, aspect_surf_filename, dip_base_filename, aspect_base_filename, local_cell_sizes_slope, DEM_debris_flow_initiation_filename, DEM_neighbor_directed_graph_filename, DEM_UCA_filename, material, material_GIS, convert_time, convert_intensity, actual_landslide_inventory_region, ET_time_I, field_capacity_suction = read_RISD_json_yaml_input_v20260228(input_JSON_YAML_file_name)
+
+	copy_input = deepcopy(monte_carlo_iter_filename_dict["original_input"])
+	copy_input["restarting_simulation_JSON"] = None
+
+	filename, _, output_folder_path, _, monte_carlo_iteration_max, output_txt_format, plot_option, gamma_w, FS_crit, dz, termination_apply, landslide_to_debris_flow_threshold, DEM_surf_dip_infiltration_apply, DEM_debris_flow_criteria_apply, FS_3D_analysis, FS_3D_iter_limit, FS_3D_tol, cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio, FS_3D_apply_side, FS_3D_apply_root, _, cpu_num, dt, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _ = read_RISD_json_yaml_input_v20260228(copy_input) 
+	
+	#####################################
+	# store new dictionary
+	#####################################
+	monte_carlo_iter_result_filename_dict = deepcopy(monte_carlo_iter_filename_dict)
+
+	# slope analysis results for each monte-carlo simulation if not existing
+	output_folder_path_iter_temp = f"{output_folder_path}iteration_"
+	for iter_num in range(1,monte_carlo_iteration_max+1):
+	 
+		# create output folder for each Monte Carlo iteration slope stability analysis
+		if not os.path.exists(f"{output_folder_path_iter_temp}{iter_num}/slope/"):
+			os.makedirs(f"{output_folder_path_iter_temp}{iter_num}/slope/", exist_ok=True)			
+
+		# create template for slope stability analysis results
+		if "min_FS" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"] = {}
+		if "crit_FS_z" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["crit_FS_z"] = {}
+		if "debris_flow_source" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"] = {}
+		if "landslide_source" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"] = {}
+		if "runout_depth_source" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["runout_depth_source"] = {}
+		if "FS_3D_screening" not in monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)].keys():
+			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["FS_3D_screening"] = {}   # [skipped, total] number of 3D slip surfaces at each time step
+
+	#####################################
+	# check if all Monte Carlo iterations are completed
+	#####################################
+	check_all_monte_carlo_iterations_completed = 0
+	for iter_num, filename_dict in monte_carlo_iter_filename_dict["iterations"].items(): 
+		# check if simulation is completed
+		if check_3DTSP_iteration_completed(filename_dict):
+			check_all_monte_carlo_iterations_completed += 1 
+
+	if check_all_monte_carlo_iterations_completed == monte_carlo_iteration_max:
+		print(f"		All Monte Carlo iterations Completed.\n")
+		return monte_carlo_iter_result_filename_dict
+
+	######################################
+	# wall time, CPU time and memory usage of each stage - optional (default: not recorded, no profiling)
+	######################################
+	stage_metrics_folder = None
+	stage_metrics_profile = monte_carlo_iter_filename_dict["original_input"].get("stage_metrics_profile", None)
+	if monte_carlo_iter_filename_dict["original_input"].get("stage_metrics_apply", False) or stage_metrics_profile:
+		stage_metrics_folder = f"{output_folder_path}stage_metrics/"
+	stage_metrics = generate_3DTSP_stage_metrics(stage_metrics_folder, filename, None, stage_metrics_profile)
+ 
+	#####################################
+	## import input files from Monte Carlo iteration dictionary
+	#####################################
+	## constant with time - DEM and grid data
+	stage_timer = start_3DTSP_stage(stage_metrics, "read_inputs")
+	DEM_surface, _, _ = read_GIS_data(monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_surface"][1], monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_surface"][0], full_output=False)
+	DEM_noData, _, _ = read_GIS_data(monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_noData"][1], monte_carlo_iter_filename_dict["iterations"]["1"]["DEM_noData"][0], full_output=False)
+	stop_3DTSP_stage(stage_metrics, stage_timer, DEM_surface.size)
+
+	## data types of the rasters held in memory - "double" or "single" precision (default: "double")
+	raster_dtypes = generate_3DTSP_raster_dtypes(monte_carlo_iter_filename_dict["original_input"].get("raster_precision", "double"), DEM_surface.size)
+	DEM_noData = np.rint(DEM_noData).astype(raster_dtypes["mask"])
+
+	## grid information
+	nodata_value = monte_carlo_iter_filename_dict["iterations"]["1"]["nodata_value"]
+	XYZ_row_or_col_increase_first = monte_carlo_iter_filename_dict["iterations"]["1"]["XYZ_row_or_col_increase_first"]
+	deltaX = monte_carlo_iter_filename_dict["iterations"]["1"]["deltaX"]
+	deltaY = monte_carlo_iter_filename_dict["iterations"]["1"]["deltaY"]
+	gridUniqueX = np.arange(monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueX_min"], monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueX_max"]+0.1*deltaX, deltaX)
+	gridUniqueY = np.arange(monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueY_min"], monte_carlo_iter_filename_dict["iterations"]["1"]["gridUniqueY_max"]+0.1*deltaY, deltaY)
 
+	## decimal point information
+	dx_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["dx_dp"]
+	dy_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["dy_dp"]
+	dz_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["dz_dp"]
+	rate_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["rate_dp"]
+	t_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["t_dp"]
+	theta_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["theta_dp"]
+	press_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["press_dp"]
+	cumul_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["cumul_dp"]
+	FS_dp = monte_carlo_iter_filename_dict["iterations"]["1"]["FS_dp"]
 
-			# export data
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "min_FS", min_comp_FS, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, FS_dp, time=start_time_step, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "crit_FS_z", failure_soil_thickness, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=start_time_step, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "debris_flow_source", debris_flow_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=start_time_step, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "landslide_source", landslide_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=start_time_step, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "runout_depth_source", runout_depth_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=start_time_step, iteration=iter_num)
-
-			#############################
-			## progress track
-			############################# 
-			start_time = filename_dict["intensity"][str(start_time_step)][2] 
-			if start_time >= 3600: 	# time is in hours
-				print(f"iteration {iter_num}, completed time-step: {start_time_step}, current time: {start_time/3600:.2f}hr; completion: {100*(start_time_step)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
-			else:  # time is in seconds
-				print(f"iteration {iter_num}, completed time-step: {start_time_step}, current time: {start_time:,}s; completion: {100*(start_time_step)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
-	
-			# export final all input and results JSON file - save to keep track of the simulations
-			with open(f"{output_folder_path}{filename} - all_input_results.json", 'w') as f:
-				json.dump(monte_carlo_iter_result_filename_dict, f, indent=4, cls=json_serialize)
+	######################################################
+	## generate all possible combinations of DEM cell groupings for 3D slope stability analysis
+	######################################################	
+	# this is same for all Monte Carlo iterations so run this outside the loop once
+	unique_slip_surf_grouping_DEM_grid_num = None
+	DEM_grid_num = None
+	if isinstance(FS_3D_analysis, bool) and FS_3D_analysis:
 
-		#####################################
-		## iterate through time steps
-		#####################################
-		for time_step in range(start_time_step, max_time_step):
-			
-			#####################################
-			# GIS data at given time step
-			#####################################
-			rain_t, _, _ = read_GIS_data(filename_dict["intensity"][str(time_step)][1], filename_dict["intensity"][str(time_step)][0], full_output=False)
-			cur_time = filename_dict["intensity"][str(time_step)][3] # end of the time in the current time step
-
-			# ET rate at current time step
-			if "ET_rate" in filename_dict and str(time_step) in filename_dict["ET_rate"]:
-				ET_t, _, _ = read_GIS_data(filename_dict["ET_rate"][str(time_step)][1], filename_dict["ET_rate"][str(time_step)][0], full_output=False)
-			else:
-				ET_t = np.zeros(DEM_surface.shape)
-   
-			if time_step == start_time_step:
-				# gwt_dz_t, _, _ = read_GIS_data(filename_dict["gwt_dz"][str(time_step)][1], filename_dict["gwt_dz"][str(time_step)][0], full_output=False)
-				gwt_z_t, _, _ = read_GIS_data(filename_dict["gwt_z"][str(time_step)][1], filename_dict["gwt_z"][str(time_step)][0], full_output=False)
-				Surface_Storage_t, _, _ = read_GIS_data(filename_dict["Surface_Storage"][str(time_step)][1], filename_dict["Surface_Storage"][str(time_step)][0], full_output=False)
-				Precipitation_t, _, _ = read_GIS_data(filename_dict["Precipitation"][str(time_step)][1], filename_dict["Precipitation"][str(time_step)][0], full_output=False)
-				Runoff_t, _, _ = read_GIS_data(filename_dict["Runoff"][str(time_step)][1], filename_dict["Runoff"][str(time_step)][0], full_output=False)
-				f_rate_t, _, _ = read_GIS_data(filename_dict["f_rate"][str(time_step)][1], filename_dict["f_rate"][str(time_step)][0], full_output=False)
-				F_cumul_t, _, _ = read_GIS_data(filename_dict["F_cumul"][str(time_step)][1], filename_dict["F_cumul"][str(time_step)][0], full_output=False)
-				z_w_t, _, _ = read_GIS_data(filename_dict["z_w"][str(time_step)][1], filename_dict["z_w"][str(time_step)][0], full_output=False)
-				wet_z_t, _, _ = read_GIS_data(filename_dict["wet_z"][str(time_step)][1], filename_dict["wet_z"][str(time_step)][0], full_output=False)
-				if "ET_cumul" in filename_dict and str(time_step) in filename_dict["ET_cumul"]:
-					ET_cumul_t, _, _ = read_GIS_data(filename_dict["ET_cumul"][str(time_step)][1], filename_dict["ET_cumul"][str(time_step)][0], full_output=False)
-				else:
-					ET_cumul_t = np.zeros(DEM_surface.shape)
-			else:
-				# gwt_dz_t = np.copy(gwt_dz_new_f)
-				gwt_z_t = np.copy(gwt_z_new_f)
-				Surface_Storage_t = np.copy(S_f)
-				Precipitation_t = np.copy(P_f)
-				Runoff_t = np.copy(RO_f)
-				f_rate_t = np.copy(infil_rate_f_f)
-				F_cumul_t = np.copy(infil_cumul_F_f)
-				z_w_t = np.copy(infil_zw_f)
-				wet_z_t = np.copy(wetting_front_z_f)
-				ET_cumul_t = np.copy(ET_cumul_f)
-
-			#####################################################
-			## 1D transient Green-Ampt analysis
-			######################################################
+		print('The programming is generating the slip surface data for 3D slope stability analysis ... \n')
+		
+		###################
+		## generate local slip surfaces (plan-view) using superellipse shape
+		###################
+		group_side_slip_surf_grouping = generate_local_superellipse_grouping_v1_10(cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio)
+		# group_side_N_min, group_side_N_max, n_param, x_a_y_b_ratio
 
-			# multiprocessing data setup
-			compute_GA_slanted_nonUniRain_input = []
-			for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))):
+		###################
+		## simply generate DEM cell groupings in global coordinates 
+		###################
+		# assign unique number to each DEM cell 
+		# use to identify unique cell groupings
+		DEM_grid_num = np.arange(int(len(gridUniqueY)*len(gridUniqueX))).reshape((len(gridUniqueY), len(gridUniqueX))).astype(raster_dtypes["cell_id"])
 
-				# skip any DEM cell with soil depth less than the minimum depth increment - too small for analysis
-				if soil_thickness[i,j] <= dz or DEM_noData[i,j] == 0:
-					continue
+		# multiprocess input file			
+		generate_global_superellipse_slip_surface_input = []
+		for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))): 
+			generate_global_superellipse_slip_surface_input.append((i, j, cell_size_3DFS_min, cell_size_3DFS_max, group_side_slip_surf_grouping, len(gridUniqueY), len(gridUniqueX), DEM_grid_num))
+			# g_row_y, g_col_x, group_side_N_min, group_side_N_max, group_side_slip_surf_grouping, len_DEM_y_grid, len_DEM_x_grid, DEM_grid_num
 
-				if DEM_surf_dip_infiltration_apply:
-					surf_dip_i = dip_surf_deg[i,j]
-				else:
-					surf_dip_i = 0 
-
-				# general surface (90 > beta >= 0)
-				# i, j, z_top, z_bottom, z_length, infil_zw_pre, wetting_front_z_pre, gwt_z_pre, rain_I, k_sat_z, cur_t, dt, T_p, T_pp, delta_theta, psi_r_head, infil_cumul_F_pre, slope_beta_deg, P_pre, S_pre, RO_pre, infil_rate_f_pre, S_max, cumul_dp, t_dp, rate_dp, dz_dp, ET_rate, theta_FC, theta_residual, theta_sat, ET_cumul_pre = compute_GA_slanted_nonUniRain_input
-				compute_GA_slanted_nonUniRain_input.append( (i, j, DEM_surface[i,j], bedrock_surface[i,j], soil_thickness[i,j], z_w_t[i,j], wet_z_t[i,j], gwt_z_t[i,j], rain_t[i,j], k_sat[i,j], cur_time, dt, T_p[i,j], T_pp[i,j], delta_theta[i,j], psi_r[i,j]/gamma_w, F_cumul_t[i,j], surf_dip_i, Precipitation_t[i,j], Surface_Storage_t[i,j], Runoff_t[i,j], f_rate_t[i,j], S_max[i,j], cumul_dp, t_dp, rate_dp, dz_dp, ET_t[i,j], theta_FC[i,j], theta_residual[i,j], theta_sat[i,j], ET_cumul_t[i,j]) )
-
-			# run infilatration analysis
-			pool_1DGA_t = mp.Pool(cpu_num)
-
-			comp_1DGS_output = pool_1DGA_t.map(compute_GA_nonUniRain_slanted_MP, compute_GA_slanted_nonUniRain_input)
-			# i, j, P_new, S_new, RO_new, infil_cumul_F_new, infil_rate_f_new, gwt_z_new, infil_zw_new, wetting_front_z_new, ET_cumul_new
-
-			pool_1DGA_t.close()
-			pool_1DGA_t.join()
-
-			# join and store computed data
-			P_f = np.zeros(DEM_surface.shape)
-			S_f = np.zeros(DEM_surface.shape)
-			RO_f = np.zeros(DEM_surface.shape)
-			infil_rate_f_f = np.zeros(DEM_surface.shape)
-			infil_cumul_F_f = np.zeros(DEM_surface.shape)
-			infil_zw_f = np.zeros(DEM_surface.shape)
-			wetting_front_z_f = np.zeros(DEM_surface.shape)
-			gwt_z_new_f = np.zeros(DEM_surface.shape)
-			gwt_dz_new_f = np.zeros(DEM_surface.shape)
-			ET_cumul_f = np.zeros(DEM_surface.shape)
-			for (i, j, P_new, S_new, RO_new, infil_cumul_F_new, infil_rate_f_new, gwt_z_new, infil_zw_new, wetting_front_z_new, ET_cumul_new) in comp_1DGS_output:
-				P_f[i,j] = P_new
-				S_f[i,j] = S_new
-				RO_f[i,j] = RO_new
-				infil_rate_f_f[i,j] = infil_rate_f_new
-				infil_cumul_F_f[i,j] = infil_cumul_F_new
-				infil_zw_f[i,j] = infil_zw_new
-				wetting_front_z_f[i,j] = wetting_front_z_new
-				gwt_z_new_f[i,j] = gwt_z_new
-				gwt_dz_new_f[i,j] = DEM_surface[i,j] - gwt_z_new  
-				ET_cumul_f[i,j] = ET_cumul_new
+		# generate all possible combinations of DEM cell groupings
+		stage_timer = start_3DTSP_stage(stage_metrics, "slip_generation_stage1")
+		slip_surface_data_stage1 = map_3DTSP_stage_MP(generate_global_superellipse_grouping_MP_v1_00, generate_global_superellipse_slip_surface_input, cpu_num)   
+		# all_slip_surf_data_temp - current
 
-			# add results to the filename dictionary
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["gwt_dz"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_dz - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["gwt_z"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_z - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["Surface_Storage"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Surface_Storage - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["Precipitation"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Precipitation - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["Runoff"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Runoff - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["f_rate"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - f_rate - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["F_cumul"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - F_cumul - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["z_w"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - z_w - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["wet_z"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - wet_z - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-			monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["ET_cumul"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - ET_cumul - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-
-			# generate plots
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - gwt_dz - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_dz - t{time_step+1} - i{iter_num}", 'gwt_dz', gridUniqueX, gridUniqueY, None, gwt_dz_new_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - gwt_z - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - gwt_z - t{time_step+1} - i{iter_num}", 'gwt_z', gridUniqueX, gridUniqueY, None, gwt_z_new_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - Surface_Storage - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Surface_Storage - t{time_step+1} - i{iter_num}", 'S', gridUniqueX, gridUniqueY, None, S_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - Precipitation - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Precipitation - t{time_step+1} - i{iter_num}", 'P', gridUniqueX, gridUniqueY, None, P_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - Runoff - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - Runoff - t{time_step+1} - i{iter_num}", 'RO', gridUniqueX, gridUniqueY, None, RO_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - f_rate - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - f_rate - t{time_step+1} - i{iter_num}", 'f', gridUniqueX, gridUniqueY, None, infil_rate_f_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - F_cumul - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - F_cumul - t{time_step+1} - i{iter_num}", 'F', gridUniqueX, gridUniqueY, None, infil_cumul_F_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - z_w - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - z_w - t{time_step+1} - i{iter_num}", 'z_w', gridUniqueX, gridUniqueY, None, infil_zw_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - wet_z - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - wet_z - t{time_step+1} - i{iter_num}", 'wet_z', gridUniqueX, gridUniqueY, None, wetting_front_z_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-			if os.path.exists(f"{output_folder_path}iteration_{iter_num}/hydraulics/{filename} - ET_cumul - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-				plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/hydraulics/", f"{filename} - ET_cumul - t{time_step+1} - i{iter_num}", 'ET_cumul', gridUniqueX, gridUniqueY, None, ET_cumul_f, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-
-			# generate output file
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "gwt_dz", gwt_dz_new_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "gwt_z", gwt_z_new_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "Surface_Storage", S_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "Precipitation", P_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "Runoff", RO_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "f_rate", infil_rate_f_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, rate_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "F_cumul", infil_cumul_F_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "z_w", infil_zw_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "wet_z", wetting_front_z_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
-			generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/hydraulics/", filename, "ET_cumul", ET_cumul_f, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, cumul_dp, time=time_step+1, iteration=iter_num)
-
-			#############################
-			## Physically-based slope stability
-			#############################
-			if FS_3D_analysis is not None: 
+		# only take in unique DEM cell groupings
+		unique_slip_surf_grouping_DEM_grid_num = list(set(list(itertools.chain.from_iterable(slip_surface_data_stage1))))
+		stop_3DTSP_stage(stage_metrics, stage_timer, len(generate_global_superellipse_slip_surface_input))
+		# unique_slip_surf_grouping_DEM_grid_num_list = [list(item) if isinstance(item, tuple) else int(item) for item in unique_slip_surf_grouping_DEM_grid_num]  
 
-				### cell 3D slope stability
-				if FS_3D_analysis:
 
-					###################
-					## update water-related information and perform slope stability analysis for each generated slip surface
-					###################
-					# multiprocessing input
-					compute_t_3DFS_input_temp = compute_t_3DFS_input[:]
-					del compute_t_3DFS_input
+	# running statistics of all Monte Carlo iterations - updated at each time step and used for the probabilistic analysis
+	os.makedirs(f"{output_folder_path}probabilistic_results/online_statistics/", exist_ok=True)
 
-					compute_t_3DFS_input = []
-					for slip_data_temp in compute_t_3DFS_input_temp:
-			
-						slip_data = list(slip_data_temp)
+	# infinite slope pre-screening of the 3D slip surfaces - skip if infinite slope FS >= FS_crit + margin at all DEM cells of the slip surface
+	FS_3D_screening_margin = None
+	if FS_3D_analysis and monte_carlo_iter_filename_dict["original_input"].get("FS_3D_screening_apply", False):
+		FS_3D_screening_margin = float(monte_carlo_iter_filename_dict["original_input"].get("FS_3D_screening_margin", 0.5))
 
-						# critical_depth_3D_FS_MP_input
-						# 0truncated_inside_row_y_col_x_global_idx, 1local_ext_id, 2local_z_t, 3local_z_b, 4local_gw_z, 5local_front_z, 6local_psi_r, 7local_psi_i, 8local_base_dip_rad, 9local_base_aspect_rad, 10local_gamma_s, 11local_phi_eff_rad, 12local_phi_b_rad, 13local_c, 14local_veg_areal_weight, 15local_root_c_base, 16local_root_c_side, 17local_root_depth, 18local_root_vZ_alpha2, 19local_root_vZ_beta2, 20local_root_vZ_RR_max, 21local_root_gamma, 22local_root_alpha1, 23local_root_beta1, 24local_root_DBH, 25local_root_d_tri, 26local_root_DB_alpha2, 27local_root_DB_beta2, 28iteration_max, 29min_FS_diff, 30deltaX, 31deltaY, 32dz, 33gamma_w, 34FS_crit, 35correctFS_bool, 36FS_3D_apply_side, 37FS_3D_apply_root, 38DEM_root_model, 39dz_dp, 40press_dp
+	######################################
+	# data shared by all Monte Carlo iterations
+	######################################
+	iteration_shared_data = {
+		"filename": filename,
+		"output_folder_path": output_folder_path,
+		"output_txt_format": output_txt_format,
+		"plot_option": plot_option,
+		"gamma_w": gamma_w,
+		"FS_crit": FS_crit,
+		"dz": dz,
+		"termination_apply": termination_apply,
+		"landslide_to_debris_flow_threshold": landslide_to_debris_flow_threshold,
+		"DEM_surf_dip_infiltration_apply": DEM_surf_dip_infiltration_apply,
+		"DEM_debris_flow_criteria_apply": DEM_debris_flow_criteria_apply,
+		"FS_3D_analysis": FS_3D_analysis,
+		"FS_3D_iter_limit": FS_3D_iter_limit,
+		"FS_3D_tol": FS_3D_tol,
+		"FS_3D_apply_side": FS_3D_apply_side,
+		"FS_3D_apply_root": FS_3D_apply_root,
+		"FS_3D_screening_margin": FS_3D_screening_margin,
+		"dt": dt,
+		"DEM_surface": DEM_surface,
+		"DEM_noData": DEM_noData,
+		"nodata_value": nodata_value,
+		"XYZ_row_or_col_increase_first": XYZ_row_or_col_increase_first,
+		"deltaX": deltaX,
+		"deltaY": deltaY,
+		"gridUniqueX": gridUniqueX,
+		"gridUniqueY": gridUniqueY,
+		"dx_dp": dx_dp,
+		"dy_dp": dy_dp,
+		"dz_dp": dz_dp,
+		"rate_dp": rate_dp,
+		"t_dp": t_dp,
+		"theta_dp": theta_dp,
+		"press_dp": press_dp,
+		"cumul_dp": cumul_dp,
+		"FS_dp": FS_dp,
+		"unique_slip_surf_grouping_DEM_grid_num": unique_slip_surf_grouping_DEM_grid_num,
+		"DEM_grid_num": DEM_grid_num,
+		"FS_thresholds": monte_carlo_iter_filename_dict["original_input"].get("online_statistics_FS_thresholds", [1.0, 1.2, 1.5]),
+		"results_journal_compaction_interval": monte_carlo_iter_filename_dict["original_input"].get("results_journal_compaction_interval", 50),
+		"stage_metrics_folder": stage_metrics_folder,
+		"stage_metrics_profile": stage_metrics_profile,
+		"raster_dtypes": raster_dtypes
+	}
 
+	######################################
+	# sharded execution - iterations are claimed through lock files shared with other workers
+	######################################
+	shard_apply = monte_carlo_iter_filename_dict["original_input"].get("sharded_execution", False)
+	shard_lock_timeout = monte_carlo_iter_filename_dict["original_input"].get("shard_lock_timeout", None)
+	shard_folder_path = f"{output_folder_path}shard_claims/"
+	shard_worker_id = f"{socket.gethostname()}_{os.getpid()}"
+	if shard_apply:
+		os.makedirs(shard_folder_path, exist_ok=True)
+		print(f"Sharded execution - worker {shard_worker_id} claims Monte Carlo iterations from {shard_folder_path} ...\n")
 
-						# only the groundwater condition has changed since pervious simulation
-						# only change 4local_gw_z and 5local_front_z
-						new_local_gw_z = []
-						new_local_front_z = []
-						for (t_y_row, t_x_col) in slip_data[0]:
-							new_local_gw_z.append(gwt_z_new_f[t_y_row, t_x_col])
-							new_local_front_z.append(wetting_front_z_f[t_y_row, t_x_col])
+	######################################
+	# select iteration-level or cell-level parallelism
+	######################################
+	remaining_iter_num_list = [iter_num for iter_num, filename_dict in monte_carlo_iter_filename_dict["iterations"].items() if not check_3DTSP_iteration_completed(filename_dict)]
 
-						slip_data[4] = new_local_gw_z[:]
-						slip_data[5] = new_local_front_z[:]
+	# number of tasks computed at each time step of a single iteration
+	if isinstance(FS_3D_analysis, bool) and FS_3D_analysis:
+		active_cell_num = len(unique_slip_surf_grouping_DEM_grid_num)
+	else:
+		active_cell_num = int(np.count_nonzero(DEM_noData))
 
-						compute_t_3DFS_input.append(slip_data[:])
-						del slip_data
+	parallel_iteration_mode = monte_carlo_iter_filename_dict["original_input"].get("parallel_iteration_mode", "cell")
+	parallel_min_cells_per_cpu = monte_carlo_iter_filename_dict["original_input"].get("parallel_min_cells_per_cpu", 50000)
+	iter_parallel_num, cpu_num_per_iter = select_3DTSP_parallel_scheme(active_cell_num, len(remaining_iter_num_list), cpu_num, parallel_mode=parallel_iteration_mode, min_cells_per_cpu=parallel_min_cells_per_cpu)
 
-					pool_1DGA_3DFS_t = mp.Pool(cpu_num)
+	results_JSON_path = f"{output_folder_path}{filename} - all_input_results.json"
 
-					t_output_failSoil_critFS = pool_1DGA_3DFS_t.map(critical_depth_group_3D_FS_HungrJanbu_MP_v10_00, compute_t_3DFS_input)   # Hungr 1989 + side resistance + root resistance
-					# index = slip surface ID number
-					# failure_soil_thickness_per_DEM_cell, min_comp_FS for each generated slip surface
+	######################################
+	# convergence-driven stopping - no more iterations once the probability of landslide at the final time step has converged
+	######################################
+	convergence_apply = monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_convergence_apply", False)
+	convergence_target_SE = monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_convergence_target_SE", 0.01)
+	convergence_cell_fraction = monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_convergence_cell_fraction", 0.95)
+	convergence_min_iteration = monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_convergence_min_iteration", 50)
+	online_statistics_folder = f"{output_folder_path}probabilistic_results/online_statistics/"
+	if convergence_apply and (shard_apply or FS_3D_analysis is None):
+		print("Convergence-driven stopping is not available with sharded execution or without slope stability analysis - all Monte Carlo iterations are computed.\n")
+		convergence_apply = False
+	if convergence_apply and len(monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_importance_shift", None) or {}) > 0:
+		print("Convergence-driven stopping is not available with importance sampling - all Monte Carlo iterations are computed.\n")
+		convergence_apply = False
+
+	monte_carlo_convergence = None
+	if convergence_apply:
+		monte_carlo_convergence = check_3DTSP_monte_carlo_convergence(online_statistics_folder, filename, convergence_target_SE, convergence_cell_fraction, convergence_min_iteration)
+		if monte_carlo_convergence is not None and monte_carlo_convergence["converged"]:
+			remaining_iter_num_list = []
 
-					pool_1DGA_3DFS_t.close()
-					pool_1DGA_3DFS_t.join()
+	######################################
+	# run the Monte Carlo iterations - cell-level parallelism
+	######################################
+	if iter_parallel_num == 1:
 
-					###################
-					## critical FS per each cell 
-					###################
+		for iter_num, filename_dict in monte_carlo_iter_filename_dict["iterations"].items(): 
 
-					min_comp_FS = np.ones(DEM_surface.shape)*9999 		  # for noData -> 9999
-					failure_soil_thickness = np.zeros(DEM_surface.shape)
-		
-					for ((failure_soil_thickness_per_DEM_cell, min_comp_FS_comp), slip_data) in zip(t_output_failSoil_critFS, compute_t_3DFS_input):
-						for idx,(t_y_row, t_x_col) in enumerate(slip_data[0]):
-							# save the minimum computed factor of safety and track the corresponding failure soil thickness
-							if min_comp_FS[t_y_row, t_x_col] > min_comp_FS_comp:
-								min_comp_FS[t_y_row, t_x_col] = min_comp_FS_comp
-								failure_soil_thickness[t_y_row, t_x_col] = failure_soil_thickness_per_DEM_cell[idx]
+			if not shard_apply:
+				# stop once the probability of landslide has converged
+				if monte_carlo_convergence is not None and monte_carlo_convergence["converged"]:
+					break
 
-					# revert noData from 9999 to -1
-					min_comp_FS = np.where(min_comp_FS == 9999, -1, min_comp_FS)
+				monte_carlo_iter_result_filename_dict = perform_3DTSP_iteration_v2(iter_num, filename_dict, monte_carlo_iter_result_filename_dict, iteration_shared_data, cpu_num_per_iter, results_JSON_path, iteration_only_JSON=False, worker_id=shard_worker_id)
 
-				### infinite slope stability analysis
-				else:
+				if convergence_apply:
+					monte_carlo_convergence = check_3DTSP_monte_carlo_convergence(online_statistics_folder, filename, convergence_target_SE, convergence_cell_fraction, convergence_min_iteration)
+				continue
 
-					# multiprocessing input
-					compute_t_inf_slope_input = []
-					for (i,j) in itertools.product(range(len(gridUniqueY)), range(len(gridUniqueX))): 
-						
-						# skip any DEM cell with soil depth less than the minimum depth increment - too small for analysis
-						if DEM_soil_thickness[i,j] <= dz or DEM_noData[i,j] == 0:
-							continue
+			# skip iterations completed before or claimed by other workers
+			iteration_JSON_path = f"{output_folder_path}iteration_{iter_num}/{filename} - results - i{iter_num}.json"
+			if iter_num not in remaining_iter_num_list or not claim_3DTSP_iteration_shard(shard_folder_path, iter_num, shard_worker_id, shard_lock_timeout, iteration_JSON_path):
+				continue
 
-						# i, j, z_b, z_t, phi, phi_b, c, gamma_s, alpha, gw_z, front_z, psi_i, psi_r, FS_crit, gamma_w, dz, check_only, dz_dp, press_dp = critical_depth_inf_FS_MP_input
-						compute_t_inf_slope_input.append( (i, j, bedrock_surface[i,j], DEM_surface[i,j], soil_phi[i,j], soil_phi_b[i,j], soil_c[i,j], soil_unit_weight[i,j], dip_base_deg[i,j], gwt_z_new_f[i,j], wetting_front_z_f[i,j], initial_suction[i,j], psi_r[i,j], FS_crit, gamma_w, dz, False, dz_dp, press_dp) )
+			# continue from the last time step exported by the earlier worker (if any)
+			monte_carlo_iter_result_filename_dict = merge_3DTSP_iteration_results_JSON(monte_carlo_iter_result_filename_dict, iteration_JSON_path)
+			iteration_filename_dict = deepcopy(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)])
 
-					pool_1DGA_infS_t = mp.Pool(cpu_num)
+			monte_carlo_iter_result_filename_dict = perform_3DTSP_iteration_v2(iter_num, iteration_filename_dict, monte_carlo_iter_result_filename_dict, iteration_shared_data, cpu_num_per_iter, iteration_JSON_path, iteration_only_JSON=True, worker_id=shard_worker_id)
+			
+			# the iteration JSON file is not exported when the iteration was already completed
+			compact_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, iteration_JSON_path, iter_num=iter_num)
+			complete_3DTSP_iteration_shard(shard_folder_path, iter_num, shard_worker_id)
 
-					t_output_FS_data = pool_1DGA_infS_t.map(critical_depth_inf_FS_MP, compute_t_inf_slope_input)
-					# i, j, failure_soil_thickness_t, min_comp_FS_t
+	######################################
+	# run the Monte Carlo iterations - iteration-level parallelism
+	######################################
+	else:
+		print(f"Running {iter_parallel_num} Monte Carlo iterations concurrently with {cpu_num_per_iter} CPU(s) each ({len(remaining_iter_num_list)} iterations remaining) ...\n")
 
-					pool_1DGA_infS_t.close()
-					pool_1DGA_infS_t.join()
+		# non-daemonic processes are used so that each iteration can still create its own multiprocessing pool when cpu_num_per_iter > 1
+		# each concurrent process slot accumulates its own running statistics (see update_3DTSP_online_statistics)
+		running_iter_process = {}
+		while remaining_iter_num_list or running_iter_process:
 
-					## join and store the FS output
-					min_comp_FS = np.ones(bedrock_surface.shape)*-1
-					failure_soil_thickness = np.zeros(bedrock_surface.shape)
+			# start new iterations on the free CPUs
+			while remaining_iter_num_list and len(running_iter_process) < iter_parallel_num:
+				iter_num = remaining_iter_num_list.pop(0)
+				iteration_JSON_path = f"{output_folder_path}iteration_{iter_num}/{filename} - results - i{iter_num}.json"
+				iteration_filename_dict = monte_carlo_iter_filename_dict["iterations"][iter_num]
 
-					for (i,j,crit_zz,min_FSi) in t_output_FS_data:
+				# skip iterations claimed by other workers
+				if shard_apply and not claim_3DTSP_iteration_shard(shard_folder_path, iter_num, shard_worker_id, shard_lock_timeout, iteration_JSON_path):
+					continue
 
-						if min_FSi == 9999: # all error
-							min_FSi = -1
-						min_FSi = min(min_FSi, 10) # in case of very large FS value
+				# continue from the last time step exported by the earlier worker or the stopped process (if any)
+				monte_carlo_iter_result_filename_dict = merge_3DTSP_iteration_results_JSON(monte_carlo_iter_result_filename_dict, iteration_JSON_path)
+				iteration_filename_dict = deepcopy(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)])
 
-						min_comp_FS[i,j] = min_FSi
-						failure_soil_thickness[i,j] = crit_zz
+				# only pass the results of the given iteration to the process
+				iteration_result_filename_dict = {"iterations": {str(iter_num): monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]}}
 
-				################################################################
-				## debris-flow initiation
-				################################################################
-				# landslide source - slope cell with FS < critical FS
-				landslide_source = np.where((min_comp_FS < FS_crit) & (soil_thickness > dz), 1, 0)
+				iter_slot = min(set(range(iter_parallel_num)) - set(slot for (_, _, slot) in running_iter_process.values()))
+				iter_process = mp.Process(target=perform_3DTSP_iteration_v2, args=(iter_num, iteration_filename_dict, iteration_result_filename_dict, iteration_shared_data, cpu_num_per_iter, iteration_JSON_path), kwargs={"iteration_only_JSON": True, "worker_id": f"{shard_worker_id}_p{iter_slot}"})
+				iter_process.start()
+				running_iter_process[iter_num] = (iter_process, iteration_JSON_path, iter_slot)
 
-				# debris-flow initiation condition applied -> check if slope failure become debris-flow
-				if DEM_debris_flow_criteria_apply:
-					debris_flow_source = np.where((min_comp_FS < FS_crit) & (DEM_debris_flow_criteria == 1) & (soil_thickness > dz), 1, 0)
-				# debris-flow initiation condition not applied -> then all slope can become debris-flow
-				else:  
-					debris_flow_source = np.copy(landslide_source)
-
-				# failure depth of debris flow source area - for runout analysis
-				runout_depth_source = np.where(debris_flow_source == 1, failure_soil_thickness, 0)
-
-				################################################################
-				## store and export data 
-				################################################################
-				# add results to the filename dictionary
-				monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-				monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["crit_FS_z"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-				monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-				monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-				monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["runout_depth_source"][str(time_step+1)] = [f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{time_step+1} - i{iter_num}.{output_txt_format}"]
-    
-				# plot data
-				if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - min_FS - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-					plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - min_FS - t{time_step+1} - i{iter_num}", 'FS', gridUniqueX, gridUniqueY, None, min_comp_FS, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-				if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - crit_FS_z - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-					plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - crit_FS_z - t{time_step+1} - i{iter_num}", 'fail_dz', gridUniqueX, gridUniqueY, None, failure_soil_thickness, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
-				if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - debris_flow_source - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-					plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - debris_flow_source - t{time_step+1} - i{iter_num}", 'dfs', gridUniqueX, gridUniqueY, None, debris_flow_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
-				if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - landslide_source - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-					plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - landslide_source - t{time_step+1} - i{iter_num}", 'source', gridUniqueX, gridUniqueY, None, landslide_source, contour_limit=[0, 1.0, 0.5], open_html=False, layout_width=1000, layout_height=1000)
-				if os.path.exists(f"{output_folder_path}iteration_{iter_num}/slope/{filename} - runout_depth_source - t{time_step+1} - i{iter_num}.html") == False and plot_option:
-					plot_DEM_mat_map_v8_0(f"{output_folder_path}iteration_{iter_num}/slope/", f"{filename} - runout_depth_source - t{time_step+1} - i{iter_num}", 'run_h0', gridUniqueX, gridUniqueY, None, runout_depth_source, contour_limit=None, open_html=False, layout_width=1000, layout_height=1000)
+			# all remaining iterations were claimed by other workers
+			if not running_iter_process:
+				break
 
-				# export data
-				generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "min_FS", min_comp_FS, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, FS_dp, time=time_step+1, iteration=iter_num)
-				generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "crit_FS_z", failure_soil_thickness, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=time_step+1, iteration=iter_num)
-				generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "debris_flow_source", debris_flow_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=time_step+1, iteration=iter_num)
-				generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "landslide_source", landslide_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=time_step+1, iteration=iter_num)
-				generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/slope/", filename, "runout_depth_source", runout_depth_source, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 0, time=time_step+1, iteration=iter_num)
-
-			#############################
-			## progress track
-			############################# 
-			if cur_time >= 3600: 	# time is in hours
-				print(f"iteration {iter_num}, completed time-step: {time_step+1}, current time: {cur_time/3600:.2f}hr; completion: {100*(time_step+1)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
-			else:  # time is in seconds
-				print(f"iteration {iter_num}, completed time-step: {time_step+1}, current time: {cur_time:,}s; completion: {100*(time_step+1)/max_time_step:.2f}%") 	#; debris-flow simuilation time: {debris_cur_t}s")
-
-			# export final all input and results JSON file - save to keep track of the simulations
-			with open(f"{output_folder_path}{filename} - all_input_results.json", 'w') as f:
-				json.dump(monte_carlo_iter_result_filename_dict, f, indent=4, cls=json_serialize)
-
-			#############################
-			## termination condition
-			############################# 
-			# terminate when enough landslide failure or debris-flow source has occurred during the simulation
-			if termination_apply:
-				if DEM_debris_flow_criteria_apply: # get debris flow source 
-
-					# clustering to determine 
-					debris_flow_cluster_label, debris_flow_cluster_sizes = hoshen_kopelman(debris_flow_source, connectivity=4) 	# only consider orthogonal connection for landslide source clustering 
-
-					# determine the landslide cluster souce with the largest area i.e. size
-					if debris_flow_cluster_sizes:  # there is at least single cluster
-						largest_debris_flow_cluster_label = max(debris_flow_cluster_sizes, key=debris_flow_cluster_sizes.get)
-						largest_cluster_area = debris_flow_cluster_sizes[largest_debris_flow_cluster_label]*deltaX*deltaY
-						largest_cluster_volume = float(np.where(debris_flow_cluster_label == largest_debris_flow_cluster_label, failure_soil_thickness, 0).sum()*deltaX*deltaY)
-						largest_cluster_max_depth = float(np.max(np.where(debris_flow_cluster_label == largest_debris_flow_cluster_label, runout_depth_source, 0)))
-					else:
-						largest_cluster_area = 0
-						largest_cluster_volume = 0
-						largest_cluster_max_depth = 0
+			# wait until at least one iteration is finished
+			mp_connection_wait([iter_process.sentinel for (iter_process, _, _) in running_iter_process.values()])
 
-				else:  # find threshold based on landslide source
+			# merge the results of finished iterations into the results filename dictionary
+			for iter_num in list(running_iter_process.keys()):
+				iter_process, iteration_JSON_path, _ = running_iter_process[iter_num]
+				if iter_process.is_alive():
+					continue
 
-					# depth threshold
-					landslide_depth_source = np.where(landslide_source == 1, failure_soil_thickness, 0)
-    
-					# clustering to determine 
-					landslide_cluster_label, landslide_cluster_sizes = hoshen_kopelman(landslide_source, connectivity=4) 	# only consider orthogonal connection for landslide source clustering 
-
-					# determine the landslide cluster souce with the largest area i.e. size
-					if landslide_cluster_sizes:  # there is at least single cluster
-						largest_landslide_cluster_label = max(landslide_cluster_sizes, key=landslide_cluster_sizes.get)
-						largest_cluster_area = landslide_cluster_sizes[largest_landslide_cluster_label]*deltaX*deltaY
-						largest_cluster_volume = float(np.where(landslide_cluster_label == largest_landslide_cluster_label, failure_soil_thickness, 0).sum()*deltaX*deltaY)
-						largest_cluster_max_depth = float(np.max(np.where(landslide_cluster_label == largest_landslide_cluster_label, landslide_depth_source, 0)))
-					else:
-						largest_cluster_area = 0
-						largest_cluster_volume = 0
-						largest_cluster_max_depth = 0
+				iter_process.join()
+				del running_iter_process[iter_num]
+
+				# the iteration journal file is appended every time step, so partially completed iterations are kept for restarting
+				monte_carlo_iter_result_filename_dict = merge_3DTSP_iteration_results_JSON(monte_carlo_iter_result_filename_dict, iteration_JSON_path)
+				compact_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, iteration_JSON_path, iter_num=iter_num)
+				if iter_process.exitcode != 0:
+					print(f"Monte Carlo iteration {iter_num} stopped with exit code {iter_process.exitcode}. Restart the simulation with the restarting_simulation_JSON option to complete the iteration.\n")
+				elif shard_apply:
+					complete_3DTSP_iteration_shard(shard_folder_path, iter_num, shard_worker_id)
+
+				# export final all input and results JSON file - save to keep track of the simulations
+				# with sharded execution, the merged results are only exported after all workers are finished
+				if not shard_apply:
+					compact_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path)
+
+				# stop starting new iterations once the probability of landslide has converged
+				# iterations are started in order, so the iterations with smaller number are all started or completed
+				if convergence_apply:
+					monte_carlo_convergence = check_3DTSP_monte_carlo_convergence(online_statistics_folder, filename, convergence_target_SE, convergence_cell_fraction, convergence_min_iteration)
+					if monte_carlo_convergence is not None and monte_carlo_convergence["converged"]:
+						remaining_iter_num_list = []
 
-				if (largest_cluster_max_depth >= landslide_to_debris_flow_threshold["depth"] and 
-					largest_cluster_area >= landslide_to_debris_flow_threshold["area"] and 
-					largest_cluster_volume >= landslide_to_debris_flow_threshold["volume"]):
-        
-					print(f"Termination condition is met at iteration {iter_num}, time-step {time_step+1} with landslide cluster with max failure depth {largest_cluster_max_depth:.2f}m, area {largest_cluster_area:.2f}m^2, and volume {largest_cluster_volume:.2f}m^3. Simulation is terminated.\n")
-					break
+	######################################
+	# sharded execution - merge the results of all workers
+	######################################
+	if shard_apply:
+		monte_carlo_iter_result_filename_dict = merge_3DTSP_shard_results(monte_carlo_iter_result_filename_dict, monte_carlo_iter_filename_dict, shard_folder_path, shard_worker_id, output_folder_path, filename)
+		if monte_carlo_iter_result_filename_dict is None:
+			return None
 
-		print(f'		 Computation of combined rainfall infiltration and slope stability for iteration {iter_num} is completed!\n')
+	else:
+		# converged - only keep the completed iterations, so that the probabilistic analysis uses monte_carlo_iteration_max iterations
+		# iterations completed out of order after the first incomplete iteration are removed, and the running statistics including
+		# them are computed again from the kept iterations in collect_3DTSP_online_statistics
+		if monte_carlo_convergence is not None and monte_carlo_convergence["converged"]:
+			converged_iteration_max = 0
+			while converged_iteration_max < monte_carlo_iteration_max and check_3DTSP_iteration_completed(monte_carlo_iter_result_filename_dict["iterations"][str(converged_iteration_max+1)]):
+				converged_iteration_max += 1
+			for iter_num in range(converged_iteration_max+1, monte_carlo_iteration_max+1):
+				del monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]
+			monte_carlo_iter_result_filename_dict["original_input"]["monte_carlo_iteration_max"] = converged_iteration_max
+			monte_carlo_iter_result_filename_dict["monte_carlo_convergence"] = monte_carlo_convergence
+
+			print(f"Probability of landslide converged after {converged_iteration_max} of {monte_carlo_iteration_max} Monte Carlo iterations - {100*monte_carlo_convergence['converged_cell_fraction']:.1f}% of DEM cells with standard error <= {convergence_target_SE:g} (max {monte_carlo_convergence['max_SE']:.4f}, mean {monte_carlo_convergence['mean_SE']:.4f}).\n")
+
+		# export all results and remove the journal
+		stage_timer = start_3DTSP_stage(stage_metrics, "manifest_save")
+		compact_3DTSP_results_journal(monte_carlo_iter_result_filename_dict, results_JSON_path)
+		stop_3DTSP_stage(stage_metrics, stage_timer)
+
+	# total of each stage over all time steps and Monte Carlo iterations
+	if stage_metrics_folder is not None:
+		summarize_3DTSP_stage_metrics(stage_metrics_folder, filename)
 
 	print(f'		 Computation of combined rainfall infiltration and slope stability is completed!\n')
 
@@ -8431,6 +10451,12 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 	if not os.path.exists(probabilistic_results_folder):
 		os.makedirs(probabilistic_results_folder, exist_ok=True)
 
+	## running statistics accumulated by each worker during the simulation (see update_3DTSP_online_statistics)
+	# merged once for each time step; iterations missing from the running statistics are read from the results GIS files
+	online_statistics_folder = f"{probabilistic_results_folder}online_statistics/"
+	FS_thresholds = monte_carlo_iter_result_filename_dict["original_input"].get("online_statistics_FS_thresholds", [1.0, 1.2, 1.5])
+	grid_shape = (len(gridUniqueY), len(gridUniqueX))
+
 	#############################################################
 	## for each time step
 	#############################################################
@@ -8439,18 +10465,12 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 		time_max = max(len(monte_carlo_iter_result_filename_dict["iterations"]["1"]["intensity"]), len(monte_carlo_iter_result_filename_dict["iterations"]["1"]["min_FS"]))
 
 		for time_step in range(time_max):
-			prob_susceptibility_landslide = np.zeros((len(gridUniqueY), len(gridUniqueX)), dtype=float)  # susceptibility map for shallow landslides
-			prob_susceptibility_debris_flow = np.zeros((len(gridUniqueY), len(gridUniqueX)), dtype=float)  # susceptibility map for debris flows initiation
-			
-			for iter_num in range(1, monte_carlo_iteration_max+1):
-				landslide_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(time_step)][0], full_output=False) 
-				debris_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(time_step)][0], full_output=False) 
-				
-				prob_susceptibility_landslide = prob_susceptibility_landslide + landslide_suscept_i
-				prob_susceptibility_debris_flow = prob_susceptibility_debris_flow + debris_suscept_i 
-			
-			prob_susceptibility_landslide = prob_susceptibility_landslide / monte_carlo_iteration_max
-			prob_susceptibility_debris_flow = prob_susceptibility_debris_flow / monte_carlo_iteration_max
+			# running statistics accumulated during the simulation - susceptibility map for shallow landslides and debris flows initiation
+			online_statistics = collect_3DTSP_online_statistics(online_statistics_folder, filename, f"t{time_step}", monte_carlo_iter_result_filename_dict, [time_step]*monte_carlo_iteration_max, FS_thresholds, grid_shape)
+
+			# sum of the importance sampling weights of the iterations (number of iterations without importance sampling)
+			prob_susceptibility_landslide = online_statistics["landslide_weight"] / monte_carlo_iteration_max
+			prob_susceptibility_debris_flow = online_statistics["debris_flow_weight"] / monte_carlo_iteration_max
 
 			# add results to the filename dictionary
 			monte_carlo_iter_result_prob_filename_dict["probabilistic_landslide"][str(time_step)] = [probabilistic_results_folder, f"{filename} - prob_susceptibility_landslide - t{time_step}.{output_txt_format}"]
@@ -8471,18 +10491,12 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 		time_max = min([min(len(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["intensity"]), len(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"])) for iter_num in range(1, monte_carlo_iteration_max+1)])
 
 		for time_step in range(time_max):
-			prob_susceptibility_landslide = np.zeros((len(gridUniqueY), len(gridUniqueX)), dtype=float)  # susceptibility map for shallow landslides
-			prob_susceptibility_debris_flow = np.zeros((len(gridUniqueY), len(gridUniqueX)), dtype=float)  # susceptibility map for debris flows initiation
-			
-			for iter_num in range(1, monte_carlo_iteration_max+1):
-				landslide_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(time_step)][0], full_output=False) 
-				debris_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(time_step)][0], full_output=False) 
-				
-				prob_susceptibility_landslide = prob_susceptibility_landslide + landslide_suscept_i
-				prob_susceptibility_debris_flow = prob_susceptibility_debris_flow + debris_suscept_i 
-			
-			prob_susceptibility_landslide = prob_susceptibility_landslide / monte_carlo_iteration_max
-			prob_susceptibility_debris_flow = prob_susceptibility_debris_flow / monte_carlo_iteration_max
+			# running statistics accumulated during the simulation - susceptibility map for shallow landslides and debris flows initiation
+			online_statistics = collect_3DTSP_online_statistics(online_statistics_folder, filename, f"t{time_step}", monte_carlo_iter_result_filename_dict, [time_step]*monte_carlo_iteration_max, FS_thresholds, grid_shape)
+
+			# sum of the importance sampling weights of the iterations (number of iterations without importance sampling)
+			prob_susceptibility_landslide = online_statistics["landslide_weight"] / monte_carlo_iteration_max
+			prob_susceptibility_debris_flow = online_statistics["debris_flow_weight"] / monte_carlo_iteration_max
 
 			# add results to the filename dictionary
 			monte_carlo_iter_result_prob_filename_dict["probabilistic_landslide"][str(time_step)] = [probabilistic_results_folder, f"{filename} - prob_susceptibility_landslide - t{time_step}.{output_txt_format}"]
@@ -8501,19 +10515,11 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 	#############################################################
 	## for the final - when termination_apply == True 
 	#############################################################
-	prob_susceptibility_landslide_final = np.zeros((len(gridUniqueY), len(gridUniqueX)), dtype=float)  # susceptibility map for shallow landslides
-	prob_susceptibility_debris_flow_final = np.zeros((len(gridUniqueY), len(gridUniqueX)), dtype=float)  # susceptibility map for debris flows initiation
-	
-	for iter_num in range(1, monte_carlo_iteration_max+1):
-		final_time_step = len(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"]) - 1
-		landslide_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(final_time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(final_time_step)][0], full_output=False) 
-		debris_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(final_time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(final_time_step)][0], full_output=False) 
-		
-		prob_susceptibility_landslide_final = prob_susceptibility_landslide_final + landslide_suscept_i
-		prob_susceptibility_debris_flow_final = prob_susceptibility_debris_flow_final + debris_suscept_i
-	
-	prob_susceptibility_landslide_final = prob_susceptibility_landslide_final / monte_carlo_iteration_max
-	prob_susceptibility_debris_flow_final = prob_susceptibility_debris_flow_final / monte_carlo_iteration_max
+	final_time_step_list = [len(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"]) - 1 for iter_num in range(1, monte_carlo_iteration_max+1)]
+	online_statistics_final = collect_3DTSP_online_statistics(online_statistics_folder, filename, "final", monte_carlo_iter_result_filename_dict, final_time_step_list, FS_thresholds, grid_shape)
+
+	prob_susceptibility_landslide_final = online_statistics_final["landslide_weight"] / monte_carlo_iteration_max  # susceptibility map for shallow landslides
+	prob_susceptibility_debris_flow_final = online_statistics_final["debris_flow_weight"] / monte_carlo_iteration_max  # susceptibility map for debris flows initiation
 
 	# add results to the filename dictionary
 	monte_carlo_iter_result_prob_filename_dict["probabilistic_landslide"]["final"] = [probabilistic_results_folder, f"{filename} - prob_susceptibility_landslide - final.{output_txt_format}"]
@@ -8529,6 +10535,29 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 	generate_output_GIS(output_txt_format, probabilistic_results_folder, filename, "prob_susceptibility_landslide - final", prob_susceptibility_landslide_final, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 5, time=None, iteration=None)
 	generate_output_GIS(output_txt_format, probabilistic_results_folder, filename, "prob_susceptibility_debris_flow - final", prob_susceptibility_debris_flow_final, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 5, time=None, iteration=None)
 
+	#############################################################
+	## mean and standard deviation of min_FS and crit_FS_z, and probability of min_FS below the FS thresholds at the final time step
+	#############################################################
+	FS_count_final = online_statistics_final["FS_count"]
+	final_statistics_map_dict = {
+		"min_FS_mean": np.where(FS_count_final > 0, online_statistics_final["min_FS_mean"], -1),
+		"min_FS_std": np.where(FS_count_final > 1, np.sqrt(online_statistics_final["min_FS_M2"]/np.maximum(FS_count_final-1, 1)), 0),
+		"crit_FS_z_mean": online_statistics_final["crit_FS_z_mean"],
+		"crit_FS_z_std": np.where(FS_count_final > 1, np.sqrt(online_statistics_final["crit_FS_z_M2"]/np.maximum(FS_count_final-1, 1)), 0)
+	}
+	for thres_idx, FS_thres in enumerate(online_statistics_final["FS_thresholds"]):
+		final_statistics_map_dict[f"prob_FS_below_{FS_thres:g}"] = online_statistics_final["FS_below_weight"][thres_idx] / monte_carlo_iteration_max
+
+	# coefficient of variation of the probability of landslide and debris flow (precision of the Monte Carlo or importance sampling estimate) - -1 if the probability is 0
+	for prob_name, prob_final in [("landslide", prob_susceptibility_landslide_final), ("debris_flow", prob_susceptibility_debris_flow_final)]:
+		prob_SE = np.sqrt(np.maximum(online_statistics_final[f"{prob_name}_weight_sq"]/monte_carlo_iteration_max - prob_final**2, 0)/monte_carlo_iteration_max)
+		final_statistics_map_dict[f"prob_susceptibility_{prob_name}_CoV"] = np.divide(prob_SE, prob_final, out=-np.ones(prob_final.shape), where=(prob_final > 0))
+
+	monte_carlo_iter_result_prob_filename_dict["probabilistic_statistics"] = {}
+	for stat_name, stat_map in final_statistics_map_dict.items():
+		monte_carlo_iter_result_prob_filename_dict["probabilistic_statistics"][stat_name] = [probabilistic_results_folder, f"{filename} - {stat_name} - final.{output_txt_format}"]
+		generate_output_GIS(output_txt_format, probabilistic_results_folder, filename, f"{stat_name} - final", stat_map, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, 5, time=None, iteration=None)
+
 	#############################################################
 	## compute the probability of landslide and debris flow occurrence for each pixel based on the final time step when termination condition is met for each iteration
 	#############################################################
@@ -8538,9 +10567,15 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 
 	for iter_num in range(1, monte_carlo_iteration_max+1):
 		# landslide and debris flow source location at the final time step when termination condition
-		final_time_step = len(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["min_FS"]) - 1
-		landslide_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(final_time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(final_time_step)][0], full_output=False) 
-		debris_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(final_time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(final_time_step)][0], full_output=False) 
+		final_source_path = f"{output_folder_path}iteration_{iter_num}/slope/{filename} - final_source - i{iter_num}.npz"
+		if os.path.exists(final_source_path):
+			with np.load(final_source_path) as final_source_npz:
+				landslide_suscept_i = final_source_npz["landslide_source"].astype(int)
+				debris_suscept_i = final_source_npz["debris_flow_source"].astype(int)
+		else:
+			final_time_step = final_time_step_list[iter_num-1]
+			landslide_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(final_time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["landslide_source"][str(final_time_step)][0], full_output=False) 
+			debris_suscept_i, _, _ = read_GIS_data(monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(final_time_step)][1], monte_carlo_iter_result_filename_dict["iterations"][str(iter_num)]["debris_flow_source"][str(final_time_step)][0], full_output=False) 
 
 		# list all probabilities for landslide and debris flow occurrence for each pixel based on the final time step when termination condition is met for each iteration
 		landslide_occurrence_probability_final_cell = np.where(landslide_suscept_i == 1, prob_susceptibility_landslide_final, -1)  
@@ -8594,11 +10629,396 @@ def run_probabilistic_results_v2_00(monte_carlo_iter_result_filename_dict):
 	return monte_carlo_iter_result_prob_filename_dict
 
 
+###########################################################################
+## tiled domain decomposition
+###########################################################################
+def compute_3DTSP_tile_halo(FS_3D_analysis, cell_size_3DFS_max, local_cell_sizes_slope):
+	"""Number of halo DEM cells around each tile for which the interior cells give the same results as the full DEM.
+
+	Parameters
+	----------
+	FS_3D_analysis : None | bool
+		None = infiltration only, False = infinite slope, True = 3D Janbu slope stability analysis.
+	cell_size_3DFS_max : int
+		maximum side length (in DEM cells) of the 3D slip surfaces.
+	local_cell_sizes_slope : int
+		side length (in DEM cells) of the local region used to compute the dip and aspect.
+
+	Returns
+	-------
+	int
+		halo width in DEM cells
+	"""
+	# dip and aspect use floor(N/2) cells around each cell (N+2 when too few cells have data)
+	halo_cells = int(np.floor(local_cell_sizes_slope/2)) + 1
+
+	# 3D slip surfaces containing a DEM cell extend up to (cell_size_3DFS_max - 1) cells from the cell, and use the dip of their cells
+	if isinstance(FS_3D_analysis, bool) and FS_3D_analysis:
+		halo_cells += int(cell_size_3DFS_max)
+
+	return halo_cells
+
+def generate_3DTSP_tile_windows(nrows, ncols, tile_size, halo_cells):
+	"""Split the DEM into tiles with halos.
+
+	Parameters
+	----------
+	nrows : int
+		number of rows of the DEM
+	ncols : int
+		number of columns of the DEM
+	tile_size : int | list
+		number of rows and columns of the interior of each tile - [rows, columns] or a single number for square tiles
+	halo_cells : int
+		number of DEM cells added around each tile interior (truncated at the DEM boundary)
+
+	Returns
+	-------
+	list
+		{"tile": "rR_cC", "window": [row_min, row_max, col_min, col_max], "interior": [row_min, row_max, col_min, col_max]} of each tile;
+		row 0 is the northernmost row of the ascii grid and the maximums are excluded
+	"""
+	if isinstance(tile_size, (int, float)):
+		tile_rows, tile_cols = int(tile_size), int(tile_size)
+	else:
+		tile_rows, tile_cols = int(tile_size[0]), int(tile_size[1])
+
+	tile_windows = []
+	for tile_r, row_min in enumerate(range(0, nrows, tile_rows)):
+		for tile_c, col_min in enumerate(range(0, ncols, tile_cols)):
+			interior = [row_min, min(nrows, row_min+tile_rows), col_min, min(ncols, col_min+tile_cols)]
+			window = [max(0, interior[0]-halo_cells), min(nrows, interior[1]+halo_cells), max(0, interior[2]-halo_cells), min(ncols, interior[3]+halo_cells)]
+			tile_windows.append({"tile": f"r{tile_r}_c{tile_c}", "window": window, "interior": interior})
+
+	return tile_windows
+
+def collect_3DTSP_tile_rasters(input_data, input_folder_path, raster_list=None):
+	"""Find the GIS files in the input data that are cut into tiles.
+
+	Parameters
+	----------
+	input_data : dict | list
+		input JSON or YAML data (searched recursively)
+	input_folder_path : str
+		directory of the input GIS files
+	raster_list : list, optional
+		file names found so far. Defaults to None.
+
+	Returns
+	-------
+	list
+		file names (relative to input_folder_path) of the GIS files in input_data
+	"""
+	if raster_list is None:
+		raster_list = []
+
+	if isinstance(input_data, dict):
+		input_values = input_data.values()
+	elif isinstance(input_data, list):
+		input_values = input_data
+	else:
+		input_values = [input_data]
+
+	for input_value in input_values:
+		if isinstance(input_value, (dict, list)):
+			collect_3DTSP_tile_rasters(input_value, input_folder_path, raster_list)
+		elif isinstance(input_value, str) and input_value.split(".")[-1].lower() in ["asc", "csv", "grd", "las"] and os.path.isfile(input_folder_path+input_value):
+			if input_value not in raster_list:
+				raster_list.append(input_value)
+
+	return raster_list
+
+def generate_3DTSP_tile_inputs(input_data, tile_windows, nrows, ncols, tiles_folder_path, cpu_num_per_tile):
+	"""Cut the input GIS files into tiles and export the input YAML file of each tile.
+
+	The window of each tile in the full DEM is exported as "random_field_window" so that the tile receives the window 
+	of the random fields of the full DEM (see generate_random_field_step); the tiles share monte_carlo_sampling_seed.
+
+	Parameters
+	----------
+	input_data : dict
+		input JSON or YAML data of the full DEM
+	tile_windows : list
+		tiles (see generate_3DTSP_tile_windows)
+	nrows : int
+		number of rows of the DEM
+	ncols : int
+		number of columns of the DEM
+	tiles_folder_path : str
+		directory of the tiles - the inputs and results of each tile are in "{tiles_folder_path}tile_rR_cC/input/" and ".../results/"
+	cpu_num_per_tile : int
+		max_cpu_num of each tile
+
+	Returns
+	-------
+	list
+		input YAML file path of each tile
+	"""
+	input_folder_path = input_data["input_folder_path"]
+	if input_folder_path[-1] != "/":
+		input_folder_path += '/'
+
+	# the ascii grids are cut in a single pass over their rows, so the full DEM is never held in memory
+	raster_list = collect_3DTSP_tile_rasters(input_data, input_folder_path)
+	for raster_file_name in raster_list:
+		if raster_file_name.split(".")[-1].lower() != "asc":
+			print(f"tiled execution requires every GIS input file in ascii grid (asc) file format: {raster_file_name}")
+			sys.exit(3)
+
+		tile_raster_file_names = []
+		for tile_window in tile_windows:
+			tile_raster_file_name = f"{tiles_folder_path}tile_{tile_window['tile']}/input/{raster_file_name}"
+			os.makedirs(os.path.dirname(tile_raster_file_name), exist_ok=True)
+			tile_raster_file_names.append(tile_raster_file_name)
+		split_ascii_grid(input_folder_path+raster_file_name, [tile_window["window"] for tile_window in tile_windows], tile_raster_file_names)
+
+	tile_input_file_names = []
+	for tile_window in tile_windows:
+		tile_folder_path = f"{tiles_folder_path}tile_{tile_window['tile']}/"
+
+		tile_input_data = deepcopy(input_data)
+		tile_input_data["input_folder_path"] = f"{tile_folder_path}input/"
+		tile_input_data["output_folder_path"] = f"{tile_folder_path}results/"
+		tile_input_data["restarting_simulation_JSON"] = None
+		tile_input_data["tiled_execution"] = None
+		tile_input_data["results_format"] = "asc"
+		tile_input_data["generate_plot"] = False
+		tile_input_data["termination_apply"] = False
+		tile_input_data["DEM_neighbor_directed_graph_filename"] = None
+		tile_input_data["max_cpu_num"] = cpu_num_per_tile
+		# rows of the random fields increase from south to north (row 0 of the window is the northernmost row)
+		tile_input_data["random_field_window"] = {"n_row": int(nrows), "n_col": int(ncols), "row_min": int(nrows - tile_window["window"][1]), "col_min": int(tile_window["window"][2])}
+
+		tile_input_file_name = f"{tile_folder_path}{input_data['filename']} - tile_{tile_window['tile']}.yaml"
+		with open(tile_input_file_name, 'w') as yaml_file:
+			yaml.safe_dump(tile_input_data, yaml_file, sort_keys=False)
+		tile_input_file_names.append(tile_input_file_name)
+
+	return tile_input_file_names
+
+def run_3DTSP_tiles(tile_windows, tile_input_file_names, tiles_folder_path, tile_parallel_num):
+	"""Run the simulation of each tile in a separate process.
+
+	Parameters
+	----------
+	tile_windows : list
+		tiles (see generate_3DTSP_tile_windows)
+	tile_input_file_names : list
+		input YAML file path of each tile
+	tiles_folder_path : str
+		directory of the tiles
+	tile_parallel_num : int
+		number of tiles run concurrently
+
+	Returns
+	-------
+	list
+		tiles not completed (non-zero exit code)
+	"""
+	import subprocess
+
+	remaining_tiles = []
+	for tile_window, tile_input_file_name in zip(tile_windows, tile_input_file_names):
+		# tiles completed by an earlier run are not run again
+		if os.path.exists(f"{tiles_folder_path}tile_{tile_window['tile']}/tile_completed.json"):
+			continue
+		remaining_tiles.append((tile_window, tile_input_file_name))
+
+	print(f"Running {len(remaining_tiles)} of {len(tile_windows)} tiles ({tile_parallel_num} concurrently) ...\n")
+
+	failed_tiles = []
+	running_tile_process = {}
+	while remaining_tiles or running_tile_process:
+
+		# start new tiles - the output of each tile is written to its log file
+		while remaining_tiles and len(running_tile_process) < tile_parallel_num:
+			tile_window, tile_input_file_name = remaining_tiles.pop(0)
+			tile_folder_path = f"{tiles_folder_path}tile_{tile_window['tile']}/"
+			tile_log_file = open(f"{tile_folder_path}tile_log.txt", "w")
+			tile_process = subprocess.Popen([sys.executable, os.path.abspath(__file__), tile_input_file_name], stdout=tile_log_file, stderr=subprocess.STDOUT)
+			running_tile_process[tile_window["tile"]] = (tile_process, tile_log_file, tile_folder_path, time.time())
+
+		time.sleep(1)
+
+		for tile in list(running_tile_process.keys()):
+			tile_process, tile_log_file, tile_folder_path, start_time = running_tile_process[tile]
+			if tile_process.poll() is None:
+				continue
+
+			tile_log_file.close()
+			del running_tile_process[tile]
+
+			if tile_process.returncode != 0:
+				print(f"Tile {tile} stopped with exit code {tile_process.returncode} - see {tile_folder_path}tile_log.txt\n")
+				failed_tiles.append(tile)
+				continue
+
+			with open(f"{tile_folder_path}tile_completed.json", 'w') as json_file:
+				json.dump({"tile": tile, "wall_time": time.time()-start_time}, json_file)
+			print(f"	Tile {tile} completed ({time.time()-start_time:.1f} s)\n")
+
+	return failed_tiles
+
+def stitch_3DTSP_tile_outputs(tile_windows, tiles_folder_path, output_folder_path):
+	"""Stitch the interior of the ascii grid results of each tile into the results of the full DEM.
+
+	Parameters
+	----------
+	tile_windows : list
+		tiles (see generate_3DTSP_tile_windows)
+	tiles_folder_path : str
+		directory of the tiles
+	output_folder_path : str
+		directory of the results of the full DEM - the stitched files keep the folder structure of the results of each tile
+
+	Returns
+	-------
+	int
+		number of stitched files
+	"""
+	first_results_folder_path = f"{tiles_folder_path}tile_{tile_windows[0]['tile']}/results/"
+
+	stitched_num = 0
+	for (dir_path, _, dir_file_names) in os.walk(first_results_folder_path):
+		relative_dir_path = os.path.relpath(dir_path, first_results_folder_path)
+
+		for dir_file_name in sorted(dir_file_names):
+			if dir_file_name.split(".")[-1].lower() != "asc":
+				continue
+
+			relative_file_name = os.path.normpath(os.path.join(relative_dir_path, dir_file_name))
+			tile_file_names = [f"{tiles_folder_path}tile_{tile_window['tile']}/results/{relative_file_name}" for tile_window in tile_windows]
+			if not all(os.path.exists(tile_file_name) for tile_file_name in tile_file_names):
+				print(f"{relative_file_name} is not generated in every tile and is not stitched")
+				continue
+
+			os.makedirs(os.path.dirname(output_folder_path+relative_file_name), exist_ok=True)
+			merge_ascii_grid(tile_file_names, [tile_window["window"] for tile_window in tile_windows], [tile_window["interior"] for tile_window in tile_windows], output_folder_path+relative_file_name)
+			stitched_num += 1
+
+	return stitched_num
+
+def perform_3DTSP_tiled(input_file_name, FS_3D_analysis, cell_size_3DFS_max, local_cell_sizes_slope, cpu_num):
+	"""Run the simulation with tiled domain decomposition if "tiled_execution" is specified in the input file.
+
+	The DEM is split into tiles with halos, each tile is simulated as a separate run (inputs and results in 
+	"{output_folder_path}tiles/tile_rR_cC/") and the interior of the ascii grid results of the tiles are stitched 
+	into "{output_folder_path}", with the same folder structure and file names as the simulation of the full DEM.
+
+	Parameters
+	----------
+	input_file_name : str
+		input JSON or YAML file path
+	FS_3D_analysis : None | bool
+		None = infiltration only, False = infinite slope, True = 3D Janbu slope stability analysis.
+	cell_size_3DFS_max : int
+		maximum side length (in DEM cells) of the 3D slip surfaces.
+	local_cell_sizes_slope : int
+		side length (in DEM cells) of the local region used to compute the dip and aspect.
+	cpu_num : int
+		CPU multiprocessing number shared by the tiles run concurrently
+
+	Returns
+	-------
+	bool
+		True if the tiled execution is performed; False if "tiled_execution" is not specified
+	"""
+
+	# check whether it is yaml or json file format
+	input_file_name_format = input_file_name.split('.')[-1]
+	if input_file_name_format.lower() == "json":
+		with open(input_file_name, 'r') as json_file:
+			input_data = json.load(json_file)
+	elif input_file_name_format.lower() in ["yaml", "yml"]:
+		with open(input_file_name, 'r') as yaml_file:
+			input_data = yaml.safe_load(yaml_file)
+	else:
+		print("the input file should be in JSON (.json) or YAML (.yaml, .yml) file format")
+		sys.exit(1)
+
+	tiled_execution = input_data.get("tiled_execution", None)
+	if tiled_execution is None or tiled_execution is False:
+		return False
+
+	input_folder_path = input_data["input_folder_path"]
+	if input_folder_path[-1] != "/":
+		input_folder_path += '/'
+	output_folder_path = input_data["output_folder_path"]
+	if output_folder_path[-1] != "/":
+		output_folder_path += '/'
+	tiles_folder_path = f"{output_folder_path}tiles/"
+	os.makedirs(tiles_folder_path, exist_ok=True)
+
+	if input_data["DEM_file_name"].split(".")[-1].lower() != "asc":
+		print("tiled execution requires the DEM in ascii grid (asc) file format")
+		sys.exit(3)
+
+	######################################
+	# inputs that depend on the full DEM
+	######################################
+	if input_data.get("termination_apply", False):
+		print("The termination condition is not available with tiled execution - the simulation of every tile continues until the final time step.\n")
+	if input_data.get("results_format", "asc") != "asc":
+		print("The results of tiled execution are exported in ascii grid (asc) file format.\n")
+	if FS_3D_analysis is not None and input_data.get("DEM_debris_flow_criteria_apply", False) and input_data.get("DEM_debris_flow_initiation_filename", None) is None and input_data.get("DEM_UCA_filename", None) is None:
+		print("The upslope contributing area (UCA) is computed inside each tile - provide DEM_UCA_filename or DEM_debris_flow_initiation_filename computed over the full DEM to obtain the same debris-flow sources as the simulation of the full DEM.\n")
+
+	######################################
+	# split the DEM into tiles
+	######################################
+	DEM_header = read_ascii_grid_header(input_folder_path+input_data["DEM_file_name"])
+
+	halo_cells = tiled_execution.get("halo_cells", None)
+	if halo_cells is None:
+		halo_cells = compute_3DTSP_tile_halo(FS_3D_analysis, cell_size_3DFS_max, local_cell_sizes_slope)
+	tile_windows = generate_3DTSP_tile_windows(DEM_header["nrows"], DEM_header["ncols"], tiled_execution.get("tile_size", 1000), int(halo_cells))
+
+	tile_parallel_num = max(1, min(int(tiled_execution.get("tile_parallel_num", 1)), len(tile_windows), cpu_num))
+	cpu_num_per_tile = max(1, cpu_num // tile_parallel_num)
+
+	print(f"Tiled execution - {len(tile_windows)} tiles of {tiled_execution.get('tile_size', 1000)} DEM cells with {halo_cells} halo cells ... \n")
+
+	# the random fields of the full DEM are generated with the same seed in every tile - the seed of an earlier run is reused
+	tiles_json_file_name = f"{tiles_folder_path}{input_data['filename']} - tiles.json"
+	if input_data.get("monte_carlo_sampling_seed", None) is None:
+		if os.path.exists(tiles_json_file_name):
+			with open(tiles_json_file_name, 'r') as json_file:
+				input_data["monte_carlo_sampling_seed"] = json.load(json_file).get("monte_carlo_sampling_seed", None)
+		if input_data.get("monte_carlo_sampling_seed", None) is None:
+			input_data["monte_carlo_sampling_seed"] = int(np.random.SeedSequence().entropy % 2**63)
+
+	with open(tiles_json_file_name, 'w') as json_file:
+		json.dump({"nrows": DEM_header["nrows"], "ncols": DEM_header["ncols"], "halo_cells": int(halo_cells), "monte_carlo_sampling_seed": input_data["monte_carlo_sampling_seed"], "tiles": tile_windows}, json_file, indent=2)
+
+	# the inputs of the completed tiles are kept
+	incomplete_tile_windows = [tile_window for tile_window in tile_windows if not os.path.exists(f"{tiles_folder_path}tile_{tile_window['tile']}/tile_completed.json")]
+	if incomplete_tile_windows:
+		generate_3DTSP_tile_inputs(input_data, incomplete_tile_windows, DEM_header["nrows"], DEM_header["ncols"], tiles_folder_path, cpu_num_per_tile)
+	tile_input_file_names = [f"{tiles_folder_path}tile_{tile_window['tile']}/{input_data['filename']} - tile_{tile_window['tile']}.yaml" for tile_window in tile_windows]
+
+	######################################
+	# run and stitch the tiles
+	######################################
+	failed_tiles = run_3DTSP_tiles(tile_windows, tile_input_file_names, tiles_folder_path, tile_parallel_num)
+	if failed_tiles:
+		print(f"{len(failed_tiles)} tiles are not completed - run the simulation again to complete the tiles and stitch the results.\n")
+		return True
+
+	print('The programming is stitching the results of the tiles ... \n')
+	stitched_num = stitch_3DTSP_tile_outputs(tile_windows, tiles_folder_path, output_folder_path)
+	print(f'		Stitching {stitched_num} result files completed!\n')
+
+	return True
+
+
 ###########################################################################
 ## run 
 ###########################################################################
 if __name__ == '__main__':
 
+	## UCA directed graph
+	from scipy.sparse import csr_matrix, save_npz, load_npz
+
 	try:
 		# check the input JSON files exist in the specified directory
 		if os.path.exists(input_JSON_YAML_file_name) == False:
@@ -8612,10 +11032,18 @@ if __name__ == '__main__':
 	
 		filename, input_folder_path, output_folder_path, restarting_simulation_dict, monte_carlo_iteration_max, output_txt_format, plot_option, gamma_w, FS_crit, dz, termination_apply, landslide_to_debris_flow_threshold, DEM_surf_dip_infiltration_apply, DEM_debris_flow_criteria_apply, FS_3D_analysis, FS_3D_iter_limit, FS_3D_tol, cell_size_3DFS_min, cell_size_3DFS_max, superellipse_n_parameter, superellipse_eccen_ratio, FS_3D_apply_side, FS_3D_apply_root, DEM_UCA_compute_all, cpu_num, dt, rain_time_I, DEM_file_name, material_file_name, soil_depth_model, soil_depth_data, ground_water_model, ground_water_data, dip_surf_filename, aspect_surf_filename, dip_base_filename, aspect_base_filename, local_cell_sizes_slope, DEM_debris_flow_initiation_filename, DEM_neighbor_directed_graph_filename, DEM_UCA_filename, material, material_GIS, convert_time, convert_intensity, actual_landslide_inventory_region, ET_time_I, field_capacity_suction = read_RISD_json_yaml_input_v20260228(input_JSON_YAML_file_name)
 
+		## post-processing plots (plotly is only needed with generate_plot)
+		if plot_option:
+			import plotly.graph_objs as go
+
 		# out_filename = output_folder_path + filename   #default typical file path and file name template for saving results and plots
 	
 		print('		Importing the input JSON file completed!\n')
 
+		## tiled domain decomposition - each tile is simulated separately and the results are stitched (see perform_3DTSP_tiled)
+		if restarting_simulation_dict is None and perform_3DTSP_tiled(input_JSON_YAML_file_name, FS_3D_analysis, cell_size_3DFS_max, local_cell_sizes_slope, cpu_num):
+			sys.exit(0)
+
 		#################################################################################################################################
 		## rounding
 		#################################################################################################################################
@@ -9135,10 +11563,37 @@ if __name__ == '__main__':
 				# export data
 				generate_output_GIS(output_txt_format, f"{output_folder_path}iteration_{iter_num}/material/", filename, "DEM_material_id", DEM_material_id, DEM_noData, nodata_value, gridUniqueX, gridUniqueY, deltaX, deltaY, XYZ_row_or_col_increase_first, dx_dp, dy_dp, dz_dp, time=None, iteration=iter_num)
 
+			# sampling strategy of the standard normal inputs of the random fields - "MC" (plain Monte Carlo), "LHS" (Latin hypercube) or "Sobol" (scrambled Sobol sequence)
+			# each field of each iteration draws from its own stream of the seed, so the seed and sample index (iteration - 1) reproduce the random fields
+			monte_carlo_sampling = {
+				"method": monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_sampling_method", "MC"),
+				"seed": monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_sampling_seed", None),
+				"sample_num": monte_carlo_iteration_max
+			}
+			if monte_carlo_sampling["method"] not in ["MC", "LHS", "Sobol"]:
+				print(f"monte_carlo_sampling_method '{monte_carlo_sampling['method']}' is not recognized. Options: 'MC', 'LHS', 'Sobol'. The 'MC' option is used.")
+				monte_carlo_sampling["method"] = "MC"
+			if monte_carlo_sampling["seed"] is None:
+				monte_carlo_sampling["seed"] = int(np.random.SeedSequence().entropy % 2**63)
+			print(f'		Sampling of the random fields: {monte_carlo_sampling["method"]} (seed: {monte_carlo_sampling["seed"]})\n')
+
+			# importance sampling - shift of the mean of the standard normal field of the material parameters {parameter name: shift}
+			# e.g. {"c": -1.5, "phi": -1.0} samples more iterations with low strength; each iteration is weighted with its likelihood ratio
+			monte_carlo_sampling["importance_shift"] = monte_carlo_iter_filename_dict["original_input"].get("monte_carlo_importance_shift", None) or {}
+			if not isinstance(monte_carlo_sampling["importance_shift"], dict):
+				print("monte_carlo_importance_shift should be a dictionary {parameter name: shift}. Importance sampling is not used.")
+				monte_carlo_sampling["importance_shift"] = {}
+			if len(monte_carlo_sampling["importance_shift"]) > 0:
+				print(f'		Importance sampling of the material parameters - shift of the standard normal fields: {monte_carlo_sampling["importance_shift"]}\n')
+
+			# tiled execution - window of the tile in the full DEM, so that the random fields of the full DEM are used (see perform_3DTSP_tiled)
+			if monte_carlo_iter_filename_dict["original_input"].get("random_field_window", None) is not None:
+				monte_carlo_sampling["window"] = monte_carlo_iter_filename_dict["original_input"]["random_field_window"]
+
 			# generate GIS files and plots for each monte carlo iteration
 			# (1) GIS data for each material properties for each iteration (iteration = 1 when deterministic)
 			# (2) dictionary storing all material properties for each iteration 
-			monte_carlo_iter_material_filename_dict = define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, gridUniqueX, gridUniqueY, deltaX, deltaY, material, cpu_num, iterations=monte_carlo_iteration_max, output_folder_dir=output_folder_path, save_file_name=filename, output_txt_format=output_txt_format, XYZ_row_or_col_increase_first=XYZ_row_or_col_increase_first, DEM_noData=DEM_noData, nodata_value=nodata_value, dz_incre=dz, plot=plot_option)
+			monte_carlo_iter_material_filename_dict = define_random_field_step_monte_carlo_filenameOnly_v2(DEM_material_id, gridUniqueX, gridUniqueY, deltaX, deltaY, material, cpu_num, iterations=monte_carlo_iteration_max, output_folder_dir=output_folder_path, save_file_name=filename, output_txt_format=output_txt_format, XYZ_row_or_col_increase_first=XYZ_row_or_col_increase_first, DEM_noData=DEM_noData, nodata_value=nodata_value, dz_incre=dz, plot=plot_option, sampling=monte_carlo_sampling)
 			'''
 			monte_carlo_iter_material_filename_dict[iteration number] = {
 				"hydraulic": {
@@ -9160,6 +11615,8 @@ if __name__ == '__main__':
 			for iter_num in range(1,monte_carlo_iteration_max+1):
 				temp_dict = monte_carlo_iter_filename_dict["iterations"][str(iter_num)]
 				temp_dict["material"] = deepcopy(monte_carlo_iter_material_filename_dict[iter_num])
+				importance_log_weight = temp_dict["material"].pop("importance_log_weight", 0.0)
+				temp_dict["sampling"] = {"method": monte_carlo_sampling["method"], "seed": monte_carlo_sampling["seed"], "sample_index": iter_num-1, "log_weight": importance_log_weight}
 				monte_carlo_iter_filename_dict["iterations"][str(iter_num)] = deepcopy(temp_dict)
 				del temp_dict
 
@@ -9171,7 +11628,7 @@ if __name__ == '__main__':
 			print('The programming is generating precipitation for analysis ... \n')
 
 			# generate random rainfall time series for each grid cell
-			monte_carlo_iter_I_filename_dict = define_random_rainfall_step_monte_carlo(rain_time_I, gridUniqueX, gridUniqueY, deltaX, deltaY, cpu_num, input_folder_path, output_folder_path, filename, convert_intensity, iterations=monte_carlo_iteration_max, output_txt_format=output_txt_format, XYZ_row_or_col_increase_first=XYZ_row_or_col_increase_first, DEM_noData=DEM_noData, nodata_value=nodata_value, I_dp=rate_dp, plot=plot_option)
+			monte_carlo_iter_I_filename_dict = define_random_rainfall_step_monte_carlo(rain_time_I, gridUniqueX, gridUniqueY, deltaX, deltaY, cpu_num, input_folder_path, output_folder_path, filename, convert_intensity, iterations=monte_carlo_iteration_max, output_txt_format=output_txt_format, XYZ_row_or_col_increase_first=XYZ_row_or_col_increase_first, DEM_noData=DEM_noData, nodata_value=nodata_value, I_dp=rate_dp, plot=plot_option, sampling=monte_carlo_sampling)
 			'''
 			monte_carlo_iter_I_filename_dict[iteration number] = {
 				time: rain_I_GIS filename
@@ -9192,7 +11649,7 @@ if __name__ == '__main__':
 			###########################
 			# generate ET rate GIS files for each time step (same pattern as rainfall but simpler - no probabilistic)
 			if len(ET_time_I) > 0:
-				monte_carlo_iter_ET_filename_dict = define_random_rainfall_step_monte_carlo(ET_time_I, gridUniqueX, gridUniqueY, deltaX, deltaY, cpu_num, input_folder_path, output_folder_path, filename+"_ET", 1.0, iterations=monte_carlo_iteration_max, output_txt_format=output_txt_format, XYZ_row_or_col_increase_first=XYZ_row_or_col_increase_first, DEM_noData=DEM_noData, nodata_value=nodata_value, I_dp=rate_dp, plot=plot_option)
+				monte_carlo_iter_ET_filename_dict = define_random_rainfall_step_monte_carlo(ET_time_I, gridUniqueX, gridUniqueY, deltaX, deltaY, cpu_num, input_folder_path, output_folder_path, filename+"_ET", 1.0, iterations=monte_carlo_iteration_max, output_txt_format=output_txt_format, XYZ_row_or_col_increase_first=XYZ_row_or_col_increase_first, DEM_noData=DEM_noData, nodata_value=nodata_value, I_dp=rate_dp, plot=plot_option, sampling=monte_carlo_sampling)
 				for iter_num in range(1,monte_carlo_iteration_max+1):
 					temp_dict = monte_carlo_iter_filename_dict["iterations"][str(iter_num)]
 					temp_dict["ET_rate"] = deepcopy(monte_carlo_iter_ET_filename_dict[iter_num])
@@ -9295,6 +11752,27 @@ if __name__ == '__main__':
 			with open(f"{output_folder_path}{filename} - all_input.json", 'w') as f:
 				json.dump(monte_carlo_iter_filename_dict, f, indent=4, cls=json_serialize)
 
+			# remove the results journal files of the previous simulation exported in the same output folder
+			for results_journal_path in [f"{output_folder_path}{filename} - all_input_results.jsonl"]+[f"{output_folder_path}iteration_{iter_num}/{filename} - results - i{iter_num}.jsonl" for iter_num in range(1,monte_carlo_iteration_max+1)]:
+				if os.path.exists(results_journal_path):
+					os.remove(results_journal_path)
+
+			# remove the iteration results JSON files of the previous simulation - otherwise merged into the results of the new simulation
+			for iteration_JSON_path in [f"{output_folder_path}iteration_{iter_num}/{filename} - results - i{iter_num}.json" for iter_num in range(1,monte_carlo_iteration_max+1)]:
+				if os.path.exists(iteration_JSON_path):
+					os.remove(iteration_JSON_path)
+
+			# remove the shard claims (".lock" and ".done") of the previous simulation - otherwise the iterations are skipped as claimed or completed
+			shard_folder_path = f"{output_folder_path}shard_claims/"
+			if os.path.exists(shard_folder_path):
+				for shard_claim_file in os.listdir(shard_folder_path):
+					os.remove(shard_folder_path+shard_claim_file)
+
+			# remove the running statistics of the previous simulation exported in the same output folder
+			online_statistics_folder = f"{output_folder_path}probabilistic_results/online_statistics/"
+			if os.path.exists(online_statistics_folder):
+				shutil.rmtree(online_statistics_folder)
+
 			print('		Prepared to start the simulations!\n')
 
 
@@ -9302,6 +11780,12 @@ if __name__ == '__main__':
 		elif isinstance(restarting_simulation_dict, dict):
 			monte_carlo_iter_filename_dict = deepcopy(restarting_simulation_dict)
 
+			# slope stability analysis option is not returned when restarting - read from the original input
+			copy_input = deepcopy(monte_carlo_iter_filename_dict["original_input"])
+			copy_input["restarting_simulation_JSON"] = None
+			FS_3D_analysis = read_RISD_json_yaml_input_v20260228(copy_input)[14]
+			del copy_input
+
 			print('		Imported the monte carlo simulation files to restart simulation!\n')
 
 
@@ -9310,6 +11794,13 @@ if __name__ == '__main__':
 		######################################################################################################################################################
 		monte_carlo_iter_result_filename_dict = perform_3DTSP_v2(monte_carlo_iter_filename_dict)
 
+		# sharded execution - other workers are still computing; the last worker to finish merges the results and performs the probabilistic analysis
+		if monte_carlo_iter_result_filename_dict is None:
+			sys.exit(0)
+
+		# fewer iterations are computed when the probability of landslide has converged (monte_carlo_convergence_apply)
+		monte_carlo_iteration_max = monte_carlo_iter_result_filename_dict["original_input"]["monte_carlo_iteration_max"]
+
 		######################################################################################################################################################
 		## analyze probabilistic analysis based on the overall simulation results
 		######################################################################################################################################################
@@ -3,8 +3,10 @@ Plot output variable(s) vs time for a specific (X, Y) grid point from 3DTSP resu
 
 Usage:
     python plot_result_time_graph.py <results_json> <x> <y> [variable1] [variable2] ...
+    python plot_result_time_graph.py <results_json> [variable1] [variable2] ... --points <points_csv>
 
     If no variables are specified, lists all available time-stepped variables.
+    Only the header and the lines holding the requested grid cells are parsed in each result file.
 
 Examples:
     # List available variables:
@@ -16,6 +18,9 @@ Examples:
     # Plot multiple variables at (50, 50):
     python plot_result_time_graph.py "./04-Results/project_filename - all_input_results.json" 50 50 min_FS gwt_dz z_w
 
+    # Export and plot min_FS and z_w at every point of sensors.csv ("x, y, name" per line), reading the time steps with 8 processes:
+    python plot_result_time_graph.py "./04-Results/project_filename - all_input_results.json" min_FS z_w --points sensors.csv --workers 8
+
     # Specify iteration (default=1):
     python plot_result_time_graph.py "./04-Results/project_filename - all_input_results.json" 50 50 min_FS --iteration 2
 
@@ -27,6 +32,8 @@ import sys
 import os
 import json
 import argparse
+import csv
+import multiprocessing as mp
 import numpy as np
 from plotly.offline import plot as plotly_offline_plot
 import plotly.graph_objs as go
@@ -153,6 +160,147 @@ def read_gis_file(filepath):
         raise ValueError(f"Unsupported file format: {ext}")
 
 
+def get_grid_info(results_dict, iteration_str="1"):
+    """Grid size of the results from the JSON file (needed to locate points in CSV files).
+    
+    Returns {"nrows", "ncols", "deltaX", "deltaY"} or None if not available.
+    """
+    iter_data = results_dict["iterations"].get(iteration_str, results_dict["iterations"].get("1", {}))
+    if "deltaX" not in iter_data or "deltaY" not in iter_data:
+        return None
+    ncols = iter_data.get("n_col_x", int(round((iter_data["gridUniqueX_max"] - iter_data["gridUniqueX_min"]) / iter_data["deltaX"])) + 1)
+    nrows = iter_data.get("n_row_y", int(round((iter_data["gridUniqueY_max"] - iter_data["gridUniqueY_min"]) / iter_data["deltaY"])) + 1)
+    return {"nrows": int(nrows), "ncols": int(ncols), "deltaX": float(iter_data["deltaX"]), "deltaY": float(iter_data["deltaY"])}
+
+
+def read_grid_layout(filepath, grid_info=None):
+    """Read the grid layout of a GIS result file from its header (or first lines for CSV) only.
+    
+    The layout gives the line and position of each grid cell value, assuming one grid row (ASC, GRD) 
+    or one XYZ point (CSV) per line, as written by 3DTSP.
+    
+    Returns dict {"format", "nrows", "ncols", "x0", "y0", "dx", "dy", "header_lines", "order"}, 
+    or None if the file does not have this layout (then the full file is read).
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+
+    with open(filepath, 'r') as f:
+        if ext == '.asc':
+            meta = {}
+            header_lines = 0
+            for line in f:
+                parts = line.strip().split()
+                if len(parts) == 2 and not parts[0].replace('.','',1).replace('-','',1).replace('+','',1).isdigit():
+                    meta[parts[0].lower()] = parts[1]
+                    header_lines += 1
+                else:
+                    first_line = line
+                    break
+            else:
+                return None
+            layout = {
+                "format": "asc", "nrows": int(meta['nrows']), "ncols": int(meta['ncols']),
+                "x0": float(meta.get('xllcorner', meta.get('xllcenter', 0))), "y0": float(meta.get('yllcorner', meta.get('yllcenter', 0))),
+                "dx": float(meta['cellsize']), "dy": float(meta['cellsize']),
+                "header_lines": header_lines, "order": "north_first"
+            }
+            if len(first_line.split()) != layout["ncols"]:
+                return None
+
+        elif ext == '.grd':
+            lines = [f.readline() for _ in range(6)]
+            ncols, nrows = int(lines[1].split()[0]), int(lines[1].split()[1])
+            xmin, xmax = float(lines[2].split()[0]), float(lines[2].split()[1])
+            ymin, ymax = float(lines[3].split()[0]), float(lines[3].split()[1])
+            layout = {
+                "format": "grd", "nrows": nrows, "ncols": ncols, "x0": xmin, "y0": ymin,
+                "dx": (xmax - xmin) / (ncols - 1) if ncols > 1 else 0, "dy": (ymax - ymin) / (nrows - 1) if nrows > 1 else 0,
+                "header_lines": 5, "order": "south_first"
+            }
+            if len(lines[5].split()) != ncols:
+                return None
+
+        elif ext == '.csv':
+            if grid_info is None:
+                return None
+            first_xyz = [float(v) for v in f.readline().split(',')]
+            second_line = f.readline()
+            second_xyz = [float(v) for v in second_line.split(',')] if second_line.strip() else first_xyz
+            # 3DTSP writes the XYZ points from the smallest X and Y, with either X ("row") or Y ("col") cycling first
+            layout = {
+                "format": "csv", "nrows": grid_info["nrows"], "ncols": grid_info["ncols"], "x0": first_xyz[0], "y0": first_xyz[1],
+                "dx": grid_info["deltaX"], "dy": grid_info["deltaY"], "header_lines": 0,
+                "order": "x_first" if second_xyz[1] == first_xyz[1] and grid_info["ncols"] > 1 else "y_first"
+            }
+
+        else:
+            raise ValueError(f"Unsupported file format: {ext}")
+
+    return layout
+
+
+def locate_grid_points(layout, points):
+    """Find the nearest grid cell of each (x, y) point from the grid layout.
+    
+    Returns list of (line_index, value_index, matched_x, matched_y) of each point.
+    """
+    locations = []
+    for (target_x, target_y) in points:
+        col = int(round((target_x - layout["x0"]) / layout["dx"])) if layout["dx"] > 0 else 0
+        row = int(round((target_y - layout["y0"]) / layout["dy"])) if layout["dy"] > 0 else 0   # from the smallest Y
+        col = min(max(col, 0), layout["ncols"] - 1)
+        row = min(max(row, 0), layout["nrows"] - 1)
+
+        if layout["order"] == "north_first":
+            line_index, value_index = layout["header_lines"] + (layout["nrows"] - 1 - row), col
+        elif layout["order"] == "south_first":
+            line_index, value_index = layout["header_lines"] + row, col
+        elif layout["order"] == "x_first":
+            line_index, value_index = row * layout["ncols"] + col, 2
+        else:
+            line_index, value_index = col * layout["nrows"] + row, 2
+
+        locations.append((line_index, value_index, layout["x0"] + col * layout["dx"], layout["y0"] + row * layout["dy"]))
+    return locations
+
+
+def read_grid_point_values(read_input):
+    """Read the values at the given lines and positions of a GIS result file, parsing only those lines.
+    
+    read_input = (filepath, locations) with locations from locate_grid_points.
+    Returns list of values of each location.
+    """
+    filepath, locations = read_input
+    separator = ',' if os.path.splitext(filepath)[1].lower() == '.csv' else None
+
+    wanted_lines = {}
+    for point_idx, (line_index, value_index, _, _) in enumerate(locations):
+        wanted_lines.setdefault(line_index, []).append((point_idx, value_index))
+    last_line = max(wanted_lines.keys())
+
+    values = [np.nan] * len(locations)
+    with open(filepath, 'r') as f:
+        for line_index, line in enumerate(f):
+            if line_index in wanted_lines:
+                parts = line.split(separator)
+                for point_idx, value_index in wanted_lines[line_index]:
+                    values[point_idx] = float(parts[value_index])
+            if line_index >= last_line:
+                break
+    return values
+
+
+def read_grid_point_values_full(read_input):
+    """Read the values of the nearest grid points by parsing the full GIS result file (files without a known layout).
+    
+    read_input = (filepath, points). Returns (values, matched_xy) of each point.
+    """
+    filepath, points = read_input
+    xyz_data = read_gis_file(filepath)
+    matched = [find_nearest_grid_point(xyz_data, target_x, target_y) for (target_x, target_y) in points]
+    return [val for (_, _, val) in matched], [(mx, my) for (mx, my, _) in matched]
+
+
 def find_nearest_grid_point(xyz_data, target_x, target_y):
     """Find the row in xyz_data closest to (target_x, target_y) and return its value.
     
@@ -203,39 +351,100 @@ def compute_time_values(results_dict):
     return time_values, time_unit_label, dt * convert_time, convert_time
 
 
-def extract_time_series(var_file_dict, target_x, target_y):
-    """Extract value at (target_x, target_y) for each time step.
+def extract_time_series_points(var_file_dict, points, grid_info=None, workers=1):
+    """Extract the values at many (x, y) points for each time step.
     
-    Returns (time_step_indices, values, matched_x, matched_y)
+    The row and column of each point are computed once from the header of the first file, and only the 
+    lines holding these values are parsed in each file. The time steps are read by `workers` processes.
+    
+    Returns (time_step_indices, values, matched_xy) where values[k][p] is the value of point p at time_step_indices[k].
     """
     time_steps = sorted(var_file_dict.keys(), key=int)
     indices = []
-    values = []
-    matched_x = None
-    matched_y = None
-
+    filepaths = []
     for ts in time_steps:
         file_info = var_file_dict[ts]
-        folder = file_info[0]
-        filename = file_info[1]
-        filepath = os.path.join(folder, filename)
+        filepath = os.path.join(file_info[0], file_info[1])
 
         if not os.path.exists(filepath):
             print(f"  Warning: File not found: {filepath}, skipping time step {ts}")
             continue
-
-        xyz_data = read_gis_file(filepath)
-        mx, my, val = find_nearest_grid_point(xyz_data, target_x, target_y)
-        matched_x = mx
-        matched_y = my
         indices.append(int(ts))
-        values.append(val)
+        filepaths.append(filepath)
+
+    if not filepaths:
+        return [], [], [(None, None)] * len(points)
+
+    # every time step of a variable is on the same grid
+    layout = read_grid_layout(filepaths[0], grid_info)
+    if layout is not None:
+        locations = locate_grid_points(layout, points)
+        read_function = read_grid_point_values
+        read_inputs = [(filepath, locations) for filepath in filepaths]
+        matched_xy = [(mx, my) for (_, _, mx, my) in locations]
+    else:
+        read_function = read_grid_point_values_full
+        read_inputs = [(filepath, points) for filepath in filepaths]
+
+    if workers > 1 and len(read_inputs) > 1:
+        with mp.Pool(min(workers, len(read_inputs))) as pool:
+            outputs = pool.map(read_function, read_inputs)
+    else:
+        outputs = [read_function(read_input) for read_input in read_inputs]
+
+    if layout is not None:
+        values = outputs
+    else:
+        values = [output[0] for output in outputs]
+        matched_xy = outputs[-1][1]
 
-    return indices, values, matched_x, matched_y
+    return indices, values, matched_xy
+
+
+def extract_time_series(var_file_dict, target_x, target_y, grid_info=None, workers=1):
+    """Extract value at (target_x, target_y) for each time step.
+    
+    Returns (time_step_indices, values, matched_x, matched_y)
+    """
+    indices, values, matched_xy = extract_time_series_points(var_file_dict, [(target_x, target_y)], grid_info=grid_info, workers=workers)
+    return indices, [val[0] for val in values], matched_xy[0][0], matched_xy[0][1]
+
+
+def load_points_file(points_path):
+    """Load the points from a CSV file with "x, y" or "x, y, name" in each line (a header line is skipped).
+    
+    Returns (points, names)
+    """
+    points = []
+    names = []
+    with open(points_path, 'r') as f:
+        for line in f:
+            parts = [part.strip() for part in line.split(',')]
+            if len(parts) < 2:
+                continue
+            try:
+                point = (float(parts[0]), float(parts[1]))
+            except ValueError:
+                continue  # header
+            points.append(point)
+            names.append(parts[2] if len(parts) > 2 and parts[2] else f"P{len(points)}")
+    return points, names
+
+
+def export_time_series_csv(output_path, time_indices, time_values, values, names, matched_xy):
+    """Export the time series of one variable at many points (one column per point)."""
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["time_step", "time"] + names)
+        writer.writerow(["x", ""] + [mx for (mx, _) in matched_xy])
+        writer.writerow(["y", ""] + [my for (_, my) in matched_xy])
+        for ti, val in zip(time_indices, values):
+            writer.writerow([ti, time_values[ti] if ti < len(time_values) else ""] + list(val))
+    print(f"Time series saved to: {output_path}")
 
 
 def plot_time_graph(plot_data, time_values, time_unit_label, target_x, target_y, 
-                    matched_x, matched_y, output_path, open_html=False):
+                    matched_x, matched_y, output_path, open_html=False, title=None):
     """Generate a plotly interactive line graph of variable(s) vs time.
     
     Args:
@@ -246,6 +455,7 @@ def plot_time_graph(plot_data, time_values, time_unit_label, target_x, target_y,
         matched_x, matched_y: actual grid coordinates used
         output_path: path for the output HTML file
         open_html: whether to open in browser
+        title: plot title (default: "Results vs Time at (matched_x, matched_y)")
     """
     traces = []
     color_list = [
@@ -293,8 +503,11 @@ def plot_time_graph(plot_data, time_values, time_unit_label, target_x, target_y,
     if matched_x != target_x or matched_y != target_y:
         coord_info += f"  [requested ({target_x}, {target_y})]"
 
+    if title is None:
+        title = f"Results vs Time {coord_info}"
+
     layout = go.Layout(
-        title=f"Results vs Time {coord_info}",
+        title=title,
         paper_bgcolor='rgba(255,255,255,1)',
         plot_bgcolor='rgba(255,255,255,1)',
         xaxis=dict(
@@ -333,15 +546,27 @@ def main():
         epilog=__doc__
     )
     parser.add_argument("results_json", help="Path to the 'all_input_results.json' file")
-    parser.add_argument("x", type=float, help="X coordinate of the grid point")
-    parser.add_argument("y", type=float, help="Y coordinate of the grid point")
+    parser.add_argument("x", nargs='?', help="X coordinate of the grid point (omitted with --points)")
+    parser.add_argument("y", nargs='?', help="Y coordinate of the grid point (omitted with --points)")
     parser.add_argument("variables", nargs='*', help="Variable name(s) to plot. If omitted, lists available variables.")
     parser.add_argument("--iteration", "-i", type=int, default=1, help="Monte Carlo iteration number (default: 1)")
-    parser.add_argument("--output", "-o", type=str, default=None, help="Output HTML file path (auto-generated if not specified)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Output HTML file path (auto-generated if not specified); output folder with --points")
     parser.add_argument("--open", action="store_true", help="Open the plot in a web browser")
+    parser.add_argument("--points", "-p", type=str, default=None, help="CSV file of points (x, y[, name] per line) - exports the time series of each variable at every point")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Number of processes reading the time steps (default: 1)")
 
     args = parser.parse_args()
 
+    # with --points, the positional arguments after the JSON file are the variable names
+    if args.points:
+        args.variables = [v for v in (args.x, args.y) if v is not None] + args.variables
+    else:
+        try:
+            args.x, args.y = float(args.x), float(args.y)
+        except (TypeError, ValueError):
+            print("Error: X and Y coordinates of the grid point (or --points) must be specified.")
+            sys.exit(1)
+
     # Load JSON
     if not os.path.exists(args.results_json):
         print(f"Error: Results JSON file not found: {args.results_json}")
@@ -395,6 +620,42 @@ def main():
 
     # Compute time values
     time_values, time_unit_label, dt_seconds, convert_time = compute_time_values(results_dict)
+    grid_info = get_grid_info(results_dict, iteration_str)
+
+    # Time series at many points - one CSV file and plot per variable
+    if args.points:
+        if not os.path.exists(args.points):
+            print(f"Error: Points file not found: {args.points}")
+            sys.exit(1)
+        points, point_names = load_points_file(args.points)
+        if not points:
+            print(f"Error: No points found in {args.points}")
+            sys.exit(1)
+
+        output_dir = args.output if args.output else os.path.dirname(args.results_json)
+        os.makedirs(output_dir or ".", exist_ok=True)
+        points_name = os.path.splitext(os.path.basename(args.points))[0]
+
+        for var_name in requested_vars:
+            source_type, var_file_dict = all_vars[var_name]
+            print(f"Extracting '{var_name}' at {len(points)} points...")
+
+            time_indices, values, matched_xy = extract_time_series_points(var_file_dict, points, grid_info=grid_info, workers=args.workers)
+
+            if len(values) == 0:
+                print(f"  Warning: No data found for '{var_name}'. Skipping.")
+                continue
+
+            export_time_series_csv(os.path.join(output_dir, f"time_series_{points_name}_{var_name}.csv"), time_indices, time_values, values, point_names, matched_xy)
+
+            plot_data = [(name, time_indices, [val[p] for val in values]) for p, name in enumerate(point_names)]
+            plot_time_graph(
+                plot_data, time_values, time_unit_label,
+                None, None, None, None,
+                os.path.join(output_dir, f"time_graph_{points_name}_{var_name}.html"), open_html=args.open,
+                title=f"{var_name} vs Time at {len(points)} points ({points_name})"
+            )
+        return
 
     # Extract time series for each variable
     plot_data = []
@@ -405,7 +666,7 @@ def main():
         source_type, var_file_dict = all_vars[var_name]
         print(f"Extracting '{var_name}' at ({args.x}, {args.y})...")
 
-        time_indices, values, matched_x, matched_y = extract_time_series(var_file_dict, args.x, args.y)
+        time_indices, values, matched_x, matched_y = extract_time_series(var_file_dict, args.x, args.y, grid_info=grid_info, workers=args.workers)
 
         if len(values) == 0:
             print(f"  Warning: No data found for '{var_name}'. Skipping.")
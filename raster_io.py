@@ -0,0 +1,312 @@
+"""
+Reading of ESRI ASCII grid (.asc) raster files shared by 3DPLS and 3DTSP.
+
+The header is parsed once and the numeric block is bulk-loaded into a numpy array,
+instead of splitting and converting each value in Python.
+Optionally, a binary sidecar (<file>.cache.npz) is written next to the ASCII grid and
+reused by the subsequent reads as long as the size and modification time of the ASCII grid are unchanged.
+Grids larger than memory can be cut into windows and stitched back row by row.
+"""
+
+import json
+import os
+from decimal import Decimal
+import numpy as np
+
+## Header keywords of the ESRI ASCII grid format
+ASCII_GRID_KEYS = ("ncols", "nrows", "xllcorner", "xllcenter", "yllcorner", "yllcenter", "cellsize", "nodata_value")
+
+## Write and reuse the binary sidecars (see set_raster_cache)
+RASTER_CACHE_APPLY = False
+
+
+def set_raster_cache(apply=False):
+    """
+    Set whether the binary sidecars of the ASCII grids are written and reused by default.
+
+    Parameters
+    ----------
+    apply : bool
+        If True, read_ascii_grid writes <file>.cache.npz after parsing an ASCII grid and
+        reads the sidecar instead of the ASCII grid afterwards. The default is False.
+    """
+    global RASTER_CACHE_APPLY
+    RASTER_CACHE_APPLY = bool(apply)
+
+
+def read_ascii_grid_header(file_name, header_lines=None):
+    """
+    Read the header of an ASCII grid.
+
+    Parameters
+    ----------
+    file_name : str
+        Path of the ASCII grid.
+    header_lines : int
+        Number of header lines. If None, the leading lines starting with a header keyword are used.
+
+    Returns
+    -------
+    header : dict
+        Header values with lower case keywords (ncols and nrows as int, the rest as float)
+        and "header_lines", the number of lines before the numeric block.
+    """
+    header = {}
+    n_lines = 0
+    with open(file_name, "r") as f:
+        for line in f:
+            parts = line.split()
+            if header_lines is None:
+                if len(parts) < 2 or parts[0].lower() not in ASCII_GRID_KEYS:
+                    break
+            elif n_lines >= header_lines:
+                break
+            if len(parts) >= 2:
+                header[parts[0].lower()] = parts[1]
+            n_lines += 1
+
+    for key in list(header.keys()):
+        header[key] = int(float(header[key])) if key in ("ncols", "nrows") else float(header[key])
+    header["header_lines"] = n_lines
+    return header
+
+
+def _cache_file_name(file_name):
+    return file_name + ".cache.npz"
+
+
+def _source_stamp(file_name):
+    stat = os.stat(file_name)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _read_cache(file_name, dtype):
+    cache_name = _cache_file_name(file_name)
+    if not os.path.exists(cache_name):
+        return None
+    try:
+        with np.load(cache_name, allow_pickle=False) as cache:
+            if not np.array_equal(cache["source_stamp"], _source_stamp(file_name)):
+                return None
+            ## sidecar written at a lower precision (e.g. float32) than requested - parse the ASCII grid again
+            if np.dtype(dtype).kind == "f" and cache["data"].dtype.itemsize < np.dtype(dtype).itemsize:
+                return None
+            return cache["data"].astype(dtype, copy=False), json.loads(str(cache["header"]))
+    except (OSError, ValueError, KeyError):
+        return None  ## corrupted or older sidecar - parse the ASCII grid again
+
+
+def _write_cache(file_name, data, header):
+    cache_name = _cache_file_name(file_name)
+    ## write to a temporary file first so that an interrupted run does not leave a partial sidecar
+    temp_name = cache_name + ".tmp.npz"
+    try:
+        np.savez(temp_name, data=data, header=np.array(json.dumps(header)), source_stamp=_source_stamp(file_name))
+        os.replace(temp_name, cache_name)
+    except OSError:
+        ## read-only input folder - the sidecar is only an optimization
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+
+
+def read_ascii_grid(file_name, header_lines=None, dtype=float, cache=None):
+    """
+    Read an ASCII grid into a 2D numpy array.
+
+    Parameters
+    ----------
+    file_name : str
+        Path of the ASCII grid.
+    header_lines : int
+        Number of header lines. If None, detected from the header keywords.
+    dtype : data-type
+        Data type of the returned array. The default is float.
+    cache : bool
+        Write and reuse the binary sidecar <file>.cache.npz (stored in dtype). If None, the setting of set_raster_cache is used.
+
+    Returns
+    -------
+    data : numpy array
+        Values of the grid (nrows, ncols); the first row is the northernmost row, as in the file.
+    header : dict
+        Header values (see read_ascii_grid_header).
+    """
+    if cache is None:
+        cache = RASTER_CACHE_APPLY
+
+    if cache:
+        cached = _read_cache(file_name, dtype)
+        if cached is not None:
+            return cached
+
+    header = read_ascii_grid_header(file_name, header_lines)
+
+    ## Bulk-load the numeric block (the rows may be wrapped over several lines)
+    with open(file_name, "r") as f:
+        for _ in range(header["header_lines"]):
+            f.readline()
+        values = np.fromstring(f.read(), dtype=float, sep=" ")
+
+    if "ncols" in header and "nrows" in header:
+        if values.size != header["ncols"] * header["nrows"]:
+            raise ValueError(
+                "%s: %d values read, expected nrows x ncols = %d x %d" % (file_name, values.size, header["nrows"], header["ncols"])
+            )
+        data = values.reshape(header["nrows"], header["ncols"])
+    else:
+        ## No dimensions in the header - keep the line layout of the file
+        data = np.loadtxt(file_name, skiprows=header["header_lines"], ndmin=2)
+    data = data.astype(dtype, copy=False)
+
+    if cache:
+        _write_cache(file_name, data, header)
+
+    return data, header
+
+
+def _read_header_text(file_name):
+    ## header keywords and values as written in the file (the values are kept as text so that windows do not round the coordinates)
+    header_text = []
+    with open(file_name, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 2 or parts[0].lower() not in ASCII_GRID_KEYS:
+                break
+            header_text.append((parts[0].lower(), parts[1]))
+    return header_text
+
+
+def _write_header_text(f, header_text):
+    f.write("".join("%s %s\n" % (key, value) for (key, value) in header_text))
+
+
+def iter_ascii_grid_rows(file_name, header=None):
+    """
+    Iterate over the rows of an ASCII grid without loading the grid.
+
+    Parameters
+    ----------
+    file_name : str
+        Path of the ASCII grid.
+    header : dict
+        Header of the grid (see read_ascii_grid_header). If None, it is read from the file.
+
+    Yields
+    ------
+    row : list of str
+        Values of each grid row (ncols) as written in the file, from the northernmost row.
+    """
+    if header is None:
+        header = read_ascii_grid_header(file_name)
+    ncols = header["ncols"]
+
+    with open(file_name, "r") as f:
+        for _ in range(header["header_lines"]):
+            f.readline()
+
+        ## the rows may be wrapped over several lines
+        row = []
+        for line in f:
+            row.extend(line.split())
+            while len(row) >= ncols:
+                yield row[:ncols]
+                row = row[ncols:]
+
+
+def split_ascii_grid(file_name, windows, out_file_names):
+    """
+    Cut an ASCII grid into windows in a single pass over its rows.
+
+    Parameters
+    ----------
+    file_name : str
+        Path of the ASCII grid.
+    windows : list of tuple
+        (row_min, row_max, col_min, col_max) of each window (row 0 is the northernmost row, the maximums are excluded).
+    out_file_names : list of str
+        Path of the ASCII grid written for each window. The values are copied as written in file_name.
+    """
+    header = read_ascii_grid_header(file_name)
+    header_text = _read_header_text(file_name)
+    corner_x = "xllcorner" if "xllcorner" in header else "xllcenter"
+    corner_y = "yllcorner" if "yllcorner" in header else "yllcenter"
+    values = dict(header_text)
+
+    out_files = []
+    try:
+        for (row_min, row_max, col_min, col_max), out_file_name in zip(windows, out_file_names):
+            out_file = open(out_file_name, "w")
+            out_files.append(out_file)
+
+            ## lower left corner of the window - decimal arithmetic keeps the coordinates of the grid
+            window_values = dict(values)
+            window_values["ncols"] = str(col_max - col_min)
+            window_values["nrows"] = str(row_max - row_min)
+            window_values[corner_x] = str(Decimal(values[corner_x]) + col_min * Decimal(values["cellsize"]))
+            window_values[corner_y] = str(Decimal(values[corner_y]) + (header["nrows"] - row_max) * Decimal(values["cellsize"]))
+            _write_header_text(out_file, [(key, window_values[key]) for (key, _) in header_text])
+
+        for row_idx, row in enumerate(iter_ascii_grid_rows(file_name, header)):
+            for (row_min, row_max, col_min, col_max), out_file in zip(windows, out_files):
+                if row_min <= row_idx < row_max:
+                    out_file.write(" ".join(row[col_min:col_max]) + "\n")
+    finally:
+        for out_file in out_files:
+            out_file.close()
+
+
+def merge_ascii_grid(file_names, windows, interiors, out_file_name):
+    """
+    Stitch the interiors of windowed ASCII grids (see split_ascii_grid) into a single ASCII grid.
+
+    Parameters
+    ----------
+    file_names : list of str
+        Path of the ASCII grid of each window.
+    windows : list of tuple
+        (row_min, row_max, col_min, col_max) of each window in the stitched grid.
+    interiors : list of tuple
+        (row_min, row_max, col_min, col_max) of the part of each window copied into the stitched grid.
+        The interiors must cover the stitched grid without overlapping.
+    out_file_name : str
+        Path of the stitched ASCII grid. Only one row of each window is held in memory.
+    """
+    nrows = max(interior[1] for interior in interiors)
+    ncols = max(interior[3] for interior in interiors)
+
+    ## header of the stitched grid from the lower left window
+    lower_left = min(range(len(windows)), key=lambda n: (windows[n][2], -windows[n][1]))
+    header = read_ascii_grid_header(file_names[lower_left])
+    header_text = _read_header_text(file_names[lower_left])
+    corner_x = "xllcorner" if "xllcorner" in header else "xllcenter"
+    corner_y = "yllcorner" if "yllcorner" in header else "yllcenter"
+    values = dict(header_text)
+    values["ncols"] = str(ncols)
+    values["nrows"] = str(nrows)
+    values[corner_x] = str(Decimal(values[corner_x]) - windows[lower_left][2] * Decimal(values["cellsize"]))
+    values[corner_y] = str(Decimal(values[corner_y]) - (nrows - windows[lower_left][1]) * Decimal(values["cellsize"]))
+
+    with open(out_file_name, "w") as out_file:
+        _write_header_text(out_file, [(key, values[key]) for (key, _) in header_text])
+
+        ## windows sharing the same interior rows are read together, from west to east
+        for band_row_min in sorted(set(interior[0] for interior in interiors)):
+            band = sorted([n for n in range(len(interiors)) if interiors[n][0] == band_row_min], key=lambda n: interiors[n][2])
+            band_row_max = interiors[band[0]][1]
+
+            band_rows = []
+            for n in band:
+                rows = iter_ascii_grid_rows(file_names[n])
+                for _ in range(interiors[n][0] - windows[n][0]):
+                    next(rows)
+                band_rows.append(rows)
+
+            for _ in range(band_row_max - band_row_min):
+                row = []
+                for n, rows in zip(band, band_rows):
+                    offset = interiors[n][2] - windows[n][2]
+                    row.extend(next(rows)[offset:offset + interiors[n][3] - interiors[n][2]])
+                out_file.write(" ".join(row) + "\n")
+
+            for rows in band_rows:
+                rows.close()